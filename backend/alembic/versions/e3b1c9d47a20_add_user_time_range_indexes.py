@@ -0,0 +1,107 @@
+"""add user time-range indexes
+
+Revision ID: e3b1c9d47a20
+Revises: 12a0f296ebc2
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b1c9d47a20'
+down_revision: Union[str, None] = '12a0f296ebc2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Composite (user_id, date) indexes matching the per-user range filters."""
+
+    # food_logs: queries filter on meal_date (idx_food_logs_user_date is on created_at)
+    op.create_index(
+        'ix_food_logs_user_meal_date',
+        'food_logs',
+        ['user_id', 'meal_date'],
+        postgresql_using='btree'
+    )
+    # Leading column of the composite index
+    op.drop_index('ix_food_logs_user_id', table_name='food_logs')
+
+    # activity_logs: covering index for SUM(duration_minutes) / SUM(calories_burned)
+    op.create_index(
+        'ix_activity_logs_user_activity_date',
+        'activity_logs',
+        ['user_id', 'activity_date'],
+        postgresql_using='btree',
+        postgresql_include=['duration_minutes', 'calories_burned']
+    )
+    op.drop_index('idx_activities_user_date', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_user_id', table_name='activity_logs')
+
+    # weight_logs: covering index for the weight chart
+    op.create_index(
+        'ix_weight_logs_user_log_date',
+        'weight_logs',
+        ['user_id', 'log_date'],
+        postgresql_using='btree',
+        postgresql_include=['weight_kg']
+    )
+    op.drop_index('idx_weight_logs_user_date', table_name='weight_logs')
+    op.drop_index('ix_weight_logs_user_id', table_name='weight_logs')
+
+    # daily_nutrition: one row per user and day (required for upserts)
+    # Keep the most recent row if duplicates were created before the constraint
+    op.execute(
+        """
+        DELETE FROM daily_nutrition
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM daily_nutrition GROUP BY user_id, date
+        )
+        """
+    )
+    op.drop_index('idx_daily_nutrition_user_date', table_name='daily_nutrition')
+    op.drop_index('ix_daily_nutrition_user_date', table_name='daily_nutrition')
+    with op.batch_alter_table('daily_nutrition') as batch_op:
+        batch_op.create_unique_constraint('uq_daily_nutrition_user_date', ['user_id', 'date'])
+
+    # usage_tracking: already covered by the unique_user_date constraint
+    # food_items: food_log_id already indexed (idx_food_items_log_id)
+
+
+def downgrade() -> None:
+    """Restore the previous indexes."""
+
+    with op.batch_alter_table('daily_nutrition') as batch_op:
+        batch_op.drop_constraint('uq_daily_nutrition_user_date', type_='unique')
+    op.create_index('ix_daily_nutrition_user_date', 'daily_nutrition', ['user_id', 'date'], unique=True)
+    op.create_index(
+        'idx_daily_nutrition_user_date',
+        'daily_nutrition',
+        ['user_id', sa.text('date DESC')],
+        postgresql_using='btree'
+    )
+
+    op.create_index('ix_weight_logs_user_id', 'weight_logs', ['user_id'], unique=False)
+    op.create_index(
+        'idx_weight_logs_user_date',
+        'weight_logs',
+        ['user_id', sa.text('log_date DESC')],
+        postgresql_using='btree'
+    )
+    op.drop_index('ix_weight_logs_user_log_date', table_name='weight_logs')
+
+    op.create_index('ix_activity_logs_user_id', 'activity_logs', ['user_id'], unique=False)
+    op.create_index(
+        'idx_activities_user_date',
+        'activity_logs',
+        ['user_id', sa.text('activity_date DESC')],
+        postgresql_using='btree'
+    )
+    op.drop_index('ix_activity_logs_user_activity_date', table_name='activity_logs')
+
+    op.create_index('ix_food_logs_user_id', 'food_logs', ['user_id'], unique=False)
+    op.drop_index('ix_food_logs_user_meal_date', table_name='food_logs')
@@ -4,6 +4,8 @@ from pydantic import BaseModel, Field
 import structlog
 
 from app.llm.client import get_hf_client, HuggingFaceClient
+from app.llm.governor import LLMPriority, get_llm_governor
+from app.llm.model_health import get_model_health
 from app.llm.models import ModelInfo, ModelCapability, get_primary_models, get_fallback_model
 from app.i18n import get_translator, Translator, DEFAULT_LANGUAGE
 
@@ -31,6 +33,11 @@ class BaseAgent(ABC, Generic[InputT, OutputT]):
     name: str = "BaseAgent"
     capability: ModelCapability = ModelCapability.PROFILING
     confidence_threshold: float = 0.7
+    # Réponses LLM mises en cache (prompt identique => même réponse).
+    # À laisser False pour les générations où la variété est attendue.
+    cacheable: bool = False
+    # Priorité des appels dans le gouverneur LLM (file d'attente par modèle)
+    priority: LLMPriority = LLMPriority.COACH
 
     def __init__(self, client: HuggingFaceClient | None = None, language: str = DEFAULT_LANGUAGE):
         self.client = client or get_hf_client()
@@ -39,6 +46,11 @@ class BaseAgent(ABC, Generic[InputT, OutputT]):
         self.language = language
         self.translator = get_translator(language)
 
+    @property
+    def cache_namespace(self) -> str | None:
+        """Namespace du cache de réponses LLM (None si l'agent n'est pas cacheable)."""
+        return self.capability.value if self.cacheable else None
+
     def t(self, key: str, **kwargs: Any) -> str:
         """Shortcut for translation."""
         return self.translator.get(key, **kwargs)
@@ -73,7 +85,8 @@ class BaseAgent(ABC, Generic[InputT, OutputT]):
     ) -> AgentResponse:
         """Traitement principal avec un modèle spécifique."""
         if model is None:
-            model = self._models[0] if self._models else self._fallback
+            routed = await self.route_models()
+            model = routed[0] if routed else None
 
         if model is None:
             raise ValueError(f"Aucun modèle disponible pour {self.capability}")
@@ -93,6 +106,8 @@ class BaseAgent(ABC, Generic[InputT, OutputT]):
                 prompt=prompt,
                 max_new_tokens=model.max_tokens,
                 temperature=model.temperature,
+                cache_namespace=self.cache_namespace,
+                priority=self.priority,
             )
 
             result = self.parse_response(raw_response, input_data)
@@ -132,10 +147,30 @@ class BaseAgent(ABC, Generic[InputT, OutputT]):
             )
             return await self.fallback(input_data)
 
+    async def route_models(self) -> list[ModelInfo]:
+        """Modèles de la capacité, du plus rapide en bonne santé au fallback (cf. model_health)."""
+        models = self._models + ([self._fallback] if self._fallback else [])
+        return await get_model_health().route(models)
+
+    async def pick_model_id(self, preferred: str) -> str:
+        """Modèle préféré si son circuit est fermé, sinon le meilleur modèle routé de la capacité."""
+        if not await get_model_health().is_open(preferred):
+            return preferred
+        routed = await self.route_models()
+        return routed[0].id if routed else preferred
+
     async def fallback(self, input_data: InputT) -> AgentResponse:
         """Comportement de fallback."""
-        if self._fallback is None:
-            # Fallback déterministe si pas de modèle de fallback
+        shedding = get_llm_governor().is_shedding(self.priority)
+        breaker_open = self._fallback is not None and await get_model_health().is_open(self._fallback.id)
+        if self._fallback is None or shedding or breaker_open:
+            # Fallback déterministe si pas de modèle de fallback, si le gouverneur
+            # LLM déleste (le modèle de fallback attendrait aussi) ou si le circuit
+            # du modèle de fallback est ouvert
+            if shedding:
+                logger.warning("agent_load_shed_fallback", agent=self.name)
+            elif breaker_open:
+                logger.warning("agent_circuit_open_fallback", agent=self.name, model=self._fallback.id)
             result = self.deterministic_fallback(input_data)
             return AgentResponse(
                 result=result,
@@ -142,6 +142,7 @@ class CoachAgent(BaseAgent[CoachInput, CoachResponse]):
     name = "CoachAgent"
     capability = ModelCapability.COACHING
     confidence_threshold = 0.5
+    cacheable = True
 
     async def process(self, input_data: CoachInput, model=None) -> AgentResponse:
         """
@@ -263,6 +264,7 @@ class CoachAgent(BaseAgent[CoachInput, CoachResponse]):
                     model_id=model_id,
                     max_tokens=800,
                     temperature=0.7,
+                    cache_namespace=self.cache_namespace,
                 )
 
                 if not raw_response:
@@ -334,6 +336,7 @@ Réponds UNIQUEMENT avec le JSON, sans commentaires."""
                 model_id=VALIDATION_MODEL,
                 max_tokens=600,
                 temperature=0.3,  # Plus déterministe pour validation
+                cache_namespace=self.cache_namespace,
             )
 
             if not raw_response:
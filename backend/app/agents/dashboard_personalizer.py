@@ -9,6 +9,7 @@ import structlog
 
 from app.agents.base import BaseAgent, AgentResponse
 from app.agents.consensus import ConsensusValidator
+from app.llm.governor import LLMPriority
 from app.llm.models import ModelCapability
 from app.models.profile import DietType, Goal as ProfileGoal, ActivityLevel
 from app.i18n import DEFAULT_LANGUAGE
@@ -251,6 +252,8 @@ class DashboardPersonalizerAgent(BaseAgent[PersonalizerInput, PersonalizationRes
     name = "DashboardPersonalizerAgent"
     capability = ModelCapability.COACHING
     confidence_threshold = 0.5
+    cacheable = True
+    priority = LLMPriority.BATCH  # Enrichissement optionnel, calculé en tâche de fond
 
     def build_prompt(self, input_data: PersonalizerInput) -> str:
         """Non utilisé - cet agent utilise une analyse déterministe."""
@@ -648,6 +651,8 @@ class DashboardPersonalizerAgent(BaseAgent[PersonalizerInput, PersonalizationRes
                 model_id=PERSONALIZER_MODELS[0],
                 max_tokens=500,
                 temperature=0.7,
+                cache_namespace=self.cache_namespace,
+                priority=self.priority,
             )
 
             if not raw_response:
@@ -9,6 +9,7 @@ import structlog
 
 from app.agents.base import BaseAgent, AgentResponse
 from app.agents.consensus import ConsensusValidator
+from app.llm.governor import LLMPriority
 from app.llm.models import ModelCapability
 from app.models.profile import DietType, Goal
 from app.i18n import DEFAULT_LANGUAGE
@@ -90,6 +91,8 @@ class MealPlanAgent(BaseAgent[MealPlanInput, MealPlanResponse]):
     name = "MealPlanAgent"
     capability = ModelCapability.RECIPE_GENERATION
     confidence_threshold = 0.6
+    cacheable = False  # Variété attendue à chaque génération
+    priority = LLMPriority.BATCH  # Délesté en premier sous charge (jour de fallback)
 
     async def process(self, input_data: MealPlanInput, model=None) -> AgentResponse:
         """
@@ -193,6 +196,7 @@ class MealPlanAgent(BaseAgent[MealPlanInput, MealPlanResponse]):
                     model_id=model_id,
                     max_tokens=1500,
                     temperature=0.7,
+                    priority=self.priority,
                 )
 
                 if not raw_response:
@@ -37,6 +37,7 @@ class NutritionAgent(BaseAgent[NutritionEstimationInput, NutritionData]):
     name = "NutritionAgent"
     capability = ModelCapability.NUTRITION_ESTIMATION
     confidence_threshold = 0.6
+    cacheable = True
 
     def build_prompt(self, input_data: NutritionEstimationInput) -> str:
         """Construit le prompt pour estimation nutritionnelle."""
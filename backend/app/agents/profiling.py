@@ -74,6 +74,7 @@ class ProfilingAgent(BaseAgent[ProfileInput, ProfileAnalysis]):
     name = "ProfilingAgent"
     capability = ModelCapability.PROFILING
     confidence_threshold = 0.7
+    cacheable = True
     text_model = "Qwen/Qwen2.5-72B-Instruct"  # Qwen 72B -> Mistral 7B (API gratuite)
 
     def __init__(self, *args, **kwargs):
@@ -90,19 +91,22 @@ class ProfilingAgent(BaseAgent[ProfileInput, ProfileAnalysis]):
         logger = structlog.get_logger()
 
         prompt = self.build_prompt(input_data)
+        # Modèle préféré, sauf si son circuit est ouvert (cf. model_health)
+        model_id = await self.pick_model_id(self.text_model)
 
         logger.info(
             "profiling_agent_processing",
             agent=self.name,
-            model=self.text_model,
+            model=model_id,
         )
 
         try:
             raw_response = await self.client.text_chat(
                 prompt=prompt,
-                model_id=self.text_model,
+                model_id=model_id,
                 max_tokens=500,
                 temperature=0.5,
+                cache_namespace=self.cache_namespace,
             )
 
             if not raw_response:
@@ -115,7 +119,7 @@ class ProfilingAgent(BaseAgent[ProfileInput, ProfileAnalysis]):
             logger.info(
                 "profiling_agent_response",
                 agent=self.name,
-                model=self.text_model,
+                model=model_id,
                 confidence=confidence,
             )
 
@@ -131,7 +135,7 @@ class ProfilingAgent(BaseAgent[ProfileInput, ProfileAnalysis]):
             return AgentResponse(
                 result=result,
                 confidence=confidence,
-                model_used=self.text_model,
+                model_used=model_id,
                 reasoning="Profile analysis completed",
                 used_fallback=False,
             )
@@ -140,7 +144,7 @@ class ProfilingAgent(BaseAgent[ProfileInput, ProfileAnalysis]):
             logger.error(
                 "profiling_agent_error",
                 agent=self.name,
-                model=self.text_model,
+                model=model_id,
                 error=str(e),
             )
             return await self.fallback(input_data)
@@ -257,6 +257,7 @@ class RecipeAgent(BaseAgent[RecipeInput, Recipe]):
     name = "RecipeAgent"
     capability = ModelCapability.RECIPE_GENERATION
     confidence_threshold = 0.6
+    cacheable = False  # Variété attendue à chaque génération
 
     async def process(self, input_data: RecipeInput, model=None) -> AgentResponse:
         """
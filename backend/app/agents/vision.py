@@ -1,9 +1,10 @@
 import json
 import re
 import base64
-from typing import Any
+from typing import Any, AsyncIterator
 
 from app.agents.base import BaseAgent, AgentResponse
+from app.llm.governor import LLMPriority
 from app.llm.models import ModelCapability
 from app.i18n import DEFAULT_LANGUAGE, get_translator
 
@@ -148,6 +149,19 @@ class FoodAnalysis:
             self.total_carbs = total_carbs
             self.total_fat = total_fat
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "FoodAnalysis":
+        """Reconstruit une analyse sérialisée par to_dict (sans rapport de santé)."""
+        return cls(
+            items=[FoodItem(**item) for item in data.get("items", [])],
+            meal_type=data.get("meal_type"),
+            total_calories=data.get("total_calories", 0),
+            total_protein=data.get("total_protein", 0),
+            total_carbs=data.get("total_carbs", 0),
+            total_fat=data.get("total_fat", 0),
+            description=data.get("description", ""),
+        )
+
     def to_dict(self) -> dict:
         return {
             "items": [item.to_dict() for item in self.items],
@@ -179,6 +193,8 @@ class VisionAgent(BaseAgent[VisionInput, FoodAnalysis]):
     name = "VisionAgent"
     capability = ModelCapability.FOOD_DETECTION
     confidence_threshold = 0.5
+    cacheable = True
+    priority = LLMPriority.VISION
     vlm_model = "Qwen/Qwen2.5-VL-72B-Instruct"  # Powerful vision model
 
     # Keywords pour détecter les plats complexes nécessitant dual-pass
@@ -201,20 +217,36 @@ class VisionAgent(BaseAgent[VisionInput, FoodAnalysis]):
         Traitement spécifique pour la vision utilisant l'API VLM.
         Override la méthode de base pour utiliser vision_chat.
 
+        Renvoie le résultat de la dernière étape de process_stages.
+        """
+        response = None
+        async for _stage, response in self.process_stages(input_data):
+            pass
+        return response
+
+    async def process_stages(self, input_data: VisionInput) -> AsyncIterator[tuple[str, AgentResponse]]:
+        """
+        Pipeline VLM par étapes, chaque résultat intermédiaire est produit dès qu'il est prêt.
+
         DUAL-PASS pour plats complexes:
-        1. Première passe: Analyse standard
+        1. Première passe: Analyse standard -> ("detected", réponse)
         2. Si plat complexe détecté: Deuxième passe avec prompt de décomposition
+           -> ("decomposed", réponse) si la décomposition est meilleure
+
+        En cas d'échec de la première passe, seule l'étape ("detected", fallback) est produite.
         """
         import structlog
 
         logger = structlog.get_logger()
 
         prompt = self.build_prompt(input_data)
+        # Modèle VLM préféré, sauf si son circuit est ouvert (cf. model_health)
+        model_id = await self.pick_model_id(self.vlm_model)
 
         logger.info(
             "vision_agent_processing",
             agent=self.name,
-            model=self.vlm_model,
+            model=model_id,
         )
 
         try:
@@ -222,66 +254,77 @@ class VisionAgent(BaseAgent[VisionInput, FoodAnalysis]):
             raw_response = await self.client.vision_chat(
                 image_base64=input_data.image_base64,
                 prompt=prompt,
-                model_id=self.vlm_model,
+                model_id=model_id,
                 max_tokens=1200,
+                cache_namespace=self.cache_namespace,
+                image_type=input_data.image_type,
             )
 
             if not raw_response:
                 logger.warning("vision_empty_response")
-                return await self.fallback(input_data)
+                yield "detected", await self.fallback(input_data)
+                return
 
             result = self.parse_response(raw_response, input_data)
+            confidence = self.calculate_confidence(result, raw_response)
 
-            # === DÉTECTION PLAT COMPLEXE ===
-            is_complex = self._is_complex_dish(result)
-
-            if is_complex:
-                logger.info(
-                    "complex_dish_detected",
-                    description=result.description[:100] if result.description else "N/A",
-                    items_count=len(result.items),
-                )
-
-                # === DEUXIÈME PASSE: Décomposition ===
-                decomposition_result = await self._dual_pass_decomposition(
-                    input_data, result, logger
-                )
-
-                if decomposition_result:
-                    result = decomposition_result
-                    logger.info(
-                        "dual_pass_completed",
-                        items_count=len(result.items),
-                        total_calories=result.total_calories,
-                    )
+        except Exception as e:
+            logger.error(
+                "vision_agent_error",
+                agent=self.name,
+                model=model_id,
+                error=str(e),
+            )
+            yield "detected", await self.fallback(input_data)
+            return
+
+        yield "detected", AgentResponse(
+            result=result,
+            confidence=confidence,
+            model_used=model_id,
+            reasoning=result.description,
+            used_fallback=False,
+        )
 
-            confidence = self.calculate_confidence(result, raw_response)
+        # === DÉTECTION PLAT COMPLEXE ===
+        is_complex = self._is_complex_dish(result)
 
+        if is_complex:
             logger.info(
-                "vision_agent_response",
-                agent=self.name,
-                model=self.vlm_model,
-                confidence=confidence,
+                "complex_dish_detected",
+                description=result.description[:100] if result.description else "N/A",
                 items_count=len(result.items),
-                used_dual_pass=is_complex,
             )
 
-            return AgentResponse(
-                result=result,
-                confidence=confidence,
-                model_used=self.vlm_model,
-                reasoning=result.description,
-                used_fallback=False,
+            # === DEUXIÈME PASSE: Décomposition ===
+            decomposition_result = await self._dual_pass_decomposition(
+                input_data, result, logger, model_id
             )
 
-        except Exception as e:
-            logger.error(
-                "vision_agent_error",
-                agent=self.name,
-                model=self.vlm_model,
-                error=str(e),
-            )
-            return await self.fallback(input_data)
+            if decomposition_result:
+                result = decomposition_result
+                confidence = self.calculate_confidence(result, raw_response)
+                logger.info(
+                    "dual_pass_completed",
+                    items_count=len(result.items),
+                    total_calories=result.total_calories,
+                )
+                yield "decomposed", AgentResponse(
+                    result=result,
+                    confidence=confidence,
+                    model_used=model_id,
+                    reasoning=result.description,
+                    used_fallback=False,
+                )
+
+        logger.info(
+            "vision_agent_response",
+            agent=self.name,
+            model=model_id,
+            confidence=confidence,
+            items_count=len(result.items),
+            used_dual_pass=is_complex,
+        )
 
     def _is_complex_dish(self, analysis: FoodAnalysis) -> bool:
         """
@@ -317,7 +360,7 @@ class VisionAgent(BaseAgent[VisionInput, FoodAnalysis]):
         return False
 
     async def _dual_pass_decomposition(
-        self, input_data: VisionInput, first_pass: FoodAnalysis, logger
+        self, input_data: VisionInput, first_pass: FoodAnalysis, logger, model_id: str
     ) -> FoodAnalysis | None:
         """
         Deuxième passe pour décomposer un plat complexe en composants.
@@ -384,8 +427,10 @@ IMPORTANT: List at least 2-4 separate components. DO NOT merge everything into o
             decomposition_response = await self.client.vision_chat(
                 image_base64=input_data.image_base64,
                 prompt=decomposition_prompt,
-                model_id=self.vlm_model,
+                model_id=model_id,
                 max_tokens=1500,  # Plus de tokens pour la décomposition
+                cache_namespace=self.cache_namespace,
+                image_type=input_data.image_type,
             )
 
             if not decomposition_response:
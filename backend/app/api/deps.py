@@ -1,9 +1,10 @@
 """Dependencies for API endpoints."""
 
-from fastapi import HTTPException
+from fastapi import Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.auth import get_current_user
+from app.core.rate_limiter import CostClass, get_ai_limiter, retry_after_header
 from app.database import get_db
 from app.models.user import User
 
@@ -44,4 +45,35 @@ async def check_subscription_tier(
     return True
 
 
-__all__ = ["get_current_user", "get_db", "check_subscription_tier"]
+def rate_limited(cost_class: CostClass):
+    """
+    Dépendance de rate limiting pondéré pour un endpoint IA.
+
+    Prélève cost_class.cost tokens dans le bucket de l'utilisateur
+    authentifié (partagé par tous les endpoints IA).
+
+    Usage:
+        @router.post("/analyze", dependencies=[Depends(rate_limited(VISION_LIMIT))])
+
+    Raises:
+        HTTPException 429 si le bucket est vide (Retry-After renseigné)
+    """
+    async def dependency(
+        current_user: User = Depends(get_current_user),
+    ) -> None:
+        allowed, retry_after = await get_ai_limiter().acquire(f"user:{current_user.id}", cost_class)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "error": "rate_limit_exceeded",
+                    "message": "Trop de requêtes. Veuillez réessayer plus tard.",
+                    "retry_after": retry_after_header(retry_after),
+                },
+                headers={"Retry-After": retry_after_header(retry_after)},
+            )
+
+    return dependency
+
+
+__all__ = ["get_current_user", "get_db", "check_subscription_tier", "rate_limited"]
@@ -11,6 +11,7 @@ from passlib.context import CryptContext
 from sqlalchemy import select
 
 from app.config import get_settings
+from app.core.user_cache import get_user_cache
 from app.database import async_session_maker
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse
@@ -72,8 +73,13 @@ def verify_refresh_token(token: str) -> TokenData | None:
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
+    request: Request = None,
 ) -> User:
-    """Récupère l'utilisateur courant depuis le token."""
+    """
+    Récupère l'utilisateur courant depuis le token.
+
+    Renseigne request.state.user_id (clé du rate limiting par utilisateur).
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Identifiants invalides",
@@ -89,12 +95,20 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    async with async_session_maker() as db:
-        result = await db.execute(select(User).where(User.email == token_data.email))
-        user = result.scalar_one_or_none()
-        if user is None:
-            raise credentials_exception
-        return user
+    # Principal en cache (TTL court, invalidé sur mise à jour profil/abonnement)
+    user_cache = get_user_cache()
+    user = await user_cache.get(token_data.email)
+    if user is None:
+        async with async_session_maker() as db:
+            result = await db.execute(select(User).where(User.email == token_data.email))
+            user = result.scalar_one_or_none()
+            if user is None:
+                raise credentials_exception
+        await user_cache.set(user)
+
+    if request is not None:
+        request.state.user_id = user.id
+    return user
 
 
 def create_tokens(email: str) -> Token:
@@ -1,6 +1,7 @@
 import httpx
 from fastapi import APIRouter, HTTPException, status
 from app.schemas.barcode import BarcodeSearchResponse, BarcodeProduct
+from app.core.http_pool import get_http_client, OPENFOODFACTS
 
 router = APIRouter()
 
@@ -27,10 +28,10 @@ async def search_by_barcode(barcode: str):
     url = OPENFOODFACTS_API.format(barcode=barcode)
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
+        client = get_http_client(OPENFOODFACTS)
+        response = await client.get(url, timeout=10.0)
+        response.raise_for_status()
+        data = response.json()
     except httpx.TimeoutException:
         return BarcodeSearchResponse(
             success=False,
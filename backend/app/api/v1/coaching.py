@@ -65,9 +65,9 @@ async def get_tips(
     """
     Récupère les conseils personnalisés du jour.
     """
-    # Vérifier les limites d'utilisation
+    # Vérifier la limite et compter le conseil (atomique)
     sub_service = SubscriptionService(db)
-    allowed, used, limit = await sub_service.check_limit(current_user.id, "coach_messages")
+    allowed, used, limit = await sub_service.consume_usage(current_user.id, "coach_messages")
 
     if not allowed:
         raise HTTPException(
@@ -81,9 +81,6 @@ async def get_tips(
             }
         )
 
-    # Incrémenter l'usage
-    await sub_service.increment_usage(current_user.id, "coach_messages")
-
     # Récupérer le profil
     profile_query = select(Profile).where(Profile.user_id == current_user.id)
     profile_result = await db.execute(profile_query)
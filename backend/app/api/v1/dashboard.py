@@ -1,19 +1,23 @@
 import asyncio
+import logging
 from datetime import datetime, date, timedelta
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 
-from app.database import get_db
-from app.api.deps import get_current_user
+from app.database import get_db, async_session_maker
+from app.api.deps import get_current_user, rate_limited
+from app.core.rate_limiter import COACH_LIMIT
 from app.models.user import User
 from app.models.profile import Profile
-from app.models.food_log import FoodLog, DailyNutrition
-from app.models.activity import ActivityLog
+from app.models.food_log import DailyNutrition
 from app.models.gamification import Achievement, Streak, Notification, UserStats, ACHIEVEMENTS, calculate_level
+from app.services.dashboard_read_model import load_dashboard_snapshot
+from app.services.dashboard_insights import get_dashboard_insights_cache, insights_digest
 from app.agents.coach import get_coach_agent, CoachInput, get_time_of_day
 from app.agents.dashboard_personalizer import get_dashboard_personalizer_agent, PersonalizerInput
 from app.i18n import get_translator, DEFAULT_LANGUAGE
+from app.config import get_settings
 from app.schemas.dashboard import (
     CoachResponseSchema,
     CoachAdviceSchema,
@@ -43,64 +47,27 @@ async def get_dashboard(
     Récupère toutes les données du dashboard.
     """
     today = date.today()
-    start_of_day = datetime.combine(today, datetime.min.time())
-    end_of_day = datetime.combine(today, datetime.max.time())
-
-    # Récupérer ou créer les stats utilisateur
-    stats = await get_or_create_user_stats(db, current_user.id)
-
-    # Nutrition du jour - calculée directement depuis food_logs pour être toujours à jour
-    food_logs_query = select(FoodLog).where(and_(
-        FoodLog.user_id == current_user.id,
-        FoodLog.meal_date >= start_of_day,
-        FoodLog.meal_date <= end_of_day,
-    ))
-    food_logs_result = await db.execute(food_logs_query)
-    food_logs = food_logs_result.scalars().all()
 
-    # Calculer les totaux depuis les food_logs
-    calories_from_food = sum(log.total_calories or 0 for log in food_logs)
-    protein_from_food = sum(log.total_protein or 0 for log in food_logs)
-    carbs_from_food = sum(log.total_carbs or 0 for log in food_logs)
-    fat_from_food = sum(log.total_fat or 0 for log in food_logs)
-    meals_count = len(food_logs)
+    # Toutes les données du jour en un aller-retour (cf. dashboard_read_model)
+    snapshot = await load_dashboard_snapshot(db, async_session_maker, current_user.id, today)
 
-    # Récupérer l'eau depuis DailyNutrition (seule donnée qui y est stockée séparément)
-    nutrition_query = select(DailyNutrition).where(and_(
-        DailyNutrition.user_id == current_user.id,
-        DailyNutrition.date >= start_of_day,
-        DailyNutrition.date <= end_of_day,
-    ))
-    nutrition_result = await db.execute(nutrition_query)
-    nutrition = nutrition_result.scalar_one_or_none()
-    water_today = nutrition.water_ml if nutrition else 0
-
-    # Activités du jour - récupérer durée ET calories brûlées
-    activities_query = select(
-        func.sum(ActivityLog.duration_minutes),
-        func.sum(ActivityLog.calories_burned)
-    ).where(and_(
-        ActivityLog.user_id == current_user.id,
-        ActivityLog.activity_date >= start_of_day,
-        ActivityLog.activity_date <= end_of_day,
-    ))
-    activities_result = await db.execute(activities_query)
-    activity_row = activities_result.one()
-    activity_minutes = activity_row[0] or 0
-    calories_burned = activity_row[1] or 0
-
-    # Streak de logging
-    streak_query = select(Streak).where(and_(
-        Streak.user_id == current_user.id,
-        Streak.streak_type == "logging",
-    ))
-    streak_result = await db.execute(streak_query)
-    logging_streak = streak_result.scalar_one_or_none()
-
-    # Objectifs du profil - chargement explicite pour async
-    profile_query = select(Profile).where(Profile.user_id == current_user.id)
-    profile_result = await db.execute(profile_query)
-    profile = profile_result.scalar_one_or_none()
+    # Récupérer ou créer les stats utilisateur
+    stats = snapshot.stats or await get_or_create_user_stats(db, current_user.id)
+
+    # Nutrition du jour - résumé DailyNutrition maintenu à chaque saisie de repas
+    calories_from_food = snapshot.calories
+    protein_from_food = snapshot.protein
+    carbs_from_food = snapshot.carbs
+    fat_from_food = snapshot.fat
+    meals_count = snapshot.meals_count
+    water_today = snapshot.water_ml
+
+    # Activités du jour - durée ET calories brûlées
+    activity_minutes = snapshot.activity_minutes
+    calories_burned = snapshot.calories_burned
+
+    # Objectifs du profil
+    profile = snapshot.profile
     target_calories = profile.daily_calories if profile and profile.daily_calories else 2000
     target_protein = profile.protein_g if profile and profile.protein_g else 100
     target_carbs = profile.carbs_g if profile and profile.carbs_g else 250
@@ -138,67 +105,19 @@ async def get_dashboard(
         activity_percent=round((activity_minutes / activity_target) * 100, 1) if activity_target else 0,
         calories_burned=calories_burned,
         meals_today=meals_count,
-        streak_days=logging_streak.current_count if logging_streak else 0,
+        streak_days=snapshot.logging_streak_days,
     )
 
-    # Conseil du coach (avec fallback si l'API IA échoue ou timeout)
+    # Coach et personnalisation: servis depuis le cache (jamais d'attente LLM),
+    # recalculés en tâche de fond quand ils sont périmés
     coach_advice = None
+    personalization = None
     if profile:
-        # Vérifier si le token Hugging Face est configuré
-        from app.config import get_settings
-        settings = get_settings()
-        hf_token = settings.HUGGINGFACE_TOKEN
-
-        # Si le token n'est pas configuré ou est le placeholder, utiliser directement le fallback
-        if not hf_token or hf_token == "" or "your-" in hf_token.lower() or "placeholder" in hf_token.lower():
-            import logging
-            logging.info("Hugging Face token not configured, using fallback coach advice")
-            coach_advice = get_fallback_coach_advice(current_user.name, quick_stats, current_user.preferred_language)
-        else:
-            try:
-                # Timeout de 5 secondes pour éviter que le dashboard reste bloqué
-                coach_advice = await asyncio.wait_for(
-                    get_coach_advice(db, current_user, quick_stats),
-                    timeout=5.0
-                )
-            except asyncio.TimeoutError:
-                import logging
-                logging.warning("Coach AI timed out after 5s, using fallback")
-                coach_advice = get_fallback_coach_advice(current_user.name, quick_stats, current_user.preferred_language)
-            except Exception as e:
-                # Si le coach IA échoue, on utilise un conseil par défaut
-                import logging
-                logging.warning(f"Coach AI failed, using fallback: {e}")
-                coach_advice = get_fallback_coach_advice(current_user.name, quick_stats, current_user.preferred_language)
-
-    # Achievements récents
-    achievements_query = (
-        select(Achievement)
-        .where(Achievement.user_id == current_user.id)
-        .order_by(Achievement.unlocked_at.desc())
-        .limit(5)
-    )
-    achievements_result = await db.execute(achievements_query)
-    recent_achievements = achievements_result.scalars().all()
-
-    # Streaks actifs
-    streaks_query = select(Streak).where(and_(
-        Streak.user_id == current_user.id,
-        Streak.current_count > 0,
-    ))
-    streaks_result = await db.execute(streaks_query)
-    active_streaks = streaks_result.scalars().all()
-
-    # Notifications
-    notifications_query = (
-        select(Notification)
-        .where(Notification.user_id == current_user.id)
-        .order_by(Notification.created_at.desc())
-        .limit(10)
-    )
-    notifications_result = await db.execute(notifications_query)
-    notifications = notifications_result.scalars().all()
+        coach_advice, personalization = await get_dashboard_insights(current_user, profile, quick_stats)
 
+    recent_achievements = snapshot.recent_achievements
+    active_streaks = snapshot.active_streaks
+    notifications = snapshot.notifications
     unread_count = sum(1 for n in notifications if not n.read)
 
     # User stats response
@@ -217,21 +136,6 @@ async def get_dashboard(
         achievements_count=stats.achievements_count,
     )
 
-    # Personnalisation du dashboard basée sur le profil complet
-    personalization = None
-    if profile:
-        try:
-            personalization = await asyncio.wait_for(
-                get_personalization(db, current_user, profile, quick_stats),
-                timeout=3.0
-            )
-        except asyncio.TimeoutError:
-            import logging
-            logging.warning("Dashboard personalization timed out, using defaults")
-        except Exception as e:
-            import logging
-            logging.warning(f"Dashboard personalization failed: {e}")
-
     return DashboardResponse(
         user_name=current_user.name,
         quick_stats=quick_stats,
@@ -245,7 +149,7 @@ async def get_dashboard(
     )
 
 
-@router.get("/coach", response_model=CoachResponseSchema)
+@router.get("/coach", response_model=CoachResponseSchema, dependencies=[Depends(rate_limited(COACH_LIMIT))])
 async def get_coach(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -378,6 +282,96 @@ def get_fallback_coach_advice(user_name: str, quick_stats: QuickStats, language:
     )
 
 
+def is_hf_token_configured() -> bool:
+    """Vrai si un token Hugging Face réel est configuré (pas un placeholder)."""
+    hf_token = get_settings().HUGGINGFACE_TOKEN
+    return bool(hf_token) and "your-" not in hf_token.lower() and "placeholder" not in hf_token.lower()
+
+
+async def get_dashboard_insights(
+    user: User,
+    profile: Profile,
+    quick_stats: QuickStats,
+) -> tuple[CoachResponseSchema, PersonalizationData | None]:
+    """
+    Coach et personnalisation du dashboard, sans attendre le LLM.
+
+    Sert le dernier résultat en cache (même périmé) et lance un recalcul en
+    tâche de fond si les QuickStats ou le profil ont changé depuis. Sans
+    résultat en cache: conseils par défaut, pas de personnalisation.
+    """
+    cache = get_dashboard_insights_cache()
+    digest = insights_digest(quick_stats, profile, user.preferred_language, get_time_of_day())
+    cached = await cache.get(user.id, digest)
+
+    if cached is None or not cached.fresh:
+        cache.schedule_refresh(user.id, digest, lambda: compute_dashboard_insights(user, quick_stats))
+
+    if cached is None or cached.coach is None:
+        coach_advice = get_fallback_coach_advice(user.name, quick_stats, user.preferred_language)
+    else:
+        coach_advice = CoachResponseSchema.model_validate(cached.coach)
+    personalization = (
+        PersonalizationData.model_validate(cached.personalization)
+        if cached is not None and cached.personalization is not None
+        else None
+    )
+    return coach_advice, personalization
+
+
+async def compute_dashboard_insights(
+    user: User,
+    quick_stats: QuickStats,
+) -> tuple[dict, dict | None, bool]:
+    """
+    Recalcul en tâche de fond (session dédiée, la requête HTTP est terminée).
+
+    Returns:
+        (coach, personnalisation) sérialisés, et True si un agent a échoué
+    """
+    timeout = get_settings().DASHBOARD_INSIGHTS_AGENT_TIMEOUT
+    degraded = False
+
+    async with async_session_maker() as db:
+        profile_result = await db.execute(select(Profile).where(Profile.user_id == user.id))
+        profile = profile_result.scalar_one_or_none()
+
+        if not is_hf_token_configured():
+            logging.info("Hugging Face token not configured, using fallback coach advice")
+            coach_advice = get_fallback_coach_advice(user.name, quick_stats, user.preferred_language)
+        else:
+            try:
+                coach_advice = await asyncio.wait_for(get_coach_advice(db, user, quick_stats), timeout=timeout)
+            except asyncio.TimeoutError:
+                logging.warning(f"Coach AI timed out after {timeout}s, using fallback")
+                coach_advice = get_fallback_coach_advice(user.name, quick_stats, user.preferred_language)
+                degraded = True
+            except Exception as e:
+                logging.warning(f"Coach AI failed, using fallback: {e}")
+                coach_advice = get_fallback_coach_advice(user.name, quick_stats, user.preferred_language)
+                degraded = True
+
+        personalization = None
+        if profile:
+            try:
+                personalization = await asyncio.wait_for(
+                    get_personalization(db, user, profile, quick_stats),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                logging.warning("Dashboard personalization timed out, using defaults")
+                degraded = True
+            except Exception as e:
+                logging.warning(f"Dashboard personalization failed: {e}")
+                degraded = True
+
+    return (
+        coach_advice.model_dump(mode="json"),
+        personalization.model_dump(mode="json") if personalization else None,
+        degraded,
+    )
+
+
 async def get_coach_advice(db: AsyncSession, user: User, quick_stats: QuickStats) -> CoachResponseSchema:
     """Génère les conseils du coach."""
     # Chargement explicite du profile pour async
@@ -2,6 +2,15 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 
 from app.config import get_settings
+from app.core.db_pool import get_db_pool_metrics
+from app.core.http_pool import get_http_pool_metrics
+from app.core.rate_limiter import get_ai_limiter
+from app.database import async_engine
+from app.llm.governor import get_llm_governor
+from app.llm.model_health import get_model_health
+from app.llm.response_cache import get_response_cache
+from app.services.photo_dedup import get_photo_dedup_index
+from app.services.usage_quota import get_usage_quota_engine
 
 router = APIRouter()
 settings = get_settings()
@@ -22,3 +31,51 @@ async def health_check() -> HealthResponse:
         version=settings.APP_VERSION,
         environment=settings.ENVIRONMENT,
     )
+
+
+@router.get("/health/http-pool")
+async def http_pool_metrics() -> dict:
+    """Métriques des pools HTTP sortants (dimensionnement sous charge)."""
+    return get_http_pool_metrics()
+
+
+@router.get("/health/db-pool")
+async def db_pool_metrics() -> dict:
+    """Métriques du pool de connexions DB (latence d'acquisition, usage)."""
+    return get_db_pool_metrics(async_engine)
+
+
+@router.get("/health/llm-cache")
+async def llm_cache_metrics() -> dict:
+    """Métriques du cache de réponses LLM (taux de hits, appels dédupliqués)."""
+    return get_response_cache().get_stats()
+
+
+@router.get("/health/photo-dedup")
+async def photo_dedup_metrics() -> dict:
+    """Métriques de la déduplication des photos (analyses VLM évitées)."""
+    return get_photo_dedup_index().get_stats()
+
+
+@router.get("/health/usage-quota")
+async def usage_quota_metrics() -> dict:
+    """Métriques du moteur de quotas (stockage, incréments en attente d'écriture)."""
+    return get_usage_quota_engine().get_stats()
+
+
+@router.get("/health/rate-limiter")
+async def rate_limiter_metrics() -> dict:
+    """Métriques du rate limiting IA (token bucket par utilisateur)."""
+    return get_ai_limiter().get_stats()
+
+
+@router.get("/health/llm-governor")
+async def llm_governor_metrics() -> dict:
+    """Métriques du gouverneur LLM (créneaux par modèle, attente en file, délestage)."""
+    return get_llm_governor().get_stats()
+
+
+@router.get("/health/model-health")
+async def model_health_metrics() -> dict:
+    """Santé des modèles LLM (latence, taux d'erreur, état des circuits)."""
+    return get_model_health().get_stats()
@@ -5,7 +5,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.database import get_db
-from app.api.deps import get_current_user, check_subscription_tier
+from app.api.deps import get_current_user, check_subscription_tier, rate_limited
+from app.core.rate_limiter import MEAL_PLAN_LIMIT
 from app.models.user import User
 from app.models.profile import Profile
 from app.schemas.meal_plan import (
@@ -18,7 +19,7 @@ from app.agents.meal_plan import get_meal_plan_agent, MealPlanInput
 router = APIRouter()
 
 
-@router.post("/generate", response_model=MealPlanResponse)
+@router.post("/generate", response_model=MealPlanResponse, dependencies=[Depends(rate_limited(MEAL_PLAN_LIMIT))])
 async def generate_meal_plan(
     request: MealPlanRequest,
     db: AsyncSession = Depends(get_db),
@@ -116,7 +117,7 @@ async def get_meal_plan_history(
     return []
 
 
-@router.post("/preview", response_model=MealPlanResponse)
+@router.post("/preview", response_model=MealPlanResponse, dependencies=[Depends(rate_limited(MEAL_PLAN_LIMIT))])
 async def preview_meal_plan(
     request: MealPlanRequest,
     db: AsyncSession = Depends(get_db),
@@ -20,6 +20,7 @@ from app.api.v1.auth import get_current_user
 from app.services.multilingual_nutrition_search import search_nutrition_multilingual
 from app.services.nllb_translator import (
     translate_food_to_english,
+    translate_foods_to_english,
     translate_with_nllb,
     get_supported_languages,
     get_cache_stats,
@@ -169,6 +170,28 @@ class FoodTranslationRequest(BaseModel):
     )
 
 
+class FoodTranslationBatchRequest(BaseModel):
+    """Requête de traduction de plusieurs aliments (un repas) vers anglais."""
+
+    food_names: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=50,
+        description="Noms des aliments (50 max)"
+    )
+    language: str = Field(
+        ...,
+        pattern="^(en|fr|ar|de|es|pt|zh)$",
+        description="Langue des noms (en, fr, ar, de, es, pt, zh)"
+    )
+
+
+class FoodTranslationBatchResponse(BaseModel):
+    """Traductions d'aliments (même ordre que la requête)."""
+
+    translations: list[TranslationResponse]
+
+
 class SupportedLanguagesResponse(BaseModel):
     """Langues supportées par NLLB-200."""
 
@@ -271,6 +294,60 @@ async def translate_food_name_endpoint(
         )
 
 
+@router.post("/translate/food/batch", response_model=FoodTranslationBatchResponse)
+async def translate_food_names_batch_endpoint(
+    request: FoodTranslationBatchRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Traduit plusieurs noms d'aliments vers l'anglais en un seul appel.
+
+    Variante batch de /translate/food: les doublons et les noms déjà en cache
+    ne sont pas retraduits, et les autres partent dans une seule inférence.
+
+    Args:
+        request: Noms des aliments et langue source
+
+    Returns:
+        Noms traduits en anglais (même ordre)
+    """
+    food_names = [name.strip()[:200] for name in request.food_names if name.strip()]
+    if not food_names:
+        raise HTTPException(status_code=422, detail="Aucun nom d'aliment fourni")
+
+    logger.info(
+        "food_translation_batch_request",
+        user_id=current_user.id,
+        count=len(food_names),
+        language=request.language,
+    )
+
+    try:
+        translated = await translate_foods_to_english(
+            food_names=food_names,
+            source_lang=request.language
+        )
+
+        return FoodTranslationBatchResponse(
+            translations=[
+                TranslationResponse(
+                    original=original,
+                    translated=translation,
+                    source_lang=request.language,
+                    target_lang="en",
+                )
+                for original, translation in zip(food_names, translated)
+            ]
+        )
+
+    except Exception as e:
+        logger.error("food_translation_batch_error", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur de traduction: {str(e)}"
+        )
+
+
 @router.get("/translate/languages", response_model=SupportedLanguagesResponse)
 async def get_translation_languages_endpoint(
     current_user: User = Depends(get_current_user),
@@ -20,6 +20,8 @@ from app.schemas.recipe import (
     RecipeHistoryResponse,
 )
 from app.api.v1.auth import get_current_user
+from app.api.deps import rate_limited
+from app.core.rate_limiter import RECIPE_LIMIT
 from app.agents.recipe import get_recipe_agent, RecipeInput, UserContext, MealHistoryAnalysis
 from app.services.subscription import SubscriptionService
 
@@ -234,7 +236,11 @@ async def _build_user_context(
     )
 
 
-@router.post("/generate", response_model=RecipeGenerateResponse)
+@router.post(
+    "/generate",
+    response_model=RecipeGenerateResponse,
+    dependencies=[Depends(rate_limited(RECIPE_LIMIT))],
+)
 async def generate_recipe(
     request: RecipeGenerateRequest,
     current_user: Annotated[User, Depends(get_current_user)],
@@ -249,9 +255,9 @@ async def generate_recipe(
     - Les repas déjà consommés aujourd'hui
     - La tendance de poids sur la semaine
     """
-    # Vérifier les limites d'utilisation
+    # Vérifier la limite et compter la génération (atomique)
     sub_service = SubscriptionService(db)
-    allowed, used, limit = await sub_service.check_limit(current_user.id, "recipe_generations")
+    allowed, used, limit = await sub_service.consume_usage(current_user.id, "recipe_generations")
 
     if not allowed:
         raise HTTPException(
@@ -265,41 +271,43 @@ async def generate_recipe(
             }
         )
 
-    # Récupérer le profil pour personnalisation
-    result = await db.execute(
-        select(Profile).where(Profile.user_id == current_user.id)
-    )
-    profile = result.scalar_one_or_none()
-
-    # Construire le contexte utilisateur complet
-    user_context = await _build_user_context(db, current_user.id, profile)
-
-    # Préparer l'input pour l'agent
-    recipe_input = RecipeInput(
-        ingredients=request.ingredients,
-        meal_type=request.meal_type,
-        diet_type=profile.diet_type if profile else None,
-        allergies=profile.allergies if profile else [],
-        excluded_foods=profile.excluded_foods if profile else [],
-        max_prep_time=request.max_prep_time,
-        servings=request.servings,
-        goal=profile.goal if profile else None,
-        target_calories=None,  # Sera calculé intelligemment par le contexte
-        user_context=user_context,
-    )
-
-    # Générer la recette
-    agent = get_recipe_agent(language=current_user.preferred_language)
-    response = await agent.process(recipe_input)
-
-    if not response.result:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Échec de la génération de recette",
+    try:
+        # Récupérer le profil pour personnalisation
+        result = await db.execute(
+            select(Profile).where(Profile.user_id == current_user.id)
+        )
+        profile = result.scalar_one_or_none()
+
+        # Construire le contexte utilisateur complet
+        user_context = await _build_user_context(db, current_user.id, profile)
+
+        # Préparer l'input pour l'agent
+        recipe_input = RecipeInput(
+            ingredients=request.ingredients,
+            meal_type=request.meal_type,
+            diet_type=profile.diet_type if profile else None,
+            allergies=profile.allergies if profile else [],
+            excluded_foods=profile.excluded_foods if profile else [],
+            max_prep_time=request.max_prep_time,
+            servings=request.servings,
+            goal=profile.goal if profile else None,
+            target_calories=None,  # Sera calculé intelligemment par le contexte
+            user_context=user_context,
         )
 
-    # Incrémenter l'usage après génération réussie
-    await sub_service.increment_usage(current_user.id, "recipe_generations")
+        # Générer la recette
+        agent = get_recipe_agent(language=current_user.preferred_language)
+        response = await agent.process(recipe_input)
+
+        if not response.result:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Échec de la génération de recette",
+            )
+    except Exception:
+        # Génération échouée: l'usage n'est pas décompté
+        await sub_service.release_usage(current_user.id, "recipe_generations")
+        raise
 
     recipe_data = response.result.to_dict()
 
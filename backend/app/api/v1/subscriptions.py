@@ -3,6 +3,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.user_cache import invalidate_user_principal
 from app.database import get_db
 from app.api.deps import get_current_user
 from app.models.user import User
@@ -36,24 +37,21 @@ async def get_subscription_status(
 ):
     """Retourne le statut d'abonnement de l'utilisateur."""
     service = SubscriptionService(db)
-    subscription = await service.get_subscription(current_user.id)
 
-    # Obtenir le tier effectif (inclut le trial)
-    effective_tier = await service.get_effective_tier(current_user.id)
-
-    # Obtenir les informations de trial
-    trial_info = await service.get_trial_info(current_user.id)
+    # Utilisateur, abonnement et trial en une requête (tier effectif inclut le trial)
+    state = await service.get_tier_state(current_user.id)
+    subscription = state.subscription
 
     return SubscriptionStatusResponse(
-        tier=SubscriptionTier(effective_tier),
+        tier=SubscriptionTier(state.tier),
         status=SubscriptionStatus(subscription.status.value) if subscription else None,
         renews_at=subscription.current_period_end if subscription else None,
         cancel_at_period_end=subscription.cancel_at_period_end if subscription else False,
         is_active=subscription.status.value == "active" if subscription else True,
         # Trial info
-        is_trial=trial_info["is_trial"],
-        trial_ends_at=current_user.trial_ends_at if current_user.trial_ends_at else None,
-        days_remaining=trial_info["days_remaining"]
+        is_trial=state.is_trial,
+        trial_ends_at=state.trial_ends_at,
+        days_remaining=state.days_remaining
     )
 
 
@@ -372,6 +370,7 @@ async def debug_set_tier(
         update(User).where(User.id == current_user.id).values(subscription_tier=tier)
     )
     await db.commit()
+    await invalidate_user_principal(current_user.email)
 
     return {
         "message": f"Tier updated to {tier}",
@@ -9,6 +9,7 @@ from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.activity import ActivityLog, WeightLog, Goal as GoalModel, ACTIVITY_TYPES, calculate_calories_burned
 from app.models.food_log import FoodLog, DailyNutrition
+from app.services.dashboard_insights import invalidate_dashboard_insights
 from app.schemas.activity import (
     ActivityLogCreate,
     ActivityLogResponse,
@@ -77,6 +78,7 @@ async def create_activity(
 
     db.add(activity)
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
     await db.refresh(activity)
 
     return activity
@@ -145,6 +147,7 @@ async def update_activity(
         setattr(activity, field, value)
 
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
     await db.refresh(activity)
 
     return activity
@@ -168,6 +171,7 @@ async def delete_activity(
 
     await db.delete(activity)
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
 
     return {"message": "Activité supprimée"}
 
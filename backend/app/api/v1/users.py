@@ -3,6 +3,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.user_cache import invalidate_user_principal
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
@@ -26,8 +27,8 @@ async def update_current_user(
     db: AsyncSession = Depends(get_db),
 ) -> UserResponse:
     """Mettre à jour les informations de l'utilisateur connecté."""
-    # Merger l'utilisateur dans la session courante
-    user = await db.merge(current_user)
+    # Recharger depuis la base: current_user peut venir du cache (valeurs jusqu'à USER_CACHE_TTL)
+    user = await db.get(User, current_user.id)
 
     update_data = user_update.model_dump(exclude_unset=True)
 
@@ -36,5 +37,6 @@ async def update_current_user(
 
     await db.commit()
     await db.refresh(user)
+    await invalidate_user_principal(user.email)
 
     return UserResponse.model_validate(user)
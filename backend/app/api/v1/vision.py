@@ -1,13 +1,20 @@
+import asyncio
+import json
+from dataclasses import dataclass
 from datetime import datetime, date, timedelta
+from typing import Any, AsyncIterator
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.rate_limiter import limiter, VISION_LIMIT
+from app.core.rate_limiter import VISION_LIMIT
+from app.core.http_pool import get_http_client, OPENFOODFACTS
 from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload
 
+from app.config import get_settings
 from app.database import get_db, async_session_maker
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, rate_limited
 from app.models.user import User
 from app.models.profile import Profile
 from app.models.food_log import FoodLog, FoodItem as FoodItemModel, DailyNutrition, FavoriteFood, FavoriteMeal
@@ -40,16 +47,26 @@ from app.schemas.food_log import (
     GalleryItem,
     GalleryResponse,
 )
+from app.agents.base import AgentResponse
 from app.agents.vision import get_vision_agent, VisionInput, calculate_health_report, FoodAnalysis
 from app.services.subscription import SubscriptionService, get_limit_value
 from app.services.nutrition_database import validate_detected_items_batch
 from app.services.feedback_learning import apply_feedback_learning_to_analysis
+from app.services.daily_nutrition import NutritionDelta, apply_daily_delta, apply_log_change
+from app.services.dashboard_insights import invalidate_dashboard_insights
+from app.services.photo_dedup import PhotoMatch, compute_photo_hash, get_photo_dedup_index
+from app.services.image_preprocessing import (
+    ImagePreprocessingError,
+    PreprocessedImage,
+    preprocess_image_async,
+    run_in_image_pool,
+)
 
 router = APIRouter()
+settings = get_settings()
 
 
-@router.post("/analyze", response_model=ImageAnalyzeResponse)
-@limiter.limit(VISION_LIMIT)
+@router.post("/analyze", response_model=ImageAnalyzeResponse, dependencies=[Depends(rate_limited(VISION_LIMIT))])
 async def analyze_image(
     request: Request,
     response: Response,
@@ -64,27 +81,102 @@ async def analyze_image(
     - Génère un rapport de santé personnalisé basé sur le profil
     - Sauvegarde automatiquement dans le journal (par défaut)
     """
-    # Phase 1: Vérifier les limites (nouvelle session courte)
-    async with async_session_maker() as db:
-        sub_service = SubscriptionService(db)
-        allowed, used, limit = await sub_service.check_limit(current_user.id, "vision_analyses")
+    import structlog
+    logger = structlog.get_logger()
 
-        if not allowed:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
-                    "error": "limit_reached",
-                    "message": "Limite d'analyses photo atteinte pour aujourd'hui",
-                    "used": used,
-                    "limit": limit,
-                    "upgrade_url": "/pricing"
-                }
-            )
+    prepared = await _prepare_analysis(body, current_user, logger)
+
+    result = None
+    async for event, data in _analysis_pipeline(prepared, body, current_user, logger):
+        if event == "complete":
+            result = data
+    return result
 
-    # Phase 2: Analyse IA (peut prendre du temps - pas de DB ici)
+
+@router.post("/analyze/stream", dependencies=[Depends(rate_limited(VISION_LIMIT))])
+async def analyze_image_stream(
+    request: Request,
+    body: ImageAnalyzeRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Variante Server-Sent Events de /analyze: les résultats arrivent au fil de l'analyse.
+
+    Événements (data JSON), dans l'ordre:
+    - detected: aliments de la première passe VLM
+    - decomposed: décomposition d'un plat complexe (deuxième passe, optionnel)
+    - validated: valeurs vérifiées USDA et corrections apprises
+    - health_report: rapport de santé personnalisé
+    - saved: id du repas enregistré (null si save_to_log est false)
+    - complete: réponse complète, même format que /analyze
+    - error: {status_code, detail} si l'analyse échoue une fois le flux ouvert
+
+    La limite d'analyses et la validité de l'image sont vérifiées avant
+    l'ouverture du flux (erreurs HTTP 429/400 classiques).
+    """
     import structlog
     logger = structlog.get_logger()
 
+    prepared = await _prepare_analysis(body, current_user, logger)
+
+    async def events():
+        try:
+            async for event, data in _analysis_pipeline(prepared, body, current_user, logger):
+                yield _sse_event(event, data)
+        except HTTPException as e:
+            yield _sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.error("vision_stream_error", user_id=current_user.id, error=str(e)[:500])
+            yield _sse_event("error", {
+                "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "detail": f"Erreur lors de l'analyse: {type(e).__name__}",
+            })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Pas de mise en cache ni de buffering proxy: chaque événement part immédiatement
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse_event(event: str, data: Any) -> str:
+    """Formate un événement Server-Sent Events (data JSON sur une ligne)."""
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _stage_payload(analysis: FoodAnalysis, confidence: float, model_used: str) -> dict:
+    """Résultat intermédiaire d'une étape (aliments et totaux)."""
+    payload = analysis.to_dict()
+    payload.pop("health_report", None)
+    payload["confidence"] = confidence
+    payload["model_used"] = model_used
+    return payload
+
+
+@dataclass
+class _PreparedAnalysis:
+    """Image prête pour le VLM et analyse réutilisée d'une photo quasi identique."""
+
+    image: PreprocessedImage
+    photo_hash: int | None
+    reused: PhotoMatch | None
+    language: str
+
+
+async def _prepare_analysis(
+    body: ImageAnalyzeRequest,
+    current_user: User,
+    logger,
+) -> _PreparedAnalysis:
+    """
+    Vérifie l'image, cherche une photo quasi identique puis compte l'analyse.
+
+    Lève les HTTPException avant tout appel VLM (et avant l'ouverture du flux SSE).
+    L'analyse est décomptée ici; _analysis_pipeline l'annule si elle échoue.
+    """
     # Valider l'image avant l'analyse
     if not body.image_base64 or len(body.image_base64) < 100:
         logger.error("vision_invalid_image", image_size=len(body.image_base64) if body.image_base64 else 0)
@@ -102,211 +194,245 @@ async def analyze_image(
         language=current_user.preferred_language,
     )
 
-    agent = get_vision_agent(language=current_user.preferred_language)
-
-    vision_input = VisionInput(
-        image_base64=body.image_base64,
-        context=body.meal_type,
-    )
-
+    # Décodage, réduction à la résolution du VLM, suppression EXIF (pool de threads)
     try:
-        result = await agent.process(vision_input)
+        image = await preprocess_image_async(body.image_base64)
+    except ImagePreprocessingError as e:
+        logger.warning("vision_invalid_image", user_id=current_user.id, reason=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Image invalide: {e}"
+        )
 
-        # Vérifier que le résultat est valide
-        if not result or not result.result:
-            logger.error("vision_empty_result", user_id=current_user.id)
+    # Photo quasi identique déjà analysée (double tap, nouvel essai): pas de VLM
+    photo_hash = None
+    reused = None
+    language = current_user.preferred_language or "en"
+    if settings.PHOTO_DEDUP_ENABLED:
+        photo_hash = await run_in_image_pool(compute_photo_hash, image.image_base64)
+        if photo_hash is not None:
+            reused = await get_photo_dedup_index().find(current_user.id, photo_hash, language)
+
+    # Vérifier la limite et compter l'analyse (atomique, nouvelle session courte).
+    # En dernier: une image invalide ne consomme rien.
+    async with async_session_maker() as db:
+        sub_service = SubscriptionService(db)
+        allowed, used, limit = await sub_service.consume_usage(current_user.id, "vision_analyses")
+
+        if not allowed:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="L'analyse n'a retourné aucun résultat. Veuillez réessayer."
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={
+                    "error": "limit_reached",
+                    "message": "Limite d'analyses photo atteinte pour aujourd'hui",
+                    "used": used,
+                    "limit": limit,
+                    "upgrade_url": "/pricing"
+                }
             )
 
-        # Log le succès ou l'utilisation du fallback
-        if result.used_fallback:
-            logger.warning(
-                "vision_used_fallback",
-                user_id=current_user.id,
-                confidence=result.confidence,
-                reason=result.reasoning,
-            )
-        else:
-            logger.info(
-                "vision_analysis_success",
-                user_id=current_user.id,
-                items_count=len(result.result.items) if result.result.items else 0,
-                confidence=result.confidence,
-                model=result.model_used,
-            )
+    return _PreparedAnalysis(image, photo_hash, reused, language)
 
-    except HTTPException:
-        # Relancer les HTTPException sans les transformer
-        raise
-    except Exception as e:
-        error_type = type(e).__name__
-        error_msg = str(e)
 
-        logger.error(
-            "vision_analysis_error",
-            user_id=current_user.id,
-            error_type=error_type,
-            error_msg=error_msg[:500],
-        )
+async def _analysis_pipeline(
+    prepared: _PreparedAnalysis,
+    body: ImageAnalyzeRequest,
+    current_user: User,
+    logger,
+) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Pipeline d'analyse par étapes, partagé par /analyze et /analyze/stream.
 
-        # Messages d'erreur plus spécifiques selon le type d'erreur
-        if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-            detail = "L'analyse a pris trop de temps. Veuillez réessayer avec une image plus petite."
-        elif "401" in error_msg or "403" in error_msg or "authentication" in error_msg.lower():
-            detail = "Erreur d'authentification avec le service IA. Veuillez réessayer plus tard."
-        elif "connection" in error_msg.lower() or "network" in error_msg.lower():
-            detail = "Erreur de connexion au service IA. Veuillez vérifier votre connexion."
-        elif "rate limit" in error_msg.lower() or "429" in error_msg:
-            detail = "Service temporairement surchargé. Veuillez réessayer dans quelques minutes."
+    Produit (événement, données) dès que chaque étape est terminée: detected,
+    decomposed (plat complexe), validated, health_report, saved, puis
+    complete (ImageAnalyzeResponse).
+    """
+    try:
+        if prepared.reused is not None:
+            analysis = FoodAnalysis.from_dict(prepared.reused.analysis)
+            confidence = prepared.reused.confidence
+            model_used = prepared.reused.model_used
+            validated_items = list(analysis.items)
+            yield "detected", _stage_payload(analysis, confidence, model_used)
         else:
-            detail = f"Erreur lors de l'analyse: {error_type}"
-
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=detail
-        )
-
-    analysis = result.result
-    confidence = result.confidence
-    model_used = result.model_used
-
-    # === APPROCHE HYBRIDE: VLM détecte, USDA vérifie/corrige ===
-    # Le VLM est bon pour la détection, mais USDA est plus précis pour la nutrition
-    validated_items = list(analysis.items)
+            detection = None
+            async for stage, detection in _detect_stages(prepared.image, body, current_user, logger):
+                yield stage, _stage_payload(detection.result, detection.confidence, detection.model_used)
+            analysis = detection.result
+            confidence = detection.confidence
+            model_used = detection.model_used
+            validated_items = await _validate_with_usda(analysis, current_user, logger)
+
+            # Ne pas réutiliser un fallback déterministe (VLM indisponible)
+            if prepared.photo_hash is not None and validated_items and model_used != "deterministic":
+                await get_photo_dedup_index().add(
+                    current_user.id,
+                    prepared.photo_hash,
+                    prepared.language,
+                    FoodAnalysis(
+                        items=validated_items,
+                        meal_type=analysis.meal_type,
+                        description=analysis.description,
+                    ).to_dict(),
+                    confidence,
+                    model_used,
+                )
 
-    # === PHASE 1: USDA LOOKUP PRIORITAIRE ===
-    # Si USDA trouve l'aliment, utiliser ses valeurs (95% précision)
-    # Sinon garder l'estimation VLM (déjà corrigée pour les lipides)
-    usda_found_count = 0
-    ai_fallback_count = 0
+        # === PHASE 3: FEEDBACK LEARNING ===
+        # Appliquer les corrections apprises des utilisateurs précédents
+        try:
+            async with async_session_maker() as feedback_db:
+                # Convertir items en dicts pour le feedback learning
+                items_for_learning = [item.to_dict() for item in validated_items]
+
+                # Appliquer les corrections apprises
+                corrected_items = await apply_feedback_learning_to_analysis(
+                    db=feedback_db,
+                    items=items_for_learning,
+                    user_id=current_user.id,
+                )
 
-    try:
-        items_as_dicts = [item.to_dict() for item in validated_items]
-        usda_validated_items = await validate_detected_items_batch(
-            items_as_dicts,
-            language=current_user.preferred_language or "en"
+                # Mettre à jour les items avec les corrections apprises
+                learning_applied_count = 0
+                for i, corrected in enumerate(corrected_items):
+                    if corrected.get("learning_applied", False):
+                        learning_applied_count += 1
+                        validated_items[i].calories = int(corrected.get("calories", validated_items[i].calories))
+                        validated_items[i].protein = round(corrected.get("protein", validated_items[i].protein), 1)
+                        validated_items[i].carbs = round(corrected.get("carbs", validated_items[i].carbs), 1)
+                        validated_items[i].fat = round(corrected.get("fat", validated_items[i].fat), 1)
+
+                        logger.info(
+                            "feedback_learning_applied",
+                            food=validated_items[i].name,
+                            confidence=corrected.get("learning_confidence"),
+                            samples=corrected.get("learning_samples"),
+                        )
+
+                if learning_applied_count > 0:
+                    logger.info(
+                        "feedback_learning_summary",
+                        total_items=len(validated_items),
+                        learning_applied=learning_applied_count,
+                    )
+        except Exception as e:
+            logger.warning("feedback_learning_failed", error=str(e))
+            # En cas d'erreur, continuer sans feedback learning
+
+        # Recalculer les totaux
+        total_calories = sum(item.calories for item in validated_items)
+        total_protein = sum(item.protein for item in validated_items)
+        total_carbs = sum(item.carbs for item in validated_items)
+        total_fat = sum(item.fat for item in validated_items)
+
+        # Créer un objet FoodAnalysis pour le calcul du rapport
+        analysis_for_report = FoodAnalysis(
+            items=validated_items,
+            meal_type=analysis.meal_type or body.meal_type,
+            total_calories=total_calories,
+            total_protein=total_protein,
+            total_carbs=total_carbs,
+            total_fat=total_fat,
+            description=analysis.description,
         )
+        yield "validated", _stage_payload(analysis_for_report, confidence, model_used)
+    except (Exception, asyncio.CancelledError):
+        # Analyse non aboutie (erreur VLM, client SSE déconnecté): pas décomptée
+        await _release_vision_usage(current_user.id)
+        raise
 
-        # Mettre à jour les items avec les données USDA (PRIORITAIRE)
-        for i, usda_item in enumerate(usda_validated_items):
-            usda_source = usda_item.get("source", "ai_estimated")
-
-            if usda_source in ("usda_verified", "usda_translation"):
-                # USDA trouvé - utiliser ses valeurs (haute confiance)
-                usda_found_count += 1
-
-                # Log la différence entre VLM et USDA pour analyse
-                ai_calories = validated_items[i].calories
-                usda_calories = usda_item.get("calories", 0)
-                diff_percent = abs(ai_calories - usda_calories) / max(usda_calories, 1) * 100
-
-                logger.info(
-                    "usda_override_applied",
-                    food=validated_items[i].name,
-                    ai_calories=ai_calories,
-                    usda_calories=int(usda_calories),
-                    diff_percent=round(diff_percent, 1),
-                    usda_name=usda_item.get("usda_food_name"),
-                )
-
-                # Appliquer les valeurs USDA
-                validated_items[i].calories = int(usda_item.get("calories", validated_items[i].calories))
-                validated_items[i].protein = round(usda_item.get("protein", validated_items[i].protein), 1)
-                validated_items[i].carbs = round(usda_item.get("carbs", validated_items[i].carbs), 1)
-                validated_items[i].fat = round(usda_item.get("fat", validated_items[i].fat), 1)
-                validated_items[i].source = usda_source
-                validated_items[i].needs_verification = False
-                validated_items[i].usda_food_name = usda_item.get("usda_food_name")
-                validated_items[i].original_name = usda_item.get("original_name")
-                validated_items[i].confidence = 0.95  # Haute confiance pour USDA
-            else:
-                # USDA pas trouvé - garder estimation VLM (déjà corrigée)
-                ai_fallback_count += 1
-                validated_items[i].source = "ai_estimated"
-                validated_items[i].needs_verification = validated_items[i].confidence < 0.7
-                validated_items[i].usda_food_name = None
-                validated_items[i].original_name = None
+    # Phase 3: Opérations DB post-analyse. shield: un client SSE déconnecté
+    # n'interrompt pas l'enregistrement du repas.
+    health_context, food_log_id = await asyncio.shield(
+        _persist_analysis(analysis_for_report, confidence, model_used, body, current_user)
+    )
 
-                logger.info(
-                    "ai_estimation_used",
-                    food=validated_items[i].name,
-                    calories=validated_items[i].calories,
-                    confidence=validated_items[i].confidence,
-                    reason="usda_not_found",
-                )
+    # === CALCULER LE RAPPORT DE SANTÉ ULTRA-PERSONNALISÉ ===
+    health_report = calculate_health_report(
+        analysis=analysis_for_report,
+        **health_context,
+        language=current_user.preferred_language,
+    )
 
-        logger.info(
-            "nutrition_validation_summary",
-            total_items=len(validated_items),
-            usda_found=usda_found_count,
-            ai_fallback=ai_fallback_count,
-            usda_coverage_percent=round(usda_found_count / max(len(validated_items), 1) * 100, 1),
+    # Préparer la réponse avec les nouveaux champs source
+    detected_items = [
+        DetectedItem(
+            name=item.name,
+            quantity=item.quantity,
+            unit=item.unit,
+            calories=item.calories,
+            protein=item.protein,
+            carbs=item.carbs,
+            fat=item.fat,
+            confidence=item.confidence,
+            source=item.source,
+            needs_verification=item.needs_verification,
+            usda_food_name=item.usda_food_name,
+            original_name=item.original_name,
         )
+        for item in validated_items
+    ]
 
-    except Exception as e:
-        logger.warning("usda_validation_failed", error=str(e))
-        # En cas d'erreur USDA, garder les estimations VLM (déjà corrigées)
-        for item in validated_items:
-            item.source = "ai_estimated"
-            item.needs_verification = item.confidence < 0.7
+    # Construire la réponse du rapport de santé
+    health_report_response = HealthReportResponse(
+        health_score=health_report.health_score,
+        goal_compatibility=health_report.goal_compatibility,
+        verdict=health_report.verdict,
+        verdict_color=health_report.verdict_color,
+        summary=health_report.summary,
+        positive_points=health_report.positive_points,
+        negative_points=health_report.negative_points,
+        recommendations=health_report.recommendations,
+        macro_analysis=health_report.macro_analysis,
+        weekly_impact=health_report.weekly_impact,
+        meal_timing_feedback=health_report.meal_timing_feedback,
+    )
+    yield "health_report", health_report_response
+    yield "saved", {"food_log_id": food_log_id}
 
-    # === PHASE 3: FEEDBACK LEARNING ===
-    # Appliquer les corrections apprises des utilisateurs précédents
-    try:
-        async with async_session_maker() as feedback_db:
-            # Convertir items en dicts pour le feedback learning
-            items_for_learning = [item.to_dict() for item in validated_items]
-
-            # Appliquer les corrections apprises
-            corrected_items = await apply_feedback_learning_to_analysis(
-                db=feedback_db,
-                items=items_for_learning,
-                user_id=current_user.id,
-            )
+    yield "complete", ImageAnalyzeResponse(
+        success=True,
+        description=analysis.description,
+        meal_type=analysis.meal_type or body.meal_type,
+        items=detected_items,
+        total_calories=total_calories,
+        total_protein=round(total_protein, 1),
+        total_carbs=round(total_carbs, 1),
+        total_fat=round(total_fat, 1),
+        confidence=confidence,
+        model_used=model_used,
+        food_log_id=food_log_id,
+        health_report=health_report_response,
+    )
 
-            # Mettre à jour les items avec les corrections apprises
-            learning_applied_count = 0
-            for i, corrected in enumerate(corrected_items):
-                if corrected.get("learning_applied", False):
-                    learning_applied_count += 1
-                    validated_items[i].calories = int(corrected.get("calories", validated_items[i].calories))
-                    validated_items[i].protein = round(corrected.get("protein", validated_items[i].protein), 1)
-                    validated_items[i].carbs = round(corrected.get("carbs", validated_items[i].carbs), 1)
-                    validated_items[i].fat = round(corrected.get("fat", validated_items[i].fat), 1)
 
-                    logger.info(
-                        "feedback_learning_applied",
-                        food=validated_items[i].name,
-                        confidence=corrected.get("learning_confidence"),
-                        samples=corrected.get("learning_samples"),
-                    )
+async def _release_vision_usage(user_id: int) -> None:
+    """Annule l'analyse décomptée par _prepare_analysis."""
+    async with async_session_maker() as db:
+        await SubscriptionService(db).release_usage(user_id, "vision_analyses")
 
-            if learning_applied_count > 0:
-                logger.info(
-                    "feedback_learning_summary",
-                    total_items=len(validated_items),
-                    learning_applied=learning_applied_count,
-                )
-    except Exception as e:
-        logger.warning("feedback_learning_failed", error=str(e))
-        # En cas d'erreur, continuer sans feedback learning
 
-    # Recalculer les totaux
-    total_calories = sum(item.calories for item in validated_items)
-    total_protein = sum(item.protein for item in validated_items)
-    total_carbs = sum(item.carbs for item in validated_items)
-    total_fat = sum(item.fat for item in validated_items)
+async def _persist_analysis(
+    meal: FoodAnalysis,
+    confidence: float,
+    model_used: str,
+    body: ImageAnalyzeRequest,
+    current_user: User,
+) -> tuple[dict, int | None]:
+    """
+    Charge le contexte du rapport de santé et enregistre le repas.
+
+    Returns:
+        (arguments de calculate_health_report, id du repas ou None)
+    """
+    validated_items = meal.items
+    total_calories = meal.total_calories
+    total_protein = meal.total_protein
+    total_carbs = meal.total_carbs
+    total_fat = meal.total_fat
 
     # Phase 3: Opérations DB post-analyse (nouvelle session fraîche)
     async with async_session_maker() as db:
-        # Incrémenter l'usage après analyse réussie
-        sub_service = SubscriptionService(db)
-        await sub_service.increment_usage(current_user.id, "vision_analyses")
-        # Commit immédiat pour l'usage (même si save_to_log est false)
-        await db.commit()
-
         # Récupérer le profil utilisateur pour le rapport de santé
         profile_query = select(Profile).where(Profile.user_id == current_user.id)
         profile_result = await db.execute(profile_query)
@@ -487,7 +613,7 @@ async def analyze_image(
                     user_id=current_user.id,
                     meal_type=body.meal_type,
                     meal_date=datetime.utcnow(),
-                    description=analysis.description,
+                    description=meal.description,
                     image_analyzed=True,
                     detected_items=[item.to_dict() for item in validated_items],
                     confidence_score=confidence,
@@ -528,84 +654,195 @@ async def analyze_image(
                     )
                     db.add(food_item)
 
+                # Mettre à jour le résumé journalier (même transaction)
+                await apply_daily_delta(
+                    db, current_user.id, food_log.meal_date.date(), NutritionDelta.from_log(food_log)
+                )
                 await db.commit()
+                await invalidate_dashboard_insights(current_user.id)
                 food_log_id = food_log.id
 
-                # Mettre à jour le résumé journalier
-                await update_daily_nutrition(db, current_user.id, datetime.utcnow().date())
+    health_context = {
+        "user_profile": user_profile_dict,
+        "daily_consumed": daily_consumed_dict,
+        "activities_today": activities_dict,
+        "weight_trend": weight_trend_dict,
+        "meal_history": meal_history_dict,
+    }
+    return health_context, food_log_id
 
-    # Créer un objet FoodAnalysis pour le calcul du rapport
-    analysis_for_report = FoodAnalysis(
-        items=validated_items,
-        meal_type=analysis.meal_type or body.meal_type,
-        total_calories=total_calories,
-        total_protein=total_protein,
-        total_carbs=total_carbs,
-        total_fat=total_fat,
-        description=analysis.description,
-    )
 
-    # === CALCULER LE RAPPORT DE SANTÉ ULTRA-PERSONNALISÉ ===
-    health_report = calculate_health_report(
-        analysis=analysis_for_report,
-        user_profile=user_profile_dict,
-        daily_consumed=daily_consumed_dict,
-        activities_today=activities_dict,
-        weight_trend=weight_trend_dict,
-        meal_history=meal_history_dict,
-        language=current_user.preferred_language,
+async def _detect_stages(
+    image: PreprocessedImage,
+    body: ImageAnalyzeRequest,
+    current_user: User,
+    logger,
+) -> AsyncIterator[tuple[str, AgentResponse]]:
+    """
+    Détection VLM par étapes (VisionAgent.process_stages).
+
+    Yields:
+        (étape, réponse de l'agent): "detected", puis "decomposed" si plat complexe
+    """
+    agent = get_vision_agent(language=current_user.preferred_language)
+
+    vision_input = VisionInput(
+        image_base64=image.image_base64,
+        image_type=image.media_type,
+        context=body.meal_type,
     )
 
-    # Préparer la réponse avec les nouveaux champs source
-    detected_items = [
-        DetectedItem(
-            name=item.name,
-            quantity=item.quantity,
-            unit=item.unit,
-            calories=item.calories,
-            protein=item.protein,
-            carbs=item.carbs,
-            fat=item.fat,
-            confidence=item.confidence,
-            source=item.source,
-            needs_verification=item.needs_verification,
-            usda_food_name=item.usda_food_name,
-            original_name=item.original_name,
+    try:
+        async for stage, result in agent.process_stages(vision_input):
+
+            # Vérifier que le résultat est valide
+            if not result or not result.result:
+                logger.error("vision_empty_result", user_id=current_user.id)
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="L'analyse n'a retourné aucun résultat. Veuillez réessayer."
+                )
+
+            # Log le succès ou l'utilisation du fallback
+            if result.used_fallback:
+                logger.warning(
+                    "vision_used_fallback",
+                    user_id=current_user.id,
+                    confidence=result.confidence,
+                    reason=result.reasoning,
+                )
+            else:
+                logger.info(
+                    "vision_analysis_success",
+                    user_id=current_user.id,
+                    items_count=len(result.result.items) if result.result.items else 0,
+                    confidence=result.confidence,
+                    model=result.model_used,
+                )
+
+            yield stage, result
+
+    except HTTPException:
+        # Relancer les HTTPException sans les transformer
+        raise
+    except Exception as e:
+        error_type = type(e).__name__
+        error_msg = str(e)
+
+        logger.error(
+            "vision_analysis_error",
+            user_id=current_user.id,
+            error_type=error_type,
+            error_msg=error_msg[:500],
         )
-        for item in validated_items
-    ]
 
-    # Construire la réponse du rapport de santé
-    health_report_response = HealthReportResponse(
-        health_score=health_report.health_score,
-        goal_compatibility=health_report.goal_compatibility,
-        verdict=health_report.verdict,
-        verdict_color=health_report.verdict_color,
-        summary=health_report.summary,
-        positive_points=health_report.positive_points,
-        negative_points=health_report.negative_points,
-        recommendations=health_report.recommendations,
-        macro_analysis=health_report.macro_analysis,
-        weekly_impact=health_report.weekly_impact,
-        meal_timing_feedback=health_report.meal_timing_feedback,
-    )
+        # Messages d'erreur plus spécifiques selon le type d'erreur
+        if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
+            detail = "L'analyse a pris trop de temps. Veuillez réessayer avec une image plus petite."
+        elif "401" in error_msg or "403" in error_msg or "authentication" in error_msg.lower():
+            detail = "Erreur d'authentification avec le service IA. Veuillez réessayer plus tard."
+        elif "connection" in error_msg.lower() or "network" in error_msg.lower():
+            detail = "Erreur de connexion au service IA. Veuillez vérifier votre connexion."
+        elif "rate limit" in error_msg.lower() or "429" in error_msg:
+            detail = "Service temporairement surchargé. Veuillez réessayer dans quelques minutes."
+        else:
+            detail = f"Erreur lors de l'analyse: {error_type}"
 
-    return ImageAnalyzeResponse(
-        success=True,
-        description=analysis.description,
-        meal_type=analysis.meal_type or body.meal_type,
-        items=detected_items,
-        total_calories=total_calories,
-        total_protein=round(total_protein, 1),
-        total_carbs=round(total_carbs, 1),
-        total_fat=round(total_fat, 1),
-        confidence=confidence,
-        model_used=model_used,
-        food_log_id=food_log_id,
-        health_report=health_report_response,
-    )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=detail
+        )
 
 
+async def _validate_with_usda(analysis: FoodAnalysis, current_user: User, logger) -> list:
+    """
+    Validation USDA des aliments détectés (les items sont mis à jour en place).
+
+    Returns:
+        aliments validés
+    """
+    # === APPROCHE HYBRIDE: VLM détecte, USDA vérifie/corrige ===
+    # Le VLM est bon pour la détection, mais USDA est plus précis pour la nutrition
+    validated_items = list(analysis.items)
+
+    # === PHASE 1: USDA LOOKUP PRIORITAIRE ===
+    # Si USDA trouve l'aliment, utiliser ses valeurs (95% précision)
+    # Sinon garder l'estimation VLM (déjà corrigée pour les lipides)
+    usda_found_count = 0
+    ai_fallback_count = 0
+
+    try:
+        items_as_dicts = [item.to_dict() for item in validated_items]
+        usda_validated_items = await validate_detected_items_batch(
+            items_as_dicts,
+            language=current_user.preferred_language or "en"
+        )
+
+        # Mettre à jour les items avec les données USDA (PRIORITAIRE)
+        for i, usda_item in enumerate(usda_validated_items):
+            usda_source = usda_item.get("source", "ai_estimated")
+
+            if usda_source in ("usda_verified", "usda_translation"):
+                # USDA trouvé - utiliser ses valeurs (haute confiance)
+                usda_found_count += 1
+
+                # Log la différence entre VLM et USDA pour analyse
+                ai_calories = validated_items[i].calories
+                usda_calories = usda_item.get("calories", 0)
+                diff_percent = abs(ai_calories - usda_calories) / max(usda_calories, 1) * 100
+
+                logger.info(
+                    "usda_override_applied",
+                    food=validated_items[i].name,
+                    ai_calories=ai_calories,
+                    usda_calories=int(usda_calories),
+                    diff_percent=round(diff_percent, 1),
+                    usda_name=usda_item.get("usda_food_name"),
+                )
+
+                # Appliquer les valeurs USDA
+                validated_items[i].calories = int(usda_item.get("calories", validated_items[i].calories))
+                validated_items[i].protein = round(usda_item.get("protein", validated_items[i].protein), 1)
+                validated_items[i].carbs = round(usda_item.get("carbs", validated_items[i].carbs), 1)
+                validated_items[i].fat = round(usda_item.get("fat", validated_items[i].fat), 1)
+                validated_items[i].source = usda_source
+                validated_items[i].needs_verification = False
+                validated_items[i].usda_food_name = usda_item.get("usda_food_name")
+                validated_items[i].original_name = usda_item.get("original_name")
+                validated_items[i].confidence = 0.95  # Haute confiance pour USDA
+            else:
+                # USDA pas trouvé - garder estimation VLM (déjà corrigée)
+                ai_fallback_count += 1
+                validated_items[i].source = "ai_estimated"
+                validated_items[i].needs_verification = validated_items[i].confidence < 0.7
+                validated_items[i].usda_food_name = None
+                validated_items[i].original_name = None
+
+                logger.info(
+                    "ai_estimation_used",
+                    food=validated_items[i].name,
+                    calories=validated_items[i].calories,
+                    confidence=validated_items[i].confidence,
+                    reason="usda_not_found",
+                )
+
+        logger.info(
+            "nutrition_validation_summary",
+            total_items=len(validated_items),
+            usda_found=usda_found_count,
+            ai_fallback=ai_fallback_count,
+            usda_coverage_percent=round(usda_found_count / max(len(validated_items), 1) * 100, 1),
+        )
+
+    except Exception as e:
+        logger.warning("usda_validation_failed", error=str(e))
+        # En cas d'erreur USDA, garder les estimations VLM (déjà corrigées)
+        for item in validated_items:
+            item.source = "ai_estimated"
+            item.needs_verification = item.confidence < 0.7
+
+    return validated_items
+
 @router.post("/logs/save", response_model=FoodLogResponse)
 async def save_analysis(
     body: AnalysisSaveRequest,
@@ -675,12 +912,14 @@ async def save_analysis(
             )
             db.add(food_item)
 
+        # Mettre à jour le résumé journalier (même transaction)
+        await apply_daily_delta(
+            db, current_user.id, food_log.meal_date.date(), NutritionDelta.from_log(food_log)
+        )
         await db.commit()
+        await invalidate_dashboard_insights(current_user.id)
         await db.refresh(food_log)
 
-        # Mettre à jour le résumé journalier
-        await update_daily_nutrition(db, current_user.id, datetime.utcnow().date())
-
         # Recharger avec les items
         query = (
             select(FoodLog)
@@ -753,12 +992,12 @@ async def create_manual_log(
     food_log.total_fiber = total_fiber
     food_log.confidence_score = 1.0
 
+    # Mettre à jour le résumé journalier (même transaction)
+    await apply_daily_delta(db, current_user.id, food_log.meal_date.date(), NutritionDelta.from_log(food_log))
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
     await db.refresh(food_log)
 
-    # Mettre à jour le résumé journalier
-    await update_daily_nutrition(db, current_user.id, datetime.utcnow().date())
-
     # Recharger avec les items
     query = (
         select(FoodLog)
@@ -875,12 +1114,12 @@ async def create_food_log(
     food_log.total_carbs = total_carbs
     food_log.total_fat = total_fat
 
+    # Mettre à jour le résumé journalier (même transaction)
+    await apply_daily_delta(db, current_user.id, food_log.meal_date.date(), NutritionDelta.from_log(food_log))
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
     await db.refresh(food_log)
 
-    # Mettre à jour le résumé journalier
-    await update_daily_nutrition(db, current_user.id, food_log.meal_date.date())
-
     return food_log
 
 
@@ -901,17 +1140,21 @@ async def update_food_log(
     if not food_log:
         raise HTTPException(status_code=404, detail="Log non trouvé")
 
+    before = (food_log.meal_date.date(), NutritionDelta.from_log(food_log))
+
     update_data = data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(food_log, field, value)
 
     food_log.user_corrected = True
+
+    # Mettre à jour le résumé journalier (même transaction)
+    after = (food_log.meal_date.date(), NutritionDelta.from_log(food_log))
+    await apply_log_change(db, current_user.id, before, after)
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
     await db.refresh(food_log)
 
-    # Mettre à jour le résumé journalier
-    await update_daily_nutrition(db, current_user.id, food_log.meal_date.date())
-
     return food_log
 
 
@@ -931,12 +1174,11 @@ async def delete_food_log(
     if not food_log:
         raise HTTPException(status_code=404, detail="Log non trouvé")
 
-    meal_date = food_log.meal_date.date()
+    # Retirer le repas du résumé journalier (même transaction)
+    await apply_daily_delta(db, current_user.id, food_log.meal_date.date(), -NutritionDelta.from_log(food_log))
     await db.delete(food_log)
     await db.commit()
-
-    # Mettre à jour le résumé journalier
-    await update_daily_nutrition(db, current_user.id, meal_date)
+    await invalidate_dashboard_insights(current_user.id)
 
     return {"message": "Log supprimé"}
 
@@ -980,12 +1222,20 @@ async def add_food_item(
     food_log.total_fat = (food_log.total_fat or 0) + (data.fat or 0)
     food_log.user_corrected = True
 
+    # Mettre à jour le résumé journalier (même transaction)
+    await apply_daily_delta(
+        db, current_user.id, food_log.meal_date.date(),
+        NutritionDelta(
+            calories=data.calories or 0,
+            protein=data.protein or 0,
+            carbs=data.carbs or 0,
+            fat=data.fat or 0,
+        ),
+    )
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
     await db.refresh(food_item)
 
-    # Mettre à jour le résumé journalier
-    await update_daily_nutrition(db, current_user.id, food_log.meal_date.date())
-
     return food_item
 
 
@@ -1031,12 +1281,20 @@ async def update_food_item(
     food_log.total_fat = (food_log.total_fat or 0) - old_fat + (food_item.fat or 0)
     food_log.user_corrected = True
 
+    # Mettre à jour le résumé journalier (même transaction)
+    await apply_daily_delta(
+        db, current_user.id, food_log.meal_date.date(),
+        NutritionDelta(
+            calories=(food_item.calories or 0) - old_calories,
+            protein=(food_item.protein or 0) - old_protein,
+            carbs=(food_item.carbs or 0) - old_carbs,
+            fat=(food_item.fat or 0) - old_fat,
+        ),
+    )
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
     await db.refresh(food_item)
 
-    # Mettre à jour le résumé journalier
-    await update_daily_nutrition(db, current_user.id, food_log.meal_date.date())
-
     return food_item
 
 
@@ -1068,12 +1326,19 @@ async def delete_food_item(
     food_log.total_carbs = (food_log.total_carbs or 0) - (food_item.carbs or 0)
     food_log.total_fat = (food_log.total_fat or 0) - (food_item.fat or 0)
 
-    meal_date = food_log.meal_date.date()
+    # Mettre à jour le résumé journalier (même transaction)
+    await apply_daily_delta(
+        db, current_user.id, food_log.meal_date.date(),
+        -NutritionDelta(
+            calories=food_item.calories or 0,
+            protein=food_item.protein or 0,
+            carbs=food_item.carbs or 0,
+            fat=food_item.fat or 0,
+        ),
+    )
     await db.delete(food_item)
     await db.commit()
-
-    # Mettre à jour le résumé journalier
-    await update_daily_nutrition(db, current_user.id, meal_date)
+    await invalidate_dashboard_insights(current_user.id)
 
     return {"message": "Aliment supprimé"}
 
@@ -1206,60 +1471,11 @@ async def add_water(
 
     daily.water_ml = (daily.water_ml or 0) + data.amount_ml
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
 
     return {"water_ml": daily.water_ml}
 
 
-# Helper function
-
-async def update_daily_nutrition(db: AsyncSession, user_id: int, target_date: date):
-    """Met à jour le résumé nutritionnel journalier."""
-    start = datetime.combine(target_date, datetime.min.time())
-    end = datetime.combine(target_date, datetime.max.time())
-
-    # Récupérer tous les logs du jour
-    logs_query = select(FoodLog).where(and_(
-        FoodLog.user_id == user_id,
-        FoodLog.meal_date >= start,
-        FoodLog.meal_date <= end,
-    ))
-    logs_result = await db.execute(logs_query)
-    logs = logs_result.scalars().all()
-
-    # Calculer les totaux
-    total_calories = sum(log.total_calories or 0 for log in logs)
-    total_protein = sum(log.total_protein or 0 for log in logs)
-    total_carbs = sum(log.total_carbs or 0 for log in logs)
-    total_fat = sum(log.total_fat or 0 for log in logs)
-    total_fiber = sum(log.total_fiber or 0 for log in logs)
-    meals_count = len(logs)
-
-    # Récupérer ou créer le résumé journalier
-    daily_query = select(DailyNutrition).where(and_(
-        DailyNutrition.user_id == user_id,
-        DailyNutrition.date >= start,
-        DailyNutrition.date <= end,
-    ))
-    daily_result = await db.execute(daily_query)
-    daily = daily_result.scalar_one_or_none()
-
-    if not daily:
-        daily = DailyNutrition(
-            user_id=user_id,
-            date=datetime.combine(target_date, datetime.min.time()),
-        )
-        db.add(daily)
-
-    daily.total_calories = total_calories
-    daily.total_protein = total_protein
-    daily.total_carbs = total_carbs
-    daily.total_fat = total_fat
-    daily.total_fiber = total_fiber
-    daily.meals_count = meals_count
-
-    await db.commit()
-
-
 # =====================================================
 # RECENT FOODS ENDPOINTS
 # =====================================================
@@ -1462,8 +1678,6 @@ async def search_barcode(
 
     Cette API est gratuite et contient plus de 2 millions de produits.
     """
-    import httpx
-
     # Nettoyer le code-barres (garder seulement les chiffres)
     clean_barcode = "".join(filter(str.isdigit, barcode))
 
@@ -1474,44 +1688,44 @@ async def search_barcode(
         )
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # API Open Food Facts
-            url = f"https://world.openfoodfacts.org/api/v2/product/{clean_barcode}.json"
-            response = await client.get(url, headers={
-                "User-Agent": "NutriProfile/1.0 (contact@nutriprofile.app)"
-            })
-
-            if response.status_code != 200:
-                return BarcodeSearchResponse(
-                    found=False,
-                    barcode=clean_barcode,
-                )
-
-            data = response.json()
-
-            if data.get("status") != 1 or "product" not in data:
-                return BarcodeSearchResponse(
-                    found=False,
-                    barcode=clean_barcode,
-                )
+        client = get_http_client(OPENFOODFACTS)
+        # API Open Food Facts
+        url = f"https://world.openfoodfacts.org/api/v2/product/{clean_barcode}.json"
+        response = await client.get(url, timeout=10.0, headers={
+            "User-Agent": "NutriProfile/1.0 (contact@nutriprofile.app)"
+        })
+
+        if response.status_code != 200:
+            return BarcodeSearchResponse(
+                found=False,
+                barcode=clean_barcode,
+            )
 
-            product = data["product"]
-            nutriments = product.get("nutriments", {})
+        data = response.json()
 
-            # Extraire les valeurs nutritionnelles pour 100g
+        if data.get("status") != 1 or "product" not in data:
             return BarcodeSearchResponse(
-                found=True,
+                found=False,
                 barcode=clean_barcode,
-                product_name=product.get("product_name") or product.get("product_name_en"),
-                brand=product.get("brands"),
-                serving_size=product.get("serving_size"),
-                calories=int(nutriments.get("energy-kcal_100g", 0)) or int(nutriments.get("energy_100g", 0) / 4.184) if nutriments.get("energy_100g") else None,
-                protein=round(nutriments.get("proteins_100g", 0), 1) or None,
-                carbs=round(nutriments.get("carbohydrates_100g", 0), 1) or None,
-                fat=round(nutriments.get("fat_100g", 0), 1) or None,
-                fiber=round(nutriments.get("fiber_100g", 0), 1) if nutriments.get("fiber_100g") else None,
-                image_url=product.get("image_front_url") or product.get("image_url"),
             )
+
+        product = data["product"]
+        nutriments = product.get("nutriments", {})
+
+        # Extraire les valeurs nutritionnelles pour 100g
+        return BarcodeSearchResponse(
+            found=True,
+            barcode=clean_barcode,
+            product_name=product.get("product_name") or product.get("product_name_en"),
+            brand=product.get("brands"),
+            serving_size=product.get("serving_size"),
+            calories=int(nutriments.get("energy-kcal_100g", 0)) or int(nutriments.get("energy_100g", 0) / 4.184) if nutriments.get("energy_100g") else None,
+            protein=round(nutriments.get("proteins_100g", 0), 1) or None,
+            carbs=round(nutriments.get("carbohydrates_100g", 0), 1) or None,
+            fat=round(nutriments.get("fat_100g", 0), 1) or None,
+            fiber=round(nutriments.get("fiber_100g", 0), 1) if nutriments.get("fiber_100g") else None,
+            image_url=product.get("image_front_url") or product.get("image_url"),
+        )
     except Exception as e:
         print(f"Erreur Open Food Facts: {e}")
         return BarcodeSearchResponse(
@@ -1637,12 +1851,12 @@ async def log_favorite_meal(
     favorite.use_count += 1
     favorite.updated_at = datetime.utcnow()
 
+    # Mettre à jour le résumé journalier (même transaction)
+    await apply_daily_delta(db, current_user.id, food_log.meal_date.date(), NutritionDelta.from_log(food_log))
     await db.commit()
+    await invalidate_dashboard_insights(current_user.id)
     await db.refresh(food_log)
 
-    # Mettre à jour le résumé journalier
-    await update_daily_nutrition(db, current_user.id, datetime.utcnow().date())
-
     # Recharger avec les items
     query = (
         select(FoodLog)
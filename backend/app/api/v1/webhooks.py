@@ -9,7 +9,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.config import get_settings
-from app.services.subscription import SubscriptionService
+from app.core.cache import bump_user_tier_epoch
+from app.services.subscription import SubscriptionService, invalidate_committed_principals
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 logger = logging.getLogger(__name__)
@@ -43,6 +44,21 @@ def verify_lemonsqueezy_signature(body: bytes, signature: str) -> bool:
     return hmac.compare_digest(signature, expected)
 
 
+async def refresh_user_tier(user_id: str | int | None, db: AsyncSession) -> None:
+    """
+    Valide les changements du webhook puis change l'époque du cache de tier
+    et invalide les principals (get_current_user) des utilisateurs modifiés.
+
+    Invalidation après le commit: une requête concurrente ne peut pas
+    remettre en cache un tier lu avant la mise à jour.
+    """
+    if not user_id:
+        return
+    await db.commit()
+    await bump_user_tier_epoch(int(user_id))
+    await invalidate_committed_principals(db)
+
+
 def get_tier_from_variant(variant_id: str) -> str:
     """Retourne le tier correspondant à un variant_id Lemon Squeezy."""
     return LEMONSQUEEZY_VARIANT_TO_TIER.get(str(variant_id), "free")
@@ -115,6 +131,7 @@ async def lemonsqueezy_webhook(
     if handler:
         try:
             await handler(data, attributes, custom_data, db)
+            await refresh_user_tier(custom_data.get("user_id"), db)
             logger.info(f"Successfully processed Lemon Squeezy webhook: {event_name}")
         except Exception as e:
             logger.error(f"Error processing Lemon Squeezy webhook {event_name}: {e}")
@@ -441,6 +458,7 @@ async def paddle_webhook(
     if handler:
         try:
             await handler(data, db)
+            await refresh_user_tier(data.get("custom_data", {}).get("user_id"), db)
             logger.info(f"Successfully processed webhook: {event_type}")
         except Exception as e:
             logger.error(f"Error processing webhook {event_type}: {e}")
@@ -20,6 +20,16 @@ class Settings(BaseSettings):
     # Database (SQLite par defaut, configurable via .env)
     DATABASE_URL: str = "sqlite+aiosqlite:///./data/nutriprofile.db"
 
+    # Pool de connexions PostgreSQL (ignoré pour SQLite)
+    DB_POOL_MODE: str = "queue"  # "queue" (pool) ou "null" (une connexion par session)
+    DB_POOL_SIZE: int = 5  # Connexions gardées ouvertes par worker
+    DB_POOL_MAX_OVERFLOW: int = 10  # Connexions supplémentaires en pic
+    DB_POOL_TIMEOUT: float = 10.0  # Attente max d'une connexion libre (secondes)
+    DB_POOL_RECYCLE: int = 1800  # Remplace les connexions plus vieilles (secondes)
+    DB_POOL_PRE_PING: bool = True  # Vérifie la connexion avant usage (coupures Fly.io)
+    DB_POOL_IDLE_TIMEOUT: float = 240.0  # Remplace les connexions inactives depuis (secondes, 0 = off)
+    DB_PGBOUNCER: bool = False  # Derrière PgBouncer (mode transaction): pas de cache de requêtes préparées
+
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     REFRESH_SECRET_KEY: str = "your-refresh-secret-key-change-in-production"
@@ -27,11 +37,126 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7  # Refresh token (7 jours)
     ALGORITHM: str = "HS256"
 
+    # Redis (cache partagé entre workers, fallback mémoire si vide)
+    REDIS_URL: str = ""
+
     # Hugging Face
     HUGGINGFACE_TOKEN: str = ""
 
+    # Cache des réponses LLM (opt-in par agent, cf. app.llm.response_cache)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_BACKEND: str = "redis"  # "redis" (cache partagé, mémoire si pas de Redis) ou "disk"
+    LLM_CACHE_DIR: str = "data/llm_cache"  # Backend "disk"
+    LLM_CACHE_DEFAULT_TTL: int = 3600
+    LLM_CACHE_TTLS: dict[str, int] = {  # Par namespace (capacité de l'agent ou service)
+        "food_detection": 7 * 24 * 3600,  # Même photo, même analyse
+        "nutrition_estimation": 7 * 24 * 3600,
+        "translation": 30 * 24 * 3600,
+        "voice_parsing": 24 * 3600,
+        "profiling": 24 * 3600,
+        "coaching": 30 * 60,  # Même prompt = mêmes stats et même moment de la journée
+    }
+
+    # Gouverneur de concurrence LLM (cf. app.llm.governor), par worker
+    LLM_MAX_CONCURRENCY_PER_MODEL: int = 8  # Appels simultanés vers un même modèle
+    LLM_MODEL_CONCURRENCY: dict[str, int] = {}  # Surcharges par modèle ({"Qwen/...": 4})
+    LLM_QUEUE_BUDGETS: dict[str, float] = {  # Attente max en file avant délestage (secondes)
+        "vision": 20.0,
+        "coach": 10.0,
+        "batch": 5.0,  # Délesté en premier: fallback déterministe par jour
+    }
+
+    # Santé des modèles LLM (cf. app.llm.model_health), partagée via Redis
+    LLM_HEALTH_EWMA_ALPHA: float = 0.2  # Poids du dernier appel dans les moyennes mobiles
+    LLM_BREAKER_FAILURES: int = 3  # Échecs consécutifs qui ouvrent le circuit
+    LLM_BREAKER_ERROR_RATE: float = 0.5  # Taux d'erreur (EWMA) qui ouvre le circuit
+    LLM_BREAKER_MIN_CALLS: int = 10  # Appels min avant d'appliquer le taux d'erreur
+    LLM_BREAKER_COOLDOWN: float = 30.0  # Secondes d'ouverture avant de réessayer le modèle
+    LLM_BREAKER_PROBE_TTL: float = 30.0  # Semi-ouvert: durée max d'une sonde avant d'en admettre une autre
+    LLM_HEALTH_SYNC_INTERVAL: float = 2.0  # Relecture max de l'état partagé (secondes)
+
+    # Pool HTTP partagé (HuggingFace, USDA, OpenFoodFacts, Lemon Squeezy)
+    HTTP_POOL_MAX_CONNECTIONS: int = 20  # Connexions max par service/hôte
+    HTTP_POOL_MAX_KEEPALIVE: int = 10  # Connexions keep-alive conservées par hôte
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = 30.0  # Secondes avant fermeture d'une connexion inactive
+    HTTP_POOL_CONNECT_TIMEOUT: float = 5.0
+    HTTP_POOL_ACQUIRE_TIMEOUT: float = 10.0  # Attente max d'une connexion libre dans le pool
+    HTTP_POOL_HTTP2: bool = True  # Nécessite httpx[http2]
+
     # USDA FoodData Central API
     USDA_API_KEY: str = ""
+    USDA_BACKEND: str = "api"  # "api" (FoodData Central) ou "local" (miroir SQLite)
+    USDA_LOCAL_DB_PATH: str = "data/usda_foods.db"  # Construit par scripts/load_usda_local.py
+    USDA_BATCH_CONCURRENCY: int = 6  # Validations USDA simultanées par analyse photo
+    USDA_ITEM_TIMEOUT: float = 8.0  # Timeout par aliment (secondes), résultat partiel au-delà
+    USDA_CACHE_MAX_ENTRIES: int = 5000  # Entrées du LRU en mémoire (par worker)
+    USDA_CACHE_TTL: int = 7 * 24 * 3600  # Résultats trouvés (7 jours)
+    USDA_CACHE_NEGATIVE_TTL: int = 3600  # Résultats vides (1 heure)
+
+    # Prétraitement des photos avant le VLM (cf. app.services.image_preprocessing)
+    VISION_IMAGE_MAX_SIDE: int = 1024  # Plus grand côté envoyé au VLM (px)
+    VISION_IMAGE_FORMAT: str = "jpeg"  # "jpeg" ou "webp"
+    VISION_IMAGE_QUALITY: int = 85
+    VISION_MAX_IMAGE_BYTES: int = 20 * 1024 * 1024  # Image décodée max acceptée
+    VISION_PREPROCESS_THREADS: int = 2  # Pool de threads dédié (CPU)
+
+    # Déduplication perceptuelle des photos (/vision/analyze)
+    PHOTO_DEDUP_ENABLED: bool = True
+    PHOTO_DEDUP_MAX_DISTANCE: int = 6  # Distance de Hamming max entre dHash 64 bits
+    PHOTO_DEDUP_TTL: int = 24 * 3600  # Durée de réutilisation d'une analyse
+    PHOTO_DEDUP_MAX_PER_USER: int = 20  # Analyses récentes indexées par utilisateur
+    PHOTO_DEDUP_GLOBAL: bool = False  # Réutiliser aussi les analyses des autres utilisateurs
+
+    # Résumés DailyNutrition (mis à jour par deltas, réconciliés périodiquement)
+    DAILY_NUTRITION_RECONCILE_INTERVAL: int = 6 * 3600  # Secondes entre deux réconciliations (0 = désactivé)
+    DAILY_NUTRITION_RECONCILE_DAYS: int = 7  # Jours vérifiés à chaque passage
+
+    # Quotas d'usage (vérification + incrément atomiques Redis, écriture différée en base)
+    USAGE_QUOTA_FLUSH_INTERVAL: float = 5.0  # Secondes entre deux écritures groupées dans usage_tracking
+
+    # Coach et personnalisation du dashboard (stale-while-revalidate)
+    DASHBOARD_INSIGHTS_TTL: int = 30 * 60  # Fraîcheur d'un résultat LLM (même digest)
+    DASHBOARD_INSIGHTS_DEGRADED_TTL: int = 120  # Fraîcheur d'un fallback (agent en échec)
+    DASHBOARD_INSIGHTS_MAX_STALE: int = 24 * 3600  # Durée de conservation d'un résultat périmé
+    DASHBOARD_INSIGHTS_AGENT_TIMEOUT: float = 20.0  # Timeout par agent, en tâche de fond
+
+    # Cache de l'utilisateur authentifié (get_current_user)
+    USER_CACHE_MAX_ENTRIES: int = 10000  # Entrées du LRU en mémoire (par worker)
+    USER_CACHE_TTL: int = 60  # Cache partagé (Redis), invalidé explicitement
+    USER_CACHE_LOCAL_TTL: int = 15  # LRU local: borne la latence d'invalidation entre workers
+
+    # Rate limiting des endpoints IA (token bucket par utilisateur, coût par endpoint)
+    RATE_LIMIT_AI_TOKENS_PER_MINUTE: int = 60  # Recharge continue du bucket
+    RATE_LIMIT_AI_BURST: int = 60  # Capacité (rafale maximale)
+    RATE_LIMIT_COSTS: dict[str, float] = {  # Coût d'un appel, en tokens
+        "vision": 6,  # 1 à 2 passes VLM
+        "recipe": 12,
+        "coach": 3,
+        "meal_plan": 24,  # 1 appel LLM par jour du plan
+    }
+
+    # Cache du tier effectif (versionné par une époque, changée par les webhooks de paiement)
+    TIER_CACHE_TTL: int = 6 * 3600
+    TIER_CACHE_TTL_LOCAL: int = 5 * 60  # Sans Redis: l'époque n'est pas partagée entre workers
+
+    # Cache des traductions d'aliments (NLLB / LLM)
+    TRANSLATION_CACHE_MAX_ENTRIES: int = 10000  # Entrées du LRU en mémoire (par worker)
+    TRANSLATION_CACHE_TTL: int = 30 * 24 * 3600  # 30 jours
+    TRANSLATION_CACHE_SHARED: bool = True  # Partage via Redis (app.core.cache)
+    NLLB_BACKEND: str = "remote"  # "remote" (HuggingFace) ou "local" (CPU, transformers)
+    NLLB_LOCAL_MODEL: str = "facebook/nllb-200-distilled-600M"
+    NLLB_LOCAL_QUANTIZE: bool = True  # Quantification int8 dynamique (torch)
+    NLLB_LOCAL_ONNX: bool = False  # Export ONNX (nécessite optimum[onnxruntime])
+    NLLB_LOCAL_THREADS: int = 1  # Threads d'inférence (hors event loop)
+    NLLB_LOCAL_RETRY_INTERVAL: float = 300.0  # Délai avant de retenter un chargement échoué (secondes)
+    NLLB_BATCH_WINDOW_MS: int = 20  # Fenêtre de regroupement des traductions manquantes
+    NLLB_BATCH_MAX_SIZE: int = 16  # Textes max par appel d'inférence
+
+    # Index d'embeddings USDA (recherche sémantique)
+    FOOD_INDEX_PATH: str = "usda_embeddings_index"  # Répertoire de l'index memory-mappé
+    FOOD_INDEX_MODE: str = "exact"  # "exact" ou "ivf" (approximatif, plus rapide)
+    FOOD_INDEX_IVF_LISTS: int = 0  # Nombre de clusters IVF (0 = auto, ~sqrt(N))
+    FOOD_INDEX_IVF_NPROBE: int = 8  # Clusters parcourus par requête (rappel vs latence)
 
     # Paddle (Payment Gateway - Merchant of Record) - DEPRECATED, use Lemon Squeezy
     PADDLE_API_KEY: str = ""
@@ -5,6 +5,8 @@ Provides simple caching for frequently accessed data with TTL support.
 import logging
 import json
 import hashlib
+import time
+from collections import OrderedDict
 from typing import Any, Optional, Callable
 from functools import wraps
 from datetime import timedelta
@@ -165,6 +167,54 @@ class MemoryCache(CacheBackend):
         return len(keys_to_delete)
 
 
+class LRUCache:
+    """
+    Bounded in-process cache with per-entry TTL and least-recently-used eviction.
+
+    Synchronous, used as a first tier in front of the shared Cache.
+    """
+
+    def __init__(self, max_entries: int, ttl: int = 300):
+        """Initialize with a size cap and a default TTL in seconds."""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        """Get value (None if missing or expired) and mark it recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set value, evicting the least recently used entries above the cap."""
+        self._entries[key] = (value, time.monotonic() + (ttl if ttl is not None else self.ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        """Delete key."""
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+    def keys(self) -> list[str]:
+        """Current keys (may include expired entries not yet evicted)."""
+        return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class Cache:
     """
     Main cache interface with automatic fallback.
@@ -342,12 +392,28 @@ def cached(
 
 # Invalidation helpers
 
+async def get_user_tier_epoch(user_id: int) -> int:
+    """Current tier cache epoch for a user (0 until the first invalidation)."""
+    return await get_cache().get(tier_epoch_key(user_id), 0)
+
+
+async def bump_user_tier_epoch(user_id: int) -> int:
+    """
+    Move a user's tier cache to a new epoch.
+
+    Entries cached under the previous epoch are no longer read and simply
+    expire, so no key scan is needed. The epoch outlives the tier entries
+    (2x TTL): once it expires, every entry of an older epoch is gone too.
+    """
+    epoch = time.time_ns()
+    await get_cache().set(tier_epoch_key(user_id), epoch, ttl=2 * settings.TIER_CACHE_TTL)
+    return epoch
+
+
 async def invalidate_user_tier_cache(user_id: int) -> None:
     """Invalidate tier cache for a user (after subscription change)."""
-    cache = get_cache()
-    pattern = f"user_tier:{user_id}:*"
-    deleted = await cache.clear_pattern(pattern)
-    logger.info(f"Invalidated {deleted} tier cache entries for user {user_id}")
+    epoch = await bump_user_tier_epoch(user_id)
+    logger.info(f"Invalidated tier cache for user {user_id} (epoch {epoch})")
 
 
 async def invalidate_pricing_cache() -> None:
@@ -359,9 +425,16 @@ async def invalidate_pricing_cache() -> None:
 
 # Predefined cache keys
 
-def tier_cache_key(user_id: int) -> str:
-    """Generate cache key for user tier."""
-    return Cache.make_key("user_tier", str(user_id))
+def tier_cache_key(user_id: int, epoch: int = 0) -> str:
+    """Generate cache key for user tier, scoped to the user's tier epoch."""
+    if not epoch:
+        return Cache.make_key("user_tier", str(user_id))
+    return Cache.make_key("user_tier", str(user_id), str(epoch))
+
+
+def tier_epoch_key(user_id: int) -> str:
+    """Generate cache key for a user's tier cache epoch."""
+    return Cache.make_key("user_tier_epoch", str(user_id))
 
 
 def pricing_cache_key() -> str:
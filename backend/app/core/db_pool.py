@@ -0,0 +1,208 @@
+"""
+Database connection pool configuration and metrics.
+
+PostgreSQL uses a real connection pool (DB_POOL_MODE="queue") instead of
+opening a new asyncpg connection (TCP + auth handshake) for every session.
+Connections are health-checked so pooled connections survive Fly.io closing
+idle connections:
+
+- pool_pre_ping: test a connection before handing it out
+- pool_recycle: replace connections older than DB_POOL_RECYCLE
+- idle timeout: drop connections unused for DB_POOL_IDLE_TIMEOUT on checkout
+
+DB_PGBOUNCER=True makes the engine safe behind PgBouncer in transaction mode
+(no asyncpg statement cache, unique prepared statement names).
+
+Connection-acquire latency is measured in the pool and exposed through
+get_db_pool_metrics().
+"""
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+logger = logging.getLogger(__name__)
+
+POOL_MODE_QUEUE = "queue"
+POOL_MODE_NULL = "null"
+
+# Number of recent acquire timings kept for percentiles
+LATENCY_WINDOW = 1000
+
+
+@dataclass
+class PoolMetrics:
+    """Counters for connection checkout and lifecycle."""
+
+    acquires: int = 0
+    acquire_errors: int = 0
+    total_acquire_ms: float = 0.0
+    max_acquire_ms: float = 0.0
+    connects: int = 0
+    idle_discards: int = 0
+    invalidations: int = 0
+    recent_ms: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record_acquire(self, elapsed_ms: float) -> None:
+        """Record one successful checkout."""
+        self.acquires += 1
+        self.total_acquire_ms += elapsed_ms
+        self.max_acquire_ms = max(self.max_acquire_ms, elapsed_ms)
+        self.recent_ms.append(elapsed_ms)
+
+    def as_dict(self) -> dict:
+        """Serialize counters with average and recent percentiles."""
+        recent = sorted(self.recent_ms)
+
+        def percentile(p: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 2)
+
+        return {
+            "acquires": self.acquires,
+            "acquire_errors": self.acquire_errors,
+            "avg_acquire_ms": round(self.total_acquire_ms / self.acquires, 2) if self.acquires else 0.0,
+            "p50_acquire_ms": percentile(0.50),
+            "p95_acquire_ms": percentile(0.95),
+            "max_acquire_ms": round(self.max_acquire_ms, 2),
+            "connects": self.connects,
+            "idle_discards": self.idle_discards,
+            "invalidations": self.invalidations,
+        }
+
+
+class MeteredAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long a checkout waits."""
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self) -> "MeteredAsyncQueuePool":
+        """Keep metrics across pool recreation (engine.dispose())."""
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.acquire_errors += 1
+            raise
+        self.metrics.record_acquire((time.perf_counter() - start) * 1000)
+        return connection
+
+
+def build_engine_kwargs(database_url: str, settings: Any) -> dict:
+    """
+    Engine options for the configured database.
+
+    Args:
+        database_url: Async database URL (postgresql+asyncpg:// or sqlite+aiosqlite://)
+        settings: Application settings
+
+    Returns:
+        Keyword arguments for create_async_engine
+    """
+    kwargs: dict[str, Any] = {"echo": settings.DEBUG}
+
+    if database_url.startswith("sqlite"):
+        # SQLite needs check_same_thread=False for async
+        kwargs["connect_args"] = {"check_same_thread": False}
+        return kwargs
+
+    # Disable SSL for Fly.io internal connections (asyncpg uses ssl=False)
+    connect_args: dict[str, Any] = {"ssl": False}
+
+    if settings.DB_PGBOUNCER:
+        # PgBouncer (transaction mode) cannot keep prepared statements per connection
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+
+    kwargs["connect_args"] = connect_args
+
+    if settings.DB_POOL_MODE == POOL_MODE_NULL:
+        # One connection per session (previous behaviour)
+        kwargs["poolclass"] = NullPool
+        return kwargs
+
+    kwargs.update(
+        poolclass=MeteredAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        # LIFO keeps the working set small so surplus connections go idle and expire
+        pool_use_lifo=True,
+    )
+    return kwargs
+
+
+def install_pool_events(engine: AsyncEngine, idle_timeout: float) -> None:
+    """
+    Count connects/invalidations and discard connections idle too long.
+
+    Args:
+        engine: Async engine using MeteredAsyncQueuePool
+        idle_timeout: Seconds after which an idle pooled connection is replaced (0 = off)
+    """
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, MeteredAsyncQueuePool):
+        return
+    metrics = pool.metrics
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+        connection_record.info["last_checkin"] = time.monotonic()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.info["last_checkin"] = time.monotonic()
+
+    @event.listens_for(engine.sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    if idle_timeout > 0:
+        @event.listens_for(engine.sync_engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            last_checkin = connection_record.info.get("last_checkin")
+            if last_checkin is not None and time.monotonic() - last_checkin > idle_timeout:
+                metrics.idle_discards += 1
+                # The pool retries the checkout with a fresh connection
+                raise exc.DisconnectionError("connection idle longer than DB_POOL_IDLE_TIMEOUT")
+
+
+def get_db_pool_metrics(engine: AsyncEngine) -> dict:
+    """
+    Snapshot of pool state and acquire latency.
+
+    Returns:
+        Dict with pool class, size/usage counters and acquire timings
+    """
+    pool = engine.sync_engine.pool
+    data: dict[str, Any] = {"pool": type(pool).__name__}
+
+    if isinstance(pool, MeteredAsyncQueuePool):
+        data.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            **pool.metrics.as_dict(),
+        )
+    return data
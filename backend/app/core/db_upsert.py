@@ -0,0 +1,20 @@
+"""
+Dialect-specific INSERT constructs for upserts (INSERT ... ON CONFLICT).
+
+PostgreSQL in production, SQLite in tests and local development: both
+dialects expose an `insert()` with `on_conflict_do_update`, but the generic
+sqlalchemy.insert does not.
+"""
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def upsert_insert_for(db: AsyncSession):
+    """Return the `insert` construct supporting ON CONFLICT for the session's dialect."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return pg_insert
+    if dialect == "sqlite":
+        return sqlite_insert
+    raise NotImplementedError(f"Upsert not supported for {dialect}")
@@ -0,0 +1,200 @@
+"""
+Shared pooled HTTP clients for outbound integrations.
+
+One long-lived httpx.AsyncClient per upstream service (HuggingFace, USDA,
+OpenFoodFacts, Lemon Squeezy) so TCP+TLS connections are reused across
+requests instead of being re-established on every call. Each service gets
+its own connection pool, which gives per-host connection limits.
+
+Clients are created lazily on first use and closed in the app lifespan
+(see close_http_clients). Per-call timeouts can still be passed to
+client.get/post; the defaults below apply otherwise.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# HTTP/2 requires the optional "h2" package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Service names
+HUGGINGFACE = "huggingface"
+USDA = "usda"
+OPENFOODFACTS = "openfoodfacts"
+LEMONSQUEEZY = "lemonsqueezy"
+
+# Default read timeout per service (seconds). Vision calls override per request.
+SERVICE_TIMEOUTS: dict[str, float] = {
+    HUGGINGFACE: 60.0,
+    USDA: 10.0,
+    OPENFOODFACTS: 10.0,
+    LEMONSQUEEZY: 30.0,
+}
+
+DEFAULT_TIMEOUT = 30.0
+
+
+@dataclass
+class PoolStats:
+    """Request counters for one service pool."""
+
+    requests: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    total_time_ms: float = 0.0
+    created_at: float = field(default_factory=time.time)
+
+    def as_dict(self) -> dict:
+        """Serialize counters (average latency is up to response headers)."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "avg_time_ms": round(self.total_time_ms / self.requests, 1) if self.requests else 0.0,
+            "uptime_s": round(time.time() - self.created_at, 1),
+        }
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper counting requests and in-flight calls for a pool."""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: PoolStats):
+        self._transport = transport
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Delegate to the pooled transport while recording metrics."""
+        self.stats.requests += 1
+        self.stats.in_flight += 1
+        self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+        start = time.perf_counter()
+        try:
+            return await self._transport.handle_async_request(request)
+        except Exception:
+            self.stats.errors += 1
+            raise
+        finally:
+            self.stats.in_flight -= 1
+            self.stats.total_time_ms += (time.perf_counter() - start) * 1000
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool."""
+        await self._transport.aclose()
+
+    def connection_counts(self) -> dict:
+        """Open/idle connection counts from the underlying httpcore pool."""
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = 0
+        for connection in connections:
+            try:
+                if connection.is_idle():
+                    idle += 1
+            except Exception:
+                pass
+        return {"open_connections": len(connections), "idle_connections": idle}
+
+
+_clients: dict[str, httpx.AsyncClient] = {}
+_transports: dict[str, MeteredTransport] = {}
+
+
+def _build_client(service: str) -> httpx.AsyncClient:
+    """Create the pooled client for a service from settings."""
+    http2 = settings.HTTP_POOL_HTTP2 and HTTP2_AVAILABLE
+    if settings.HTTP_POOL_HTTP2 and not HTTP2_AVAILABLE:
+        logger.warning("h2 not installed, HTTP pool falling back to HTTP/1.1")
+
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        SERVICE_TIMEOUTS.get(service, DEFAULT_TIMEOUT),
+        connect=settings.HTTP_POOL_CONNECT_TIMEOUT,
+        pool=settings.HTTP_POOL_ACQUIRE_TIMEOUT,
+    )
+
+    transport = MeteredTransport(
+        httpx.AsyncHTTPTransport(limits=limits, http2=http2, retries=1),
+        PoolStats(),
+    )
+    _transports[service] = transport
+
+    logger.info(
+        f"HTTP pool created for {service} "
+        f"(max_connections={limits.max_connections}, http2={http2})"
+    )
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+def get_http_client(service: str) -> httpx.AsyncClient:
+    """
+    Get the shared pooled client for an upstream service.
+
+    Args:
+        service: Service name (HUGGINGFACE, USDA, OPENFOODFACTS, LEMONSQUEEZY)
+
+    Returns:
+        Long-lived httpx.AsyncClient (never close it directly)
+    """
+    client = _clients.get(service)
+    if client is None or client.is_closed:
+        client = _build_client(service)
+        _clients[service] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close all pooled clients (called on app shutdown)."""
+    for service, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing HTTP pool {service}: {e}")
+    _clients.clear()
+    _transports.clear()
+
+
+def get_http_pool_metrics() -> dict:
+    """
+    Snapshot of pool usage per service, for sizing under load.
+
+    Returns:
+        Dict with settings and per-service request/connection counters
+    """
+    services: dict[str, dict] = {}
+    for service, transport in _transports.items():
+        services[service] = {
+            **transport.stats.as_dict(),
+            **transport.connection_counts(),
+        }
+
+    return {
+        "max_connections_per_host": settings.HTTP_POOL_MAX_CONNECTIONS,
+        "max_keepalive_per_host": settings.HTTP_POOL_MAX_KEEPALIVE,
+        "http2": settings.HTTP_POOL_HTTP2 and HTTP2_AVAILABLE,
+        "services": services,
+    }
+
+
+def get_service_stats(service: str) -> Optional[PoolStats]:
+    """Raw counters for one service (None if its pool was never used)."""
+    transport = _transports.get(service)
+    return transport.stats if transport else None
@@ -1,7 +1,20 @@
 """
 Rate limiting configuration for NutriProfile API.
 Uses slowapi with Redis backend for production.
+
+Two layers:
+- slowapi sliding window (moving-window) for the general per-client limit
+- a cost-weighted token bucket per user for the expensive LLM endpoints
+  (VISION_LIMIT, RECIPE_LIMIT, COACH_LIMIT, MEAL_PLAN_LIMIT), so AI calls draw from their own
+  budget and never throttle cheap reads
 """
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from jose import JWTError, jwt
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -10,7 +23,9 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
 from app.config import get_settings
+from app.core.cache import Cache, REDIS_AVAILABLE, redis
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
@@ -23,16 +38,36 @@ def get_user_identifier(request: Request) -> str:
     if hasattr(request.state, "user_id") and request.state.user_id:
         return f"user:{request.state.user_id}"
 
+    # Middleware limits run before auth dependencies: use the token subject
+    subject = _token_subject(request)
+    if subject:
+        return f"user:{Cache.hash_key(subject)}"
+
     # Fall back to IP address
     return get_remote_address(request)
 
 
+def _token_subject(request: Request) -> Optional[str]:
+    """Subject of a valid bearer access token, if any."""
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type", "access") != "access":
+        return None
+    return payload.get("sub")
+
+
 # Create limiter with Redis storage in production
 limiter = Limiter(
     key_func=get_user_identifier,
     default_limits=["100/minute"],  # Default rate limit
     storage_uri=settings.REDIS_URL if hasattr(settings, 'REDIS_URL') and settings.REDIS_URL else "memory://",
-    strategy="fixed-window",
+    strategy="moving-window",  # Sliding window: no 2x burst at window edges
     headers_enabled=True,  # Add X-RateLimit headers to responses
 )
 
@@ -40,20 +75,160 @@ limiter = Limiter(
 # Rate limit decorators for different endpoints
 # These can be imported and used as decorators on endpoint functions
 
-# Vision analysis - expensive AI operation
-VISION_LIMIT = "10/minute"
+# Authentication - prevent brute force
+AUTH_LIMIT = "5/minute"
+
+# General API - standard limit
+GENERAL_LIMIT = "100/minute"
+
+
+@dataclass(frozen=True)
+class CostClass:
+    """Weight of an endpoint in the per-user AI token bucket."""
+    name: str
+    cost: float
+
+
+# AI endpoints: cost in tokens of RATE_LIMIT_AI_TOKENS_PER_MINUTE
+# (defaults: 10 vision, 5 recipe, 20 coach or 2 meal plan calls per minute, shared budget)
+# Vision analysis - expensive AI operation (up to 2 VLM passes)
+VISION_LIMIT = CostClass("vision", settings.RATE_LIMIT_COSTS["vision"])
 
 # Recipe generation - expensive AI operation
-RECIPE_LIMIT = "5/minute"
+RECIPE_LIMIT = CostClass("recipe", settings.RATE_LIMIT_COSTS["recipe"])
 
 # Coach messages - moderate AI operation
-COACH_LIMIT = "20/minute"
+COACH_LIMIT = CostClass("coach", settings.RATE_LIMIT_COSTS["coach"])
+
+# Meal plan generation - one LLM call per planned day
+MEAL_PLAN_LIMIT = CostClass("meal_plan", settings.RATE_LIMIT_COSTS["meal_plan"])
+
+
+# KEYS[1] = bucket hash; ARGV = capacity, refill tokens/second, cost
+# Returns {allowed (0/1), retry after in ms}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {allowed, retry}
+"""
 
-# Authentication - prevent brute force
-AUTH_LIMIT = "5/minute"
 
-# General API - standard limit
-GENERAL_LIMIT = "100/minute"
+class TokenBucketLimiter:
+    """
+    Per-user token bucket with cost-weighted requests.
+
+    Tokens refill continuously (no window edges). Shared through Redis when
+    configured; falls back to per-worker buckets if Redis is unavailable.
+    """
+
+    MAX_LOCAL_BUCKETS = 10000
+
+    def __init__(self, tokens_per_minute: float, burst: float, redis_url: str = ""):
+        self.capacity = float(burst)
+        self.rate = tokens_per_minute / 60.0
+        self.redis_url = redis_url if REDIS_AVAILABLE else ""
+        self._client = None
+        self._script = None
+        self._local: dict[str, tuple[float, float]] = {}
+        self._stats = {"allowed": 0, "limited": 0, "redis_errors": 0}
+
+    async def _get_client(self):
+        if self._client is None:
+            client = redis.from_url(
+                self.redis_url,
+                encoding="utf-8",
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5,
+            )
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            self._client = client
+        return self._client
+
+    def _acquire_local(self, key: str, cost: float) -> tuple[bool, float]:
+        now = time.monotonic()
+        if len(self._local) >= self.MAX_LOCAL_BUCKETS:
+            # Buckets idle long enough to be full again carry no state
+            full_after = self.capacity / self.rate
+            self._local = {k: v for k, v in self._local.items() if now - v[1] < full_after}
+        tokens, ts = self._local.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - ts) * self.rate)
+        if tokens >= cost:
+            self._local[key] = (tokens - cost, now)
+            return True, 0.0
+        self._local[key] = (tokens, now)
+        return False, (cost - tokens) / self.rate
+
+    async def acquire(self, identifier: str, cost_class: CostClass) -> tuple[bool, float]:
+        """
+        Take cost_class.cost tokens from the identifier's bucket.
+
+        Returns:
+            (allowed, retry_after_seconds)
+        """
+        key = f"ratelimit:ai:{identifier}"
+        cost = min(cost_class.cost, self.capacity)
+        result = None
+        if self.redis_url:
+            try:
+                await self._get_client()
+                allowed, retry_ms = await self._script(keys=[key], args=[self.capacity, self.rate, cost])
+                result = bool(int(allowed)), int(retry_ms) / 1000.0
+            except Exception as e:
+                self._stats["redis_errors"] += 1
+                logger.warning(f"Rate limiter Redis error, using local bucket: {e}")
+        if result is None:
+            result = self._acquire_local(key, cost)
+
+        self._stats["allowed" if result[0] else "limited"] += 1
+        return result
+
+    def get_stats(self) -> dict:
+        """Counters for the health endpoint."""
+        return {
+            "backend": "redis" if self.redis_url else "memory",
+            "capacity": self.capacity,
+            "tokens_per_minute": self.rate * 60,
+            "local_buckets": len(self._local),
+            **self._stats,
+        }
+
+
+_ai_limiter: Optional[TokenBucketLimiter] = None
+
+
+def get_ai_limiter() -> TokenBucketLimiter:
+    """Get global AI token bucket limiter (singleton)."""
+    global _ai_limiter
+    if _ai_limiter is None:
+        _ai_limiter = TokenBucketLimiter(
+            tokens_per_minute=settings.RATE_LIMIT_AI_TOKENS_PER_MINUTE,
+            burst=settings.RATE_LIMIT_AI_BURST,
+            redis_url=settings.REDIS_URL,
+        )
+    return _ai_limiter
+
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After value (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(seconds)))
 
 
 async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
@@ -0,0 +1,158 @@
+"""
+Authenticated-user (principal) cache for get_current_user.
+
+Every authenticated request used to open a session and SELECT the user by
+email. The columns endpoints read from current_user (id, preferred_language,
+subscription_tier, trial_ends_at, ...) are cached for a short time, keyed by
+the token subject:
+
+1. In-process LRU (per worker, no I/O), USER_CACHE_LOCAL_TTL
+2. Shared Cache (Redis if configured), USER_CACHE_TTL
+
+hashed_password is never cached. A cached principal is rebuilt as a detached
+User instance, like the one the previous session-per-lookup code returned.
+
+Profile and subscription changes call invalidate_user_principal(); other
+workers' in-process entries expire after USER_CACHE_LOCAL_TTL.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import get_settings
+from app.core.cache import Cache, LRUCache, get_cache
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CACHE_PREFIX = "user_principal"
+
+# Columns kept in the cache (never hashed_password)
+PRINCIPAL_FIELDS = (
+    "id",
+    "email",
+    "name",
+    "is_active",
+    "preferred_language",
+    "subscription_tier",
+    "trial_ends_at",
+    "created_at",
+    "updated_at",
+)
+_DATETIME_FIELDS = ("trial_ends_at", "created_at", "updated_at")
+
+
+def principal_cache_key(subject: str) -> str:
+    """Cache key for a token subject (email, hashed so it never appears in Redis keys)."""
+    return Cache.make_key(CACHE_PREFIX, Cache.hash_key(subject))
+
+
+def serialize_user(user: User) -> dict[str, Any]:
+    """JSON-serializable principal fields of a user."""
+    data = {name: getattr(user, name) for name in PRINCIPAL_FIELDS}
+    for name in _DATETIME_FIELDS:
+        if isinstance(data[name], datetime):
+            data[name] = data[name].isoformat()
+    return data
+
+
+def deserialize_user(data: dict[str, Any]) -> User:
+    """Detached User built from cached principal fields."""
+    fields = {name: data.get(name) for name in PRINCIPAL_FIELDS}
+    for name in _DATETIME_FIELDS:
+        if isinstance(fields[name], str):
+            fields[name] = datetime.fromisoformat(fields[name])
+    user = User(**fields)
+    # Same state as a user loaded by a closed session: persistent identity, no session
+    make_transient_to_detached(user)
+    return user
+
+
+class UserPrincipalCache:
+    """Two-tier cache of principal fields keyed by token subject."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        local_ttl: Optional[int] = None,
+        shared: Optional[Cache] = None,
+    ):
+        self.ttl = ttl or settings.USER_CACHE_TTL
+        self.local_ttl = local_ttl or settings.USER_CACHE_LOCAL_TTL
+        self._memory = LRUCache(max_entries or settings.USER_CACHE_MAX_ENTRIES, self.local_ttl)
+        self._shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self) -> Cache:
+        """Shared cache (resolved lazily)."""
+        if self._shared is None:
+            self._shared = get_cache()
+        return self._shared
+
+    async def get(self, subject: str) -> Optional[User]:
+        """Cached user for a token subject, or None."""
+        key = principal_cache_key(subject)
+        data = self._memory.get(key)
+        if data is None:
+            data = await self.shared.get(key)
+            if isinstance(data, dict):
+                self._memory.set(key, data)
+            else:
+                data = None
+
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return deserialize_user(data)
+
+    async def set(self, user: User) -> None:
+        """Store a freshly loaded user in both tiers."""
+        key = principal_cache_key(user.email)
+        data = serialize_user(user)
+        self._memory.set(key, data)
+        await self.shared.set(key, data, self.ttl)
+
+    async def invalidate(self, subject: str) -> None:
+        """Drop a subject from both tiers."""
+        key = principal_cache_key(subject)
+        self._memory.delete(key)
+        await self.shared.delete(key)
+
+    async def clear(self) -> None:
+        """Remove every cached principal."""
+        self._memory.clear()
+        await self.shared.clear_pattern(f"{CACHE_PREFIX}:*")
+
+    def get_stats(self) -> dict:
+        """Entry count and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_user_cache: Optional[UserPrincipalCache] = None
+
+
+def get_user_cache() -> UserPrincipalCache:
+    """Global principal cache (one per worker)."""
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = UserPrincipalCache()
+    return _user_cache
+
+
+async def invalidate_user_principal(email: str) -> None:
+    """Invalidate the cached principal of a user (after profile or subscription change)."""
+    await get_user_cache().invalidate(email)
+    logger.debug("Invalidated principal cache entry")
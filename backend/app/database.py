@@ -2,9 +2,9 @@ from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.pool import NullPool
 
 from app.config import get_settings
+from app.core.db_pool import build_engine_kwargs, install_pool_events
 
 settings = get_settings()
 
@@ -32,26 +32,15 @@ def convert_database_url(url: str) -> str:
 database_url = convert_database_url(settings.DATABASE_URL)
 
 # Configuration adaptée pour SQLite vs PostgreSQL
-engine_kwargs = {
-    "echo": settings.DEBUG,
-}
-
-# SQLite ne supporte pas pool_pre_ping
-if not database_url.startswith("sqlite"):
-    # Use NullPool for Fly.io - creates new connection per request
-    # This avoids "connection was closed in the middle of operation" errors
-    # that happen when Fly.io closes idle connections
-    engine_kwargs["poolclass"] = NullPool
-    # Disable SSL for Fly.io internal connections (asyncpg uses ssl=False)
-    engine_kwargs["connect_args"] = {"ssl": False}
-else:
-    # SQLite nécessite check_same_thread=False pour async
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
+# PostgreSQL: pool de connexions vérifiées (pre-ping, recycle, idle timeout),
+# DB_POOL_MODE="null" pour revenir à une connexion par session
+engine_kwargs = build_engine_kwargs(database_url, settings)
 
 engine = create_async_engine(
     database_url,
     **engine_kwargs,
 )
+install_pool_events(engine, settings.DB_POOL_IDLE_TIMEOUT)
 
 # Expose engine for external use (needed for async engine in some cases)
 async_engine = engine
@@ -1,6 +1,8 @@
 # Intégration Hugging Face
 
 from app.llm.client import HuggingFaceClient, get_hf_client
+from app.llm.governor import LLMGovernor, LLMOverloadedError, LLMPriority, get_llm_governor
+from app.llm.model_health import ModelHealthTracker, ModelUnavailableError, get_model_health
 from app.llm.models import (
     ModelType,
     ModelCapability,
@@ -15,6 +17,13 @@ from app.llm.models import (
 __all__ = [
     "HuggingFaceClient",
     "get_hf_client",
+    "LLMGovernor",
+    "LLMOverloadedError",
+    "LLMPriority",
+    "get_llm_governor",
+    "ModelHealthTracker",
+    "ModelUnavailableError",
+    "get_model_health",
     "ModelType",
     "ModelCapability",
     "ModelInfo",
@@ -1,10 +1,15 @@
 import asyncio
-from typing import Any
+import time
+from typing import Any, Awaitable, Callable
 
 import httpx
 import structlog
 
 from app.config import get_settings
+from app.core.http_pool import get_http_client, HUGGINGFACE
+from app.llm.governor import LLMPriority, get_llm_governor
+from app.llm.model_health import get_model_health
+from app.llm.response_cache import get_response_cache, response_cache_key
 
 settings = get_settings()
 logger = structlog.get_logger()
@@ -29,50 +34,74 @@ class HuggingFaceClient:
         """Effectue une requête vers l'API Hugging Face."""
         url = f"{self.BASE_URL}/{model_id}"
 
-        async with httpx.AsyncClient(timeout=self.TIMEOUT) as client:
-            for attempt in range(retries):
-                try:
-                    response = await client.post(
-                        url,
-                        headers=self.headers,
-                        json=payload,
-                    )
-
-                    # Modèle en cours de chargement
-                    if response.status_code == 503:
-                        data = response.json()
-                        wait_time = data.get("estimated_time", 20)
-                        logger.info(
-                            "model_loading",
-                            model=model_id,
-                            wait_time=wait_time,
-                            attempt=attempt + 1,
-                        )
-                        await asyncio.sleep(min(wait_time, 30))
-                        continue
-
-                    response.raise_for_status()
-                    return response.json()
-
-                except httpx.HTTPStatusError as e:
-                    logger.error(
-                        "huggingface_error",
+        client = get_http_client(HUGGINGFACE)
+        for attempt in range(retries):
+            try:
+                response = await client.post(
+                    url,
+                    headers=self.headers,
+                    json=payload,
+                    timeout=self.TIMEOUT,
+                )
+
+                # Modèle en cours de chargement
+                if response.status_code == 503:
+                    data = response.json()
+                    wait_time = data.get("estimated_time", 20)
+                    logger.info(
+                        "model_loading",
                         model=model_id,
-                        status=e.response.status_code,
-                        detail=e.response.text,
+                        wait_time=wait_time,
+                        attempt=attempt + 1,
                     )
-                    if attempt == retries - 1:
-                        raise
-                    await asyncio.sleep(2 ** attempt)
-
-                except httpx.RequestError as e:
-                    logger.error("request_error", model=model_id, error=str(e))
-                    if attempt == retries - 1:
-                        raise
-                    await asyncio.sleep(2 ** attempt)
+                    await asyncio.sleep(min(wait_time, 30))
+                    continue
+
+                response.raise_for_status()
+                return response.json()
+
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    "huggingface_error",
+                    model=model_id,
+                    status=e.response.status_code,
+                    detail=e.response.text,
+                )
+                if attempt == retries - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+            except httpx.RequestError as e:
+                logger.error("request_error", model=model_id, error=str(e))
+                if attempt == retries - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)
 
         return {"error": "Max retries exceeded"}
 
+    async def _upstream(
+        self,
+        model_id: str,
+        priority: LLMPriority,
+        call: Callable[[], Awaitable[str]],
+    ) -> str:
+        """Appel amont: disjoncteur du modèle, créneau du gouverneur, puis mesure de santé."""
+        health = get_model_health()
+        await health.check(model_id)
+
+        async def measured() -> str:
+            start = time.monotonic()
+            try:
+                response = await call()
+            except Exception:
+                await health.record(model_id, False, (time.monotonic() - start) * 1000)
+                raise
+            # Réponse vide: retries épuisés (modèle en chargement, erreurs)
+            await health.record(model_id, bool(response), (time.monotonic() - start) * 1000)
+            return response
+
+        return await get_llm_governor().run(model_id, priority, measured)
+
     async def text_generation(
         self,
         model_id: str,
@@ -80,6 +109,8 @@ class HuggingFaceClient:
         max_new_tokens: int = 500,
         temperature: float = 0.7,
         top_p: float = 0.95,
+        cache_namespace: str | None = None,
+        priority: LLMPriority = LLMPriority.COACH,
     ) -> str:
         """Génération de texte via l'API Chat (compatible avec les gros modèles)."""
         # Utiliser text_chat pour les modèles modernes (Qwen, Llama, etc.)
@@ -89,6 +120,8 @@ class HuggingFaceClient:
             model_id=model_id,
             max_tokens=max_new_tokens,
             temperature=temperature,
+            cache_namespace=cache_namespace,
+            priority=priority,
         )
 
     async def image_to_text(
@@ -99,14 +132,15 @@ class HuggingFaceClient:
         """Analyse d'image (vision)."""
         url = f"{self.BASE_URL}/{model_id}"
 
-        async with httpx.AsyncClient(timeout=self.TIMEOUT) as client:
-            response = await client.post(
-                url,
-                headers=self.headers,
-                content=image_bytes,
-            )
-            response.raise_for_status()
-            result = response.json()
+        client = get_http_client(HUGGINGFACE)
+        response = await client.post(
+            url,
+            headers=self.headers,
+            content=image_bytes,
+            timeout=self.TIMEOUT,
+        )
+        response.raise_for_status()
+        result = response.json()
 
         if isinstance(result, list) and len(result) > 0:
             return result[0].get("generated_text", "")
@@ -116,9 +150,9 @@ class HuggingFaceClient:
         """Vérifie si un modèle est disponible."""
         try:
             url = f"{self.BASE_URL}/{model_id}"
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, headers=self.headers)
-                return response.status_code in (200, 503)  # 503 = loading
+            client = get_http_client(HUGGINGFACE)
+            response = await client.get(url, headers=self.headers, timeout=10.0)
+            return response.status_code in (200, 503)  # 503 = loading
         except Exception:
             return False
 
@@ -128,11 +162,35 @@ class HuggingFaceClient:
         model_id: str = "Qwen/Qwen2.5-72B-Instruct",
         max_tokens: int = 1000,
         temperature: float = 0.7,
+        cache_namespace: str | None = None,
+        priority: LLMPriority = LLMPriority.COACH,
     ) -> str:
         """
         Génération de texte via l'API Chat Completions.
         Utilise l'API HuggingFace Inference.
+
+        Avec `cache_namespace`, la réponse est mise en cache (cf. response_cache).
+        L'appel amont passe par le gouverneur de concurrence (cf. governor):
+        LLMOverloadedError si l'attente en file dépasse le budget de `priority`,
+        ModelUnavailableError si le circuit du modèle est ouvert (cf. model_health).
         """
+        def call():
+            return self._upstream(
+                model_id, priority, lambda: self._text_chat(prompt, model_id, max_tokens, temperature)
+            )
+
+        if cache_namespace:
+            key = response_cache_key(cache_namespace, model_id, prompt, max_tokens, temperature)
+            return await get_response_cache().get_or_call(cache_namespace, key, call)
+        return await call()
+
+    async def _text_chat(
+        self,
+        prompt: str,
+        model_id: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> str:
         url = "https://router.huggingface.co/v1/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.token}",
@@ -151,59 +209,59 @@ class HuggingFaceClient:
             "temperature": temperature,
         }
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            for attempt in range(2):  # Reduced retries
-                try:
-                    response = await client.post(url, headers=headers, json=payload)
-
-                    # Don't retry on authentication errors
-                    if response.status_code in (401, 403):
-                        logger.error(
-                            "text_chat_auth_error",
-                            model=model_id,
-                            status=response.status_code,
-                            detail="Invalid or missing API token",
-                        )
-                        raise httpx.HTTPStatusError(
-                            "Authentication failed",
-                            request=response.request,
-                            response=response
-                        )
-
-                    if response.status_code == 503:
-                        wait_time = 5  # Reduced wait time
-                        logger.info(
-                            "text_model_loading",
-                            model=model_id,
-                            wait_time=wait_time,
-                            attempt=attempt + 1,
-                        )
-                        await asyncio.sleep(wait_time)
-                        continue
-
-                    response.raise_for_status()
-                    result = response.json()
-                    return result["choices"][0]["message"]["content"]
+        client = get_http_client(HUGGINGFACE)
+        for attempt in range(2):  # Reduced retries
+            try:
+                response = await client.post(url, headers=headers, json=payload, timeout=10.0)
 
-                except httpx.HTTPStatusError as e:
+                # Don't retry on authentication errors
+                if response.status_code in (401, 403):
                     logger.error(
-                        "text_chat_error",
+                        "text_chat_auth_error",
                         model=model_id,
-                        status=e.response.status_code,
-                        detail=e.response.text[:500],
+                        status=response.status_code,
+                        detail="Invalid or missing API token",
+                    )
+                    raise httpx.HTTPStatusError(
+                        "Authentication failed",
+                        request=response.request,
+                        response=response
                     )
-                    # Don't retry on auth errors
-                    if e.response.status_code in (401, 403):
-                        raise
-                    if attempt == 1:
-                        raise
-                    await asyncio.sleep(1)
-
-                except httpx.RequestError as e:
-                    logger.error("text_chat_request_error", model=model_id, error=str(e))
-                    if attempt == 1:
-                        raise
-                    await asyncio.sleep(1)
+
+                if response.status_code == 503:
+                    wait_time = 5  # Reduced wait time
+                    logger.info(
+                        "text_model_loading",
+                        model=model_id,
+                        wait_time=wait_time,
+                        attempt=attempt + 1,
+                    )
+                    await asyncio.sleep(wait_time)
+                    continue
+
+                response.raise_for_status()
+                result = response.json()
+                return result["choices"][0]["message"]["content"]
+
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    "text_chat_error",
+                    model=model_id,
+                    status=e.response.status_code,
+                    detail=e.response.text[:500],
+                )
+                # Don't retry on auth errors
+                if e.response.status_code in (401, 403):
+                    raise
+                if attempt == 1:
+                    raise
+                await asyncio.sleep(1)
+
+            except httpx.RequestError as e:
+                logger.error("text_chat_request_error", model=model_id, error=str(e))
+                if attempt == 1:
+                    raise
+                await asyncio.sleep(1)
 
         return ""
 
@@ -213,11 +271,39 @@ class HuggingFaceClient:
         prompt: str,
         model_id: str = "Qwen/Qwen2.5-VL-72B-Instruct",
         max_tokens: int = 800,
+        cache_namespace: str | None = None,
+        image_type: str = "image/jpeg",
+        priority: LLMPriority = LLMPriority.VISION,
     ) -> str:
         """
         Analyse d'image avec un modèle VLM via l'API Chat Completions.
         Utilise l'API HuggingFace Inference.
+
+        Avec `cache_namespace`, la réponse est mise en cache par empreinte de
+        l'image (une photo renvoyée à l'identique ne repasse pas par le VLM).
+        L'appel amont passe par le gouverneur de concurrence (cf. governor) et
+        le disjoncteur du modèle (cf. model_health).
         """
+        def call():
+            return self._upstream(
+                model_id,
+                priority,
+                lambda: self._vision_chat(image_base64, prompt, model_id, max_tokens, image_type),
+            )
+
+        if cache_namespace and image_base64:
+            key = response_cache_key(cache_namespace, model_id, prompt, max_tokens, image_base64=image_base64)
+            return await get_response_cache().get_or_call(cache_namespace, key, call)
+        return await call()
+
+    async def _vision_chat(
+        self,
+        image_base64: str,
+        prompt: str,
+        model_id: str,
+        max_tokens: int,
+        image_type: str = "image/jpeg",
+    ) -> str:
         url = "https://router.huggingface.co/v1/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.token}",
@@ -246,7 +332,7 @@ class HuggingFaceClient:
                         {"type": "text", "text": prompt},
                         {
                             "type": "image_url",
-                            "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"},
+                            "image_url": {"url": f"data:{image_type};base64,{image_base64}"},
                         },
                     ],
                 }
@@ -254,93 +340,93 @@ class HuggingFaceClient:
             "max_tokens": max_tokens,
         }
 
-        async with httpx.AsyncClient(timeout=90.0) as client:
-            for attempt in range(3):
-                try:
-                    logger.info("vlm_attempt", attempt=attempt + 1, model=model_id)
-                    response = await client.post(url, headers=headers, json=payload)
-
-                    if response.status_code == 503:
-                        wait_time = 20
-                        logger.info(
-                            "vlm_model_loading",
-                            model=model_id,
-                            wait_time=wait_time,
-                            attempt=attempt + 1,
-                        )
-                        await asyncio.sleep(wait_time)
-                        continue
-
-                    # Check for other error codes before raising
-                    if response.status_code != 200:
-                        error_text = response.text[:500]
-                        logger.error(
-                            "vlm_api_error",
-                            model=model_id,
-                            status=response.status_code,
-                            detail=error_text,
-                            attempt=attempt + 1,
-                        )
-                        # Don't retry on auth errors
-                        if response.status_code in (401, 403):
-                            raise httpx.HTTPStatusError(
-                                f"Authentication error: {error_text}",
-                                request=response.request,
-                                response=response
-                            )
-
-                    response.raise_for_status()
-                    result = response.json()
-
-                    content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
-                    if not content:
-                        logger.warning(
-                            "vlm_empty_response",
-                            model=model_id,
-                            raw_result=str(result)[:500],
-                        )
+        client = get_http_client(HUGGINGFACE)
+        for attempt in range(3):
+            try:
+                logger.info("vlm_attempt", attempt=attempt + 1, model=model_id)
+                response = await client.post(url, headers=headers, json=payload, timeout=90.0)
 
+                if response.status_code == 503:
+                    wait_time = 20
                     logger.info(
-                        "vlm_success",
-                        model=model_id,
-                        response_length=len(content),
-                    )
-                    return content
-
-                except httpx.HTTPStatusError as e:
-                    logger.error(
-                        "vlm_http_error",
+                        "vlm_model_loading",
                         model=model_id,
-                        status=e.response.status_code,
-                        detail=e.response.text[:500],
+                        wait_time=wait_time,
                         attempt=attempt + 1,
                     )
-                    if attempt == 2:
-                        raise
-                    await asyncio.sleep(2**attempt)
+                    await asyncio.sleep(wait_time)
+                    continue
 
-                except httpx.TimeoutException as e:
+                # Check for other error codes before raising
+                if response.status_code != 200:
+                    error_text = response.text[:500]
                     logger.error(
-                        "vlm_timeout",
+                        "vlm_api_error",
                         model=model_id,
-                        error=str(e),
+                        status=response.status_code,
+                        detail=error_text,
                         attempt=attempt + 1,
                     )
-                    if attempt == 2:
-                        raise
-                    await asyncio.sleep(2**attempt)
+                    # Don't retry on auth errors
+                    if response.status_code in (401, 403):
+                        raise httpx.HTTPStatusError(
+                            f"Authentication error: {error_text}",
+                            request=response.request,
+                            response=response
+                        )
 
-                except httpx.RequestError as e:
-                    logger.error(
-                        "vlm_request_error",
+                response.raise_for_status()
+                result = response.json()
+
+                content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+                if not content:
+                    logger.warning(
+                        "vlm_empty_response",
                         model=model_id,
-                        error=str(e),
-                        error_type=type(e).__name__,
-                        attempt=attempt + 1,
+                        raw_result=str(result)[:500],
                     )
-                    if attempt == 2:
-                        raise
-                    await asyncio.sleep(2**attempt)
+
+                logger.info(
+                    "vlm_success",
+                    model=model_id,
+                    response_length=len(content),
+                )
+                return content
+
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    "vlm_http_error",
+                    model=model_id,
+                    status=e.response.status_code,
+                    detail=e.response.text[:500],
+                    attempt=attempt + 1,
+                )
+                if attempt == 2:
+                    raise
+                await asyncio.sleep(2**attempt)
+
+            except httpx.TimeoutException as e:
+                logger.error(
+                    "vlm_timeout",
+                    model=model_id,
+                    error=str(e),
+                    attempt=attempt + 1,
+                )
+                if attempt == 2:
+                    raise
+                await asyncio.sleep(2**attempt)
+
+            except httpx.RequestError as e:
+                logger.error(
+                    "vlm_request_error",
+                    model=model_id,
+                    error=str(e),
+                    error_type=type(e).__name__,
+                    attempt=attempt + 1,
+                )
+                if attempt == 2:
+                    raise
+                await asyncio.sleep(2**attempt)
 
         logger.error("vlm_all_retries_failed", model=model_id)
         return ""
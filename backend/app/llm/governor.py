@@ -0,0 +1,209 @@
+"""
+Gouverneur de concurrence des appels LLM (HuggingFace).
+
+Chaque appel amont prend un créneau du modèle visé (limite de concurrence
+par modèle). Quand tous les créneaux sont pris, l'appel attend dans une
+file à priorité: vision interactive > coach (et autres appels texte
+interactifs) > batch (plans repas, enrichissements en tâche de fond).
+
+Un appel qui attend plus que le budget de sa priorité est délesté
+(LLMOverloadedError): l'agent répond alors avec son fallback déterministe
+plutôt que d'empiler des requêtes vouées aux 429/503 en amont.
+
+Les limites sont par worker (sémaphores en mémoire).
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Awaitable, Callable, TypeVar
+
+import structlog
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class LLMPriority(IntEnum):
+    """Priorité d'un appel LLM (plus petit = servi en premier)."""
+
+    VISION = 0  # Analyse de photo, utilisateur en attente
+    COACH = 1  # Coach, recettes, traduction, saisie vocale
+    BATCH = 2  # Plans repas, enrichissements en tâche de fond
+
+
+class LLMOverloadedError(Exception):
+    """Appel délesté: attente en file supérieure au budget de sa priorité."""
+
+    def __init__(self, model_id: str, priority: LLMPriority, waited: float):
+        super().__init__(f"LLM overloaded: {model_id} ({priority.name.lower()}) after {waited:.1f}s in queue")
+        self.model_id = model_id
+        self.priority = priority
+        self.waited = waited
+
+
+@dataclass
+class _ModelGate:
+    """Créneaux et file d'attente d'un modèle."""
+
+    limit: int
+    in_flight: int = 0
+    # Entrées [priorité, ordre d'arrivée, future]; future annulée = entrée abandonnée
+    waiters: list = field(default_factory=list)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self.waiters if not future.done())
+
+
+@dataclass
+class _PriorityStats:
+    calls: int = 0
+    queued: int = 0
+    shed: int = 0
+    waited: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    last_shed_at: float | None = None
+
+
+class LLMGovernor:
+    """Limites de concurrence par modèle, file à priorité et délestage."""
+
+    def __init__(
+        self,
+        default_limit: int | None = None,
+        model_limits: dict[str, int] | None = None,
+        queue_budgets: dict[str, float] | None = None,
+    ):
+        self.default_limit = default_limit or settings.LLM_MAX_CONCURRENCY_PER_MODEL
+        self.model_limits = settings.LLM_MODEL_CONCURRENCY if model_limits is None else model_limits
+        self.queue_budgets = settings.LLM_QUEUE_BUDGETS if queue_budgets is None else queue_budgets
+        self._gates: dict[str, _ModelGate] = {}
+        self._order = itertools.count()
+        self._stats = {priority: _PriorityStats() for priority in LLMPriority}
+
+    def budget_for(self, priority: LLMPriority) -> float:
+        """Attente maximale en file (secondes) avant délestage."""
+        return self.queue_budgets.get(priority.name.lower(), 10.0)
+
+    def _gate(self, model_id: str) -> _ModelGate:
+        gate = self._gates.get(model_id)
+        if gate is None:
+            gate = _ModelGate(limit=max(1, self.model_limits.get(model_id, self.default_limit)))
+            self._gates[model_id] = gate
+        return gate
+
+    async def acquire(self, model_id: str, priority: LLMPriority) -> None:
+        """
+        Prend un créneau du modèle, en attendant au plus le budget de la priorité.
+
+        Raises:
+            LLMOverloadedError: budget d'attente dépassé (appel délesté)
+        """
+        gate = self._gate(model_id)
+        stats = self._stats[priority]
+        stats.calls += 1
+
+        if gate.in_flight < gate.limit and not gate.queued:
+            gate.in_flight += 1
+            return
+
+        stats.queued += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(gate.waiters, [priority, next(self._order), future])
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout=self.budget_for(priority))
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # Créneau transmis au moment du timeout / de l'annulation: le rendre
+                self.release(model_id)
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                waited = time.monotonic() - start
+                stats.shed += 1
+                stats.last_shed_at = time.monotonic()
+                logger.warning(
+                    "llm_load_shed",
+                    model=model_id,
+                    priority=priority.name.lower(),
+                    waited_s=round(waited, 2),
+                    in_flight=gate.in_flight,
+                    queued=gate.queued,
+                )
+                raise LLMOverloadedError(model_id, priority, waited) from None
+            raise
+
+        waited = time.monotonic() - start
+        stats.waited += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+
+    def release(self, model_id: str) -> None:
+        """Rend un créneau: transmis au premier appel en file, sinon libéré."""
+        gate = self._gate(model_id)
+        while gate.waiters:
+            _, _, future = heapq.heappop(gate.waiters)
+            if not future.done():
+                future.set_result(True)
+                return
+        gate.in_flight = max(0, gate.in_flight - 1)
+
+    async def run(self, model_id: str, priority: LLMPriority, call: Callable[[], Awaitable[T]]) -> T:
+        """Exécute `call` dans un créneau du modèle."""
+        await self.acquire(model_id, priority)
+        try:
+            return await call()
+        finally:
+            self.release(model_id)
+
+    def is_shedding(self, priority: LLMPriority) -> bool:
+        """
+        Vrai si un appel de cette priorité a été délesté récemment (dans la
+        fenêtre de son budget): un appel de repli attendrait aussi trop.
+        """
+        last_shed_at = self._stats[priority].last_shed_at
+        return last_shed_at is not None and time.monotonic() - last_shed_at < self.budget_for(priority)
+
+    def get_stats(self) -> dict:
+        """Métriques pour l'endpoint de santé."""
+        return {
+            "default_limit": self.default_limit,
+            "models": {
+                model_id: {"limit": gate.limit, "in_flight": gate.in_flight, "queued": gate.queued}
+                for model_id, gate in self._gates.items()
+            },
+            "priorities": {
+                priority.name.lower(): {
+                    "calls": stats.calls,
+                    "queued": stats.queued,
+                    "shed": stats.shed,
+                    "budget_s": self.budget_for(priority),
+                    "avg_queue_wait_ms": round(stats.wait_total / stats.waited * 1000, 1) if stats.waited else 0.0,
+                    "max_queue_wait_ms": round(stats.wait_max * 1000, 1),
+                }
+                for priority, stats in self._stats.items()
+            },
+        }
+
+
+# Singleton
+_governor: LLMGovernor | None = None
+
+
+def get_llm_governor() -> LLMGovernor:
+    """Retourne le gouverneur LLM singleton (un par worker)."""
+    global _governor
+    if _governor is None:
+        _governor = LLMGovernor()
+    return _governor
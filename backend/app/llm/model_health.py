@@ -0,0 +1,401 @@
+"""
+Santé des modèles LLM: disjoncteur (circuit breaker) et routage adaptatif.
+
+BaseAgent.process essayait toujours self._models[0]; un modèle en timeout
+coûtait à chaque requête tout le budget TIMEOUT/retries (jusqu'à 3x90 s
+pour vision_chat) avant le fallback, sans que rien ne soit appris.
+
+Chaque appel amont (HuggingFaceClient) enregistre son issue par modèle:
+- latence: moyenne mobile exponentielle (EWMA) des appels réussis
+- taux d'erreur: EWMA de l'indicateur d'échec (0/1)
+- échecs consécutifs
+
+Le circuit s'ouvre sur une rafale d'échecs (LLM_BREAKER_FAILURES échecs
+consécutifs) ou un taux d'erreur élevé (LLM_BREAKER_ERROR_RATE, après
+LLM_BREAKER_MIN_CALLS appels). Circuit ouvert: les appels échouent
+immédiatement (ModelUnavailableError) pendant LLM_BREAKER_COOLDOWN secondes.
+Ensuite le circuit est semi-ouvert: un seul appel (la sonde, jeton SET NX
+à durée de vie LLM_BREAKER_PROBE_TTL) est admis, les autres sont rejetés
+jusqu'à son issue. Un succès referme le circuit, un échec le rouvre aussitôt.
+
+L'état est partagé entre workers via Redis (hash par modèle, mis à jour par
+un script Lua atomique); chaque worker en garde une copie lue au plus toutes
+les LLM_HEALTH_SYNC_INTERVAL secondes. Sans Redis (ou en cas d'erreur
+Redis), l'état est local au worker.
+"""
+
+import time
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import structlog
+
+from app.config import get_settings
+from app.core.cache import REDIS_AVAILABLE, Cache, redis
+from app.llm.models import ModelInfo
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+CACHE_PREFIX = "llm_health"
+# Sans appel pendant ce délai, l'état d'un modèle est oublié
+STATE_TTL_SECONDS = 24 * 3600
+
+# KEYS[1]: hash du modèle, KEYS[2]: jeton de sonde (libéré par toute issue)
+# ARGV: ok (0/1), latence ms, maintenant (s), alpha, échecs consécutifs max,
+#       taux d'erreur max, appels min, durée d'ouverture (s), TTL
+# Renvoie l'état mis à jour {latency_ms, error_rate, calls, failures, open_until}
+RECORD_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'latency_ms', 'error_rate', 'calls', 'failures', 'open_until')
+local ok = tonumber(ARGV[1]) == 1
+local latency = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local alpha = tonumber(ARGV[4])
+local latency_ms = tonumber(state[1]) or -1
+local error_rate = tonumber(state[2]) or 0
+local calls = (tonumber(state[3]) or 0) + 1
+local failures = tonumber(state[4]) or 0
+local open_until = tonumber(state[5]) or 0
+if ok then
+    if latency_ms < 0 then
+        latency_ms = latency
+    else
+        latency_ms = alpha * latency + (1 - alpha) * latency_ms
+    end
+    error_rate = (1 - alpha) * error_rate
+    failures = 0
+else
+    error_rate = alpha + (1 - alpha) * error_rate
+    failures = failures + 1
+    if failures >= tonumber(ARGV[5])
+        or (calls >= tonumber(ARGV[7]) and error_rate >= tonumber(ARGV[6])) then
+        open_until = now + tonumber(ARGV[8])
+    end
+end
+redis.call('HSET', KEYS[1], 'latency_ms', tostring(latency_ms), 'error_rate', tostring(error_rate),
+    'calls', calls, 'failures', failures, 'open_until', tostring(open_until))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[9]))
+redis.call('DEL', KEYS[2])
+return {tostring(latency_ms), tostring(error_rate), calls, failures, tostring(open_until)}
+"""
+
+
+class ModelUnavailableError(Exception):
+    """Circuit ouvert: le modèle est évité jusqu'à la fin de la période d'ouverture."""
+
+    def __init__(self, model_id: str, retry_in: float):
+        super().__init__(f"Circuit open for {model_id} (retry in {retry_in:.0f}s)")
+        self.model_id = model_id
+        self.retry_in = retry_in
+
+
+@dataclass
+class ModelState:
+    """État de santé d'un modèle."""
+
+    latency_ms: Optional[float] = None  # EWMA des appels réussis (None: jamais mesuré)
+    error_rate: float = 0.0  # EWMA de l'indicateur d'échec
+    calls: int = 0
+    failures: int = 0  # Échecs consécutifs
+    open_until: float = 0.0  # Epoch (s) de fin d'ouverture du circuit
+    probing: bool = False  # Semi-ouvert: une sonde est en cours
+
+    def is_open(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.open_until
+
+    def is_half_open(self, now: Optional[float] = None) -> bool:
+        """Ouverture expirée sans succès depuis: seule une sonde est admise."""
+        return bool(self.open_until) and self.failures > 0 and not self.is_open(now)
+
+    def is_blocked(self, now: Optional[float] = None) -> bool:
+        """Appel refusé: circuit ouvert, ou semi-ouvert avec une sonde en cours."""
+        return self.is_open(now) or (self.probing and self.is_half_open(now))
+
+    @classmethod
+    def from_values(cls, values: list) -> "ModelState":
+        latency_ms, error_rate, calls, failures, open_until = values
+        latency_ms = float(latency_ms) if latency_ms is not None else -1.0
+        return cls(
+            latency_ms=latency_ms if latency_ms >= 0 else None,
+            error_rate=float(error_rate or 0),
+            calls=int(calls or 0),
+            failures=int(failures or 0),
+            open_until=float(open_until or 0),
+        )
+
+
+def apply_outcome(
+    state: ModelState,
+    ok: bool,
+    latency_ms: float,
+    now: float,
+    alpha: float,
+    max_failures: int,
+    max_error_rate: float,
+    min_calls: int,
+    cooldown: float,
+) -> ModelState:
+    """Met à jour l'état après un appel (mêmes règles que RECORD_SCRIPT)."""
+    state = replace(state)
+    state.calls += 1
+    if ok:
+        state.latency_ms = latency_ms if state.latency_ms is None else alpha * latency_ms + (1 - alpha) * state.latency_ms
+        state.error_rate = (1 - alpha) * state.error_rate
+        state.failures = 0
+    else:
+        state.error_rate = alpha + (1 - alpha) * state.error_rate
+        state.failures += 1
+        if state.failures >= max_failures or (state.calls >= min_calls and state.error_rate >= max_error_rate):
+            state.open_until = now + cooldown
+    return state
+
+
+class HealthStore:
+    """Stockage de l'état de santé des modèles."""
+
+    async def get_many(self, model_ids: list[str]) -> dict[str, ModelState]:
+        raise NotImplementedError
+
+    async def record(self, model_id: str, ok: bool, latency_ms: float, now: float, config: tuple) -> ModelState:
+        raise NotImplementedError
+
+    async def acquire_probe(self, model_id: str, now: float, ttl: float) -> bool:
+        """Prend le jeton de sonde du modèle (faux s'il est déjà pris)."""
+        raise NotImplementedError
+
+
+class RedisHealthStore(HealthStore):
+    """État partagé entre workers (hash Redis par modèle, script Lua atomique)."""
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self._client = None
+        self._record = None
+
+    async def _get_client(self):
+        if self._client is None:
+            client = redis.from_url(
+                self.redis_url,
+                encoding="utf-8",
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5,
+            )
+            self._record = client.register_script(RECORD_SCRIPT)
+            self._client = client
+        return self._client
+
+    @staticmethod
+    def _key(model_id: str) -> str:
+        return Cache.make_key(CACHE_PREFIX, model_id)
+
+    @staticmethod
+    def _probe_key(model_id: str) -> str:
+        return Cache.make_key(CACHE_PREFIX, "probe", model_id)
+
+    async def get_many(self, model_ids: list[str]) -> dict[str, ModelState]:
+        client = await self._get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for model_id in model_ids:
+                pipe.hmget(self._key(model_id), "latency_ms", "error_rate", "calls", "failures", "open_until")
+                pipe.exists(self._probe_key(model_id))
+            rows = await pipe.execute()
+        return {
+            model_id: replace(ModelState.from_values(values), probing=bool(probing))
+            for model_id, values, probing in zip(model_ids, rows[::2], rows[1::2])
+        }
+
+    async def record(self, model_id: str, ok: bool, latency_ms: float, now: float, config: tuple) -> ModelState:
+        await self._get_client()
+        values = await self._record(
+            keys=[self._key(model_id), self._probe_key(model_id)],
+            args=[int(ok), latency_ms, now, *config, STATE_TTL_SECONDS],
+        )
+        return ModelState.from_values(values)
+
+    async def acquire_probe(self, model_id: str, now: float, ttl: float) -> bool:
+        client = await self._get_client()
+        return bool(await client.set(self._probe_key(model_id), "1", nx=True, px=max(1, int(ttl * 1000))))
+
+
+class MemoryHealthStore(HealthStore):
+    """État en mémoire (pas de partage entre workers)."""
+
+    def __init__(self):
+        self._states: dict[str, ModelState] = {}
+        # model_id -> fin de validité du jeton de sonde (epoch, s)
+        self._probes: dict[str, float] = {}
+
+    async def get_many(self, model_ids: list[str]) -> dict[str, ModelState]:
+        now = time.time()
+        return {
+            model_id: replace(self._states.get(model_id, ModelState()), probing=self._probes.get(model_id, 0.0) > now)
+            for model_id in model_ids
+        }
+
+    async def record(self, model_id: str, ok: bool, latency_ms: float, now: float, config: tuple) -> ModelState:
+        state = apply_outcome(self._states.get(model_id, ModelState()), ok, latency_ms, now, *config)
+        self._states[model_id] = state
+        self._probes.pop(model_id, None)
+        return state
+
+    async def acquire_probe(self, model_id: str, now: float, ttl: float) -> bool:
+        if self._probes.get(model_id, 0.0) > now:
+            return False
+        self._probes[model_id] = now + ttl
+        return True
+
+
+class ModelHealthTracker:
+    """Suivi de santé par modèle, disjoncteur et routage."""
+
+    def __init__(self, store: Optional[HealthStore] = None, sync_interval: Optional[float] = None):
+        if store is None:
+            if REDIS_AVAILABLE and settings.REDIS_URL:
+                store = RedisHealthStore(settings.REDIS_URL)
+            else:
+                store = MemoryHealthStore()
+        self.store = store
+        self.local = store if isinstance(store, MemoryHealthStore) else MemoryHealthStore()
+        self.sync_interval = settings.LLM_HEALTH_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self.config = (
+            settings.LLM_HEALTH_EWMA_ALPHA,
+            settings.LLM_BREAKER_FAILURES,
+            settings.LLM_BREAKER_ERROR_RATE,
+            settings.LLM_BREAKER_MIN_CALLS,
+            settings.LLM_BREAKER_COOLDOWN,
+        )
+        self.probe_ttl = settings.LLM_BREAKER_PROBE_TTL
+        # Copie locale de l'état partagé: model_id -> (état, lu à)
+        self._snapshot: dict[str, tuple[ModelState, float]] = {}
+        self.store_errors = 0
+        self.rejected = 0
+
+    async def get_states(self, model_ids: list[str]) -> dict[str, ModelState]:
+        """État des modèles (copie locale, relue depuis le stockage si trop ancienne)."""
+        now = time.monotonic()
+        stale = [
+            model_id for model_id in model_ids
+            if model_id not in self._snapshot or now - self._snapshot[model_id][1] >= self.sync_interval
+        ]
+        if stale:
+            try:
+                fresh = await self.store.get_many(stale)
+            except Exception as e:
+                self.store_errors += 1
+                logger.warning("model_health_store_error", error=str(e))
+                fresh = await self.local.get_many(stale)
+            for model_id, state in fresh.items():
+                self._snapshot[model_id] = (state, now)
+        return {model_id: self._snapshot[model_id][0] for model_id in model_ids}
+
+    async def is_open(self, model_id: str) -> bool:
+        """Vrai si le circuit du modèle est ouvert (ou semi-ouvert avec une sonde en cours)."""
+        return (await self.get_states([model_id]))[model_id].is_blocked()
+
+    async def check(self, model_id: str) -> None:
+        """
+        Lève ModelUnavailableError si le circuit du modèle est ouvert.
+
+        Circuit semi-ouvert: l'appelant qui obtient le jeton de sonde passe,
+        les autres sont rejetés jusqu'à l'issue de la sonde (record).
+
+        Raises:
+            ModelUnavailableError: appel évité (échec immédiat, sans timeout)
+        """
+        state = (await self.get_states([model_id]))[model_id]
+        now = time.time()
+        if state.is_open(now):
+            self.rejected += 1
+            raise ModelUnavailableError(model_id, state.open_until - now)
+        if not state.is_half_open(now):
+            return
+
+        try:
+            acquired = await self.store.acquire_probe(model_id, now, self.probe_ttl)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning("model_health_store_error", model=model_id, error=str(e))
+            acquired = await self.local.acquire_probe(model_id, now, self.probe_ttl)
+        self._snapshot[model_id] = (replace(state, probing=True), self._snapshot[model_id][1])
+        if not acquired:
+            self.rejected += 1
+            raise ModelUnavailableError(model_id, self.probe_ttl)
+        logger.info("model_circuit_probe", model=model_id)
+
+    async def record(self, model_id: str, ok: bool, latency_ms: float) -> None:
+        """Enregistre l'issue d'un appel amont (et met à jour la copie locale)."""
+        now = time.time()
+        try:
+            state = await self.store.record(model_id, ok, latency_ms, now, self.config)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning("model_health_store_error", model=model_id, error=str(e))
+            state = await self.local.record(model_id, ok, latency_ms, now, self.config)
+
+        previous = self._snapshot.get(model_id)
+        if state.is_open(now) and not (previous and previous[0].is_open(now)):
+            logger.warning(
+                "model_circuit_opened",
+                model=model_id,
+                failures=state.failures,
+                error_rate=round(state.error_rate, 2),
+                open_for_s=round(state.open_until - now),
+            )
+        self._snapshot[model_id] = (state, time.monotonic())
+
+    async def route(self, models: list[ModelInfo]) -> list[ModelInfo]:
+        """
+        Ordonne les modèles pour un appel: circuits fermés d'abord, modèles
+        principaux avant le fallback, puis le plus rapide (latence EWMA).
+
+        Un modèle jamais mesuré passe en premier parmi ses pairs (pour être
+        évalué); à latence égale, l'ordre du registre (priority) départage.
+        """
+        states = await self.get_states([model.id for model in models])
+        now = time.time()
+        return sorted(
+            models,
+            key=lambda model: (
+                states[model.id].is_blocked(now),
+                model.is_fallback,
+                states[model.id].latency_ms or 0.0,
+                model.priority,
+            ),
+        )
+
+    def get_stats(self) -> dict:
+        """Métriques pour l'endpoint de santé."""
+        now = time.time()
+        return {
+            "store": type(self.store).__name__,
+            "store_errors": self.store_errors,
+            "rejected_calls": self.rejected,
+            "models": {
+                model_id: {
+                    "circuit": (
+                        "open" if state.is_open(now)
+                        else "half_open" if state.is_half_open(now)
+                        else "closed"
+                    ),
+                    "probing": state.probing,
+                    "latency_ms": round(state.latency_ms, 1) if state.latency_ms is not None else None,
+                    "error_rate": round(state.error_rate, 3),
+                    "calls": state.calls,
+                    "consecutive_failures": state.failures,
+                }
+                for model_id, (state, _) in self._snapshot.items()
+            },
+        }
+
+
+# Singleton
+_tracker: ModelHealthTracker | None = None
+
+
+def get_model_health() -> ModelHealthTracker:
+    """Retourne le suivi de santé des modèles singleton (état partagé via Redis)."""
+    global _tracker
+    if _tracker is None:
+        _tracker = ModelHealthTracker()
+    return _tracker
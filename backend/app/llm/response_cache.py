@@ -0,0 +1,239 @@
+"""
+Cache des réponses LLM adressé par contenu.
+
+Clé = hash(modèle, prompt ou empreinte de l'image, max_tokens, température):
+deux appels identiques renvoient la même réponse sans repasser par
+HuggingFace. Le cache est opt-in: HuggingFaceClient ne l'utilise que si
+l'appelant passe un `cache_namespace` (capacité de l'agent, "translation",
+...), qui détermine aussi la durée de vie (LLM_CACHE_TTLS).
+
+Backends :
+- "redis": cache partagé app.core.cache (mémoire si Redis n'est pas configuré)
+- "disk": un fichier par entrée sous LLM_CACHE_DIR (survit aux redémarrages
+  sans Redis, un seul hôte)
+
+Les appels identiques simultanés sont dédupliqués: un seul appel amont, les
+autres attendent son résultat. Les réponses vides (échecs) ne sont jamais
+mises en cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import structlog
+
+from app.config import get_settings
+from app.core.cache import Cache, CacheBackend, get_cache
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+CACHE_PREFIX = "llm_response"
+
+
+class DiskCache(CacheBackend):
+    """Backend fichier: un JSON {key, value, expires_at} par entrée."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def _read(self, path: Path) -> Optional[dict]:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        entry = self._read(path)
+        if entry is None:
+            return None
+        if time.time() >= entry.get("expires_at", 0):
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("value")
+
+    def _set(self, key: str, value: str, ttl: int) -> bool:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Écriture atomique: un lecteur concurrent ne voit jamais un fichier partiel
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"key": key, "value": value, "expires_at": time.time() + ttl}), encoding="utf-8")
+        os.replace(tmp, path)
+        return True
+
+    def _delete(self, key: str) -> bool:
+        path = self._path(key)
+        if path.exists():
+            path.unlink(missing_ok=True)
+            return True
+        return False
+
+    def _clear_pattern(self, pattern: str) -> int:
+        prefix = pattern.replace("*", "")
+        deleted = 0
+        for path in self.directory.glob("*/*.json"):
+            entry = self._read(path)
+            if entry is not None and entry.get("key", "").startswith(prefix):
+                path.unlink(missing_ok=True)
+                deleted += 1
+        return deleted
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: int = 300) -> bool:
+        try:
+            return await asyncio.to_thread(self._set, key, value, ttl)
+        except OSError as e:
+            logger.warning("llm_cache_disk_write_error", error=str(e))
+            return False
+
+    async def delete(self, key: str) -> bool:
+        return await asyncio.to_thread(self._delete, key)
+
+    async def clear_pattern(self, pattern: str) -> int:
+        return await asyncio.to_thread(self._clear_pattern, pattern)
+
+
+@dataclass
+class LLMCacheStats:
+    """Compteurs du cache de réponses."""
+
+    hits: int = 0
+    misses: int = 0
+    deduplicated: int = 0
+    stored: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses + self.deduplicated
+        return {
+            **asdict(self),
+            "hit_rate": round((self.hits + self.deduplicated) / lookups, 3) if lookups else 0.0,
+        }
+
+
+def response_cache_key(
+    namespace: str,
+    model_id: str,
+    prompt: str,
+    max_tokens: int,
+    temperature: Optional[float] = None,
+    image_base64: Optional[str] = None,
+) -> str:
+    """Clé adressée par contenu (l'image est réduite à son empreinte SHA-256)."""
+    payload = {
+        "model": model_id,
+        "prompt": prompt,
+        "image": hashlib.sha256(image_base64.encode()).hexdigest() if image_base64 else None,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return Cache.make_key(CACHE_PREFIX, namespace, digest)
+
+
+class LLMResponseCache:
+    """Cache des réponses brutes, avec dédoublonnage des appels en cours."""
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttls: Optional[dict[str, int]] = None,
+        default_ttl: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self._backend = backend
+        self.ttls = settings.LLM_CACHE_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl or settings.LLM_CACHE_DEFAULT_TTL
+        self.enabled = settings.LLM_CACHE_ENABLED if enabled is None else enabled
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.stats = LLMCacheStats()
+
+    @property
+    def backend(self) -> CacheBackend:
+        """Backend configuré (résolu paresseusement)."""
+        if self._backend is None:
+            if settings.LLM_CACHE_BACKEND == "disk":
+                self._backend = DiskCache(settings.LLM_CACHE_DIR)
+            else:
+                self._backend = get_cache().backend
+        return self._backend
+
+    def ttl_for(self, namespace: str) -> int:
+        return self.ttls.get(namespace, self.default_ttl)
+
+    async def get_or_call(self, namespace: str, key: str, call: Callable[[], Awaitable[str]]) -> str:
+        """
+        Réponse en cache, sinon résultat de `call` (partagé avec les appels identiques en cours).
+
+        Args:
+            namespace: Espace de cache (détermine le TTL)
+            key: Clé (response_cache_key)
+            call: Appel amont, exécuté au plus une fois par clé à la fois
+        """
+        if not self.enabled:
+            return await call()
+
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.stats.hits += 1
+            logger.debug("llm_cache_hit", namespace=namespace)
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats.misses += 1
+            task = asyncio.create_task(self._call_and_store(namespace, key, call))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.stats.deduplicated += 1
+
+        # shield: l'annulation d'un appelant n'annule pas l'appel partagé
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _call_and_store(self, namespace: str, key: str, call: Callable[[], Awaitable[str]]) -> str:
+        response = await call()
+        if response:
+            await self.backend.set(key, response, self.ttl_for(namespace))
+            self.stats.stored += 1
+        return response
+
+    async def clear(self, namespace: Optional[str] = None) -> int:
+        """Vide le cache (un namespace ou tout)."""
+        pattern = Cache.make_key(CACHE_PREFIX, namespace, "*") if namespace else f"{CACHE_PREFIX}:*"
+        return await self.backend.clear_pattern(pattern)
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "in_flight": len(self._inflight),
+            **self.stats.as_dict(),
+        }
+
+
+_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Cache global des réponses LLM (un par worker)."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LLMResponseCache()
+    return _response_cache
@@ -1,4 +1,5 @@
 from contextlib import asynccontextmanager
+import asyncio
 import traceback
 import uuid
 
@@ -55,11 +56,36 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestion du cycle de vie de l'application."""
-    from app.database import async_engine
+    from app.database import async_engine, async_session_maker
+    from app.core.http_pool import close_http_clients
+    from app.services.daily_nutrition import run_reconciliation_loop
+    from app.services.nllb_local import preload_local_model, shutdown_local_backend
+    from app.services.image_preprocessing import shutdown_image_preprocessing
+    from app.services.usage_quota import get_usage_quota_engine, run_usage_flush_loop
     logger.info("Starting NutriProfile API", version=settings.APP_VERSION)
+    # Modèle de traduction local: chargement en arrière-plan (ne retarde pas le démarrage)
+    preload_task = asyncio.create_task(preload_local_model()) if settings.NLLB_BACKEND == "local" else None
+    # Vérification périodique des résumés DailyNutrition (maintenus par deltas).
+    # Lancée dans chaque worker, un seul corrige à la fois (verrou consultatif)
+    reconcile_task = None
+    if settings.DAILY_NUTRITION_RECONCILE_INTERVAL > 0:
+        reconcile_task = asyncio.create_task(
+            run_reconciliation_loop(async_session_maker, settings.DAILY_NUTRITION_RECONCILE_INTERVAL)
+        )
+    # Écriture groupée des compteurs de quotas dans usage_tracking
+    usage_flush_task = asyncio.create_task(
+        run_usage_flush_loop(async_session_maker, settings.USAGE_QUOTA_FLUSH_INTERVAL)
+    )
     yield
     logger.info("Shutting down NutriProfile API")
-    # Fermer proprement le pool de connexions
+    for task in (preload_task, reconcile_task, usage_flush_task):
+        if task and not task.done():
+            task.cancel()
+    await get_usage_quota_engine().flush(async_session_maker)
+    shutdown_local_backend()
+    shutdown_image_preprocessing()
+    # Fermer proprement les pools de connexions (DB + HTTP sortant)
+    await close_http_clients()
     await async_engine.dispose()
 
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -40,6 +40,16 @@ class ActivityLog(Base):
     # Relations
     user = relationship("User", back_populates="activity_logs")
 
+    # Activités d'un utilisateur sur une période; couvre les sommes durée/calories
+    __table_args__ = (
+        Index(
+            "ix_activity_logs_user_activity_date",
+            "user_id",
+            "activity_date",
+            postgresql_include=["duration_minutes", "calories_burned"],
+        ),
+    )
+
     def __repr__(self):
         return f"<ActivityLog {self.activity_type} - {self.duration_minutes}min>"
 
@@ -63,6 +73,11 @@ class WeightLog(Base):
     # Relations
     user = relationship("User", back_populates="weight_logs")
 
+    # Courbe de poids d'un utilisateur
+    __table_args__ = (
+        Index("ix_weight_logs_user_log_date", "user_id", "log_date", postgresql_include=["weight_kg"]),
+    )
+
     def __repr__(self):
         return f"<WeightLog {self.weight_kg}kg - {self.log_date}>"
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -46,6 +46,11 @@ class FoodLog(Base):
     user = relationship("User", back_populates="food_logs")
     items = relationship("FoodItem", back_populates="food_log", cascade="all, delete-orphan", passive_deletes=True)
 
+    # Repas d'un utilisateur sur une période (dashboard, suivi, coaching, PDF)
+    __table_args__ = (
+        Index("ix_food_logs_user_meal_date", "user_id", "meal_date"),
+    )
+
     def __repr__(self):
         return f"<FoodLog {self.id} - {self.meal_type} - {self.meal_date}>"
 
@@ -81,6 +86,11 @@ class FoodItem(Base):
     # Relations
     food_log = relationship("FoodLog", back_populates="items")
 
+    # Chargement des aliments d'un repas (selectinload, jointures)
+    __table_args__ = (
+        Index("idx_food_items_log_id", "food_log_id"),
+    )
+
     def __repr__(self):
         return f"<FoodItem {self.name} - {self.quantity}{self.unit}>"
 
@@ -188,5 +198,10 @@ class DailyNutrition(Base):
     # Relations
     user = relationship("User", back_populates="daily_nutrition")
 
+    # Un seul résumé par utilisateur et par jour (sert aussi d'index user_id + date)
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_daily_nutrition_user_date"),
+    )
+
     def __repr__(self):
         return f"<DailyNutrition {self.user_id} - {self.date}>"
@@ -0,0 +1,300 @@
+"""
+Maintenance incrémentale des résumés DailyNutrition.
+
+Chaque création / modification / suppression de repas ou d'aliment applique
+un delta signé à la ligne (user_id, date) du jour, par un seul UPSERT
+atomique exécuté dans la transaction de l'appelant :
+
+    INSERT ... ON CONFLICT (user_id, date) DO UPDATE SET total = total + :delta
+
+Plus de relecture de tous les FoodLog du jour ni de commit séparé. Un job
+périodique (reconcile_daily_nutrition) recalcule les totaux depuis food_logs
+pour détecter une éventuelle dérive et la corriger par le même UPSERT.
+"""
+
+import asyncio
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+import structlog
+from sqlalchemy import func, literal_column, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.core.db_upsert import upsert_insert_for
+from app.models.food_log import DailyNutrition, FoodLog
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+# Écart toléré entre totaux stockés et recalculés (arrondis des floats)
+DRIFT_TOLERANCE = 0.01
+
+
+@dataclass(frozen=True)
+class NutritionDelta:
+    """Variation des totaux d'une journée."""
+
+    calories: int = 0
+    protein: float = 0.0
+    carbs: float = 0.0
+    fat: float = 0.0
+    fiber: float = 0.0
+    meals: int = 0
+
+    @classmethod
+    def from_log(cls, log: FoodLog, meals: int = 1) -> "NutritionDelta":
+        """Contribution d'un repas (meals=1 pour un repas ajouté au jour)."""
+        return cls(
+            calories=int(log.total_calories or 0),
+            protein=float(log.total_protein or 0),
+            carbs=float(log.total_carbs or 0),
+            fat=float(log.total_fat or 0),
+            fiber=float(log.total_fiber or 0),
+            meals=meals,
+        )
+
+    def __neg__(self) -> "NutritionDelta":
+        return NutritionDelta(**{f.name: -getattr(self, f.name) for f in fields(self)})
+
+    def __sub__(self, other: "NutritionDelta") -> "NutritionDelta":
+        return NutritionDelta(**{f.name: getattr(self, f.name) - getattr(other, f.name) for f in fields(self)})
+
+    @property
+    def is_zero(self) -> bool:
+        return all(not getattr(self, f.name) for f in fields(self))
+
+
+def day_start(day: date) -> datetime:
+    """Clé `date` d'une ligne DailyNutrition (minuit)."""
+    return datetime.combine(day, datetime.min.time())
+
+
+async def apply_daily_delta(
+    db: AsyncSession,
+    user_id: int,
+    day: date,
+    delta: NutritionDelta,
+) -> None:
+    """
+    Applique un delta au résumé du jour (un seul statement, sans commit).
+
+    Crée la ligne si elle n'existe pas encore. À appeler avant le commit de
+    la mutation du repas pour rester dans la même transaction.
+    """
+    if delta.is_zero:
+        return
+
+    insert = upsert_insert_for(db)
+    now = datetime.utcnow()
+    stmt = insert(DailyNutrition).values(
+        user_id=user_id,
+        date=day_start(day),
+        total_calories=delta.calories,
+        total_protein=delta.protein,
+        total_carbs=delta.carbs,
+        total_fat=delta.fat,
+        total_fiber=delta.fiber,
+        meals_count=delta.meals,
+        created_at=now,
+        updated_at=now,
+    )
+    table = DailyNutrition.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.user_id, table.date],
+        set_={
+            "total_calories": func.coalesce(table.total_calories, 0) + stmt.excluded.total_calories,
+            "total_protein": func.coalesce(table.total_protein, 0) + stmt.excluded.total_protein,
+            "total_carbs": func.coalesce(table.total_carbs, 0) + stmt.excluded.total_carbs,
+            "total_fat": func.coalesce(table.total_fat, 0) + stmt.excluded.total_fat,
+            "total_fiber": func.coalesce(table.total_fiber, 0) + stmt.excluded.total_fiber,
+            "meals_count": func.coalesce(table.meals_count, 0) + stmt.excluded.meals_count,
+            "updated_at": now,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def apply_log_change(
+    db: AsyncSession,
+    user_id: int,
+    before: Optional[tuple[date, NutritionDelta]],
+    after: Optional[tuple[date, NutritionDelta]],
+) -> None:
+    """
+    Applique le passage d'un repas de l'état `before` à l'état `after`.
+
+    Chaque état est (jour, contribution) ou None (repas inexistant). Si le
+    jour change, le repas est retiré de l'ancien jour et ajouté au nouveau.
+    """
+    if before and after and before[0] == after[0]:
+        await apply_daily_delta(db, user_id, after[0], after[1] - before[1])
+        return
+    if before:
+        await apply_daily_delta(db, user_id, before[0], -before[1])
+    if after:
+        await apply_daily_delta(db, user_id, after[0], after[1])
+
+
+# ============== Réconciliation ==============
+
+@dataclass
+class DailyDrift:
+    """Écart entre un résumé stocké et le recalcul depuis food_logs."""
+
+    user_id: int
+    day: date
+    stored: dict[str, Any]
+    expected: dict[str, Any]
+
+
+_TOTAL_COLUMNS = ("total_calories", "total_protein", "total_carbs", "total_fat", "total_fiber", "meals_count")
+
+
+def _as_date(value: Any) -> date:
+    """date(meal_date) renvoie une date (PostgreSQL) ou une chaîne (SQLite)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+# Clé du verrou consultatif PostgreSQL: une seule réconciliation à la fois
+# (la boucle tourne dans chaque worker gunicorn)
+RECONCILE_LOCK_KEY = 0x4E505F44
+
+
+async def find_daily_drifts(
+    db: AsyncSession,
+    since: date,
+    user_id: Optional[int] = None,
+) -> list[DailyDrift]:
+    """
+    Résumés dont les totaux s'écartent du recalcul depuis food_logs.
+
+    Une seule requête agrégée (UNION ALL des repas et des résumés, groupée
+    par jour) : attendu et stocké sont lus dans le même snapshot, un repas
+    commité entre deux lectures ne peut pas apparaître comme une dérive.
+    """
+    start = day_start(since)
+    logs = select(
+        FoodLog.user_id.label("user_id"),
+        func.date(FoodLog.meal_date).label("day"),
+        *(func.coalesce(getattr(FoodLog, column), 0).label(f"want_{column}") for column in _TOTAL_COLUMNS[:-1]),
+        literal_column("1").label("want_meals_count"),
+        *(literal_column("0").label(f"have_{column}") for column in _TOTAL_COLUMNS),
+    ).where(FoodLog.meal_date >= start)
+    summaries = select(
+        DailyNutrition.user_id.label("user_id"),
+        func.date(DailyNutrition.date).label("day"),
+        *(literal_column("0").label(f"want_{column}") for column in _TOTAL_COLUMNS),
+        *(func.coalesce(getattr(DailyNutrition, column), 0).label(f"have_{column}") for column in _TOTAL_COLUMNS),
+    ).where(DailyNutrition.date >= start)
+    if user_id is not None:
+        logs = logs.where(FoodLog.user_id == user_id)
+        summaries = summaries.where(DailyNutrition.user_id == user_id)
+
+    rows = union_all(logs, summaries).subquery()
+    query = select(
+        rows.c.user_id,
+        rows.c.day,
+        *(func.sum(rows.c[f"want_{column}"]) for column in _TOTAL_COLUMNS),
+        *(func.sum(rows.c[f"have_{column}"]) for column in _TOTAL_COLUMNS),
+    ).group_by(rows.c.user_id, rows.c.day)
+
+    drifts: list[DailyDrift] = []
+    size = len(_TOTAL_COLUMNS)
+    for row in (await db.execute(query)).all():
+        want = dict(zip(_TOTAL_COLUMNS, row[2:2 + size]))
+        have = dict(zip(_TOTAL_COLUMNS, row[2 + size:]))
+        if all(abs(have[column] - want[column]) <= DRIFT_TOLERANCE for column in _TOTAL_COLUMNS):
+            continue
+        drifts.append(DailyDrift(user_id=row[0], day=_as_date(row[1]), stored=have, expected=want))
+    return drifts
+
+
+async def fix_daily_drifts(db: AsyncSession, drifts: list[DailyDrift]) -> None:
+    """
+    Corrige les écarts par deltas (attendu - stocké), sans commit.
+
+    Passe par le même UPSERT que apply_daily_delta : pas de conflit sur
+    uq_daily_nutrition_user_date pour une ligne manquante, et un delta
+    commité par un repas depuis la détection n'est pas écrasé.
+    """
+    for drift in drifts:
+        diff = {column: drift.expected[column] - drift.stored[column] for column in _TOTAL_COLUMNS}
+        correction = NutritionDelta(
+            calories=int(diff["total_calories"]),
+            protein=float(diff["total_protein"]),
+            carbs=float(diff["total_carbs"]),
+            fat=float(diff["total_fat"]),
+            fiber=float(diff["total_fiber"]),
+            meals=int(diff["meals_count"]),
+        )
+        await apply_daily_delta(db, drift.user_id, drift.day, correction)
+
+
+async def _acquire_reconcile_lock(db: AsyncSession) -> bool:
+    """Verrou de transaction (libéré au commit / rollback). Sans objet hors PostgreSQL."""
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    result = await db.execute(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_KEY)))
+    return bool(result.scalar())
+
+
+async def reconcile_daily_nutrition(
+    db: AsyncSession,
+    since: Optional[date] = None,
+    user_id: Optional[int] = None,
+    fix: bool = True,
+) -> list[DailyDrift]:
+    """
+    Compare les résumés aux totaux recalculés depuis food_logs.
+
+    Les lignes en écart sont corrigées si `fix` (commit inclus). Une seule
+    réconciliation corrige à la fois (verrou consultatif PostgreSQL) : si
+    un autre worker la détient, ce passage est sauté.
+
+    Args:
+        since: Premier jour vérifié (défaut: DAILY_NUTRITION_RECONCILE_DAYS jours)
+        user_id: Limiter à un utilisateur
+        fix: Corriger les écarts trouvés
+
+    Returns:
+        Écarts détectés
+    """
+    since = since or datetime.utcnow().date() - timedelta(days=settings.DAILY_NUTRITION_RECONCILE_DAYS)
+
+    if fix and not await _acquire_reconcile_lock(db):
+        logger.info("daily_nutrition_reconcile_skipped", reason="locked")
+        return []
+
+    drifts = await find_daily_drifts(db, since, user_id)
+    if drifts:
+        logger.warning(
+            "daily_nutrition_drift",
+            rows=len(drifts),
+            fixed=fix,
+            sample=[(d.user_id, d.day.isoformat()) for d in drifts[:10]],
+        )
+        if fix:
+            await fix_daily_drifts(db, drifts)
+            await db.commit()
+    else:
+        logger.info("daily_nutrition_reconciled", since=since.isoformat())
+    return drifts
+
+
+async def run_reconciliation_loop(session_maker: async_sessionmaker, interval: float) -> None:
+    """Réconciliation périodique (tâche de fond du lifespan)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_maker() as db:
+                await reconcile_daily_nutrition(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("daily_nutrition_reconcile_error", error=str(e))
@@ -0,0 +1,218 @@
+"""
+Cache stale-while-revalidate du coach et de la personnalisation du dashboard.
+
+GET /dashboard attendait les agents LLM (coach: 5 s, personnalisation: 3 s)
+à chaque chargement. Le résultat est maintenant mis en cache par utilisateur,
+avec l'empreinte (digest) des QuickStats, du profil, de la langue et du
+moment de la journée qui l'ont produit :
+
+- entrée fraîche (même digest, non expirée): servie telle quelle
+- entrée périmée (digest différent, expirée ou invalidée): servie
+  immédiatement, recalcul lancé en tâche de fond
+- aucune entrée: l'appelant sert son fallback, recalcul en tâche de fond
+
+Le dashboard n'attend donc jamais le LLM. La saisie d'un repas, d'une
+activité ou d'eau invalide l'entrée (invalidate_dashboard_insights) pour
+déclencher le recalcul au chargement suivant.
+
+Stockage: cache partagé (Redis si configuré, cf. app.core.cache). Les
+recalculs sont dédupliqués par worker.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+import structlog
+
+from app.config import get_settings
+from app.core.cache import Cache, get_cache
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+CACHE_PREFIX = "dashboard_insights"
+
+# Champs du profil qui influencent les conseils et la personnalisation
+PROFILE_DIGEST_FIELDS = (
+    "age",
+    "gender",
+    "height_cm",
+    "weight_kg",
+    "goal",
+    "diet_type",
+    "activity_level",
+    "medical_conditions",
+    "allergies",
+    "medications",
+    "daily_calories",
+    "protein_g",
+    "carbs_g",
+    "fat_g",
+    "water_target_ml",
+    "activity_target_min",
+)
+
+# Résultat d'un recalcul: (coach, personnalisation) sérialisés en JSON, et
+# `degraded` si un agent a échoué (fallback mis en cache moins longtemps)
+InsightsComputer = Callable[[], Awaitable[tuple[Optional[dict], Optional[dict], bool]]]
+
+
+def insights_cache_key(user_id: int) -> str:
+    return Cache.make_key(CACHE_PREFIX, str(user_id))
+
+
+def insights_digest(quick_stats: Any, profile: Any, language: str, time_of_day: str) -> str:
+    """Empreinte des entrées des agents (QuickStats + profil + langue + moment)."""
+    payload = {
+        "stats": quick_stats.model_dump(mode="json"),
+        "profile": {name: getattr(profile, name, None) for name in PROFILE_DIGEST_FIELDS},
+        "language": language,
+        "time_of_day": time_of_day,
+    }
+    return Cache.hash_key(json.dumps(payload, sort_keys=True, default=str))
+
+
+@dataclass
+class CachedInsights:
+    """Entrée du cache telle que servie au dashboard."""
+
+    coach: Optional[dict]
+    personalization: Optional[dict]
+    fresh: bool
+
+
+class DashboardInsightsCache:
+    """Cache SWR par utilisateur avec recalcul en tâche de fond."""
+
+    def __init__(
+        self,
+        ttl: Optional[int] = None,
+        degraded_ttl: Optional[int] = None,
+        max_stale: Optional[int] = None,
+        shared: Optional[Cache] = None,
+    ):
+        self.ttl = ttl or settings.DASHBOARD_INSIGHTS_TTL
+        self.degraded_ttl = degraded_ttl or settings.DASHBOARD_INSIGHTS_DEGRADED_TTL
+        self.max_stale = max_stale or settings.DASHBOARD_INSIGHTS_MAX_STALE
+        self._shared = shared
+        self._refreshing: dict[int, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self) -> Cache:
+        """Cache partagé (résolu à la première utilisation)."""
+        if self._shared is None:
+            self._shared = get_cache()
+        return self._shared
+
+    async def get(self, user_id: int, digest: str) -> Optional[CachedInsights]:
+        """Dernier résultat de l'utilisateur (None si absent), frais ou non."""
+        entry = await self.shared.get(insights_cache_key(user_id))
+        if not isinstance(entry, dict):
+            self.misses += 1
+            return None
+
+        fresh = entry.get("digest") == digest and time.time() < entry.get("fresh_until", 0)
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return CachedInsights(coach=entry.get("coach"), personalization=entry.get("personalization"), fresh=fresh)
+
+    async def set(
+        self,
+        user_id: int,
+        digest: str,
+        coach: Optional[dict],
+        personalization: Optional[dict],
+        degraded: bool = False,
+    ) -> None:
+        """Enregistre un résultat recalculé."""
+        entry = {
+            "digest": digest,
+            "fresh_until": time.time() + (self.degraded_ttl if degraded else self.ttl),
+            "coach": coach,
+            "personalization": personalization,
+        }
+        await self.shared.set(insights_cache_key(user_id), entry, self.max_stale)
+
+    async def invalidate(self, user_id: int) -> None:
+        """Marque l'entrée périmée (toujours servie, recalculée au prochain chargement)."""
+        key = insights_cache_key(user_id)
+        entry = await self.shared.get(key)
+        if isinstance(entry, dict):
+            entry["fresh_until"] = 0
+            await self.shared.set(key, entry, self.max_stale)
+
+    def schedule_refresh(self, user_id: int, digest: str, compute: InsightsComputer) -> Optional[asyncio.Task]:
+        """
+        Lance le recalcul en tâche de fond (sans effet si déjà en cours pour cet utilisateur).
+
+        Returns:
+            La tâche lancée, ou None si un recalcul était déjà en cours
+        """
+        running = self._refreshing.get(user_id)
+        if running and not running.done():
+            return None
+
+        task = asyncio.create_task(self._refresh(user_id, digest, compute))
+        self._refreshing[user_id] = task
+        task.add_done_callback(lambda done: self._forget(user_id, done))
+        return task
+
+    def _forget(self, user_id: int, task: asyncio.Task) -> None:
+        if self._refreshing.get(user_id) is task:
+            del self._refreshing[user_id]
+
+    async def _refresh(self, user_id: int, digest: str, compute: InsightsComputer) -> None:
+        start = time.perf_counter()
+        try:
+            coach, personalization, degraded = await compute()
+        except Exception as e:
+            logger.warning("dashboard_insights_refresh_failed", user_id=user_id, error=str(e))
+            return
+        await self.set(user_id, digest, coach, personalization, degraded=degraded)
+        logger.info(
+            "dashboard_insights_refreshed",
+            user_id=user_id,
+            degraded=degraded,
+            duration_ms=round((time.perf_counter() - start) * 1000),
+        )
+
+    async def wait_idle(self) -> None:
+        """Attend la fin des recalculs en cours (arrêt, tests)."""
+        tasks = [task for task in self._refreshing.values() if not task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        """Compteurs de service (frais / périmé / absent)."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": sum(1 for task in self._refreshing.values() if not task.done()),
+            "fresh_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_insights_cache: Optional[DashboardInsightsCache] = None
+
+
+def get_dashboard_insights_cache() -> DashboardInsightsCache:
+    """Cache global des conseils du dashboard (un par worker)."""
+    global _insights_cache
+    if _insights_cache is None:
+        _insights_cache = DashboardInsightsCache()
+    return _insights_cache
+
+
+async def invalidate_dashboard_insights(user_id: int) -> None:
+    """À appeler après la saisie d'un repas, d'une activité ou d'eau."""
+    await get_dashboard_insights_cache().invalidate(user_id)
@@ -0,0 +1,181 @@
+"""
+Modèle de lecture du dashboard (GET /dashboard).
+
+Remplace les ~9 requêtes séquentielles de get_dashboard par :
+
+1. Une requête "une ligne" sur la session de la requête HTTP :
+   UserStats + Profile + résumé DailyNutrition du jour + sommes d'activité
+   (sous-requête agrégée), par jointures externes depuis users.
+2. Les listes (achievements récents, streaks actifs, notifications), lancées
+   en parallèle de (1) avec asyncio.gather, chacune dans sa propre session
+   (une AsyncSession n'exécute qu'une requête à la fois).
+
+Latence: un aller-retour base de données au lieu de neuf. Les totaux du jour
+viennent de DailyNutrition (maintenu par deltas, cf. daily_nutrition) au lieu
+d'une nouvelle somme des FoodLog.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Optional
+
+from sqlalchemy import and_, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.activity import ActivityLog
+from app.models.food_log import DailyNutrition
+from app.models.gamification import Achievement, Notification, Streak, UserStats
+from app.models.profile import Profile
+from app.models.user import User
+
+RECENT_ACHIEVEMENTS_LIMIT = 5
+NOTIFICATIONS_LIMIT = 10
+
+
+@dataclass
+class DashboardSnapshot:
+    """Données brutes du dashboard pour un utilisateur et un jour."""
+
+    stats: Optional[UserStats]
+    profile: Optional[Profile]
+    calories: int = 0
+    protein: float = 0.0
+    carbs: float = 0.0
+    fat: float = 0.0
+    meals_count: int = 0
+    water_ml: int = 0
+    activity_minutes: int = 0
+    calories_burned: int = 0
+    recent_achievements: list[Achievement] = field(default_factory=list)
+    active_streaks: list[Streak] = field(default_factory=list)
+    notifications: list[Notification] = field(default_factory=list)
+
+    @property
+    def logging_streak_days(self) -> int:
+        """Série de jours de saisie (0 si inactive)."""
+        for streak in self.active_streaks:
+            if streak.streak_type == "logging":
+                return streak.current_count or 0
+        return 0
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    return datetime.combine(day, datetime.min.time()), datetime.combine(day, datetime.max.time())
+
+
+def summary_query(user_id: int, day: date):
+    """Requête "une ligne": stats, profil, totaux du jour et activité."""
+    start, end = _day_bounds(day)
+
+    activity = (
+        select(
+            func.coalesce(func.sum(ActivityLog.duration_minutes), 0).label("minutes"),
+            func.coalesce(func.sum(ActivityLog.calories_burned), 0).label("burned"),
+        )
+        .where(and_(
+            ActivityLog.user_id == user_id,
+            ActivityLog.activity_date >= start,
+            ActivityLog.activity_date <= end,
+        ))
+        .subquery("activity_today")
+    )
+
+    return (
+        select(
+            UserStats,
+            Profile,
+            DailyNutrition.total_calories,
+            DailyNutrition.total_protein,
+            DailyNutrition.total_carbs,
+            DailyNutrition.total_fat,
+            DailyNutrition.meals_count,
+            DailyNutrition.water_ml,
+            activity.c.minutes,
+            activity.c.burned,
+        )
+        .select_from(User)
+        .outerjoin(UserStats, UserStats.user_id == User.id)
+        .outerjoin(Profile, Profile.user_id == User.id)
+        .outerjoin(DailyNutrition, and_(
+            DailyNutrition.user_id == User.id,
+            DailyNutrition.date >= start,
+            DailyNutrition.date <= end,
+        ))
+        .outerjoin(activity, true())
+        .where(User.id == user_id)
+    )
+
+
+def achievements_query(user_id: int):
+    return (
+        select(Achievement)
+        .where(Achievement.user_id == user_id)
+        .order_by(Achievement.unlocked_at.desc())
+        .limit(RECENT_ACHIEVEMENTS_LIMIT)
+    )
+
+
+def active_streaks_query(user_id: int):
+    return select(Streak).where(and_(Streak.user_id == user_id, Streak.current_count > 0))
+
+
+def notifications_query(user_id: int):
+    return (
+        select(Notification)
+        .where(Notification.user_id == user_id)
+        .order_by(Notification.created_at.desc())
+        .limit(NOTIFICATIONS_LIMIT)
+    )
+
+
+async def _fetch_all(session_maker: async_sessionmaker, query) -> list[Any]:
+    """Exécute une requête de liste dans une session dédiée."""
+    async with session_maker() as session:
+        return list((await session.execute(query)).scalars().all())
+
+
+async def load_dashboard_snapshot(
+    db: AsyncSession,
+    session_maker: async_sessionmaker,
+    user_id: int,
+    day: date,
+) -> DashboardSnapshot:
+    """
+    Charge toutes les données du dashboard en un aller-retour (requêtes parallèles).
+
+    Args:
+        db: Session de la requête (requête principale)
+        session_maker: Fabrique des sessions des requêtes de liste
+        user_id: Utilisateur
+        day: Jour affiché
+
+    Returns:
+        DashboardSnapshot (stats=None si UserStats n'existe pas encore)
+    """
+    summary_result, achievements, streaks, notifications = await asyncio.gather(
+        db.execute(summary_query(user_id, day)),
+        _fetch_all(session_maker, achievements_query(user_id)),
+        _fetch_all(session_maker, active_streaks_query(user_id)),
+        _fetch_all(session_maker, notifications_query(user_id)),
+    )
+
+    row = summary_result.one_or_none()
+    if row is None:
+        return DashboardSnapshot(stats=None, profile=None)
+
+    return DashboardSnapshot(
+        stats=row[0],
+        profile=row[1],
+        calories=row[2] or 0,
+        protein=row[3] or 0.0,
+        carbs=row[4] or 0.0,
+        fat=row[5] or 0.0,
+        meals_count=row[6] or 0,
+        water_ml=row[7] or 0,
+        activity_minutes=row[8] or 0,
+        calories_burned=row[9] or 0,
+        recent_achievements=achievements,
+        active_streaks=streaks,
+        notifications=notifications,
+    )
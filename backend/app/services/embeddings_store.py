@@ -0,0 +1,340 @@
+"""
+Format de stockage sur disque de l'index d'embeddings USDA (sans pickle).
+
+Remplace le pickle d'une liste de dicts (768 floats Python par aliment,
+500MB-1GB chargés en entier dans chaque worker) par un répertoire de
+fichiers colonnes ouverts en memory-map:
+
+    usda_embeddings_index/
+        manifest.json        # version, nombre d'aliments, dimension, dtype
+        embeddings.npy       # matrice (N x D) float16 ou float32, normalisée
+        fdc_ids.npy          # int64 (N,)
+        nutrients.npy        # float32 (N x 5), valeurs pour 100g
+        names.bin            # descriptions UTF-8 concaténées
+        name_offsets.npy     # int64 (N+1,), bornes de chaque description
+        ivf_centroids.npy    # optionnel: centroïdes IVF
+        ivf_offsets.npy      # optionnel: bornes des clusters IVF
+
+Les fichiers .npy sont ouverts avec np.load(mmap_mode="r") (np.memmap):
+les workers uvicorn partagent les pages via le page cache de l'OS,
+le démarrage prend quelques millisecondes et la RSS n'inclut que les
+pages réellement lues.
+"""
+
+from typing import Iterable, List, Optional, Sequence, Union
+import json
+import os
+import shutil
+from pathlib import Path
+import structlog
+import numpy as np
+
+from app.services.food_index import FoodEmbeddingIndex, normalize_rows
+
+logger = structlog.get_logger()
+
+STORE_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+FDC_IDS_FILE = "fdc_ids.npy"
+NUTRIENTS_FILE = "nutrients.npy"
+NAMES_FILE = "names.bin"
+NAME_OFFSETS_FILE = "name_offsets.npy"
+IVF_CENTROIDS_FILE = "ivf_centroids.npy"
+IVF_OFFSETS_FILE = "ivf_offsets.npy"
+
+# Colonnes de nutrients.npy (pour 100g), dans l'ordre
+NUTRIENT_COLUMNS = ("calories", "protein", "carbs", "fat", "fiber")
+
+# Nom USDA (sous-chaîne de nutrientName) -> colonne
+USDA_NUTRIENT_NAMES = {
+    "Energy": "calories",
+    "Protein": "protein",
+    "Carbohydrate, by difference": "carbs",
+    "Total lipid (fat)": "fat",
+    "Fiber, total dietary": "fiber",
+}
+
+# Nom USDA canonique par colonne (pour reconstruire foodNutrients)
+_COLUMN_USDA_NAMES = {column: name for name, column in USDA_NUTRIENT_NAMES.items()}
+
+
+def extract_nutrients(usda_food: dict) -> List[float]:
+    """
+    Extrait les nutriments pour 100g d'un aliment au format API USDA.
+
+    Args:
+        usda_food: Aliment USDA avec "foodNutrients"
+
+    Returns:
+        Valeurs dans l'ordre de NUTRIENT_COLUMNS (0.0 si absent)
+    """
+    values = dict.fromkeys(NUTRIENT_COLUMNS, 0.0)
+
+    for nutrient in usda_food.get("foodNutrients", []):
+        nutrient_name = nutrient.get("nutrientName", "")
+        for usda_name, column in USDA_NUTRIENT_NAMES.items():
+            if usda_name in nutrient_name:
+                try:
+                    values[column] = float(nutrient.get("value", 0.0) or 0.0)
+                except (TypeError, ValueError):
+                    pass
+                break
+
+    return [values[column] for column in NUTRIENT_COLUMNS]
+
+
+class FoodMetadataTable(Sequence):
+    """
+    Table de métadonnées colonne (noms, fdcId, nutriments pour 100g).
+
+    Se comporte comme une liste d'aliments au format API USDA
+    (dicts avec "fdcId", "description" et "foodNutrients"), construits
+    à la demande: seuls les résultats de recherche sont matérialisés.
+    """
+
+    def __init__(
+        self,
+        fdc_ids: np.ndarray,
+        nutrients: np.ndarray,
+        names: Union[bytes, np.ndarray],
+        name_offsets: np.ndarray,
+    ):
+        self.fdc_ids = fdc_ids
+        self.nutrients = nutrients
+        self._names = names
+        self._name_offsets = name_offsets
+
+    @classmethod
+    def from_foods(cls, usda_foods: Iterable[dict]) -> "FoodMetadataTable":
+        """Construit la table depuis des aliments au format API USDA."""
+        fdc_ids = []
+        nutrients = []
+        encoded_names = []
+        for food in usda_foods:
+            fdc_ids.append(int(food.get("fdcId") or 0))
+            nutrients.append(extract_nutrients(food))
+            encoded_names.append(str(food.get("description", "")).encode("utf-8"))
+
+        name_offsets = np.zeros(len(encoded_names) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded_names], out=name_offsets[1:])
+
+        return cls(
+            fdc_ids=np.asarray(fdc_ids, dtype=np.int64),
+            nutrients=np.asarray(nutrients, dtype=np.float32).reshape(-1, len(NUTRIENT_COLUMNS)),
+            names=b"".join(encoded_names),
+            name_offsets=name_offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.fdc_ids)
+
+    def name(self, i: int) -> str:
+        """Description de l'aliment i."""
+        start, end = int(self._name_offsets[i]), int(self._name_offsets[i + 1])
+        return bytes(self._names[start:end]).decode("utf-8")
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        values = self.nutrients[i]
+        return {
+            "fdcId": int(self.fdc_ids[i]),
+            "description": self.name(i),
+            "foodNutrients": [
+                {"nutrientName": _COLUMN_USDA_NAMES[column], "value": float(value)}
+                for column, value in zip(NUTRIENT_COLUMNS, values)
+            ],
+        }
+
+    def take(self, order: np.ndarray) -> "FoodMetadataTable":
+        """Retourne une nouvelle table (en mémoire) réordonnée selon `order`."""
+        order = np.asarray(order, dtype=np.int64)
+        encoded_names = [
+            bytes(self._names[int(self._name_offsets[i]):int(self._name_offsets[i + 1])])
+            for i in order
+        ]
+        name_offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded_names], out=name_offsets[1:])
+
+        return FoodMetadataTable(
+            fdc_ids=np.asarray(self.fdc_ids)[order],
+            nutrients=np.asarray(self.nutrients)[order],
+            names=b"".join(encoded_names),
+            name_offsets=name_offsets,
+        )
+
+
+def save_embeddings_store(
+    index: FoodEmbeddingIndex,
+    directory: Union[str, Path],
+    dtype: str = "float32",
+) -> Path:
+    """
+    Écrit l'index au format colonne memory-mappable.
+
+    L'écriture se fait dans un répertoire temporaire renommé à la fin,
+    pour ne jamais exposer un index partiel aux workers.
+
+    Args:
+        index: Index à sauvegarder (métadonnées au format API USDA)
+        directory: Répertoire de destination
+        dtype: "float32" ou "float16" (moitié de la taille, recommandé avec IVF)
+
+    Returns:
+        Chemin du répertoire écrit
+    """
+    if dtype not in ("float16", "float32"):
+        raise ValueError(f"dtype non supporté: {dtype}")
+
+    directory = Path(directory)
+    tmp_dir = directory.with_name(directory.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    foods = index.foods
+    table = foods if isinstance(foods, FoodMetadataTable) else FoodMetadataTable.from_foods(foods)
+
+    np.save(tmp_dir / EMBEDDINGS_FILE, np.asarray(index.embeddings, dtype=dtype))
+    np.save(tmp_dir / FDC_IDS_FILE, np.asarray(table.fdc_ids))
+    np.save(tmp_dir / NUTRIENTS_FILE, np.asarray(table.nutrients))
+    np.save(tmp_dir / NAME_OFFSETS_FILE, np.asarray(table._name_offsets))
+    with open(tmp_dir / NAMES_FILE, "wb") as f:
+        f.write(bytes(table._names))
+
+    has_ivf = index.centroids is not None
+    if has_ivf:
+        np.save(tmp_dir / IVF_CENTROIDS_FILE, index.centroids)
+        np.save(tmp_dir / IVF_OFFSETS_FILE, index.list_offsets)
+
+    manifest = {
+        "format_version": STORE_FORMAT_VERSION,
+        "count": len(index),
+        "dimension": index.dimension,
+        "dtype": dtype,
+        "normalized": True,
+        "nutrient_columns": list(NUTRIENT_COLUMNS),
+        "ivf": has_ivf,
+    }
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    if directory.exists():
+        shutil.rmtree(directory)
+    os.replace(tmp_dir, directory)
+
+    logger.info(
+        "embeddings_store_saved",
+        path=str(directory),
+        count=len(index),
+        dtype=dtype,
+        ivf=has_ivf,
+    )
+    return directory
+
+
+def load_embeddings_store(directory: Union[str, Path]) -> Optional[FoodEmbeddingIndex]:
+    """
+    Ouvre un index sauvegardé par `save_embeddings_store` en memory-map.
+
+    Args:
+        directory: Répertoire de l'index
+
+    Returns:
+        FoodEmbeddingIndex adossé aux fichiers, ou None si absent/invalide
+    """
+    directory = Path(directory)
+    manifest_path = directory / MANIFEST_FILE
+
+    if not manifest_path.exists():
+        logger.warning("embeddings_store_not_found", path=str(directory))
+        return None
+
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("format_version") != STORE_FORMAT_VERSION:
+            logger.error(
+                "embeddings_store_version_mismatch",
+                path=str(directory),
+                version=manifest.get("format_version"),
+            )
+            return None
+
+        embeddings = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+        table = FoodMetadataTable(
+            fdc_ids=np.load(directory / FDC_IDS_FILE, mmap_mode="r"),
+            nutrients=np.load(directory / NUTRIENTS_FILE, mmap_mode="r"),
+            names=np.memmap(directory / NAMES_FILE, dtype=np.uint8, mode="r")
+            if (directory / NAMES_FILE).stat().st_size > 0 else b"",
+            name_offsets=np.load(directory / NAME_OFFSETS_FILE, mmap_mode="r"),
+        )
+
+        index = FoodEmbeddingIndex(embeddings, table, normalized=True)
+
+        if manifest.get("ivf"):
+            index.set_ivf(
+                np.load(directory / IVF_CENTROIDS_FILE),
+                np.load(directory / IVF_OFFSETS_FILE),
+            )
+
+        logger.info(
+            "embeddings_store_loaded",
+            path=str(directory),
+            count=len(index),
+            dtype=manifest.get("dtype"),
+            ivf=index.mode,
+        )
+        return index
+
+    except Exception as e:
+        logger.error("embeddings_store_load_error", path=str(directory), error=str(e))
+        return None
+
+
+def convert_pickle_cache(
+    usda_foods: List[dict],
+    directory: Union[str, Path],
+    dtype: str = "float32",
+    n_lists: Optional[int] = None,
+) -> Path:
+    """
+    Convertit le cache pickle (liste de dicts avec "embedding") en index colonne.
+
+    Args:
+        usda_foods: Contenu du pickle usda_embeddings.pkl
+        directory: Répertoire de destination
+        dtype: "float32" ou "float16"
+        n_lists: Si fourni (>0), pré-calcule l'index IVF avec ce nombre de clusters
+            (0 = auto). None = index exact uniquement.
+
+    Returns:
+        Chemin du répertoire écrit
+    """
+    foods = [food for food in usda_foods if "embedding" in food]
+    matrix = normalize_rows(np.asarray([food["embedding"] for food in foods], dtype=np.float32))
+    # Les métadonnées n'ont pas besoin de garder les embeddings (listes Python)
+    table = FoodMetadataTable.from_foods(foods)
+
+    # Index sur les positions: après build_ivf, `foods` donne l'ordre final des lignes
+    index = FoodEmbeddingIndex(matrix, list(range(len(foods))), normalized=True)
+    if n_lists is not None and len(foods) > 0:
+        index.build_ivf(n_lists=n_lists or None)
+
+    store_index = FoodEmbeddingIndex(
+        index.embeddings,
+        table.take(np.asarray(index.foods, dtype=np.int64)),
+        normalized=True,
+    )
+    if index.centroids is not None:
+        store_index.set_ivf(index.centroids, index.list_offsets)
+
+    return save_embeddings_store(store_index, directory, dtype=dtype)
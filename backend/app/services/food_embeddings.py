@@ -8,8 +8,10 @@ Architecture:
 - Embeddings dimension: 768
 - Langues supportées: 50+ (incluant FR, EN, AR, DE, ES, PT, ZH)
 - Similarity: Cosine similarity avec seuil 0.75
+- Recherche: FoodEmbeddingIndex (matrice float32 normalisée, exact ou IVF)
 """
 
+import asyncio
 from typing import Optional, List, Tuple
 import pickle
 from pathlib import Path
@@ -17,12 +19,23 @@ import structlog
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 
+from app.config import get_settings
+from app.services.food_index import FoodEmbeddingIndex, INDEX_MODE_IVF
+from app.services.embeddings_store import load_embeddings_store
+
+settings = get_settings()
 logger = structlog.get_logger()
 
 # Cache global pour le modèle et l'index
 _model = None
-_usda_embeddings_cache = None
+_usda_embeddings_cache: Optional[FoodEmbeddingIndex] = None
+_usda_embeddings_source_id: Optional[int] = None
 _usda_foods_cache = None
+# Construction IVF en arrière-plan (index sans IVF pré-calculé)
+_ivf_build_task: Optional[asyncio.Task] = None
+
+# Identifiant de source pour l'index chargé depuis FOOD_INDEX_PATH
+_STORE_SOURCE_ID = -1
 
 
 def get_embedding_model():
@@ -101,49 +114,152 @@ def calculate_similarity(embedding1: np.ndarray, embedding2: np.ndarray) -> floa
     return float(similarity)
 
 
+def get_food_index(usda_foods: Optional[List[dict]] = None) -> Optional[FoodEmbeddingIndex]:
+    """
+    Retourne l'index vectoriel des aliments USDA (construit une seule fois).
+
+    Source par défaut: l'index colonne memory-mappé (FOOD_INDEX_PATH),
+    sinon l'ancien cache pickle. Le mode (exact ou IVF) est configuré via
+    FOOD_INDEX_MODE, FOOD_INDEX_IVF_LISTS et FOOD_INDEX_IVF_NPROBE.
+
+    Args:
+        usda_foods: Liste d'aliments avec embeddings (défaut: index sur disque)
+
+    Returns:
+        FoodEmbeddingIndex ou None si aucun embedding disponible
+    """
+    global _usda_embeddings_cache, _usda_embeddings_source_id
+
+    if usda_foods is None:
+        if _usda_embeddings_cache is not None and _usda_embeddings_source_id == _STORE_SOURCE_ID:
+            return _usda_embeddings_cache
+
+        index = load_embeddings_store(settings.FOOD_INDEX_PATH)
+        if index is not None:
+            _configure_index(index)
+            _usda_embeddings_cache = index
+            _usda_embeddings_source_id = _STORE_SOURCE_ID
+            return index
+
+        usda_foods = load_embeddings_cache()
+        if usda_foods is None:
+            return None
+
+    # Reconstruire uniquement si la liste source a changé
+    if _usda_embeddings_cache is not None and _usda_embeddings_source_id == id(usda_foods):
+        return _usda_embeddings_cache
+
+    index = FoodEmbeddingIndex.from_foods(usda_foods)
+    _configure_index(index)
+
+    _usda_embeddings_cache = index
+    _usda_embeddings_source_id = id(usda_foods)
+    return index
+
+
+def _configure_index(index: FoodEmbeddingIndex) -> None:
+    """
+    Applique le mode de recherche configuré à l'index.
+
+    Index memory-mappé sans IVF pré-calculé: reste en recherche exacte (une
+    copie IVF chargerait toute la matrice en RAM privée dans chaque worker),
+    l'IVF se pré-calcule avec scripts/convert_embeddings_cache.py --ivf.
+    Index en mémoire (cache pickle): l'IVF est construit dans un thread sur
+    une copie de l'index, qui remplace l'index en cache une fois prêt: la
+    recherche exacte est servie d'ici là et l'event loop n'exécute jamais
+    le k-means.
+    """
+    index.n_probe = settings.FOOD_INDEX_IVF_NPROBE
+
+    if settings.FOOD_INDEX_MODE == INDEX_MODE_IVF:
+        if index.mode != INDEX_MODE_IVF and len(index) > 0:
+            if isinstance(index.embeddings, np.memmap):
+                logger.warning(
+                    "food_index_ivf_missing",
+                    path=settings.FOOD_INDEX_PATH,
+                    hint="scripts/convert_embeddings_cache.py --ivf",
+                )
+            else:
+                _schedule_ivf_build(index)
+    elif index.mode == INDEX_MODE_IVF:
+        index.drop_ivf()
+
+    logger.info("food_index_ready", size=len(index), mode=index.mode, n_probe=index.n_probe)
+
+
+def _build_ivf_copy(index: FoodEmbeddingIndex) -> FoodEmbeddingIndex:
+    """Copie IVF de l'index (build_ivf réordonne les lignes: l'original reste intact)."""
+    ivf_index = FoodEmbeddingIndex(index.embeddings, index.foods, normalized=True)
+    ivf_index.n_probe = index.n_probe
+    return ivf_index.build_ivf(n_lists=settings.FOOD_INDEX_IVF_LISTS or None)
+
+
+def _schedule_ivf_build(index: FoodEmbeddingIndex) -> None:
+    """Lance la construction IVF dans un thread (inline hors event loop, ex: scripts)."""
+    global _ivf_build_task
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        index.build_ivf(n_lists=settings.FOOD_INDEX_IVF_LISTS or None)
+        return
+
+    if _ivf_build_task is not None and not _ivf_build_task.done():
+        return
+    _ivf_build_task = asyncio.create_task(_build_ivf_in_background(index))
+
+
+async def _build_ivf_in_background(index: FoodEmbeddingIndex) -> None:
+    global _usda_embeddings_cache
+
+    try:
+        ivf_index = await asyncio.to_thread(_build_ivf_copy, index)
+    except Exception as e:
+        logger.error("food_index_ivf_build_error", error=str(e))
+        return
+
+    # Ne remplacer que si la source n'a pas changé entre-temps
+    if _usda_embeddings_cache is index:
+        _usda_embeddings_cache = ivf_index
+        logger.info("food_index_ready", size=len(ivf_index), mode=ivf_index.mode, n_probe=ivf_index.n_probe)
+
+
 async def search_similar_foods(
     query_text: str,
-    usda_foods: List[dict],
+    usda_foods: Optional[List[dict]] = None,
     top_k: int = 5,
-    threshold: float = 0.75
+    threshold: float = 0.75,
+    index: Optional[FoodEmbeddingIndex] = None,
 ) -> List[Tuple[dict, float]]:
     """
     Recherche les aliments USDA les plus similaires sémantiquement.
 
     Args:
         query_text: Nom de l'aliment recherché (n'importe quelle langue)
-        usda_foods: Liste des aliments USDA avec leurs embeddings
+        usda_foods: Liste des aliments USDA avec leurs embeddings (défaut: cache)
         top_k: Nombre de résultats à retourner
         threshold: Seuil de similarité minimum (0.75 recommandé)
+        index: Index pré-construit (prioritaire sur usda_foods)
 
     Returns:
         Liste de tuples (aliment, score_similarité) triée par score décroissant
     """
+    if index is None:
+        index = get_food_index(usda_foods)
+    if index is None or len(index) == 0:
+        return []
+
     # Embedder la query
     query_embedding = embed_text(query_text)
 
-    # Calculer similarités avec tous les aliments USDA
-    similarities = []
-
-    for food in usda_foods:
-        if "embedding" not in food:
-            continue
-
-        food_embedding = np.array(food["embedding"])
-        similarity = calculate_similarity(query_embedding, food_embedding)
-
-        if similarity >= threshold:
-            similarities.append((food, similarity))
-
-    # Trier par similarité décroissante
-    similarities.sort(key=lambda x: x[1], reverse=True)
-
-    return similarities[:top_k]
+    return index.search(query_embedding, top_k=top_k, threshold=threshold)
 
 
 def save_embeddings_cache(usda_foods: List[dict], cache_path: str = "usda_embeddings.pkl"):
     """
-    Sauvegarde les embeddings USDA dans un fichier cache.
+    Sauvegarde les embeddings USDA dans un fichier cache (ancien format pickle).
+
+    Préférer embeddings_store.convert_pickle_cache, chargé en memory-map.
 
     Args:
         usda_foods: Liste des aliments avec embeddings
@@ -163,7 +279,9 @@ def save_embeddings_cache(usda_foods: List[dict], cache_path: str = "usda_embedd
 
 def load_embeddings_cache(cache_path: str = "usda_embeddings.pkl") -> Optional[List[dict]]:
     """
-    Charge les embeddings USDA depuis le fichier cache.
+    Charge les embeddings USDA depuis le fichier cache (ancien format pickle).
+
+    Utilisé uniquement si l'index colonne (FOOD_INDEX_PATH) est absent.
 
     Args:
         cache_path: Chemin du fichier cache
@@ -241,16 +359,16 @@ save_embeddings_cache(usda_foods_with_embeddings)
 
 
 # === RECHERCHE MULTILINGUE ===
-usda_foods = load_embeddings_cache()
+index = get_food_index()
 
 # Recherche en français
-results_fr = await search_similar_foods("poulet grillé", usda_foods, top_k=3)
+results_fr = await search_similar_foods("poulet grillé", index=index, top_k=3)
 
 # Recherche en arabe
-results_ar = await search_similar_foods("دجاج", usda_foods, top_k=3)
+results_ar = await search_similar_foods("دجاج", index=index, top_k=3)
 
 # Recherche en espagnol
-results_es = await search_similar_foods("pollo asado", usda_foods, top_k=3)
+results_es = await search_similar_foods("pollo asado", index=index, top_k=3)
 
 for food, score in results_fr:
     print(f"{food['description']}: {score:.2f}")
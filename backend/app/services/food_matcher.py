@@ -0,0 +1,108 @@
+"""
+Recherche multi-motifs (Aho-Corasick) pour la traduction des noms d'aliments.
+
+Un automate est compilé une fois par langue à partir de FOOD_TRANSLATIONS.
+Une recherche parcourt la requête une seule fois, en O(len(requête)) quel que
+soit le nombre d'entrées du dictionnaire, et retient la correspondance la plus
+longue (à longueur égale: la plus à gauche). Fonctionne au niveau caractère,
+donc aussi pour le chinois et l'arabe (pas d'espaces entre les mots).
+"""
+
+from collections import deque
+from typing import Optional
+
+
+class FoodMatcher:
+    """Automate Aho-Corasick avec sémantique "la plus longue correspondance gagne"."""
+
+    def __init__(self, translations: dict[str, str]):
+        self._translations = dict(translations)
+        # Transitions par nœud (nœud 0 = racine)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Motif le plus long se terminant à ce nœud (lui-même ou via les liens d'échec)
+        self._best: list[Optional[str]] = [None]
+
+        for pattern in self._translations:
+            if pattern:
+                self._add(pattern)
+        self._build_links()
+
+    def _add(self, pattern: str) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            node = next_node
+        self._best[node] = pattern
+
+    def _build_links(self) -> None:
+        """Liens d'échec en largeur, puis propagation du motif le plus long."""
+        # Les enfants de la racine gardent fail = 0
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+
+                # Le motif propre du nœud est toujours le plus long se terminant ici
+                if self._best[child] is None:
+                    self._best[child] = self._best[self._fail[child]]
+                queue.append(child)
+
+            # Transitions complètes (automate déterministe): hérite des transitions
+            # du lien d'échec, donc plus de remontée des liens pendant la recherche
+            if node:
+                for char, target in self._goto[self._fail[node]].items():
+                    self._goto[node].setdefault(char, target)
+
+    def __len__(self) -> int:
+        return len(self._translations)
+
+    def longest_match(self, text: str) -> Optional[str]:
+        """
+        Plus longue entrée du dictionnaire contenue dans `text`.
+
+        Returns:
+            Le motif source trouvé, ou None
+        """
+        goto, best = self._goto, self._best
+        node = 0
+        found: Optional[str] = None
+        found_start = 0
+
+        for end, char in enumerate(text, start=1):
+            node = goto[node].get(char) or goto[0].get(char, 0)
+
+            pattern = best[node]
+            if pattern is not None:
+                start = end - len(pattern)
+                if (
+                    found is None
+                    or len(pattern) > len(found)
+                    or (len(pattern) == len(found) and start < found_start)
+                ):
+                    found, found_start = pattern, start
+
+        return found
+
+    def translate(self, text: str) -> Optional[str]:
+        """
+        Traduit `text` (déjà en minuscules): correspondance exacte, sinon la plus longue partielle.
+
+        Returns:
+            Traduction anglaise, ou None
+        """
+        english = self._translations.get(text)
+        if english is not None:
+            return english
+        pattern = self.longest_match(text)
+        return self._translations[pattern] if pattern is not None else None
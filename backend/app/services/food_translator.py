@@ -10,11 +10,12 @@ import structlog
 
 from app.llm.client import get_hf_client
 from app.llm.models import ModelCapability, get_primary_models
+from app.services.translation_cache import get_translation_cache
 
 logger = structlog.get_logger()
 
-# Cache simple en mémoire pour éviter de traduire plusieurs fois le même aliment
-_translation_cache: dict[tuple[str, str], str] = {}
+# Cache borné (LRU + TTL), partagé entre workers via Redis, préchargé avec FOOD_TRANSLATIONS
+CACHE_NAMESPACE = "llm"
 
 
 async def translate_food_name_to_english(
@@ -36,15 +37,16 @@ async def translate_food_name_to_english(
         return food_name
 
     # Vérifier le cache
-    cache_key = (food_name.lower(), source_language)
-    if cache_key in _translation_cache:
+    cache = get_translation_cache(CACHE_NAMESPACE)
+    cached = await cache.get(food_name, source_language, "en")
+    if cached is not None:
         logger.info(
             "translation_cache_hit",
             food_name=food_name,
             language=source_language,
-            cached_translation=_translation_cache[cache_key]
+            cached_translation=cached
         )
-        return _translation_cache[cache_key]
+        return cached
 
     # Traduction via LLM
     try:
@@ -77,14 +79,16 @@ Traduction anglaise:"""
             model_id=model.id,
             prompt=prompt,
             max_new_tokens=50,
-            temperature=0.3  # Basse température pour cohérence
+            temperature=0.3,  # Basse température pour cohérence
+            cache_namespace="translation",
         )
 
         # Extraire la traduction (nettoyer la réponse)
         translation = _clean_translation(response)
 
         # Sauvegarder dans le cache
-        _translation_cache[cache_key] = translation
+        if translation:
+            await cache.set(food_name, source_language, "en", translation)
 
         logger.info(
             "food_translation",
@@ -154,7 +158,7 @@ def _get_language_name(code: str) -> str:
     return languages.get(code, code)
 
 
-def clear_translation_cache():
+async def clear_translation_cache():
     """Vide le cache de traduction (utile pour tests)."""
-    _translation_cache.clear()
+    await get_translation_cache(CACHE_NAMESPACE).clear()
     logger.info("translation_cache_cleared")
@@ -0,0 +1,189 @@
+"""
+Prétraitement des photos avant l'envoi au VLM (/vision/analyze).
+
+Le base64 du client était transmis tel quel à vision_chat: photos de 5-12 Mo
+en 4000 px, métadonnées EXIF (GPS compris) incluses. Chaque image est
+maintenant :
+
+1. décodée et vérifiée (taille max VISION_MAX_IMAGE_BYTES, protection
+   contre les "decompression bombs" de Pillow)
+2. redressée selon l'orientation EXIF puis réduite à VISION_IMAGE_MAX_SIDE
+   (résolution effective du VLM: au-delà, le modèle redimensionne lui-même)
+3. ré-encodée en JPEG ou WebP (VISION_IMAGE_FORMAT, VISION_IMAGE_QUALITY),
+   sans EXIF, puis ré-encodée en base64
+
+Le travail CPU tourne dans un pool de threads dédié (Pillow libère le GIL
+pendant le décodage et le redimensionnement): l'event loop n'est jamais
+bloquée. Sans Pillow, l'image est transmise telle quelle.
+"""
+
+import asyncio
+import base64
+import binascii
+import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Optional
+
+import structlog
+
+from app.config import get_settings
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    ImageOps = None
+    PIL_AVAILABLE = False
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+MEDIA_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+
+class ImagePreprocessingError(ValueError):
+    """Image illisible, trop grande ou dans un format non supporté."""
+
+
+@dataclass
+class PreprocessedImage:
+    """Image prête pour le VLM."""
+
+    image_base64: str
+    media_type: str
+    width: int
+    height: int
+    original_bytes: int
+    processed_bytes: int
+
+    @property
+    def reduction_percent(self) -> float:
+        if not self.original_bytes:
+            return 0.0
+        return round((1 - self.processed_bytes / self.original_bytes) * 100, 1)
+
+
+def _decode_base64(image_base64: str) -> bytes:
+    if image_base64.startswith("data:"):
+        image_base64 = image_base64.split(",", 1)[-1]
+    try:
+        return base64.b64decode(image_base64)
+    except (binascii.Error, ValueError) as e:
+        raise ImagePreprocessingError("Encodage base64 invalide") from e
+
+
+def preprocess_image(
+    image_base64: str,
+    max_side: Optional[int] = None,
+    image_format: Optional[str] = None,
+    quality: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> PreprocessedImage:
+    """
+    Décode, redresse, réduit et ré-encode une image (synchrone, CPU).
+
+    Raises:
+        ImagePreprocessingError: image invalide ou trop grande
+    """
+    max_side = max_side or settings.VISION_IMAGE_MAX_SIDE
+    image_format = (image_format or settings.VISION_IMAGE_FORMAT).lower()
+    quality = quality or settings.VISION_IMAGE_QUALITY
+    max_bytes = max_bytes or settings.VISION_MAX_IMAGE_BYTES
+    if image_format not in MEDIA_TYPES:
+        raise ValueError(f"Format de sortie non supporté: {image_format}")
+
+    # Taille décodée estimée avant de décoder (base64 = 4/3)
+    if len(image_base64) * 3 // 4 > max_bytes:
+        raise ImagePreprocessingError("Image trop volumineuse")
+    raw = _decode_base64(image_base64)
+
+    try:
+        with Image.open(io.BytesIO(raw)) as image:
+            # Décodage JPEG à résolution réduite quand c'est possible (bien plus rapide)
+            image.draft("RGB", (max_side, max_side))
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+            output = io.BytesIO()
+            # Pas de paramètre exif: les métadonnées ne sont pas recopiées
+            if image_format == "webp":
+                image.save(output, format="WEBP", quality=quality, method=4)
+            else:
+                image.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+            width, height = image.size
+    except Image.DecompressionBombError as e:
+        raise ImagePreprocessingError("Image trop grande (pixels)") from e
+    except (OSError, SyntaxError, ValueError) as e:
+        raise ImagePreprocessingError("Image illisible") from e
+
+    processed = output.getvalue()
+    return PreprocessedImage(
+        image_base64=base64.b64encode(processed).decode("ascii"),
+        media_type=MEDIA_TYPES[image_format],
+        width=width,
+        height=height,
+        original_bytes=len(raw),
+        processed_bytes=len(processed),
+    )
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.VISION_PREPROCESS_THREADS,
+            thread_name_prefix="image-preprocess",
+        )
+    return _executor
+
+
+async def run_in_image_pool(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Exécute un traitement d'image (CPU) dans le pool dédié."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(func, *args, **kwargs))
+
+
+async def preprocess_image_async(image_base64: str) -> PreprocessedImage:
+    """
+    Prétraite une image hors de l'event loop.
+
+    Sans Pillow, l'image d'origine est renvoyée (type JPEG supposé).
+
+    Raises:
+        ImagePreprocessingError: image invalide ou trop grande
+    """
+    if not PIL_AVAILABLE:
+        size = len(image_base64) * 3 // 4
+        return PreprocessedImage(image_base64, "image/jpeg", 0, 0, size, size)
+
+    result = await run_in_image_pool(preprocess_image, image_base64)
+    logger.info(
+        "vision_image_preprocessed",
+        width=result.width,
+        height=result.height,
+        original_kb=round(result.original_bytes / 1024, 1),
+        processed_kb=round(result.processed_bytes / 1024, 1),
+        reduction_percent=result.reduction_percent,
+    )
+    return result
+
+
+def shutdown_image_preprocessing() -> None:
+    """Arrête le pool de threads (arrêt de l'application)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
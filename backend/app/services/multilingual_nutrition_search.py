@@ -7,7 +7,7 @@ Architecture waterfall optimisée:
 3. LLM NUTRITION ESTIMATION (fallback final)
 
 Performance:
-- Embeddings: ~30-50ms, précision ~90%
+- Embeddings: ~30-50ms (index exact) ou <5ms (index IVF), précision ~90%
 - NLLB-200 Traduction: ~200-500ms, précision ~85% (vs ~70% LLM)
 - LLM: ~2-3s, précision ~60-80%
 
@@ -20,7 +20,7 @@ from typing import Optional
 import structlog
 
 from app.services.nutrition_database import search_nutrition, NutritionData
-from app.services.food_embeddings import search_similar_foods, load_embeddings_cache
+from app.services.food_embeddings import search_similar_foods, get_food_index
 from app.services.nllb_translator import translate_food_to_english
 from app.agents.nutrition import estimate_nutrition_llm
 
@@ -59,14 +59,14 @@ async def search_nutrition_multilingual(
     # === ÉTAPE 1: EMBEDDINGS SIMILARITY SEARCH ===
     # Prioritaire: cross-lingue, ultra-rapide, haute précision
     try:
-        usda_foods_with_embeddings = load_embeddings_cache()
+        food_index = get_food_index()
 
-        if usda_foods_with_embeddings:
-            logger.info("trying_embeddings_search", food=food_name)
+        if food_index is not None and len(food_index) > 0:
+            logger.info("trying_embeddings_search", food=food_name, index_mode=food_index.mode)
 
             similar_foods = await search_similar_foods(
                 query_text=food_name,
-                usda_foods=usda_foods_with_embeddings,
+                index=food_index,
                 top_k=EMBEDDING_TOP_K,
                 threshold=EMBEDDING_SIMILARITY_THRESHOLD
             )
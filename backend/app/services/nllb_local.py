@@ -0,0 +1,247 @@
+"""
+Backend local (CPU) pour la traduction NLLB-200.
+
+Charge facebook/nllb-200-distilled-600M une seule fois par processus via
+transformers, optionnellement quantifié (int8 dynamique, torch) ou exporté en
+ONNX (optimum[onnxruntime]). La génération tourne dans un pool de threads
+dédié: l'event loop n'est jamais bloquée (torch/onnxruntime libèrent le GIL
+pendant le calcul).
+
+Activé avec NLLB_BACKEND="local". Tant que le modèle n'est pas chargé
+(chargement en arrière-plan, réessayé au plus toutes les
+NLLB_LOCAL_RETRY_INTERVAL secondes après un échec) et en cas d'échec
+(dépendances absentes, erreur d'inférence), nllb_translator retombe sur
+l'API distante.
+"""
+
+import asyncio
+import importlib.util
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import structlog
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+
+def is_local_backend_available() -> bool:
+    """True si transformers (et optimum pour l'ONNX) sont installés."""
+    if importlib.util.find_spec("transformers") is None:
+        return False
+    if settings.NLLB_LOCAL_ONNX and importlib.util.find_spec("optimum") is None:
+        return False
+    return True
+
+
+class LocalNLLBTranslator:
+    """Modèle NLLB chargé en mémoire (un par processus)."""
+
+    def __init__(
+        self,
+        model_id: Optional[str] = None,
+        quantize: Optional[bool] = None,
+        onnx: Optional[bool] = None,
+        max_length: int = 64,
+        num_beams: int = 2,
+    ):
+        self.model_id = model_id or settings.NLLB_LOCAL_MODEL
+        self.quantize = settings.NLLB_LOCAL_QUANTIZE if quantize is None else quantize
+        self.onnx = settings.NLLB_LOCAL_ONNX if onnx is None else onnx
+        self.max_length = max_length
+        self.num_beams = num_beams
+        self._tokenizer = None
+        self._model = None
+        self._load_lock = threading.Lock()
+        # Le tokenizer NLLB porte la langue source (src_lang): pas de lots concurrents
+        self._generate_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> None:
+        """Charge tokenizer et modèle (idempotent, thread-safe)."""
+        with self._load_lock:
+            if self._model is not None:
+                return
+
+            from transformers import AutoTokenizer
+
+            logger.info("nllb_local_loading", model=self.model_id, onnx=self.onnx, quantize=self.quantize)
+            tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+
+            if self.onnx:
+                from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+                model = ORTModelForSeq2SeqLM.from_pretrained(self.model_id, export=True)
+            else:
+                import torch
+                from transformers import AutoModelForSeq2SeqLM
+
+                model = AutoModelForSeq2SeqLM.from_pretrained(self.model_id)
+                model.eval()
+                if self.quantize:
+                    model = torch.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+
+            self._tokenizer = tokenizer
+            self._model = model
+            logger.info("nllb_local_loaded", model=self.model_id)
+
+    def translate_batch(self, texts: list[str], src_code: str, tgt_code: str) -> list[str]:
+        """
+        Traduit un lot (appel bloquant, à exécuter dans le pool).
+
+        Args:
+            texts: Textes à traduire
+            src_code: Code NLLB source (ex: "zho_Hans")
+            tgt_code: Code NLLB cible (ex: "eng_Latn")
+
+        Returns:
+            Traductions (même ordre)
+        """
+        self.load()
+
+        with self._generate_lock:
+            self._tokenizer.src_lang = src_code
+            inputs = self._tokenizer(
+                texts,
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+            )
+
+            if self.onnx:
+                outputs = self._generate(inputs, tgt_code)
+            else:
+                import torch
+
+                with torch.inference_mode():
+                    outputs = self._generate(inputs, tgt_code)
+
+            return [
+                text.strip()
+                for text in self._tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            ]
+
+    def _generate(self, inputs, tgt_code: str):
+        return self._model.generate(
+            **inputs,
+            forced_bos_token_id=self._tokenizer.convert_tokens_to_ids(tgt_code),
+            max_new_tokens=self.max_length,
+            num_beams=self.num_beams,
+        )
+
+
+_translator: Optional[LocalNLLBTranslator] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_load_task: Optional[asyncio.Task] = None
+_load_failed_at: Optional[float] = None
+
+
+def get_local_translator() -> LocalNLLBTranslator:
+    """Traducteur local (singleton par processus, chargé paresseusement)."""
+    global _translator
+    if _translator is None:
+        _translator = LocalNLLBTranslator()
+    return _translator
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.NLLB_LOCAL_THREADS,
+            thread_name_prefix="nllb-local",
+        )
+    return _executor
+
+
+async def _load_model() -> bool:
+    global _load_failed_at
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_get_executor(), get_local_translator().load)
+    except Exception as e:
+        _load_failed_at = time.monotonic()
+        logger.error("nllb_local_load_error", error=str(e))
+        return False
+    _load_failed_at = None
+    return True
+
+
+def _ensure_loading() -> Optional[asyncio.Task]:
+    """
+    Lance le chargement du modèle en arrière-plan s'il n'est pas déjà en cours.
+
+    Après un échec, pas de nouvelle tentative avant NLLB_LOCAL_RETRY_INTERVAL.
+
+    Returns:
+        Tâche de chargement, ou None si une tentative récente a échoué
+    """
+    global _load_task
+    if _load_task is not None and not _load_task.done():
+        return _load_task
+    if _load_failed_at is not None and time.monotonic() - _load_failed_at < settings.NLLB_LOCAL_RETRY_INTERVAL:
+        return None
+    _load_task = asyncio.create_task(_load_model())
+    return _load_task
+
+
+async def translate_local(
+    texts: list[str],
+    src_code: str,
+    tgt_code: str
+) -> Optional[list[str]]:
+    """
+    Traduit un lot avec le modèle local, hors de l'event loop.
+
+    Le modèle n'est jamais chargé sur le chemin d'une traduction: tant qu'il
+    n'est pas prêt, le chargement est lancé en arrière-plan et l'appelant
+    utilise l'API distante.
+
+    Returns:
+        Traductions (même ordre), ou None si le backend local a échoué ou n'est pas prêt
+    """
+    if not is_local_backend_available():
+        logger.warning("nllb_local_unavailable", message="transformers not installed")
+        return None
+
+    translator = get_local_translator()
+    if not translator.is_loaded:
+        _ensure_loading()
+        logger.debug("nllb_local_not_ready", count=len(texts))
+        return None
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _get_executor(), translator.translate_batch, texts, src_code, tgt_code
+        )
+    except Exception as e:
+        logger.error("nllb_local_error", error=str(e), count=len(texts))
+        return None
+
+
+async def preload_local_model() -> bool:
+    """Charge le modèle au démarrage (évite la latence du premier appel)."""
+    if not is_local_backend_available():
+        logger.warning("nllb_local_unavailable", message="transformers not installed")
+        return False
+    task = _ensure_loading()
+    return await task if task is not None else False
+
+
+def shutdown_local_backend() -> None:
+    """Arrête le pool de threads (arrêt de l'application)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
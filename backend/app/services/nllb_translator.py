@@ -18,11 +18,16 @@ Langues supportées par le projet:
 """
 
 import asyncio
+import json
+from dataclasses import asdict, dataclass
 from typing import Optional
 import httpx
 import structlog
 
 from app.config import get_settings
+from app.core.http_pool import get_http_client, HUGGINGFACE
+from app.services.nllb_local import translate_local
+from app.services.translation_cache import get_translation_cache
 
 settings = get_settings()
 logger = structlog.get_logger()
@@ -46,14 +51,25 @@ NLLB_LANGUAGE_CODES = {
     "ar": "arb_Arab",  # Arabic
 }
 
+# Mapping des codes NLLB vers noms de langues (prompts LLM)
+NLLB_LANGUAGE_NAMES = {
+    "eng_Latn": "English",
+    "fra_Latn": "French",
+    "deu_Latn": "German",
+    "spa_Latn": "Spanish",
+    "por_Latn": "Portuguese",
+    "zho_Hans": "Simplified Chinese",
+    "arb_Arab": "Arabic",
+}
+
 # Langues qui nécessitent traduction (non supportées nativement par USDA/OFF)
 LANGUAGES_REQUIRING_TRANSLATION = {"zh", "ar"}
 
 # Langues supportées nativement par USDA/OFF (pas besoin de traduction)
 NATIVE_API_LANGUAGES = {"en", "fr", "de", "es", "pt"}
 
-# Cache en mémoire pour éviter les appels API répétés
-_translation_cache: dict[tuple[str, str, str], str] = {}
+# Cache borné (LRU + TTL), partagé entre workers via Redis, préchargé avec FOOD_TRANSLATIONS
+CACHE_NAMESPACE = "nllb"
 
 # Configuration
 MAX_RETRIES = 3
@@ -88,58 +104,101 @@ async def translate_with_nllb(
     if source_lang == target_lang:
         return text
 
-    # Vérifier le cache
-    cache_key = (text.lower().strip(), source_lang, target_lang)
-    if cache_key in _translation_cache:
-        logger.debug(
-            "nllb_cache_hit",
-            text=text,
-            source=source_lang,
-            target=target_lang,
-            cached=_translation_cache[cache_key]
-        )
-        return _translation_cache[cache_key]
+    return (await translate_many([text], source_lang, target_lang))[0]
 
-    # Vérifier si les langues sont supportées
-    if source_lang not in NLLB_LANGUAGE_CODES:
-        logger.warning("nllb_unsupported_source_lang", lang=source_lang)
-        return text
 
-    if target_lang not in NLLB_LANGUAGE_CODES:
-        logger.warning("nllb_unsupported_target_lang", lang=target_lang)
-        return text
+async def translate_many(
+    texts: list[str],
+    source_lang: str,
+    target_lang: str = "en"
+) -> list[str]:
+    """
+    Traduit plusieurs textes avec un minimum d'appels HuggingFace.
 
-    # Obtenir les codes NLLB
-    src_code = NLLB_LANGUAGE_CODES[source_lang]
-    tgt_code = NLLB_LANGUAGE_CODES[target_lang]
+    - Les doublons de la liste et les textes déjà en cache ne sont pas renvoyés au modèle
+    - Les textes restants sont regroupés dans un seul appel d'inférence (par lots
+      de NLLB_BATCH_MAX_SIZE)
+    - Les requêtes identiques concurrentes (autres utilisateurs, fenêtre de
+      NLLB_BATCH_WINDOW_MS) partagent le même appel
 
-    # Appeler l'API HuggingFace
-    try:
-        translation = await _call_nllb_api(text, src_code, tgt_code)
+    Args:
+        texts: Textes à traduire
+        source_lang: Code langue ISO source (fr, en, de, es, pt, zh, ar)
+        target_lang: Code langue ISO cible (défaut: en)
 
-        # Sauvegarder dans le cache
-        if translation:
-            _translation_cache[cache_key] = translation
-            logger.info(
-                "nllb_translation_success",
-                original=text,
-                translated=translation,
+    Returns:
+        Textes traduits (même ordre; texte original si la traduction échoue)
+    """
+    source_lang = source_lang.lower()
+    target_lang = target_lang.lower()
+
+    if source_lang == target_lang or not texts:
+        return list(texts)
+
+    # Vérifier le cache (une fois par texte distinct)
+    cache = get_translation_cache(CACHE_NAMESPACE)
+    results: dict[str, str] = {}
+    missing: dict[str, str] = {}
+    for text in texts:
+        key = cache.normalize(text)
+        if key in results or key in missing:
+            continue
+        cached = await cache.get(text, source_lang, target_lang)
+        if cached is not None:
+            logger.debug(
+                "nllb_cache_hit",
+                text=text,
                 source=source_lang,
-                target=target_lang
+                target=target_lang,
+                cached=cached
             )
-            return translation
-
-    except Exception as e:
-        logger.error(
-            "nllb_translation_error",
-            text=text,
-            source=source_lang,
-            target=target_lang,
-            error=str(e)
+            results[key] = cached
+        else:
+            missing[key] = text
+
+    if missing:
+        # Vérifier si les langues sont supportées
+        if source_lang not in NLLB_LANGUAGE_CODES:
+            logger.warning("nllb_unsupported_source_lang", lang=source_lang)
+            missing = {}
+        elif target_lang not in NLLB_LANGUAGE_CODES:
+            logger.warning("nllb_unsupported_target_lang", lang=target_lang)
+            missing = {}
+
+    if missing:
+        # Obtenir les codes NLLB
+        src_code = NLLB_LANGUAGE_CODES[source_lang]
+        tgt_code = NLLB_LANGUAGE_CODES[target_lang]
+
+        translations = await asyncio.gather(
+            *(_batcher.translate(key, text, src_code, tgt_code) for key, text in missing.items()),
+            return_exceptions=True,
         )
 
+        for (key, text), translation in zip(missing.items(), translations):
+            if isinstance(translation, Exception):
+                logger.error(
+                    "nllb_translation_error",
+                    text=text,
+                    source=source_lang,
+                    target=target_lang,
+                    error=str(translation)
+                )
+                continue
+            if translation:
+                # Sauvegarder dans le cache
+                await cache.set(text, source_lang, target_lang, translation)
+                logger.info(
+                    "nllb_translation_success",
+                    original=text,
+                    translated=translation,
+                    source=source_lang,
+                    target=target_lang
+                )
+                results[key] = translation
+
     # Fallback: retourner le texte original
-    return text
+    return [results.get(cache.normalize(text), text) for text in texts]
 
 
 async def translate_food_to_english(
@@ -239,19 +298,8 @@ async def _translate_with_llm(
     Returns:
         Texte traduit ou None
     """
-    # Mapping des codes NLLB vers noms de langues
-    lang_names = {
-        "eng_Latn": "English",
-        "fra_Latn": "French",
-        "deu_Latn": "German",
-        "spa_Latn": "Spanish",
-        "por_Latn": "Portuguese",
-        "zho_Hans": "Simplified Chinese",
-        "arb_Arab": "Arabic",
-    }
-
-    src_name = lang_names.get(src_lang_code, "unknown")
-    tgt_name = lang_names.get(tgt_lang_code, "English")
+    src_name = NLLB_LANGUAGE_NAMES.get(src_lang_code, "unknown")
+    tgt_name = NLLB_LANGUAGE_NAMES.get(tgt_lang_code, "English")
 
     # Prompt amélioré avec exemples pour arabe et chinois
     if src_lang_code == "arb_Arab":
@@ -295,74 +343,289 @@ Only respond with the translated food name, nothing else.
 Food name: {text}"""
 
     try:
-        url = "https://router.huggingface.co/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {settings.HUGGINGFACE_TOKEN}",
-            "Content-Type": "application/json",
-        }
+        translation = await _chat_completion(prompt, max_tokens=50)
+        if translation is None:
+            return None
 
-        payload = {
-            "model": "Qwen/Qwen2.5-72B-Instruct",
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": 50,
-            "temperature": 0.1,  # Faible pour traduction déterministe
-        }
+        # Nettoyer la réponse (enlever guillemets, ponctuation finale)
+        translation = _clean_llm_translation(translation)
+
+        # Vérifier que la traduction est valide (pas vide, pas le texte original)
+        if not translation or translation == text:
+            logger.warning(
+                "llm_translation_invalid",
+                original=text,
+                result=translation
+            )
+            return None
 
-        async with httpx.AsyncClient(timeout=TIMEOUT_SECONDS) as client:
-            for attempt in range(MAX_RETRIES):
-                try:
-                    response = await client.post(url, headers=headers, json=payload)
-
-                    if response.status_code == 503:
-                        logger.info("llm_translation_model_loading", attempt=attempt + 1)
-                        await asyncio.sleep(5)
-                        continue
-
-                    response.raise_for_status()
-                    result = response.json()
-
-                    translation = result["choices"][0]["message"]["content"].strip()
-
-                    # Nettoyer la réponse (enlever guillemets, ponctuation finale)
-                    translation = translation.strip('"\'').strip('.').strip()
-
-                    # Vérifier que la traduction est valide (pas vide, pas le texte original)
-                    if not translation or translation == text:
-                        logger.warning(
-                            "llm_translation_invalid",
-                            original=text,
-                            result=translation
-                        )
-                        return None
-
-                    logger.info(
-                        "llm_translation_success",
-                        original=text,
-                        translated=translation,
-                        source_lang=src_lang_code
-                    )
-                    return translation
-
-                except httpx.HTTPStatusError as e:
-                    logger.error(
-                        "llm_translation_http_error",
-                        status=e.response.status_code,
-                        detail=e.response.text[:200],
-                        attempt=attempt + 1
-                    )
-                    if attempt == MAX_RETRIES - 1:
-                        raise
-                    await asyncio.sleep(2)
+        logger.info(
+            "llm_translation_success",
+            original=text,
+            translated=translation,
+            source_lang=src_lang_code
+        )
+        return translation
 
     except Exception as e:
         logger.error("llm_translation_error", error=str(e), text=text)
         return None
 
+
+async def _translate_batch(
+    texts: list[str],
+    src_lang_code: str,
+    tgt_lang_code: str
+) -> list[Optional[str]]:
+    """
+    Traduit un lot avec le backend configuré (NLLB_BACKEND).
+
+    "local": modèle NLLB sur CPU (voir nllb_local), API distante si échec.
+    "remote": API HuggingFace.
+    """
+    if settings.NLLB_BACKEND == "local":
+        translations = await translate_local(texts, src_lang_code, tgt_lang_code)
+        if translations is not None:
+            return [
+                translation if translation and translation != text else None
+                for text, translation in zip(texts, translations)
+            ]
+        logger.warning("nllb_local_fallback_remote", count=len(texts))
+
+    return await _translate_batch_with_llm(texts, src_lang_code, tgt_lang_code)
+
+
+async def _translate_batch_with_llm(
+    texts: list[str],
+    src_lang_code: str,
+    tgt_lang_code: str
+) -> list[Optional[str]]:
+    """
+    Traduit plusieurs noms d'aliments en un seul appel LLM (réponse en tableau JSON).
+
+    Si la réponse est inexploitable (JSON invalide, mauvais nombre d'éléments),
+    retombe sur un appel par texte.
+
+    Args:
+        texts: Noms d'aliments à traduire
+        src_lang_code: Code NLLB source
+        tgt_lang_code: Code NLLB cible
+
+    Returns:
+        Traductions (même ordre, None si échec)
+    """
+    if len(texts) == 1:
+        return [await _call_nllb_api(texts[0], src_lang_code, tgt_lang_code)]
+
+    if not settings.HUGGINGFACE_TOKEN:
+        logger.warning("nllb_no_token", message="HUGGINGFACE_TOKEN not configured")
+        return [None] * len(texts)
+
+    src_name = NLLB_LANGUAGE_NAMES.get(src_lang_code, "unknown")
+    tgt_name = NLLB_LANGUAGE_NAMES.get(tgt_lang_code, "English")
+    numbered = "\n".join(f"{i}. {text}" for i, text in enumerate(texts, start=1))
+    prompt = f"""You are a food translation expert. Translate these {len(texts)} food names from {src_name} to {tgt_name}.
+Respond ONLY with a JSON array of exactly {len(texts)} strings, in the same order, nothing else.
+
+{numbered}"""
+
+    try:
+        content = await _chat_completion(prompt, max_tokens=30 * len(texts) + 20)
+        translations = _parse_batch_response(content, len(texts))
+    except Exception as e:
+        logger.error("llm_batch_translation_error", error=str(e), count=len(texts))
+        translations = None
+
+    if translations is None:
+        logger.warning("llm_batch_translation_fallback", count=len(texts))
+        return list(await asyncio.gather(
+            *(_call_nllb_api(text, src_lang_code, tgt_lang_code) for text in texts)
+        ))
+
+    results: list[Optional[str]] = []
+    for text, translation in zip(texts, translations):
+        translation = _clean_llm_translation(translation)
+        results.append(translation if translation and translation != text else None)
+
+    logger.info(
+        "llm_batch_translation_success",
+        count=len(texts),
+        translated=sum(1 for r in results if r),
+        source_lang=src_lang_code
+    )
+    return results
+
+
+def _parse_batch_response(content: Optional[str], expected: int) -> Optional[list[str]]:
+    """Extrait le tableau JSON de traductions d'une réponse LLM."""
+    if not content:
+        return None
+    start, end = content.find("["), content.rfind("]")
+    if start == -1 or end <= start:
+        return None
+    try:
+        parsed = json.loads(content[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(parsed, list) or len(parsed) != expected:
+        return None
+    return [str(item) for item in parsed]
+
+
+def _clean_llm_translation(translation: str) -> str:
+    """Enlève guillemets et ponctuation finale d'une traduction LLM."""
+    return translation.strip().strip('"\'').strip('.').strip()
+
+
+async def _chat_completion(prompt: str, max_tokens: int) -> Optional[str]:
+    """
+    Appel chat completions HuggingFace (modèle de traduction) avec retries.
+
+    Returns:
+        Contenu de la réponse, ou None si le modèle reste indisponible
+    """
+    url = "https://router.huggingface.co/v1/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {settings.HUGGINGFACE_TOKEN}",
+        "Content-Type": "application/json",
+    }
+
+    payload = {
+        "model": "Qwen/Qwen2.5-72B-Instruct",
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": 0.1,  # Faible pour traduction déterministe
+    }
+
+    client = get_http_client(HUGGINGFACE)
+    for attempt in range(MAX_RETRIES):
+        try:
+            response = await client.post(url, headers=headers, json=payload, timeout=TIMEOUT_SECONDS)
+
+            if response.status_code == 503:
+                logger.info("llm_translation_model_loading", attempt=attempt + 1)
+                await asyncio.sleep(5)
+                continue
+
+            response.raise_for_status()
+            result = response.json()
+
+            return result["choices"][0]["message"]["content"].strip()
+
+        except httpx.HTTPStatusError as e:
+            logger.error(
+                "llm_translation_http_error",
+                status=e.response.status_code,
+                detail=e.response.text[:200],
+                attempt=attempt + 1
+            )
+            if attempt == MAX_RETRIES - 1:
+                raise
+            await asyncio.sleep(2)
+
     return None
 
 
 # ==========================================
-# Batch Translation (pour optimisation future)
+# Regroupement des requêtes (coalescing)
+# ==========================================
+
+@dataclass
+class BatchStats:
+    """Compteurs du regroupement des traductions."""
+
+    requests: int = 0
+    coalesced: int = 0
+    batches: int = 0
+    batched_items: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+class _TranslationBatcher:
+    """
+    Regroupe les traductions manquantes en appels d'inférence batch.
+
+    Les textes demandés pendant une courte fenêtre (toutes requêtes confondues)
+    partent dans un même appel; un texte déjà en attente ou en cours de
+    traduction n'est pas redemandé, l'appelant attend le même résultat.
+    """
+
+    def __init__(self):
+        self._pending: dict[tuple[str, str], dict[str, tuple[str, asyncio.Future]]] = {}
+        self._inflight: dict[tuple[str, str, str], asyncio.Future] = {}
+        self._timers: dict[tuple[str, str], asyncio.Task] = {}
+        self.stats = BatchStats()
+
+    async def translate(self, key: str, text: str, src_code: str, tgt_code: str) -> Optional[str]:
+        """Traduction de `text` (clé normalisée `key`), partagée avec les requêtes identiques."""
+        self.stats.requests += 1
+        inflight_key = (key, src_code, tgt_code)
+        future = self._inflight.get(inflight_key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[inflight_key] = future
+
+        pair = (src_code, tgt_code)
+        pending = self._pending.setdefault(pair, {})
+        pending[key] = (text, future)
+
+        if len(pending) >= settings.NLLB_BATCH_MAX_SIZE:
+            self._pending.pop(pair)
+            asyncio.create_task(self._run(pair, pending))
+        elif pair not in self._timers:
+            self._timers[pair] = asyncio.create_task(self._flush_after_window(pair))
+
+        return await asyncio.shield(future)
+
+    async def _flush_after_window(self, pair: tuple[str, str]) -> None:
+        try:
+            await asyncio.sleep(settings.NLLB_BATCH_WINDOW_MS / 1000)
+        finally:
+            self._timers.pop(pair, None)
+        pending = self._pending.pop(pair, None)
+        if pending:
+            await self._run(pair, pending)
+
+    async def _run(
+        self,
+        pair: tuple[str, str],
+        pending: dict[str, tuple[str, asyncio.Future]],
+    ) -> None:
+        """Un appel d'inférence pour tous les textes en attente."""
+        src_code, tgt_code = pair
+        keys = list(pending)
+        self.stats.batches += 1
+        self.stats.batched_items += len(keys)
+        try:
+            translations = await _translate_batch(
+                [pending[key][0] for key in keys], src_code, tgt_code
+            )
+            for key, translation in zip(keys, translations):
+                pending[key][1].set_result(translation)
+        except Exception as e:
+            for key in keys:
+                future = pending[key][1]
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # Récupérée par les appelants via shield
+        finally:
+            for key in keys:
+                self._inflight.pop((key, src_code, tgt_code), None)
+
+
+_batcher = _TranslationBatcher()
+
+
+# ==========================================
+# Batch Translation
 # ==========================================
 
 async def translate_batch(
@@ -371,7 +634,7 @@ async def translate_batch(
     target_lang: str = "en"
 ) -> list[str]:
     """
-    Traduit un batch de textes en parallèle.
+    Traduit un batch de textes (alias de translate_many).
 
     Args:
         texts: Liste de textes à traduire
@@ -381,28 +644,41 @@ async def translate_batch(
     Returns:
         Liste de textes traduits (même ordre)
     """
-    tasks = [
-        translate_with_nllb(text, source_lang, target_lang)
-        for text in texts
-    ]
-    return await asyncio.gather(*tasks)
+    return await translate_many(texts, source_lang, target_lang)
+
+
+async def translate_foods_to_english(
+    food_names: list[str],
+    source_lang: str
+) -> list[str]:
+    """
+    Version batch de translate_food_to_english (un seul appel pour tout le repas).
+
+    Args:
+        food_names: Noms d'aliments
+        source_lang: Code langue ISO (fr, en, de, es, pt, zh, ar)
+
+    Returns:
+        Noms en anglais (même ordre)
+    """
+    return await translate_many(food_names, source_lang, "en")
 
 
 # ==========================================
 # Utilitaires
 # ==========================================
 
-def clear_translation_cache():
-    """Vide le cache de traduction."""
-    _translation_cache.clear()
+async def clear_translation_cache():
+    """Vide le cache de traduction (les paires statiques restent)."""
+    await get_translation_cache(CACHE_NAMESPACE).clear()
     logger.info("nllb_cache_cleared")
 
 
 def get_cache_stats() -> dict:
-    """Retourne les statistiques du cache."""
+    """Retourne les statistiques du cache (taille, langues, taux de hits) et du batching."""
     return {
-        "size": len(_translation_cache),
-        "languages_cached": list(set(k[1] for k in _translation_cache.keys())),
+        **get_translation_cache(CACHE_NAMESPACE).get_stats(),
+        "batching": _batcher.stats.as_dict(),
     }
 
 
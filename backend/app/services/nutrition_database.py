@@ -2,17 +2,23 @@
 Service pour rechercher les informations nutritionnelles dans différentes sources.
 
 Sources (par ordre de priorité) :
-1. USDA FoodData Central API (300,000 aliments, gratuit)
+1. USDA FoodData Central (API, ou miroir local SQLite avec USDA_BACKEND="local")
 2. Agent LLM Nutrition (HuggingFace, pour plats composés/exotiques)
 3. Saisie manuelle utilisateur (fallback ultime)
 """
 
+import asyncio
+import sqlite3
 import httpx
 import structlog
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
 from app.config import get_settings
+from app.core.http_pool import get_http_client, USDA
+from app.services.food_matcher import FoodMatcher
+from app.services.usda_cache import get_usda_cache
+from app.services.usda_local import get_local_store
 
 settings = get_settings()
 logger = structlog.get_logger()
@@ -37,15 +43,22 @@ class USDANutritionService:
     """Service pour interroger l'API USDA FoodData Central."""
 
     BASE_URL = "https://api.nal.usda.gov/fdc/v1"
+    TIMEOUT = 10.0
 
     def __init__(self):
         self.api_key = settings.USDA_API_KEY
-        self.client = httpx.AsyncClient(timeout=10.0)
+        # Client HTTP partagé (pool de connexions keep-alive)
+        self.client = get_http_client(USDA)
 
     async def search_food(self, query: str, max_results: int = 5) -> list[NutritionData]:
         """
         Recherche un aliment dans la base USDA.
 
+        Avec USDA_BACKEND="local", interroge le miroir SQLite local (sans
+        réseau, dans un thread dédié, voir usda_local) et ne bascule sur l'API que s'il est absent.
+        Sinon, les résultats de l'API (y compris vides) sont mis en cache par
+        requête normalisée, en mémoire puis dans Redis (voir usda_cache).
+
         Args:
             query: Nom de l'aliment (ex: "chicken breast", "riz", "pomme")
             max_results: Nombre maximum de résultats
@@ -53,29 +66,22 @@ class USDANutritionService:
         Returns:
             Liste de NutritionData trouvés
         """
+        if settings.USDA_BACKEND == "local":
+            store = get_local_store()
+            if store is not None:
+                try:
+                    foods = await store.search_async(query, max_results)
+                    return [NutritionData(**food) for food in foods]
+                except sqlite3.Error as e:
+                    logger.error("usda_local_search_error", query=query, error=str(e))
+
         if not self.api_key:
             logger.warning("usda_api_key_missing", message="USDA API key not configured")
             return []
 
         try:
-            url = f"{self.BASE_URL}/foods/search"
-            params = {
-                "query": query,
-                "pageSize": max_results,
-                "api_key": self.api_key,
-            }
-
-            logger.info("usda_search_request", query=query, max_results=max_results)
-
-            response = await self.client.get(url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
-            foods = data.get("foods", [])
-
-            logger.info("usda_search_response", query=query, results_count=len(foods))
-
-            return [self._parse_food_item(food) for food in foods if self._parse_food_item(food)]
+            foods = await get_usda_cache().get_or_fetch(query, max_results, self._fetch_foods)
+            return [NutritionData(**food) for food in foods]
 
         except httpx.HTTPStatusError as e:
             logger.error("usda_http_error", status_code=e.response.status_code, error=str(e))
@@ -87,6 +93,32 @@ class USDANutritionService:
             logger.error("usda_unexpected_error", error=str(e))
             return []
 
+    async def _fetch_foods(self, query: str, max_results: int) -> list[dict]:
+        """
+        Appelle l'API USDA (sans cache) et retourne les aliments parsés.
+
+        Les erreurs HTTP sont propagées pour ne pas être mises en cache.
+        """
+        url = f"{self.BASE_URL}/foods/search"
+        params = {
+            "query": query,
+            "pageSize": max_results,
+            "api_key": self.api_key,
+        }
+
+        logger.info("usda_search_request", query=query, max_results=max_results)
+
+        response = await self.client.get(url, params=params, timeout=self.TIMEOUT)
+        response.raise_for_status()
+
+        data = response.json()
+        foods = data.get("foods", [])
+
+        logger.info("usda_search_response", query=query, results_count=len(foods))
+
+        parsed = [self._parse_food_item(food) for food in foods]
+        return [asdict(nutrition) for nutrition in parsed if nutrition]
+
     def _parse_food_item(self, food_data: dict) -> Optional[NutritionData]:
         """
         Parse un aliment USDA en NutritionData.
@@ -145,8 +177,11 @@ class USDANutritionService:
             return None
 
     async def close(self):
-        """Ferme le client HTTP."""
-        await self.client.aclose()
+        """
+        Conservé pour compatibilité: le client HTTP est partagé
+        et fermé à l'arrêt de l'application (close_http_clients).
+        """
+        return None
 
 
 async def search_nutrition(food_name: str, quantity_g: float = 100.0) -> Optional[NutritionData]:
@@ -1433,6 +1468,9 @@ def translate_food_to_english(food_name: str, language: str = "en") -> tuple[str
     """
     Translate a food name to English for USDA lookup.
 
+    Compound names use the longest dictionary entry they contain
+    ("poulet grillé au citron" -> "grilled chicken", not "chicken").
+
     Args:
         food_name: Food name in any supported language
         language: Source language code (fr, de, es, pt, zh, ar)
@@ -1443,21 +1481,34 @@ def translate_food_to_english(food_name: str, language: str = "en") -> tuple[str
     if language == "en":
         return food_name, False
 
-    food_lower = food_name.lower().strip()
-    translations = FOOD_TRANSLATIONS.get(language, {})
-
-    if food_lower in translations:
-        return translations[food_lower], True
+    matcher = _get_translation_matcher(language)
+    if matcher is None:
+        return food_name, False
 
-    # Try partial match for compound foods
-    for source, english in translations.items():
-        if source in food_lower:
-            return english, True
+    # Exact match, then longest dictionary entry contained in the name
+    english = matcher.translate(food_name.lower().strip())
+    if english is not None:
+        return english, True
 
     # No translation found, return original
     return food_name, False
 
 
+_translation_matchers: dict[str, FoodMatcher] = {}
+
+
+def _get_translation_matcher(language: str) -> Optional[FoodMatcher]:
+    """Compiled matcher for a language (built on first use)."""
+    matcher = _translation_matchers.get(language)
+    if matcher is None:
+        translations = FOOD_TRANSLATIONS.get(language)
+        if not translations:
+            return None
+        matcher = FoodMatcher(translations)
+        _translation_matchers[language] = matcher
+    return matcher
+
+
 @dataclass
 class USDAValidationResult:
     """Result of USDA validation for a detected food item."""
@@ -1554,82 +1605,114 @@ async def validate_against_usda(
         await service.close()
 
 
+def _item_quantity_g(item: dict) -> float:
+    """Convertit la quantité d'un item détecté en grammes (estimation grossière)."""
+    quantity_str = item.get("quantity", "100")
+    unit = item.get("unit", "g")
+
+    # Parse quantity
+    try:
+        quantity = float(quantity_str)
+    except (ValueError, TypeError):
+        quantity = 100.0
+
+    # Convert to grams if needed (rough estimation)
+    quantity_g = quantity
+    if unit == "ml":
+        quantity_g = quantity  # Approximate 1ml = 1g for liquids
+    elif unit in ("portion", "piece"):
+        quantity_g = quantity * 100  # Rough estimate
+
+    return quantity_g
+
+
+def _apply_usda_result(item: dict, result: USDAValidationResult) -> dict:
+    """Construit l'item mis à jour à partir du résultat de validation USDA."""
+    name = item.get("name", "")
+    updated_item = item.copy()
+
+    if result.found:
+        # Update with USDA verified values
+        updated_item["calories"] = int(result.calories or 0)
+        updated_item["protein"] = round(result.protein or 0, 1)
+        updated_item["carbs"] = round(result.carbs or 0, 1)
+        updated_item["fat"] = round(result.fat or 0, 1)
+        updated_item["source"] = "usda_translation" if result.was_translated else "usda_verified"
+        updated_item["usda_food_name"] = result.usda_food_name
+        updated_item["original_name"] = result.original_name if result.was_translated else None
+        updated_item["needs_verification"] = False
+        # Boost confidence for USDA verified items
+        original_confidence = item.get("confidence", 0.7)
+        updated_item["confidence"] = max(original_confidence, 0.9)
+
+        logger.info(
+            "usda_item_validated",
+            original=name,
+            usda_name=result.usda_food_name,
+            translated=result.was_translated,
+            source=updated_item["source"],
+        )
+    else:
+        # Keep AI estimation but mark as needing verification
+        updated_item["source"] = "ai_estimated"
+        updated_item["needs_verification"] = item.get("confidence", 0.7) < 0.7
+        updated_item["usda_food_name"] = None
+        updated_item["original_name"] = None
+
+        logger.info(
+            "usda_item_not_found",
+            name=name,
+            needs_verification=updated_item["needs_verification"],
+        )
+
+    return updated_item
+
+
 async def validate_detected_items_batch(
     items: list[dict],
-    language: str = "en"
+    language: str = "en",
+    max_concurrency: int | None = None,
+    item_timeout: float | None = None,
 ) -> list[dict]:
     """
     Validate a batch of detected food items against USDA.
 
     This function is called after VLM analysis to verify/enhance nutrition values.
+    Items are validated concurrently (bounded by a per-call semaphore), so the
+    total USDA time approaches the slowest item instead of the sum of all items.
+    An item that times out or fails keeps its AI estimation (partial results).
 
     Args:
         items: List of detected items from VLM (dicts with name, quantity, unit, etc.)
         language: User's language code
+        max_concurrency: Max concurrent USDA validations (default: USDA_BATCH_CONCURRENCY)
+        item_timeout: Timeout per item in seconds (default: USDA_ITEM_TIMEOUT)
 
     Returns:
-        List of items with updated source and verification status
+        List of items with updated source and verification status (same order)
     """
-    validated_items = []
-
-    for item in items:
-        name = item.get("name", "")
-        quantity_str = item.get("quantity", "100")
-        unit = item.get("unit", "g")
+    if not items:
+        return []
 
-        # Parse quantity
-        try:
-            quantity = float(quantity_str)
-        except (ValueError, TypeError):
-            quantity = 100.0
-
-        # Convert to grams if needed (rough estimation)
-        quantity_g = quantity
-        if unit == "ml":
-            quantity_g = quantity  # Approximate 1ml = 1g for liquids
-        elif unit in ("portion", "piece"):
-            quantity_g = quantity * 100  # Rough estimate
-
-        # Validate against USDA
-        result = await validate_against_usda(name, quantity_g, language)
-
-        # Create updated item
-        updated_item = item.copy()
-
-        if result.found:
-            # Update with USDA verified values
-            updated_item["calories"] = int(result.calories or 0)
-            updated_item["protein"] = round(result.protein or 0, 1)
-            updated_item["carbs"] = round(result.carbs or 0, 1)
-            updated_item["fat"] = round(result.fat or 0, 1)
-            updated_item["source"] = "usda_translation" if result.was_translated else "usda_verified"
-            updated_item["usda_food_name"] = result.usda_food_name
-            updated_item["original_name"] = result.original_name if result.was_translated else None
-            updated_item["needs_verification"] = False
-            # Boost confidence for USDA verified items
-            original_confidence = item.get("confidence", 0.7)
-            updated_item["confidence"] = max(original_confidence, 0.9)
+    max_concurrency = max(1, max_concurrency or settings.USDA_BATCH_CONCURRENCY)
+    item_timeout = item_timeout or settings.USDA_ITEM_TIMEOUT
+    semaphore = asyncio.Semaphore(max_concurrency)
 
-            logger.info(
-                "usda_item_validated",
-                original=name,
-                usda_name=result.usda_food_name,
-                translated=result.was_translated,
-                source=updated_item["source"],
-            )
-        else:
-            # Keep AI estimation but mark as needing verification
-            updated_item["source"] = "ai_estimated"
-            updated_item["needs_verification"] = item.get("confidence", 0.7) < 0.7
-            updated_item["usda_food_name"] = None
-            updated_item["original_name"] = None
-
-            logger.info(
-                "usda_item_not_found",
-                name=name,
-                needs_verification=updated_item["needs_verification"],
-            )
+    async def validate_item(item: dict) -> dict:
+        name = item.get("name", "")
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(
+                    validate_against_usda(name, _item_quantity_g(item), language),
+                    timeout=item_timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning("usda_item_timeout", name=name, timeout=item_timeout)
+                result = USDAValidationResult(found=False, original_name=name)
+            except Exception as e:
+                logger.error("usda_item_validation_error", name=name, error=str(e))
+                result = USDAValidationResult(found=False, original_name=name)
 
-        validated_items.append(updated_item)
+        return _apply_usda_result(item, result)
 
-    return validated_items
+    return list(await asyncio.gather(*(validate_item(item) for item in items)))
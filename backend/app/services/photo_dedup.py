@@ -0,0 +1,226 @@
+"""
+Déduplication perceptuelle des photos de repas (/vision/analyze).
+
+Une même photo renvoyée (double tap, nouvel essai après timeout, photo
+recompressée ou légèrement recadrée) relançait une ou deux passes VLM et la
+validation USDA. Chaque analyse réussie est indexée par le dHash de l'image
+(64 bits, robuste au redimensionnement et à la recompression JPEG) :
+
+- index par utilisateur: les PHOTO_DEDUP_MAX_PER_USER dernières analyses
+- index global optionnel (PHOTO_DEDUP_GLOBAL), même langue uniquement
+
+Une photo à une distance de Hamming <= PHOTO_DEDUP_MAX_DISTANCE d'une photo
+indexée réutilise l'analyse stockée (aliments validés USDA, description,
+confiance) sans appeler le VLM. Le feedback learning, le rapport de santé et
+la protection anti-doublons du journal s'appliquent ensuite comme avant.
+
+Stockage: cache partagé (Redis si configuré). Les index sont mis à jour en
+lecture-modification-écriture: deux analyses simultanées peuvent s'écraser,
+ce qui ne coûte qu'un appel VLM de plus. Sans Pillow, la déduplication est
+désactivée.
+"""
+
+import base64
+import binascii
+import io
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import structlog
+
+from app.config import get_settings
+from app.core.cache import Cache, get_cache
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    PIL_AVAILABLE = False
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+CACHE_PREFIX = "photo_dedup"
+HASH_SIZE = 8  # dHash 8x8 = 64 bits
+GLOBAL_INDEX_SIZE = 1000
+
+
+def decode_image_base64(image_base64: str) -> bytes:
+    """Décode une image base64 (avec ou sans préfixe data:...;base64,)."""
+    if image_base64.startswith("data:"):
+        image_base64 = image_base64.split(",", 1)[-1]
+    return base64.b64decode(image_base64)
+
+
+def dhash(image_bytes: bytes, hash_size: int = HASH_SIZE) -> int:
+    """
+    Hash de différence: niveaux de gris réduits à (hash_size+1) x hash_size,
+    un bit par comparaison de pixels voisins sur chaque ligne.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image.draft("L", (hash_size * 8, hash_size * 8))  # Décodage JPEG réduit (rapide)
+        pixels = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS).tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def compute_photo_hash(image_base64: str) -> Optional[int]:
+    """dHash d'une photo (None si Pillow est absent ou l'image illisible). CPU: à appeler hors event loop."""
+    if not PIL_AVAILABLE:
+        return None
+    try:
+        return dhash(decode_image_base64(image_base64))
+    except (binascii.Error, ValueError, OSError) as e:
+        logger.debug("photo_hash_failed", error=str(e))
+        return None
+
+
+@dataclass
+class PhotoMatch:
+    """Analyse réutilisée pour une photo quasi identique."""
+
+    analysis: dict[str, Any]
+    confidence: float
+    model_used: str
+    distance: int
+    scope: str  # "user" ou "global"
+
+
+class PhotoDedupIndex:
+    """Index des analyses récentes par hash perceptuel."""
+
+    def __init__(
+        self,
+        max_distance: Optional[int] = None,
+        ttl: Optional[int] = None,
+        max_per_user: Optional[int] = None,
+        use_global: Optional[bool] = None,
+        shared: Optional[Cache] = None,
+    ):
+        self.max_distance = settings.PHOTO_DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+        self.ttl = ttl or settings.PHOTO_DEDUP_TTL
+        self.max_per_user = max_per_user or settings.PHOTO_DEDUP_MAX_PER_USER
+        self.use_global = settings.PHOTO_DEDUP_GLOBAL if use_global is None else use_global
+        self._shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self) -> Cache:
+        """Cache partagé (résolu paresseusement)."""
+        if self._shared is None:
+            self._shared = get_cache()
+        return self._shared
+
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return Cache.make_key(CACHE_PREFIX, "user", str(user_id))
+
+    @staticmethod
+    def _global_key(language: str) -> str:
+        return Cache.make_key(CACHE_PREFIX, "global", language)
+
+    @staticmethod
+    def _analysis_key(photo_hash: int, language: str) -> str:
+        return Cache.make_key(CACHE_PREFIX, "analysis", language, f"{photo_hash:016x}")
+
+    async def _entries(self, key: str) -> list[dict]:
+        entries = await self.shared.get(key)
+        if not isinstance(entries, list):
+            return []
+        now = time.time()
+        return [entry for entry in entries if entry.get("expires_at", 0) > now]
+
+    def _nearest(self, entries: list[dict], photo_hash: int, language: str) -> Optional[tuple[int, dict]]:
+        best: Optional[tuple[int, dict]] = None
+        for entry in entries:
+            if entry.get("language") != language:
+                continue
+            distance = hamming_distance(photo_hash, int(entry["hash"], 16))
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, entry)
+        return best
+
+    async def find(self, user_id: int, photo_hash: int, language: str) -> Optional[PhotoMatch]:
+        """Analyse stockée la plus proche (distance <= max_distance), ou None."""
+        candidates = [("user", await self._entries(self._user_key(user_id)))]
+        if self.use_global:
+            candidates.append(("global", await self._entries(self._global_key(language))))
+
+        for scope, entries in candidates:
+            nearest = self._nearest(entries, photo_hash, language)
+            if nearest is None:
+                continue
+            distance, entry = nearest
+            stored = await self.shared.get(self._analysis_key(int(entry["hash"], 16), language))
+            if not isinstance(stored, dict):
+                continue
+            self.hits += 1
+            logger.info("photo_dedup_hit", user_id=user_id, scope=scope, distance=distance)
+            return PhotoMatch(
+                analysis=stored["analysis"],
+                confidence=stored["confidence"],
+                model_used=stored["model_used"],
+                distance=distance,
+                scope=scope,
+            )
+
+        self.misses += 1
+        return None
+
+    async def add(
+        self,
+        user_id: int,
+        photo_hash: int,
+        language: str,
+        analysis: dict[str, Any],
+        confidence: float,
+        model_used: str,
+    ) -> None:
+        """Indexe une analyse réussie (aliments déjà validés)."""
+        now = time.time()
+        entry = {"hash": f"{photo_hash:016x}", "language": language, "expires_at": now + self.ttl}
+        await self.shared.set(
+            self._analysis_key(photo_hash, language),
+            {"analysis": analysis, "confidence": confidence, "model_used": model_used},
+            self.ttl,
+        )
+
+        indexes = [(self._user_key(user_id), self.max_per_user)]
+        if self.use_global:
+            indexes.append((self._global_key(language), GLOBAL_INDEX_SIZE))
+        for key, size in indexes:
+            entries = [e for e in await self._entries(key) if e["hash"] != entry["hash"]]
+            entries.append(entry)
+            await self.shared.set(key, entries[-size:], self.ttl)
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": PIL_AVAILABLE and settings.PHOTO_DEDUP_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_photo_index: Optional[PhotoDedupIndex] = None
+
+
+def get_photo_dedup_index() -> PhotoDedupIndex:
+    """Index global (un par worker, données dans le cache partagé)."""
+    global _photo_index
+    if _photo_index is None:
+        _photo_index = PhotoDedupIndex()
+    return _photo_index
@@ -1,16 +1,27 @@
 """Service de gestion des abonnements et du suivi d'usage."""
 
 import logging
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from typing import Tuple
-import httpx
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.subscription import Subscription, UsageTracking, SubscriptionTier, SubscriptionStatus
 from app.models.user import User
 from app.config import get_settings
-from app.core.cache import get_cache, tier_cache_key, pricing_cache_key, invalidate_user_tier_cache
+from app.core.cache import (
+    Cache,
+    RedisCache,
+    get_cache,
+    get_user_tier_epoch,
+    invalidate_user_tier_cache,
+    pricing_cache_key,
+    tier_cache_key,
+)
+from app.core.user_cache import invalidate_user_principal
+from app.core.http_pool import get_http_client, LEMONSQUEEZY
+from app.services.usage_quota import bucket_start, get_usage_quota_engine
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -89,6 +100,76 @@ def get_limit_period(tier: str, action: str) -> str:
     return limit_info["period"] if isinstance(limit_info, dict) else "day"
 
 
+@dataclass(frozen=True)
+class TierState:
+    """Tier effectif et état du trial d'un utilisateur."""
+    user: User | None
+    subscription: Subscription | None
+    tier: str
+    trial_ends_at: datetime | None
+    is_trial: bool
+    days_remaining: int | None
+
+
+def compute_tier_state(
+    user: User | None,
+    subscription: Subscription | None,
+    now: datetime | None = None
+) -> TierState:
+    """
+    Calcule le tier effectif et l'état du trial.
+
+    Une subscription payée active (premium/pro) l'emporte sur le trial,
+    qui donne "premium" tant que trial_ends_at n'est pas dépassé.
+    """
+    if not user:
+        return TierState(None, subscription, "free", None, False, None)
+
+    trial_ends = user.trial_ends_at
+    if trial_ends is not None and trial_ends.tzinfo is None:
+        # SQLite stocke sans TZ
+        trial_ends = trial_ends.replace(tzinfo=timezone.utc)
+
+    paid = (
+        subscription is not None
+        and subscription.status == SubscriptionStatus.ACTIVE
+        and subscription.tier in [SubscriptionTier.PREMIUM, SubscriptionTier.PRO]
+    )
+    if paid:
+        return TierState(user, subscription, subscription.tier.value, user.trial_ends_at, False, None)
+    if trial_ends is None:
+        return TierState(user, subscription, user.subscription_tier or "free", None, False, None)
+
+    now = now or datetime.now(timezone.utc)
+    if now < trial_ends:
+        return TierState(user, subscription, "premium", user.trial_ends_at, True, max(0, (trial_ends - now).days))
+    return TierState(user, subscription, user.subscription_tier or "free", user.trial_ends_at, False, 0)
+
+
+def tier_cache_ttl(state: TierState, cache: Cache, now: datetime | None = None) -> int:
+    """
+    TTL du tier effectif en cache.
+
+    L'époque n'est changée que par les modifications d'abonnement: sans Redis
+    elle reste locale au worker (TTL court), et la fin d'un trial n'est
+    signalée par aucun événement (TTL borné à trial_ends_at).
+    """
+    ttl = settings.TIER_CACHE_TTL if isinstance(cache.backend, RedisCache) else settings.TIER_CACHE_TTL_LOCAL
+    if state.is_trial and state.trial_ends_at is not None:
+        trial_ends = state.trial_ends_at
+        if trial_ends.tzinfo is None:
+            trial_ends = trial_ends.replace(tzinfo=timezone.utc)
+        remaining = (trial_ends - (now or datetime.now(timezone.utc))).total_seconds()
+        ttl = min(ttl, max(1, int(remaining)))
+    return ttl
+
+
+async def invalidate_committed_principals(db: AsyncSession) -> None:
+    """Invalide les principals modifiés dans la session, une fois la transaction validée."""
+    for email in db.info.pop("principal_invalidations", set()):
+        await invalidate_user_principal(email)
+
+
 class SubscriptionService:
     """Service pour gérer les abonnements et l'usage."""
 
@@ -111,115 +192,82 @@ class SubscriptionService:
         2. Trial actif (trial_ends_at > now) → "premium"
         3. Sinon → "free"
 
-        Note: Utilise le cache Redis (TTL 5 minutes) pour optimiser les requêtes fréquentes.
+        Note: Utilise le cache Redis (TIER_CACHE_TTL, borné par la fin du trial),
+        versionné par une époque changée à chaque modification d'abonnement
+        (webhooks de paiement).
         """
-        # Check cache first
+        state = self._tier_states.get(user_id)
+        if state is not None:
+            return state.tier
+
         cache = get_cache()
-        cache_key = tier_cache_key(user_id)
+        cache_key = tier_cache_key(user_id, await get_user_tier_epoch(user_id))
         cached_tier = await cache.get(cache_key)
         if cached_tier is not None:
             return cached_tier
 
-        # Cache miss - fetch from database
-        user = await self.db.get(User, user_id)
-        if not user:
-            tier = "free"
-        else:
-            # 1. Vérifier subscription payée active
-            subscription = await self.get_subscription(user_id)
-            if subscription and subscription.status == SubscriptionStatus.ACTIVE:
-                if subscription.tier in [SubscriptionTier.PREMIUM, SubscriptionTier.PRO]:
-                    tier = subscription.tier.value
-                else:
-                    # 2. Vérifier trial actif
-                    if user.trial_ends_at:
-                        now = datetime.now(timezone.utc)
-                        # S'assurer que trial_ends_at est timezone-aware (SQLite stocke sans TZ)
-                        trial_ends = user.trial_ends_at
-                        if trial_ends.tzinfo is None:
-                            trial_ends = trial_ends.replace(tzinfo=timezone.utc)
-                        if now < trial_ends:
-                            tier = "premium"
-                        else:
-                            tier = user.subscription_tier or "free"
-                    else:
-                        tier = user.subscription_tier or "free"
-            else:
-                # 2. Vérifier trial actif
-                if user.trial_ends_at:
-                    now = datetime.now(timezone.utc)
-                    # S'assurer que trial_ends_at est timezone-aware (SQLite stocke sans TZ)
-                    trial_ends = user.trial_ends_at
-                    if trial_ends.tzinfo is None:
-                        trial_ends = trial_ends.replace(tzinfo=timezone.utc)
-                    if now < trial_ends:
-                        tier = "premium"
-                    else:
-                        # 3. Défaut: subscription_tier ou free
-                        tier = user.subscription_tier or "free"
-                else:
-                    # 3. Défaut: subscription_tier ou free
-                    tier = user.subscription_tier or "free"
-
-        # Store in cache (5 minutes TTL)
-        await cache.set(cache_key, tier, ttl=300)
-        return tier
+        state = await self.get_tier_state(user_id)
+        await cache.set(cache_key, state.tier, ttl=tier_cache_ttl(state, cache))
+        return state.tier
 
-    async def is_trial_active(self, user_id: int) -> bool:
-        """Vérifie si l'utilisateur est en période trial."""
-        user = await self.db.get(User, user_id)
-        if not user or not user.trial_ends_at:
-            return False
+    async def get_tier_state(self, user_id: int) -> TierState:
+        """
+        Utilisateur, abonnement et état du trial en une seule requête (jointure).
 
-        # Si l'utilisateur a une subscription payée active, le trial ne compte pas
-        subscription = await self.get_subscription(user_id)
-        if subscription and subscription.status == SubscriptionStatus.ACTIVE:
-            if subscription.tier in [SubscriptionTier.PREMIUM, SubscriptionTier.PRO]:
-                return False
+        Mémorisé pour la durée de la session DB, c'est-à-dire de la requête HTTP.
+        """
+        state = self._tier_states.get(user_id)
+        if state is not None:
+            return state
 
-        now = datetime.now(timezone.utc)
-        # S'assurer que trial_ends_at est timezone-aware (SQLite stocke sans TZ)
-        trial_ends = user.trial_ends_at
-        if trial_ends.tzinfo is None:
-            trial_ends = trial_ends.replace(tzinfo=timezone.utc)
-        return now < trial_ends
+        result = await self.db.execute(
+            select(User, Subscription)
+            .outerjoin(Subscription, Subscription.user_id == User.id)
+            .where(User.id == user_id)
+        )
+        row = result.first()
+        user, subscription = row if row else (None, None)
+        state = compute_tier_state(user, subscription)
+        self._tier_states[user_id] = state
+        return state
+
+    async def is_trial_active(self, user_id: int) -> bool:
+        """Vérifie si l'utilisateur est en période trial."""
+        return (await self.get_tier_state(user_id)).is_trial
 
     async def get_trial_days_remaining(self, user_id: int) -> int | None:
         """Retourne le nombre de jours restants dans le trial, ou None si pas de trial."""
-        user = await self.db.get(User, user_id)
-        if not user or not user.trial_ends_at:
-            return None
-
-        # Si l'utilisateur a une subscription payée active, pas de trial
-        subscription = await self.get_subscription(user_id)
-        if subscription and subscription.status == SubscriptionStatus.ACTIVE:
-            if subscription.tier in [SubscriptionTier.PREMIUM, SubscriptionTier.PRO]:
-                return None
-
-        now = datetime.now(timezone.utc)
-        # S'assurer que trial_ends_at est timezone-aware (SQLite stocke sans TZ)
-        trial_ends = user.trial_ends_at
-        if trial_ends.tzinfo is None:
-            trial_ends = trial_ends.replace(tzinfo=timezone.utc)
-
-        if now >= trial_ends:
-            return 0
-
-        delta = trial_ends - now
-        return max(0, delta.days)
+        return (await self.get_tier_state(user_id)).days_remaining
 
     async def get_trial_info(self, user_id: int) -> dict:
         """Retourne les informations complètes sur le trial."""
-        user = await self.db.get(User, user_id)
-        is_trial = await self.is_trial_active(user_id)
-        days_remaining = await self.get_trial_days_remaining(user_id)
+        state = await self.get_tier_state(user_id)
 
         return {
-            "is_trial": is_trial,
-            "trial_ends_at": user.trial_ends_at.isoformat() if user and user.trial_ends_at else None,
-            "days_remaining": days_remaining
+            "is_trial": state.is_trial,
+            "trial_ends_at": state.trial_ends_at.isoformat() if state.trial_ends_at else None,
+            "days_remaining": state.days_remaining
         }
 
+    @property
+    def _tier_states(self) -> dict[int, TierState]:
+        """États de tier mémorisés dans la session DB (partagés par les services de la requête)."""
+        return self.db.info.setdefault("tier_states", {})
+
+    async def _invalidate_tier(self, user_id: int) -> None:
+        """Oublie l'état mémorisé et change l'époque du cache de tier."""
+        self._tier_states.pop(user_id, None)
+        await invalidate_user_tier_cache(user_id)
+
+    async def _invalidate_principal(self, user: User) -> None:
+        """
+        Invalide le principal mis en cache, puis à nouveau après le commit
+        (voir invalidate_committed_principals): une requête concurrente peut
+        remettre en cache l'ancien tier avant que la transaction soit validée.
+        """
+        self.db.info.setdefault("principal_invalidations", set()).add(user.email)
+        await invalidate_user_principal(user.email)
+
     async def get_tier_limits(self, tier: str) -> dict:
         """Retourne les limites pour un tier donné."""
         return TIER_LIMITS.get(tier, TIER_LIMITS["free"])
@@ -234,37 +282,34 @@ class SubscriptionService:
         )
         return result.scalar_one_or_none()
 
-    async def get_or_create_today_usage(self, user_id: int) -> UsageTracking:
-        """Récupère ou crée l'enregistrement d'usage du jour."""
-        usage = await self.get_today_usage(user_id)
-
-        if not usage:
-            usage = UsageTracking(
-                user_id=user_id,
-                date=date.today(),
-                vision_analyses=0,
-                recipe_generations=0,
-                coach_messages=0
+    async def count_usage_db(self, user_id: int, action: str, period: str) -> int:
+        """Usage enregistré en base sur la période (jour, ou semaine depuis lundi)."""
+        if period == "week":
+            result = await self.db.execute(
+                select(func.coalesce(func.sum(getattr(UsageTracking, action)), 0))
+                .where(UsageTracking.user_id == user_id)
+                .where(UsageTracking.date >= bucket_start("week"))
             )
-            self.db.add(usage)
-            await self.db.flush()  # Flush instead of commit - let get_db handle commit
+            return int(result.scalar_one())
 
-        return usage
+        usage = await self.get_today_usage(user_id)
+        return getattr(usage, action, 0) if usage else 0
 
-    async def get_week_recipe_count(self, user_id: int) -> int:
-        """Compte les générations de recettes de la semaine en cours."""
-        today = date.today()
-        # Début de la semaine (lundi)
-        start_of_week = today - timedelta(days=today.weekday())
+    async def get_usage(self, user_id: int, action: str, period: str) -> int:
+        """
+        Usage courant de la période.
 
-        result = await self.db.execute(
-            select(UsageTracking)
-            .where(UsageTracking.user_id == user_id)
-            .where(UsageTracking.date >= start_of_week)
+        Compteur du moteur de quotas (Redis), sinon base + incréments pas encore écrits
+        (aucun sans Redis: les usages sont écrits en base aussitôt).
+        """
+        engine = get_usage_quota_engine()
+        used = await engine.peek(
+            user_id, action, period, lambda: self.count_usage_db(user_id, action, period)
         )
-        usages = result.scalars().all()
-
-        return sum(u.recipe_generations for u in usages)
+        if used is None:
+            used = await self.count_usage_db(user_id, action, period)
+            used += engine.pending_usage(user_id, action, bucket_start(period))
+        return used
 
     async def check_limit(
         self,
@@ -272,7 +317,9 @@ class SubscriptionService:
         action: str
     ) -> Tuple[bool, int, int]:
         """
-        Vérifie si l'utilisateur peut effectuer l'action.
+        Vérifie si l'utilisateur peut effectuer l'action (sans la compter).
+
+        Pour vérifier et compter en une seule opération atomique, utiliser consume_usage.
 
         Args:
             user_id: ID de l'utilisateur
@@ -292,48 +339,98 @@ class SubscriptionService:
         if limit == -1:
             return True, 0, -1
 
-        # Compter selon la période
-        if period == "week":
-            used = await self.get_week_recipe_count(user_id)
-        else:
-            # Pour les autres (day), on compte sur le jour
-            usage = await self.get_today_usage(user_id)
-            used = getattr(usage, action, 0) if usage else 0
-
+        used = await self.get_usage(user_id, action, period)
         allowed = used < limit
         return allowed, used, limit
 
+    async def consume_usage(
+        self,
+        user_id: int,
+        action: str
+    ) -> Tuple[bool, int, int]:
+        """
+        Vérifie la limite et compte l'usage en une seule opération atomique.
+
+        À appeler avant l'action: deux requêtes simultanées ne peuvent pas
+        dépasser la limite. Si l'action échoue ensuite, release_usage annule
+        l'usage compté.
+
+        Returns:
+            Tuple[bool, int, int]: (autorisé, utilisé avant l'appel, limite), comme check_limit
+        """
+        tier = await self.get_user_tier(user_id)
+        limit = get_limit_value(tier, action)
+        period = get_limit_period(tier, action)
+
+        engine = get_usage_quota_engine()
+        outcome = await engine.consume(
+            user_id, action, limit, period, lambda: self.count_usage_db(user_id, action, period)
+        )
+        if outcome is None:
+            # Pas de Redis (ou Redis indisponible): comptage en base (non atomique entre workers)
+            used = await self.count_usage_db(user_id, action, period)
+            used += engine.pending_usage(user_id, action, bucket_start(period))
+            allowed = limit == -1 or used < limit
+            if allowed:
+                await self._add_usage(user_id, action, 1)
+            outcome = (allowed, used)
+
+        if limit == -1:
+            return True, 0, -1
+        allowed, used = outcome
+        return allowed, used, limit
+
+    async def release_usage(self, user_id: int, action: str) -> None:
+        """Annule un usage compté par consume_usage (action échouée)."""
+        if get_usage_quota_engine().store is None:
+            await self._add_usage(user_id, action, -1)
+            return
+        tier = await self.get_user_tier(user_id)
+        await get_usage_quota_engine().refund(user_id, action, get_limit_period(tier, action))
+
+    async def _add_usage(self, user_id: int, action: str, amount: int) -> None:
+        """
+        Usage compté hors compteurs Redis: écrit en base aussitôt sans Redis
+        (partagé entre workers), sinon au prochain flush du moteur.
+        """
+        engine = get_usage_quota_engine()
+        if engine.store is None:
+            await engine.write_usage(self.db, user_id, action, amount)
+        else:
+            engine.record(user_id, action, amount)
+
     async def increment_usage(self, user_id: int, action: str) -> None:
         """
-        Incrémente le compteur d'usage pour une action.
+        Compte un usage sans vérifier la limite.
 
         Args:
             user_id: ID de l'utilisateur
             action: Type d'action (vision_analyses, recipe_generations, coach_messages)
         """
-        usage = await self.get_or_create_today_usage(user_id)
-
-        current_value = getattr(usage, action, 0)
-        setattr(usage, action, current_value + 1)
-        # No commit here - let get_db handle it
+        tier = await self.get_user_tier(user_id)
+        period = get_limit_period(tier, action)
+        engine = get_usage_quota_engine()
+        outcome = await engine.consume(
+            user_id, action, -1, period, lambda: self.count_usage_db(user_id, action, period)
+        )
+        if outcome is None:
+            await self._add_usage(user_id, action, 1)
 
     async def get_usage_status(self, user_id: int) -> dict:
         """Retourne le statut complet d'usage pour un utilisateur."""
         tier = await self.get_user_tier(user_id)
         tier_limits = TIER_LIMITS.get(tier, TIER_LIMITS["free"])
-        usage = await self.get_today_usage(user_id)
 
-        # Pour les recettes, on compte sur la semaine
-        week_recipes = await self.get_week_recipe_count(user_id)
+        # Recettes comptées sur la semaine, le reste sur le jour (get_limit_period)
+        usage = {
+            action: await self.get_usage(user_id, action, get_limit_period(tier, action))
+            for action in ("vision_analyses", "recipe_generations", "coach_messages")
+        }
 
         return {
             "tier": tier,
             "limits": tier_limits,
-            "usage": {
-                "vision_analyses": usage.vision_analyses if usage else 0,
-                "recipe_generations": week_recipes,
-                "coach_messages": usage.coach_messages if usage else 0,
-            },
+            "usage": usage,
             "reset_at": self._get_next_reset_time()
         }
 
@@ -410,7 +507,9 @@ class SubscriptionService:
         await self.db.refresh(subscription)
 
         # Invalidate tier cache
-        await invalidate_user_tier_cache(user_id)
+        await self._invalidate_tier(user_id)
+        if user:
+            await self._invalidate_principal(user)
 
         return subscription
 
@@ -429,12 +528,13 @@ class SubscriptionService:
             user = await self.db.get(User, user_id)
             if user:
                 user.subscription_tier = "free"
+                await self._invalidate_principal(user)
 
         await self.db.flush()
         await self.db.refresh(subscription)
 
         # Invalidate tier cache
-        await invalidate_user_tier_cache(user_id)
+        await self._invalidate_tier(user_id)
 
         return subscription
 
@@ -468,58 +568,58 @@ class SubscriptionService:
             return None
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://api.lemonsqueezy.com/v1/checkouts",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Accept": "application/vnd.api+json",
-                        "Content-Type": "application/vnd.api+json",
-                    },
-                    json={
-                        "data": {
-                            "type": "checkouts",
-                            "attributes": {
-                                "checkout_data": {
-                                    "email": user.email,
-                                    "name": user.name if hasattr(user, 'name') and user.name else None,
-                                    "custom": {
-                                        "user_id": str(user_id)
-                                    }
-                                },
-                                "product_options": {
-                                    "redirect_url": "https://nutriprofile.pages.dev/dashboard?checkout=success",
+            client = get_http_client(LEMONSQUEEZY)
+            response = await client.post(
+                "https://api.lemonsqueezy.com/v1/checkouts",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Accept": "application/vnd.api+json",
+                    "Content-Type": "application/vnd.api+json",
+                },
+                json={
+                    "data": {
+                        "type": "checkouts",
+                        "attributes": {
+                            "checkout_data": {
+                                "email": user.email,
+                                "name": user.name if hasattr(user, 'name') and user.name else None,
+                                "custom": {
+                                    "user_id": str(user_id)
+                                }
+                            },
+                            "product_options": {
+                                "redirect_url": "https://nutriprofile.pages.dev/dashboard?checkout=success",
+                            }
+                        },
+                        "relationships": {
+                            "store": {
+                                "data": {
+                                    "type": "stores",
+                                    "id": store_id
                                 }
                             },
-                            "relationships": {
-                                "store": {
-                                    "data": {
-                                        "type": "stores",
-                                        "id": store_id
-                                    }
-                                },
-                                "variant": {
-                                    "data": {
-                                        "type": "variants",
-                                        "id": variant_id
-                                    }
+                            "variant": {
+                                "data": {
+                                    "type": "variants",
+                                    "id": variant_id
                                 }
                             }
                         }
                     }
-                )
-
-                logger.info(f"Lemon Squeezy response status: {response.status_code}")
-
-                if response.status_code in [200, 201]:
-                    data = response.json()
-                    # Lemon Squeezy retourne l'URL de checkout dans attributes.url
-                    checkout_url = data.get("data", {}).get("attributes", {}).get("url")
-                    logger.info(f"Checkout URL created: {checkout_url[:50]}..." if checkout_url else "No URL in response")
-                    return checkout_url
-                else:
-                    logger.error(f"Lemon Squeezy error {response.status_code}: {response.text}")
-                    return None
+                }
+            )
+
+            logger.info(f"Lemon Squeezy response status: {response.status_code}")
+
+            if response.status_code in [200, 201]:
+                data = response.json()
+                # Lemon Squeezy retourne l'URL de checkout dans attributes.url
+                checkout_url = data.get("data", {}).get("attributes", {}).get("url")
+                logger.info(f"Checkout URL created: {checkout_url[:50]}..." if checkout_url else "No URL in response")
+                return checkout_url
+            else:
+                logger.error(f"Lemon Squeezy error {response.status_code}: {response.text}")
+                return None
         except Exception as e:
             logger.error(f"Checkout creation failed: {str(e)}")
             return None
@@ -538,21 +638,21 @@ class SubscriptionService:
         if not api_key:
             return None
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.lemonsqueezy.com/v1/subscriptions/{subscription.ls_subscription_id}",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Accept": "application/vnd.api+json",
-                }
-            )
+        client = get_http_client(LEMONSQUEEZY)
+        response = await client.get(
+            f"https://api.lemonsqueezy.com/v1/subscriptions/{subscription.ls_subscription_id}",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Accept": "application/vnd.api+json",
+            }
+        )
 
-            if response.status_code == 200:
-                data = response.json()
-                # Lemon Squeezy fournit urls.update_payment_method et urls.customer_portal
-                urls = data.get("data", {}).get("attributes", {}).get("urls", {})
-                return urls.get("customer_portal") or urls.get("update_payment_method")
-            return None
+        if response.status_code == 200:
+            data = response.json()
+            # Lemon Squeezy fournit urls.update_payment_method et urls.customer_portal
+            urls = data.get("data", {}).get("attributes", {}).get("urls", {})
+            return urls.get("customer_portal") or urls.get("update_payment_method")
+        return None
 
     async def cancel_lemonsqueezy_subscription(self, user_id: int) -> bool:
         """Annule un abonnement Lemon Squeezy."""
@@ -564,17 +664,17 @@ class SubscriptionService:
         if not api_key:
             return False
 
-        async with httpx.AsyncClient() as client:
-            # Lemon Squeezy utilise DELETE pour annuler (ou PATCH pour cancel at period end)
-            response = await client.delete(
-                f"https://api.lemonsqueezy.com/v1/subscriptions/{subscription.ls_subscription_id}",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Accept": "application/vnd.api+json",
-                }
-            )
+        client = get_http_client(LEMONSQUEEZY)
+        # Lemon Squeezy utilise DELETE pour annuler (ou PATCH pour cancel at period end)
+        response = await client.delete(
+            f"https://api.lemonsqueezy.com/v1/subscriptions/{subscription.ls_subscription_id}",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Accept": "application/vnd.api+json",
+            }
+        )
 
-            return response.status_code in [200, 204]
+        return response.status_code in [200, 204]
 
     async def reset_usage(self, user_id: int) -> None:
         """
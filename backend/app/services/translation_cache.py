@@ -0,0 +1,163 @@
+"""
+Cache des traductions de noms d'aliments (NLLB-200 et LLM).
+
+Trois sources, dans l'ordre :
+1. Paires statiques FOOD_TRANSLATIONS (préchargées, jamais évincées)
+2. LRU en mémoire borné avec TTL (par worker)
+3. Cache partagé app.core.cache (Redis si configuré): survit aux redémarrages
+   et évite qu'un worker repaie un appel HuggingFace déjà fait par un autre
+
+Un cache par moteur de traduction (namespace "nllb", "llm"), avec compteurs
+de hits pour suivre le taux de réussite.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import structlog
+
+from app.config import get_settings
+from app.core.cache import Cache, LRUCache, get_cache
+from app.services.nutrition_database import FOOD_TRANSLATIONS
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+CACHE_PREFIX = "translation"
+
+
+@dataclass
+class TranslationCacheStats:
+    """Compteurs d'un cache de traduction."""
+
+    static_hits: int = 0
+    memory_hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> dict:
+        hits = self.static_hits + self.memory_hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            **asdict(self),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class TranslationCache:
+    """Cache de traductions (texte, langue source, langue cible) -> traduction."""
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        shared: Optional[Cache] = None,
+        use_shared: Optional[bool] = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl or settings.TRANSLATION_CACHE_TTL
+        self._memory = LRUCache(max_entries or settings.TRANSLATION_CACHE_MAX_ENTRIES, self.ttl)
+        self._static: dict[tuple[str, str, str], str] = {}
+        self._shared = shared
+        self.use_shared = settings.TRANSLATION_CACHE_SHARED if use_shared is None else use_shared
+        self.stats = TranslationCacheStats()
+
+    @property
+    def shared(self) -> Cache:
+        """Cache partagé (résolu paresseusement)."""
+        if self._shared is None:
+            self._shared = get_cache()
+        return self._shared
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Clé de texte: minuscules, espaces superflus retirés."""
+        return " ".join(text.lower().split())
+
+    def _key(self, text: str, source_lang: str, target_lang: str) -> str:
+        return Cache.make_key(
+            CACHE_PREFIX, self.namespace, source_lang, target_lang,
+            Cache.hash_key(self.normalize(text)),
+        )
+
+    def warm(self, pairs: dict[str, dict[str, str]], target_lang: str = "en") -> int:
+        """
+        Précharge des traductions statiques {langue: {source: traduction}}.
+
+        Returns:
+            Nombre de paires chargées
+        """
+        count = 0
+        for source_lang, translations in pairs.items():
+            for source, translation in translations.items():
+                self._static[(self.normalize(source), source_lang, target_lang)] = translation
+                count += 1
+        logger.info("translation_cache_warmed", namespace=self.namespace, pairs=count)
+        return count
+
+    async def get(self, text: str, source_lang: str, target_lang: str = "en") -> Optional[str]:
+        """Traduction en cache, ou None."""
+        translation = self._static.get((self.normalize(text), source_lang, target_lang))
+        if translation is not None:
+            self.stats.static_hits += 1
+            return translation
+
+        key = self._key(text, source_lang, target_lang)
+        translation = self._memory.get(key)
+        if translation is not None:
+            self.stats.memory_hits += 1
+            return translation
+
+        if self.use_shared:
+            translation = await self.shared.get(key)
+            if isinstance(translation, str):
+                self.stats.shared_hits += 1
+                self._memory.set(key, translation)
+                return translation
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, text: str, source_lang: str, target_lang: str, translation: str) -> None:
+        """Enregistre une traduction dans les deux niveaux."""
+        key = self._key(text, source_lang, target_lang)
+        self._memory.set(key, translation)
+        if self.use_shared:
+            await self.shared.set(key, translation, self.ttl)
+
+    async def clear(self) -> None:
+        """Vide le LRU et le cache partagé (les paires statiques restent)."""
+        self._memory.clear()
+        if self.use_shared:
+            await self.shared.clear_pattern(f"{CACHE_PREFIX}:{self.namespace}:*")
+
+    def get_stats(self) -> dict:
+        """Taille et compteurs du cache."""
+        languages = {key.split(":")[2] for key in self._memory.keys()}
+        return {
+            "namespace": self.namespace,
+            "size": len(self._memory),
+            "max_entries": self._memory.max_entries,
+            "static_entries": len(self._static),
+            "languages_cached": sorted(languages),
+            "shared": self.use_shared,
+            **self.stats.as_dict(),
+        }
+
+
+_translation_caches: dict[str, TranslationCache] = {}
+
+
+def get_translation_cache(namespace: str) -> TranslationCache:
+    """
+    Cache de traduction d'un moteur (singleton par worker).
+
+    Préchargé avec les paires statiques FOOD_TRANSLATIONS (vers l'anglais).
+    """
+    cache = _translation_caches.get(namespace)
+    if cache is None:
+        cache = TranslationCache(namespace)
+        cache.warm(FOOD_TRANSLATIONS, target_lang="en")
+        _translation_caches[namespace] = cache
+    return cache
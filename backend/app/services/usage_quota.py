@@ -0,0 +1,399 @@
+"""
+Moteur de quotas d'usage (analyses photo, recettes, messages coach).
+
+SubscriptionService.check_limit relisait UsageTracking (ou sommait les lignes
+de la semaine pour les recettes) et increment_usage faisait ensuite un
+lecture-modification-écriture ORM: plusieurs allers-retours DB par appel, et
+deux requêtes simultanées pouvaient toutes deux passer sous la limite.
+
+Chaque compteur vit maintenant dans un bucket (utilisateur, action, période):
+un bucket par jour, ou par semaine (lundi) selon get_limit_period.
+
+- Redis: vérification + incrément atomiques par un script Lua. Un bucket
+  absent (début de période, Redis redémarré) est initialisé depuis
+  usage_tracking (+ incréments pas encore écrits) avec SET NX.
+- Sans Redis: pas de compteurs partagés (des compteurs en mémoire seraient
+  propres à chaque worker, et la limite multipliée par le nombre de workers).
+  Le moteur renvoie None, SubscriptionService vérifie en base et chaque usage
+  y est écrit aussitôt (UPSERT), visible de tous les workers.
+
+Avec Redis, les incréments sont accumulés par worker et écrits dans
+usage_tracking par lots (un UPSERT multi-lignes toutes les
+USAGE_QUOTA_FLUSH_INTERVAL secondes, puis à l'arrêt). En cas d'erreur Redis,
+le moteur renvoie None et SubscriptionService revient au comptage en base.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+import structlog
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.core.cache import REDIS_AVAILABLE, Cache, redis
+from app.core.db_upsert import upsert_insert_for
+from app.models.subscription import UsageTracking
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+CACHE_PREFIX = "usage_quota"
+QUOTA_ACTIONS = ("vision_analyses", "recipe_generations", "coach_messages")
+# Marge après la fin de la période avant expiration du bucket
+BUCKET_GRACE_SECONDS = 3600
+
+# KEYS[1]: bucket; ARGV: limite (-1 = illimité), coût
+# Renvoie {-1, 0} si le bucket n'existe pas, sinon {autorisé, utilisé avant l'appel}
+CONSUME_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return {-1, 0}
+end
+current = tonumber(current)
+local limit = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+if limit >= 0 and current + cost > limit then
+    return {0, current}
+end
+redis.call('INCRBY', KEYS[1], cost)
+return {1, current}
+"""
+
+# KEYS[1]: bucket; ARGV[1]: montant. Sans effet si le bucket a expiré.
+REFUND_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return -1
+end
+return redis.call('DECRBY', KEYS[1], math.min(tonumber(current), tonumber(ARGV[1])))
+"""
+
+
+def bucket_start(period: str, today: Optional[date] = None) -> date:
+    """Premier jour du bucket (le jour même, ou le lundi pour "week")."""
+    today = today or date.today()
+    if period == "week":
+        return today - timedelta(days=today.weekday())
+    return today
+
+
+def bucket_ttl(period: str, today: Optional[date] = None) -> int:
+    """Secondes jusqu'à la fin du bucket, plus une marge."""
+    start = bucket_start(period, today)
+    end = start + timedelta(days=7 if period == "week" else 1)
+    remaining = datetime.combine(end, datetime.min.time()) - datetime.now()
+    return max(int(remaining.total_seconds()), 0) + BUCKET_GRACE_SECONDS
+
+
+def quota_key(user_id: int, action: str, period: str, today: Optional[date] = None) -> str:
+    period = "week" if period == "week" else "day"
+    return Cache.make_key(CACHE_PREFIX, action, str(user_id), period, bucket_start(period, today).isoformat())
+
+
+class QuotaStore:
+    """Stockage des compteurs de quotas."""
+
+    async def consume(self, key: str, limit: int, cost: int) -> Optional[tuple[bool, int]]:
+        """Vérifie et incrémente atomiquement. None si le bucket n'existe pas."""
+        raise NotImplementedError
+
+    async def seed(self, key: str, value: int, ttl: int) -> None:
+        """Initialise un bucket absent (sans écraser un bucket existant)."""
+        raise NotImplementedError
+
+    async def get(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    async def refund(self, key: str, cost: int) -> None:
+        raise NotImplementedError
+
+
+class RedisQuotaStore(QuotaStore):
+    """Compteurs Redis partagés entre workers (scripts Lua atomiques)."""
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self._client = None
+        self._consume = None
+        self._refund = None
+
+    async def _get_client(self):
+        if self._client is None:
+            client = redis.from_url(
+                self.redis_url,
+                encoding="utf-8",
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5,
+            )
+            self._consume = client.register_script(CONSUME_SCRIPT)
+            self._refund = client.register_script(REFUND_SCRIPT)
+            self._client = client
+        return self._client
+
+    async def consume(self, key: str, limit: int, cost: int) -> Optional[tuple[bool, int]]:
+        await self._get_client()
+        status, used = await self._consume(keys=[key], args=[limit, cost])
+        if int(status) < 0:
+            return None
+        return bool(int(status)), int(used)
+
+    async def seed(self, key: str, value: int, ttl: int) -> None:
+        client = await self._get_client()
+        await client.set(key, value, ex=ttl, nx=True)
+
+    async def get(self, key: str) -> Optional[int]:
+        client = await self._get_client()
+        value = await client.get(key)
+        return None if value is None else int(value)
+
+    async def refund(self, key: str, cost: int) -> None:
+        await self._get_client()
+        await self._refund(keys=[key], args=[cost])
+
+
+class MemoryQuotaStore(QuotaStore):
+    """Compteurs en mémoire (un seul processus: tests, scripts)."""
+
+    def __init__(self):
+        self._counters: dict[str, tuple[int, float]] = {}
+
+    def _current(self, key: str) -> Optional[int]:
+        entry = self._counters.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.time() >= expires_at:
+            del self._counters[key]
+            return None
+        return value
+
+    async def consume(self, key: str, limit: int, cost: int) -> Optional[tuple[bool, int]]:
+        current = self._current(key)
+        if current is None:
+            return None
+        if limit >= 0 and current + cost > limit:
+            return False, current
+        self._counters[key] = (current + cost, self._counters[key][1])
+        return True, current
+
+    async def seed(self, key: str, value: int, ttl: int) -> None:
+        if self._current(key) is None:
+            self._counters[key] = (value, time.time() + ttl)
+
+    async def get(self, key: str) -> Optional[int]:
+        return self._current(key)
+
+    async def refund(self, key: str, cost: int) -> None:
+        current = self._current(key)
+        if current is not None:
+            self._counters[key] = (max(0, current - cost), self._counters[key][1])
+
+
+LoadUsed = Callable[[], Awaitable[int]]
+
+
+class UsageQuotaEngine:
+    """Quotas atomiques + écriture différée dans usage_tracking."""
+
+    def __init__(self, store: Optional[QuotaStore] = None):
+        if store is None and REDIS_AVAILABLE and settings.REDIS_URL:
+            store = RedisQuotaStore(settings.REDIS_URL)
+        # None: pas de compteurs partagés, SubscriptionService compte en base
+        self.store = store
+        # (user_id, jour) -> {action: incrément pas encore écrit}
+        self._pending: dict[tuple[int, date], dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._flush_lock = asyncio.Lock()
+        self.flushed_rows = 0
+        self.store_errors = 0
+
+    def pending_usage(self, user_id: int, action: str, since: date) -> int:
+        """Incréments de ce worker pas encore écrits en base (depuis `since`)."""
+        return sum(
+            counts.get(action, 0)
+            for (pending_user, day), counts in self._pending.items()
+            if pending_user == user_id and day >= since
+        )
+
+    def record(self, user_id: int, action: str, amount: int = 1) -> None:
+        """Compte un usage à écrire en base au prochain flush."""
+        self._pending[(user_id, date.today())][action] += amount
+
+    async def _seed(self, key: str, user_id: int, action: str, period: str, load_used: LoadUsed) -> None:
+        used = await load_used() + self.pending_usage(user_id, action, bucket_start(period))
+        await self.store.seed(key, used, bucket_ttl(period))
+
+    async def consume(
+        self,
+        user_id: int,
+        action: str,
+        limit: int,
+        period: str,
+        load_used: LoadUsed,
+        cost: int = 1,
+    ) -> Optional[tuple[bool, int]]:
+        """
+        Vérifie la limite et compte l'usage en une seule opération atomique.
+
+        Args:
+            limit: Limite du tier (-1 = illimité, l'usage est quand même compté)
+            period: "day" ou "week" (get_limit_period)
+            load_used: Usage de la période en base (initialisation d'un bucket absent)
+
+        Returns:
+            (autorisé, utilisé avant l'appel), ou None sans Redis ou si le stockage est indisponible
+        """
+        if self.store is None:
+            return None
+        key = quota_key(user_id, action, period)
+        try:
+            outcome = await self.store.consume(key, limit, cost)
+            if outcome is None:
+                await self._seed(key, user_id, action, period, load_used)
+                outcome = await self.store.consume(key, limit, cost)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning("usage_quota_store_error", action=action, error=str(e))
+            return None
+        if outcome is None:
+            return None
+
+        allowed, used = outcome
+        if allowed:
+            self.record(user_id, action, cost)
+        return allowed, used
+
+    async def refund(self, user_id: int, action: str, period: str, cost: int = 1) -> None:
+        """Annule un usage compté par consume (action finalement échouée)."""
+        if self.store is None:
+            return
+        self.record(user_id, action, -cost)
+        try:
+            await self.store.refund(quota_key(user_id, action, period), cost)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning("usage_quota_store_error", action=action, error=str(e))
+
+    async def peek(self, user_id: int, action: str, period: str, load_used: LoadUsed) -> Optional[int]:
+        """Usage de la période (initialise le bucket si besoin), None sans Redis ou si indisponible."""
+        if self.store is None:
+            return None
+        key = quota_key(user_id, action, period)
+        try:
+            used = await self.store.get(key)
+            if used is None:
+                await self._seed(key, user_id, action, period, load_used)
+                used = await self.store.get(key)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning("usage_quota_store_error", action=action, error=str(e))
+            return None
+        return used
+
+    async def flush(self, session_maker: async_sessionmaker) -> int:
+        """Écrit les incréments accumulés dans usage_tracking (un seul UPSERT). Renvoie le nombre de lignes."""
+        async with self._flush_lock:
+            batch = {
+                bucket: dict(counts)
+                for bucket, counts in self._pending.items()
+                if any(counts.values())
+            }
+            self._pending.clear()
+            if not batch:
+                return 0
+
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "user_id": user_id,
+                    "date": day,
+                    **{action: counts.get(action, 0) for action in QUOTA_ACTIONS},
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for (user_id, day), counts in batch.items()
+            ]
+            try:
+                async with session_maker() as db:
+                    await db.execute(_upsert_usage(db, rows, now))
+                    await db.commit()
+            except Exception as e:
+                # Remettre le lot en attente pour le prochain passage
+                for bucket, counts in batch.items():
+                    for action, amount in counts.items():
+                        self._pending[bucket][action] += amount
+                logger.error("usage_quota_flush_error", rows=len(rows), error=str(e))
+                return 0
+
+            self.flushed_rows += len(rows)
+            logger.debug("usage_quota_flushed", rows=len(rows))
+            return len(rows)
+
+    async def write_usage(self, db: AsyncSession, user_id: int, action: str, amount: int = 1) -> None:
+        """
+        Écrit un usage en base immédiatement (sans Redis: visible de tous les workers).
+
+        Valide la transaction de `db`.
+        """
+        now = datetime.utcnow()
+        row = {
+            "user_id": user_id,
+            "date": date.today(),
+            **{name: amount if name == action else 0 for name in QUOTA_ACTIONS},
+            "created_at": now,
+            "updated_at": now,
+        }
+        await db.execute(_upsert_usage(db, [row], now))
+        await db.commit()
+
+    def get_stats(self) -> dict:
+        return {
+            "store": type(self.store).__name__ if self.store is not None else "database",
+            "pending_rows": len(self._pending),
+            "flushed_rows": self.flushed_rows,
+            "store_errors": self.store_errors,
+        }
+
+
+def _upsert_usage(db: AsyncSession, rows: list[dict], now: datetime):
+    """UPSERT qui ajoute les compteurs des lignes à ceux de usage_tracking."""
+    insert = upsert_insert_for(db)
+    stmt = insert(UsageTracking).values(rows)
+    table = UsageTracking.__table__.c
+    return stmt.on_conflict_do_update(
+        index_elements=[table.user_id, table.date],
+        set_={
+            **{
+                action: func.coalesce(table[action], 0) + stmt.excluded[action]
+                for action in QUOTA_ACTIONS
+            },
+            "updated_at": now,
+        },
+    )
+
+
+_engine: Optional[UsageQuotaEngine] = None
+
+
+def get_usage_quota_engine() -> UsageQuotaEngine:
+    """Moteur global (un par worker, compteurs partagés via Redis si configuré)."""
+    global _engine
+    if _engine is None:
+        _engine = UsageQuotaEngine()
+    return _engine
+
+
+async def run_usage_flush_loop(session_maker: async_sessionmaker, interval: float) -> None:
+    """Écriture périodique des compteurs (tâche de fond du lifespan)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await get_usage_quota_engine().flush(session_maker)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("usage_quota_flush_loop_error", error=str(e))
@@ -0,0 +1,215 @@
+"""
+Cache des recherches USDA FoodData Central.
+
+Deux niveaux :
+1. LRU en mémoire (par worker, accès sans I/O)
+2. Cache partagé app.core.cache (Redis si configuré, sinon mémoire)
+
+Les clés de cache sont normalisées (casse, espaces, ponctuation, pluriel du
+dernier mot) pour que "White Rice", "white  rice" et "white rices" partagent la
+même entrée; la requête envoyée à USDA reste celle de l'appelant. Les résultats vides sont mis en cache avec un TTL plus court, et les
+recherches identiques concurrentes partagent une seule requête USDA.
+"""
+
+import asyncio
+import re
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Optional
+
+import structlog
+
+from app.config import get_settings
+from app.core.cache import Cache, LRUCache, get_cache
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+CACHE_PREFIX = "usda:search"
+
+# Pluriels en -ies dont le singulier est en -ie (sinon -ies -> -y)
+_IES_TO_IE = {"cookies", "brownies", "smoothies", "pies", "veggies", "calories"}
+# Mots en -s qui ne sont pas des pluriels
+_NOT_PLURAL_SUFFIXES = ("ss", "us", "is", "ous")
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _singularize(word: str) -> str:
+    """Singulier approximatif d'un mot anglais (règles simples, sans dépendance)."""
+    if len(word) <= 3 or not word.endswith("s") or word.endswith(_NOT_PLURAL_SUFFIXES):
+        return word
+    if word.endswith("ies"):
+        return word[:-1] if word in _IES_TO_IE else word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    return word[:-1]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalise une requête USDA pour la clé de cache (jamais envoyée à l'API:
+    "2% milk" deviendrait "2 milk").
+
+    Exemple: "  Chicken   Breasts! " -> "chicken breast"
+    """
+    text = _PUNCTUATION.sub(" ", query.lower())
+    words = _WHITESPACE.sub(" ", text).strip().split(" ")
+    if words and words[-1]:
+        words[-1] = _singularize(words[-1])
+    return " ".join(words)
+
+
+@dataclass
+class USDACacheStats:
+    """Compteurs du cache USDA."""
+
+    memory_hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    negative_hits: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.memory_hits + self.shared_hits + self.misses + self.coalesced
+        hits = self.memory_hits + self.shared_hits + self.coalesced
+        return {
+            **asdict(self),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class USDALookupCache:
+    """
+    Cache à deux niveaux des résultats USDA (listes de dicts NutritionData).
+
+    Les valeurs sont stockées sous forme de dicts sérialisables: l'appelant
+    reconstruit des objets neufs à chaque lecture (pas de partage mutable).
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        negative_ttl: Optional[int] = None,
+        shared: Optional[Cache] = None,
+    ):
+        self.max_entries = max_entries or settings.USDA_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.USDA_CACHE_TTL
+        self.negative_ttl = negative_ttl or settings.USDA_CACHE_NEGATIVE_TTL
+        self._shared = shared
+        self._memory = LRUCache(self.max_entries, self.ttl)
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.stats = USDACacheStats()
+
+    @property
+    def shared(self) -> Cache:
+        """Cache partagé (résolu paresseusement)."""
+        if self._shared is None:
+            self._shared = get_cache()
+        return self._shared
+
+    @staticmethod
+    def make_key(normalized_query: str, max_results: int) -> str:
+        """Clé de cache pour une requête normalisée."""
+        return Cache.make_key(CACHE_PREFIX, max_results, Cache.hash_key(normalized_query))
+
+    async def get_or_fetch(
+        self,
+        query: str,
+        max_results: int,
+        fetch: Callable[[str, int], Awaitable[list[dict]]],
+    ) -> list[dict]:
+        """
+        Retourne les résultats en cache ou appelle `fetch(query, max_results)`.
+
+        La requête d'origine est envoyée à USDA; seule la clé est normalisée.
+
+        Une erreur de `fetch` est propagée et n'est jamais mise en cache.
+        """
+        key = self.make_key(normalize_query(query), max_results)
+
+        value = self._memory.get(key)
+        if value is not None:
+            self.stats.memory_hits += 1
+            if not value:
+                self.stats.negative_hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            # Tâche détachée: l'annulation d'un appelant (timeout par item)
+            # n'annule pas la requête partagée avec les autres appelants
+            task = asyncio.create_task(self._load(key, query.strip(), max_results, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.stats.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Évite "Task exception was never retrieved" si tous les appelants ont été annulés
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(
+        self,
+        key: str,
+        query: str,
+        max_results: int,
+        fetch: Callable[[str, int], Awaitable[list[dict]]],
+    ) -> list[dict]:
+        """Lecture du cache partagé puis, à défaut, de l'API USDA."""
+        value = await self.shared.get(key)
+        if isinstance(value, list):
+            self.stats.shared_hits += 1
+            if not value:
+                self.stats.negative_hits += 1
+            self._memory.set(key, value, self.ttl if value else self.negative_ttl)
+            return value
+
+        self.stats.misses += 1
+        value = await fetch(query, max_results)
+        ttl = self.ttl if value else self.negative_ttl
+        self._memory.set(key, value, ttl)
+        await self.shared.set(key, value, ttl)
+        logger.debug("usda_cache_stored", query=query, results=len(value), ttl=ttl)
+        return value
+
+    async def invalidate(self, query: str, max_results: int) -> None:
+        """Supprime une entrée des deux niveaux."""
+        key = self.make_key(normalize_query(query), max_results)
+        self._memory.delete(key)
+        await self.shared.delete(key)
+
+    async def clear(self) -> None:
+        """Vide les deux niveaux."""
+        self._memory.clear()
+        await self.shared.clear_pattern(f"{CACHE_PREFIX}:*")
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+
+_usda_cache: Optional[USDALookupCache] = None
+
+
+def get_usda_cache() -> USDALookupCache:
+    """Instance globale du cache USDA (singleton par worker)."""
+    global _usda_cache
+    if _usda_cache is None:
+        _usda_cache = USDALookupCache()
+    return _usda_cache
+
+
+def get_usda_cache_stats() -> dict:
+    """Statistiques du cache USDA."""
+    cache = get_usda_cache()
+    return {
+        "entries": len(cache),
+        "max_entries": cache.max_entries,
+        **cache.stats.as_dict(),
+    }
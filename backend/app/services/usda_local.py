@@ -0,0 +1,502 @@
+"""
+Miroir local de USDA FoodData Central (SQLite + FTS5).
+
+Construit hors-ligne à partir des exports en masse USDA (JSON ou CSV, voir
+scripts/load_usda_local.py), il permet à USDANutritionService de chercher
+sans réseau (backend "local") : recherche déterministe, ~1ms sur SR Legacy +
+Foundation Foods, utilisable dans les tests.
+
+Schéma:
+    foods(fdc_id, description, data_type, publication_date,
+          calories, protein, carbs, fat, fiber, content_hash)   -- pour 100g
+    foods_fts(description)  -- index plein texte (porter + unicode61)
+    meta(key, value)        -- release chargée, date de chargement
+
+Le chargement est incrémental: seules les lignes dont le contenu a changé
+(hash) sont réécrites, ce qui rend les mises à jour mensuelles rapides.
+"""
+
+import asyncio
+import csv
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import structlog
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+# Identifiants USDA des nutriments (nouveau format "id" et ancien "number")
+ENERGY_IDS = {1008: "208"}
+# Énergie Atwater (Foundation Foods sans nutriment 1008)
+ENERGY_FALLBACK_IDS = {2047: "957", 2048: "958"}
+MACRO_IDS = {
+    "protein": (1003, "203"),
+    "fat": (1004, "204"),
+    "carbs": (1005, "205"),
+    "fiber": (1079, "291"),
+}
+
+# Clés de premier niveau des exports JSON USDA
+JSON_FOOD_LISTS = ("FoundationFoods", "SRLegacyFoods", "SurveyFoods", "BrandedFoods", "foods")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS foods (
+    fdc_id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    data_type TEXT,
+    publication_date TEXT,
+    calories REAL NOT NULL,
+    protein REAL NOT NULL DEFAULT 0,
+    carbs REAL NOT NULL DEFAULT 0,
+    fat REAL NOT NULL DEFAULT 0,
+    fiber REAL NOT NULL DEFAULT 0,
+    content_hash TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+    description,
+    content='foods',
+    content_rowid='fdc_id',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS foods_ai AFTER INSERT ON foods BEGIN
+    INSERT INTO foods_fts(rowid, description) VALUES (new.fdc_id, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS foods_ad AFTER DELETE ON foods BEGIN
+    INSERT INTO foods_fts(foods_fts, rowid, description) VALUES ('delete', old.fdc_id, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS foods_au AFTER UPDATE OF description ON foods BEGIN
+    INSERT INTO foods_fts(foods_fts, rowid, description) VALUES ('delete', old.fdc_id, old.description);
+    INSERT INTO foods_fts(rowid, description) VALUES (new.fdc_id, new.description);
+END;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class LocalFood:
+    """Aliment USDA normalisé (valeurs pour 100g)."""
+
+    fdc_id: int
+    description: str
+    calories: float
+    protein: float = 0.0
+    carbs: float = 0.0
+    fat: float = 0.0
+    fiber: float = 0.0
+    data_type: Optional[str] = None
+    publication_date: Optional[str] = None
+
+    def content_hash(self) -> str:
+        """Hash du contenu (détection des aliments modifiés entre releases)."""
+        payload = "|".join(
+            str(v) for v in (
+                self.description, self.data_type, self.publication_date,
+                round(self.calories, 3), round(self.protein, 3), round(self.carbs, 3),
+                round(self.fat, 3), round(self.fiber, 3),
+            )
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def to_nutrition_dict(self) -> dict:
+        """Format attendu par NutritionData(**data)."""
+        return {
+            "food_name": self.description,
+            "calories": self.calories,
+            "protein": self.protein,
+            "carbs": self.carbs,
+            "fat": self.fat,
+            "fiber": self.fiber,
+            "source": "usda",
+            "confidence": 0.95,
+            "portion_size_g": 100.0,
+        }
+
+
+@dataclass
+class LoadStats:
+    """Résultat d'un chargement incrémental."""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+        }
+
+
+def _macro_values(amounts: dict) -> Optional[dict]:
+    """
+    Sélectionne les macros à partir de {id ou number: quantité}.
+
+    Retourne None si aucune énergie (kcal) n'est disponible.
+    """
+    def pick(numeric_id: int, number: str) -> Optional[float]:
+        value = amounts.get(numeric_id, amounts.get(number))
+        return float(value) if value not in (None, "") else None
+
+    calories = None
+    for numeric_id, number in (*ENERGY_IDS.items(), *ENERGY_FALLBACK_IDS.items()):
+        calories = pick(numeric_id, number)
+        if calories is not None:
+            break
+    if calories is None:
+        return None
+
+    values = {"calories": calories}
+    for name, (numeric_id, number) in MACRO_IDS.items():
+        values[name] = pick(numeric_id, number) or 0.0
+    return values
+
+
+def parse_json_food(food: dict) -> Optional[LocalFood]:
+    """
+    Parse un aliment d'un export JSON USDA (bulk download ou API /foods).
+
+    Gère les deux formes de foodNutrients:
+    - bulk:  {"nutrient": {"id": 1008, "number": "208"}, "amount": 52.0}
+    - API:   {"nutrientId": 1008, "nutrientNumber": "208", "value": 52.0}
+    """
+    fdc_id = food.get("fdcId")
+    description = (food.get("description") or "").strip()
+    if not fdc_id or not description:
+        return None
+
+    amounts: dict = {}
+    for nutrient in food.get("foodNutrients", []):
+        info = nutrient.get("nutrient") or {}
+        value = nutrient.get("amount", nutrient.get("value"))
+        if value is None:
+            continue
+        numeric_id = info.get("id", nutrient.get("nutrientId"))
+        number = info.get("number", nutrient.get("nutrientNumber"))
+        unit = (info.get("unitName") or nutrient.get("unitName") or "").lower()
+        # L'énergie existe aussi en kJ avec un autre id: ne garder que kcal
+        if unit == "kj":
+            continue
+        if numeric_id is not None:
+            amounts[int(numeric_id)] = value
+        if number is not None:
+            amounts[str(number)] = value
+
+    values = _macro_values(amounts)
+    if values is None:
+        return None
+
+    return LocalFood(
+        fdc_id=int(fdc_id),
+        description=description,
+        data_type=food.get("dataType"),
+        publication_date=food.get("publicationDate"),
+        **values,
+    )
+
+
+def iter_json_foods(path: str | Path) -> Iterator[LocalFood]:
+    """Itère les aliments d'un export JSON USDA (FoundationFoods, SRLegacyFoods, ...)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        food_lists = [data]
+    else:
+        food_lists = [data[key] for key in JSON_FOOD_LISTS if key in data]
+
+    for foods in food_lists:
+        for food in foods:
+            parsed = parse_json_food(food)
+            if parsed is not None:
+                yield parsed
+
+
+def iter_csv_foods(directory: str | Path) -> Iterator[LocalFood]:
+    """
+    Itère les aliments d'un export CSV USDA (food.csv + food_nutrient.csv).
+
+    food_nutrient.csv est lu en streaming et seuls les 5 macros sont gardés
+    en mémoire, ce qui reste raisonnable même pour Branded Foods.
+    """
+    directory = Path(directory)
+    wanted = {*ENERGY_IDS, *ENERGY_FALLBACK_IDS, *(ids[0] for ids in MACRO_IDS.values())}
+
+    amounts_by_food: dict[int, dict] = {}
+    with open(directory / "food_nutrient.csv", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                nutrient_id = int(row["nutrient_id"])
+            except (KeyError, ValueError):
+                continue
+            if nutrient_id in wanted and row.get("amount"):
+                amounts_by_food.setdefault(int(row["fdc_id"]), {})[nutrient_id] = row["amount"]
+
+    with open(directory / "food.csv", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                fdc_id = int(row["fdc_id"])
+            except (KeyError, ValueError):
+                continue
+            description = (row.get("description") or "").strip()
+            values = _macro_values(amounts_by_food.get(fdc_id, {}))
+            if not description or values is None:
+                continue
+            yield LocalFood(
+                fdc_id=fdc_id,
+                description=description,
+                data_type=row.get("data_type") or None,
+                publication_date=row.get("publication_date") or None,
+                **values,
+            )
+
+
+def build_match_query(query: str, match_all: bool = True) -> Optional[str]:
+    """
+    Construit une requête FTS5 sûre (tokens entre guillemets, préfixe sur le dernier).
+
+    Exemple: "chicken breast" -> '"chicken" AND "breast"*'
+    """
+    tokens = _TOKEN.findall(query.lower())
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return f" {'AND' if match_all else 'OR'} ".join(terms)
+
+
+class USDALocalStore:
+    """Accès à la base locale USDA (lecture et chargement incrémental)."""
+
+    CANDIDATES = 50  # Candidats FTS classés avant départage
+
+    def __init__(self, path: str | Path, read_only: bool = True):
+        self.path = Path(path)
+        if read_only:
+            uri = f"file:{self.path.as_posix()}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        self._conn.row_factory = sqlite3.Row
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "USDALocalStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def count(self) -> int:
+        """Nombre d'aliments dans la base."""
+        return self._conn.execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def search(self, query: str, max_results: int = 5) -> list[dict]:
+        """
+        Recherche plein texte, classée par BM25 puis description la plus courte.
+
+        Tous les mots doivent correspondre; à défaut, n'importe lequel.
+
+        Returns:
+            Liste de dicts au format NutritionData(**data)
+        """
+        for match_all in (True, False):
+            match = build_match_query(query, match_all=match_all)
+            if match is None:
+                return []
+            # Classement BM25 dans FTS5 (rank) sur un nombre borné de candidats,
+            # puis départage par description la plus courte (ex: "Rice, white")
+            rows = self._conn.execute(
+                """
+                SELECT f.fdc_id, f.description, f.calories, f.protein, f.carbs, f.fat, f.fiber
+                FROM (
+                    SELECT rowid, rank FROM foods_fts
+                    WHERE foods_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ) AS m
+                JOIN foods f ON f.fdc_id = m.rowid
+                ORDER BY m.rank, length(f.description), f.fdc_id
+                LIMIT ?
+                """,
+                (match, max(max_results * 10, self.CANDIDATES), max_results),
+            ).fetchall()
+            if rows:
+                return [self._row_to_food(row).to_nutrition_dict() for row in rows]
+        return []
+
+    async def search_async(self, query: str, max_results: int = 5) -> list[dict]:
+        """search() hors de l'event loop (thread dédié, la connexion n'est jamais partagée)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), self.search, query, max_results)
+
+    def get(self, fdc_id: int) -> Optional[LocalFood]:
+        """Aliment par fdcId."""
+        row = self._conn.execute(
+            "SELECT fdc_id, description, calories, protein, carbs, fat, fiber, data_type, publication_date "
+            "FROM foods WHERE fdc_id = ?",
+            (fdc_id,),
+        ).fetchone()
+        return self._row_to_food(row) if row else None
+
+    @staticmethod
+    def _row_to_food(row: sqlite3.Row) -> LocalFood:
+        keys = row.keys()
+        return LocalFood(
+            fdc_id=row["fdc_id"],
+            description=row["description"],
+            calories=row["calories"],
+            protein=row["protein"],
+            carbs=row["carbs"],
+            fat=row["fat"],
+            fiber=row["fiber"],
+            data_type=row["data_type"] if "data_type" in keys else None,
+            publication_date=row["publication_date"] if "publication_date" in keys else None,
+        )
+
+    def upsert_foods(
+        self,
+        foods: Iterable[LocalFood],
+        release: Optional[str] = None,
+        batch_size: int = 5000,
+    ) -> LoadStats:
+        """
+        Charge des aliments de façon incrémentale.
+
+        Seuls les fdcIds nouveaux ou dont le contenu a changé sont écrits
+        (le hash stocké est comparé avant l'écriture).
+        """
+        stats = LoadStats()
+        batch: list[LocalFood] = []
+
+        def flush() -> None:
+            ids = [food.fdc_id for food in batch]
+            placeholders = ",".join("?" * len(ids))
+            existing = dict(self._conn.execute(
+                f"SELECT fdc_id, content_hash FROM foods WHERE fdc_id IN ({placeholders})",
+                ids,
+            ).fetchall())
+
+            rows = []
+            for food in batch:
+                content_hash = food.content_hash()
+                previous = existing.get(food.fdc_id)
+                if previous == content_hash:
+                    stats.unchanged += 1
+                    continue
+                if previous is None:
+                    stats.inserted += 1
+                else:
+                    stats.updated += 1
+                rows.append((
+                    food.fdc_id, food.description, food.data_type, food.publication_date,
+                    food.calories, food.protein, food.carbs, food.fat, food.fiber, content_hash,
+                ))
+
+            if rows:
+                self._conn.executemany(
+                    """
+                    INSERT INTO foods (fdc_id, description, data_type, publication_date,
+                                       calories, protein, carbs, fat, fiber, content_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(fdc_id) DO UPDATE SET
+                        description = excluded.description,
+                        data_type = excluded.data_type,
+                        publication_date = excluded.publication_date,
+                        calories = excluded.calories,
+                        protein = excluded.protein,
+                        carbs = excluded.carbs,
+                        fat = excluded.fat,
+                        fiber = excluded.fiber,
+                        content_hash = excluded.content_hash
+                    """,
+                    rows,
+                )
+            batch.clear()
+
+        with self._conn:
+            seen: set[int] = set()
+            for food in foods:
+                # Un même fdcId peut apparaître dans plusieurs fichiers d'une release
+                if food.fdc_id in seen:
+                    stats.skipped += 1
+                    continue
+                seen.add(food.fdc_id)
+                batch.append(food)
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+
+            meta = {"loaded_at": str(int(time.time()))}
+            if release:
+                meta["release"] = release
+            self._conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                meta.items(),
+            )
+
+        logger.info("usda_local_loaded", path=str(self.path), release=release, **stats.as_dict())
+        return stats
+
+    def optimize(self) -> None:
+        """Compacte l'index FTS après un gros chargement."""
+        self._conn.execute("INSERT INTO foods_fts(foods_fts) VALUES ('optimize')")
+        self._conn.commit()
+
+
+_local_store: Optional[USDALocalStore] = None
+_local_store_missing = False
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Un seul thread: requêtes FTS de l'ordre de la ms, connexion SQLite sérialisée
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="usda-local")
+    return _executor
+
+
+def get_local_store() -> Optional[USDALocalStore]:
+    """
+    Base locale USDA en lecture seule (USDA_LOCAL_DB_PATH), ouverte une fois.
+
+    Returns:
+        USDALocalStore, ou None si la base n'a pas été construite
+    """
+    global _local_store, _local_store_missing
+    if _local_store is None and not _local_store_missing:
+        path = Path(settings.USDA_LOCAL_DB_PATH)
+        if not path.exists():
+            logger.warning("usda_local_db_missing", path=str(path))
+            _local_store_missing = True
+            return None
+        _local_store = USDALocalStore(path)
+        logger.info("usda_local_db_opened", path=str(path), foods=_local_store.count())
+    return _local_store
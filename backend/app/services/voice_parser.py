@@ -41,6 +41,7 @@ class VoiceParser:
                 model_id="Qwen/Qwen2.5-72B-Instruct",
                 max_tokens=800,
                 temperature=0.3,  # Basse température pour parsing précis
+                cache_namespace="voice_parsing",
             )
 
             # Parser la réponse JSON du LLM
@@ -0,0 +1,230 @@
+"""
+Benchmark du chargement des données de GET /dashboard.
+
+Compare, sur une base SQLite temporaire peuplée :
+- "legacy": les 9 requêtes séquentielles de l'ancien get_dashboard
+  (dont la somme des FoodLog du jour)
+- "read_model": load_dashboard_snapshot (1 requête principale + 3 listes
+  en parallèle, totaux lus dans DailyNutrition)
+
+Une latence réseau est simulée par requête SQL (--rtt-ms) pour reproduire un
+PostgreSQL distant. Charge: --concurrency utilisateurs virtuels qui enchaînent
+--requests chargements au total; affiche p50/p95/p99.
+
+Le coach et la personnalisation (LLM) ne sont pas inclus: ils sont mesurés
+séparément et n'ont pas changé.
+
+Usage:
+    python scripts/benchmark_dashboard.py
+    python scripts/benchmark_dashboard.py --rtt-ms 2 --concurrency 20 --requests 1000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import and_, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.database import Base
+from app.models.activity import ActivityLog
+from app.models.food_log import DailyNutrition, FoodLog
+from app.models.gamification import Achievement, Notification, Streak, UserStats
+from app.models.profile import Profile
+from app.models.user import User
+from app.services.dashboard_read_model import load_dashboard_snapshot
+
+TABLES = [
+    User.__table__, Profile.__table__, UserStats.__table__, FoodLog.__table__, DailyNutrition.__table__,
+    ActivityLog.__table__, Achievement.__table__, Streak.__table__, Notification.__table__,
+]
+
+
+async def seed(session_maker, users: int, today: date) -> None:
+    """Utilisateurs avec 30 jours d'historique (repas, activités, notifications)."""
+    rng = random.Random(42)
+    async with session_maker() as db:
+        for user_id in range(1, users + 1):
+            db.add(User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x", name=f"User {user_id}"))
+            db.add(Profile(
+                user_id=user_id, age=30, gender="female", height_cm=165, weight_kg=60,
+                activity_level="moderate", goal="maintain", daily_calories=2000,
+            ))
+            db.add(UserStats(user_id=user_id))
+            db.add(Streak(user_id=user_id, streak_type="logging", current_count=rng.randint(0, 20)))
+            for days_ago in range(30):
+                day = today - timedelta(days=days_ago)
+                meals = rng.randint(2, 5)
+                calories = 0
+                for meal in range(meals):
+                    meal_calories = rng.randint(200, 800)
+                    calories += meal_calories
+                    db.add(FoodLog(
+                        user_id=user_id, meal_type="lunch", total_calories=meal_calories,
+                        total_protein=20.0, total_carbs=50.0, total_fat=15.0,
+                        meal_date=datetime.combine(day, datetime.min.time()) + timedelta(hours=8 + meal * 4),
+                    ))
+                db.add(DailyNutrition(
+                    user_id=user_id, date=datetime.combine(day, datetime.min.time()),
+                    total_calories=calories, total_protein=20.0 * meals, total_carbs=50.0 * meals,
+                    total_fat=15.0 * meals, meals_count=meals, water_ml=1500,
+                ))
+                db.add(ActivityLog(
+                    user_id=user_id, activity_type="walking", duration_minutes=30, calories_burned=120,
+                    activity_date=datetime.combine(day, datetime.min.time()) + timedelta(hours=18),
+                ))
+                db.add(Notification(user_id=user_id, notification_type="tip", title="Tip",
+                                    created_at=datetime.combine(day, datetime.min.time())))
+            for i in range(8):
+                db.add(Achievement(user_id=user_id, achievement_type=f"a{i}", name=f"A{i}", icon="*"))
+        await db.commit()
+
+
+async def legacy_load(db, user_id: int, today: date) -> dict:
+    """Ancien chargement: 9 requêtes séquentielles, somme des FoodLog en Python."""
+    start = datetime.combine(today, datetime.min.time())
+    end = datetime.combine(today, datetime.max.time())
+
+    stats = (await db.execute(select(UserStats).where(UserStats.user_id == user_id))).scalar_one_or_none()
+    logs = (await db.execute(select(FoodLog).where(and_(
+        FoodLog.user_id == user_id, FoodLog.meal_date >= start, FoodLog.meal_date <= end,
+    )))).scalars().all()
+    nutrition = (await db.execute(select(DailyNutrition).where(and_(
+        DailyNutrition.user_id == user_id, DailyNutrition.date >= start, DailyNutrition.date <= end,
+    )))).scalar_one_or_none()
+    activity = (await db.execute(select(
+        func.sum(ActivityLog.duration_minutes), func.sum(ActivityLog.calories_burned),
+    ).where(and_(
+        ActivityLog.user_id == user_id, ActivityLog.activity_date >= start, ActivityLog.activity_date <= end,
+    )))).one()
+    streak = (await db.execute(select(Streak).where(and_(
+        Streak.user_id == user_id, Streak.streak_type == "logging",
+    )))).scalar_one_or_none()
+    profile = (await db.execute(select(Profile).where(Profile.user_id == user_id))).scalar_one_or_none()
+    achievements = (await db.execute(
+        select(Achievement).where(Achievement.user_id == user_id).order_by(Achievement.unlocked_at.desc()).limit(5)
+    )).scalars().all()
+    streaks = (await db.execute(select(Streak).where(and_(
+        Streak.user_id == user_id, Streak.current_count > 0,
+    )))).scalars().all()
+    notifications = (await db.execute(
+        select(Notification).where(Notification.user_id == user_id).order_by(Notification.created_at.desc()).limit(10)
+    )).scalars().all()
+
+    return {
+        "calories": sum(log.total_calories or 0 for log in logs),
+        "meals": len(logs),
+        "water": nutrition.water_ml if nutrition else 0,
+        "activity": activity[0] or 0,
+        "streak": streak.current_count if streak else 0,
+        "profile": profile is not None,
+        "stats": stats is not None,
+        "lists": (len(achievements), len(streaks), len(notifications)),
+    }
+
+
+async def read_model_load(db, session_maker, user_id: int, today: date) -> dict:
+    snapshot = await load_dashboard_snapshot(db, session_maker, user_id, today)
+    return {
+        "calories": snapshot.calories,
+        "meals": snapshot.meals_count,
+        "water": snapshot.water_ml,
+        "activity": snapshot.activity_minutes,
+        "streak": snapshot.logging_streak_days,
+        "profile": snapshot.profile is not None,
+        "stats": snapshot.stats is not None,
+        "lists": (len(snapshot.recent_achievements), len(snapshot.active_streaks), len(snapshot.notifications)),
+    }
+
+
+async def run_load(name, load, session_maker, users: int, requests: int, concurrency: int) -> list[float]:
+    """`concurrency` clients enchaînent `requests` chargements au total."""
+    timings: list[float] = []
+    remaining = iter(range(requests))
+
+    async def client():
+        for i in remaining:
+            user_id = i % users + 1
+            start = time.perf_counter()
+            async with session_maker() as db:
+                await load(db, user_id)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall
+
+    ordered = sorted(timings)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    print(
+        f"{name:<11} p50={statistics.median(ordered):7.2f}ms  p95={pct(0.95):7.2f}ms  "
+        f"p99={pct(0.99):7.2f}ms  throughput={len(ordered) / wall:7.1f} req/s"
+    )
+    return ordered
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{Path(tmp) / 'dashboard.db'}",
+            poolclass=AsyncAdaptedQueuePool, pool_size=args.pool_size, max_overflow=0,
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+        print(f"Peuplement: {args.users} utilisateurs x 30 jours...")
+        await seed(session_maker, args.users, today)
+
+        # Latence réseau simulée (exécutée dans le thread de la connexion aiosqlite)
+        rtt = args.rtt_ms / 1000
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def simulate_rtt(*_):
+            time.sleep(rtt)
+
+        async with session_maker() as db:
+            legacy = await legacy_load(db, 1, today)
+            current = await read_model_load(db, session_maker, 1, today)
+        assert legacy == current, (legacy, current)
+
+        print(f"RTT simulé {args.rtt_ms}ms, {args.concurrency} clients, {args.requests} chargements, "
+              f"pool {args.pool_size}")
+        await run_load(
+            "legacy", lambda db, uid: legacy_load(db, uid, today),
+            session_maker, args.users, args.requests, args.concurrency,
+        )
+        await run_load(
+            "read_model", lambda db, uid: read_model_load(db, session_maker, uid, today),
+            session_maker, args.users, args.requests, args.concurrency,
+        )
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du chargement du dashboard")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="Latence simulée par requête SQL")
+    parser.add_argument("--pool-size", type=int, default=40, help="Connexions du pool")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
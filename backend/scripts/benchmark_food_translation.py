@@ -0,0 +1,92 @@
+"""
+Benchmark de translate_food_to_english: automate compilé vs ancien parcours linéaire.
+
+Rejoue toutes les entrées de FOOD_TRANSLATIONS (correspondances exactes) et
+des noms composés (correspondances partielles) pour chaque langue, vérifie
+que les correspondances exactes sont identiques et mesure le temps par appel.
+
+Usage:
+    python scripts/benchmark_food_translation.py
+    python scripts/benchmark_food_translation.py --repeat 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.nutrition_database import FOOD_TRANSLATIONS, translate_food_to_english
+
+COMPOUND_SUFFIXES = {
+    "fr": " fait maison",
+    "de": " hausgemacht",
+    "es": " casero",
+    "pt": " caseiro",
+    "zh": "一份",
+    "ar": " منزلي",
+}
+
+
+def legacy_translate(food_name: str, language: str = "en") -> tuple[str, bool]:
+    """Ancienne implémentation (parcours linéaire, premier trouvé dans l'ordre du dict)."""
+    if language == "en":
+        return food_name, False
+    food_lower = food_name.lower().strip()
+    translations = FOOD_TRANSLATIONS.get(language, {})
+    if food_lower in translations:
+        return translations[food_lower], True
+    for source, english in translations.items():
+        if source in food_lower:
+            return english, True
+    return food_name, False
+
+
+def time_per_call(func, queries: list[tuple[str, str]], repeat: int) -> float:
+    """Temps moyen par appel en microsecondes."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query, language in queries:
+            func(query, language)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark traduction des noms d'aliments")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Compilation des automates (hors mesure)
+    for language in FOOD_TRANSLATIONS:
+        translate_food_to_english("", language)
+
+    print(f"{'langue':>6} {'entrées':>8} {'mode':>8} {'ancien (µs)':>12} {'nouveau (µs)':>13} {'gain':>6} {'différences':>12}")
+    for language, translations in FOOD_TRANSLATIONS.items():
+        exact = [(source, language) for source in translations]
+        compound = [(source + COMPOUND_SUFFIXES[language], language) for source in translations]
+
+        for mode, queries in (("exact", exact), ("composé", compound)):
+            diffs = sum(
+                1 for query, lang in queries
+                if legacy_translate(query, lang) != translate_food_to_english(query, lang)
+            )
+            if mode == "exact" and diffs:
+                print(f"✗ {diffs} correspondances exactes différentes pour {language}")
+                sys.exit(1)
+
+            legacy = time_per_call(legacy_translate, queries, args.repeat)
+            compiled = time_per_call(translate_food_to_english, queries, args.repeat)
+            print(
+                f"{language:>6} {len(translations):>8} {mode:>8} {legacy:>12.2f} "
+                f"{compiled:>13.2f} {legacy / compiled:>5.1f}x {diffs:>12}"
+            )
+
+    print()
+    print("Différences en mode composé: l'entrée la plus longue l'emporte désormais")
+    print("(ex: 'poulet grillé ...' -> 'grilled chicken' au lieu de 'chicken').")
+
+
+if __name__ == "__main__":
+    main()
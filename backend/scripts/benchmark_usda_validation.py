@@ -0,0 +1,123 @@
+"""
+Benchmark de la validation USDA par lot (validate_detected_items_batch).
+
+Démarre un faux serveur USDA local (latence configurable) et compare la
+validation séquentielle (concurrence = 1) à la validation concurrente
+bornée, pour un repas de N aliments détectés.
+
+Usage:
+    python scripts/benchmark_usda_validation.py
+    python scripts/benchmark_usda_validation.py --items 8 --latency 300 --concurrency 6
+    python scripts/benchmark_usda_validation.py --slow-item --timeout 1.0
+
+Objectif: temps total ~ latence de l'aliment le plus lent, pas la somme.
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import uvicorn
+from fastapi import FastAPI
+
+from app.config import get_settings
+from app.core.http_pool import close_http_clients
+from app.services.nutrition_database import USDANutritionService, validate_detected_items_batch
+from app.services.usda_cache import get_usda_cache
+
+SLOW_FOOD = "slow food"
+
+
+def create_stub_app(latency_s: float) -> FastAPI:
+    """Faux endpoint /foods/search au format USDA FoodData Central."""
+    app = FastAPI()
+
+    @app.get("/foods/search")
+    async def search(query: str, pageSize: int = 1, api_key: str = ""):
+        await asyncio.sleep(latency_s * (10 if query == SLOW_FOOD else 1))
+        return {
+            "foods": [
+                {
+                    "fdcId": 1,
+                    "description": query.title(),
+                    "foodNutrients": [
+                        {"nutrientName": "Energy", "value": 150},
+                        {"nutrientName": "Protein", "value": 10},
+                        {"nutrientName": "Carbohydrate, by difference", "value": 20},
+                        {"nutrientName": "Total lipid (fat)", "value": 5},
+                    ],
+                }
+            ][:pageSize]
+        }
+
+    return app
+
+
+def free_port() -> int:
+    """Trouve un port TCP libre en local."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_batch(items: list[dict], concurrency: int, timeout: float) -> tuple[float, list[dict]]:
+    """Exécute une validation par lot (cache USDA vidé) et retourne (durée en s, résultats)."""
+    await get_usda_cache().clear()
+    start = time.perf_counter()
+    results = await validate_detected_items_batch(
+        items, language="en", max_concurrency=concurrency, item_timeout=timeout
+    )
+    return time.perf_counter() - start, results
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(create_stub_app(args.latency / 1000), port=port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    # Pointer le service USDA vers le faux serveur
+    get_settings().USDA_API_KEY = get_settings().USDA_API_KEY or "benchmark"
+    USDANutritionService.BASE_URL = f"http://127.0.0.1:{port}"
+
+    items = [{"name": f"food {i}", "quantity": "100", "unit": "g"} for i in range(args.items)]
+    if args.slow_item:
+        items[-1]["name"] = SLOW_FOOD
+
+    try:
+        # Préchauffage du pool de connexions
+        await run_batch(items[:1], 1, args.timeout)
+
+        print(f"{args.items} aliments, latence USDA {args.latency:.0f}ms, timeout {args.timeout}s")
+        print(f"{'concurrence':>12} {'total (ms)':>12} {'vérifiés':>10}")
+        for concurrency in (1, args.concurrency):
+            elapsed, results = await run_batch(items, concurrency, args.timeout)
+            verified = sum(1 for r in results if r["source"] == "usda_verified")
+            print(f"{concurrency:>12} {elapsed * 1000:>12.0f} {verified:>7}/{len(results)}")
+    finally:
+        await close_http_clients()
+        server.should_exit = True
+        await server_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validation USDA par lot")
+    parser.add_argument("--items", type=int, default=6, help="Aliments détectés par photo")
+    parser.add_argument("--latency", type=float, default=250.0, help="Latence USDA simulée (ms)")
+    parser.add_argument("--concurrency", type=int, default=get_settings().USDA_BATCH_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=get_settings().USDA_ITEM_TIMEOUT)
+    parser.add_argument("--slow-item", action="store_true", help="Un aliment 10x plus lent")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ IMPORTANT: Ce script doit être exécuté UNE SEULE FOIS pour pré-calculer
 les embeddings de tous les aliments USDA et les mettre en cache.
 
 Durée estimée: ~30-60 minutes pour 300,000 aliments
-Taille du cache: ~500MB-1GB
+Taille de l'index: ~900MB (float32) ou ~450MB (float16), ouvert en memory-map
 """
 
 import asyncio
@@ -17,7 +17,8 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.services.nutrition_database import USDANutritionService
-from app.services.food_embeddings import build_usda_embeddings_index, save_embeddings_cache
+from app.services.food_embeddings import build_usda_embeddings_index
+from app.services.embeddings_store import convert_pickle_cache
 
 
 class Colors:
@@ -134,17 +135,17 @@ async def main():
     print(f"{Colors.BOLD}ÉTAPE 3: Sauvegarde du cache...{Colors.END}")
     print()
 
-    cache_path = "usda_embeddings.pkl"
+    index_path = "usda_embeddings_index"
 
     try:
-        save_embeddings_cache(usda_foods_with_embeddings, cache_path)
-        print_success(f"Cache sauvegardé: {cache_path}")
+        convert_pickle_cache(usda_foods_with_embeddings, index_path)
+        print_success(f"Index sauvegardé: {index_path}/")
 
-        # Taille du fichier
-        cache_file = Path(cache_path)
-        if cache_file.exists():
-            size_mb = cache_file.stat().st_size / (1024 * 1024)
-            print_info("Taille du cache:", f"{size_mb:.1f} MB")
+        # Taille de l'index
+        index_dir = Path(index_path)
+        if index_dir.exists():
+            size_mb = sum(f.stat().st_size for f in index_dir.iterdir()) / (1024 * 1024)
+            print_info("Taille de l'index:", f"{size_mb:.1f} MB")
 
     except Exception as e:
         print_error(f"Erreur lors de la sauvegarde: {e}")
@@ -157,7 +158,7 @@ async def main():
     print_success("L'index d'embeddings USDA est prêt!")
     print()
     print(f"{Colors.BOLD}Prochaines étapes:{Colors.END}")
-    print("1. Placer le fichier 'usda_embeddings.pkl' dans le dossier backend/")
+    print("1. Placer le dossier 'usda_embeddings_index/' dans backend/ (ou configurer FOOD_INDEX_PATH)")
     print("2. Le système utilisera automatiquement cet index pour les recherches")
     print("3. Lancer les tests QA: python scripts/test_multilingual_search.py")
     print()
@@ -0,0 +1,74 @@
+"""
+Convertit le cache pickle des embeddings USDA en index colonne memory-mappé.
+
+À exécuter UNE SEULE FOIS après build_usda_embeddings_index.py (ancien format).
+
+    usda_embeddings.pkl  ->  usda_embeddings_index/
+                               manifest.json, embeddings.npy, fdc_ids.npy,
+                               nutrients.npy, names.bin, name_offsets.npy
+                               (+ ivf_centroids.npy, ivf_offsets.npy avec --ivf)
+
+Usage:
+    python scripts/convert_embeddings_cache.py
+    python scripts/convert_embeddings_cache.py --dtype float16 --ivf
+    python scripts/convert_embeddings_cache.py --input old.pkl --output usda_embeddings_index
+"""
+
+import argparse
+import pickle
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.embeddings_store import convert_pickle_cache, load_embeddings_store
+
+
+def directory_size_mb(directory: Path) -> float:
+    """Taille totale d'un répertoire en MB."""
+    return sum(f.stat().st_size for f in directory.iterdir() if f.is_file()) / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversion pickle -> index memory-mappé")
+    parser.add_argument("--input", default="usda_embeddings.pkl", help="Cache pickle existant")
+    parser.add_argument("--output", default="usda_embeddings_index", help="Répertoire de sortie")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--ivf", action="store_true", help="Pré-calculer l'index approximatif IVF")
+    parser.add_argument("--n-lists", type=int, default=0, help="Clusters IVF (0 = auto, ~sqrt(N))")
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"✗ Cache introuvable: {input_path}")
+        sys.exit(1)
+
+    print(f"Lecture de {input_path} ({input_path.stat().st_size / (1024 * 1024):.1f} MB)...")
+    with open(input_path, "rb") as f:
+        usda_foods = pickle.load(f)
+    print(f"  {len(usda_foods)} aliments")
+
+    start = time.perf_counter()
+    output = convert_pickle_cache(
+        usda_foods,
+        args.output,
+        dtype=args.dtype,
+        n_lists=args.n_lists if args.ivf else None,
+    )
+    print(f"✓ Index écrit dans {output} en {time.perf_counter() - start:.1f}s ({directory_size_mb(output):.1f} MB)")
+
+    # Vérification: réouverture en memory-map
+    start = time.perf_counter()
+    index = load_embeddings_store(output)
+    if index is None:
+        print("✗ Impossible de relire l'index")
+        sys.exit(1)
+    print(f"✓ Réouverture en {(time.perf_counter() - start) * 1000:.1f}ms ({len(index)} aliments, mode {index.mode})")
+    print()
+    print("Configurer FOOD_INDEX_PATH (défaut: usda_embeddings_index) et supprimer l'ancien pickle.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Construit / met à jour le miroir local USDA FoodData Central (SQLite + FTS5).
+
+Sources: exports en masse https://fdc.nal.usda.gov/download-datasets
+    - JSON: FoodData_Central_foundation_food_json_*.json, sr_legacy_food_json_*.json, ...
+    - CSV:  répertoire décompressé contenant food.csv et food_nutrient.csv
+
+Le chargement est incrémental: relancer avec la release du mois suivant
+n'écrit que les fdcIds nouveaux ou modifiés.
+
+Usage:
+    python scripts/load_usda_local.py --json FoodData_Central_sr_legacy_food_json_2018-04.json
+    python scripts/load_usda_local.py --csv FoodData_Central_foundation_food_csv_2024-10-31 --release 2024-10
+    python scripts/load_usda_local.py --json a.json --json b.json --db data/usda_foods.db
+
+Puis configurer USDA_BACKEND=local (et USDA_LOCAL_DB_PATH si besoin).
+"""
+
+import argparse
+import sys
+import time
+from itertools import chain
+from pathlib import Path
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import get_settings
+from app.services.usda_local import USDALocalStore, iter_csv_foods, iter_json_foods
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chargement du miroir local USDA")
+    parser.add_argument("--json", action="append", default=[], help="Export JSON USDA (répétable)")
+    parser.add_argument("--csv", action="append", default=[], help="Répertoire CSV USDA (répétable)")
+    parser.add_argument("--db", default=get_settings().USDA_LOCAL_DB_PATH, help="Base SQLite cible")
+    parser.add_argument("--release", default=None, help="Nom de la release (ex: 2024-10)")
+    args = parser.parse_args()
+
+    if not args.json and not args.csv:
+        parser.error("au moins un --json ou --csv est requis")
+
+    sources = [*args.json, *args.csv]
+    missing = [source for source in sources if not Path(source).exists()]
+    if missing:
+        print(f"✗ Introuvable: {', '.join(missing)}")
+        sys.exit(1)
+
+    foods = chain(
+        *(iter_json_foods(path) for path in args.json),
+        *(iter_csv_foods(path) for path in args.csv),
+    )
+
+    start = time.perf_counter()
+    with USDALocalStore(args.db, read_only=False) as store:
+        stats = store.upsert_foods(foods, release=args.release)
+        store.optimize()
+        total = store.count()
+
+    print(f"✓ {args.db} mis à jour en {time.perf_counter() - start:.1f}s")
+    print(
+        f"  {stats.inserted} ajoutés, {stats.updated} modifiés, "
+        f"{stats.unchanged} inchangés, {stats.skipped} doublons ignorés"
+    )
+    print(f"  {total} aliments au total")
+
+
+if __name__ == "__main__":
+    main()
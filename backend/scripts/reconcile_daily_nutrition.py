@@ -0,0 +1,53 @@
+"""
+Vérifie (et corrige) les résumés DailyNutrition à partir de food_logs.
+
+Les résumés sont maintenus par deltas à chaque écriture; ce script recalcule
+les totaux pour une période et signale les écarts. L'API lance la même
+vérification périodiquement (DAILY_NUTRITION_RECONCILE_INTERVAL).
+
+Usage:
+    python scripts/reconcile_daily_nutrition.py                 # 7 derniers jours, corrige
+    python scripts/reconcile_daily_nutrition.py --days 90 --dry-run
+    python scripts/reconcile_daily_nutrition.py --user 42 --days 365
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import get_settings
+from app.database import async_engine, async_session_maker
+from app.services.daily_nutrition import reconcile_daily_nutrition
+
+
+async def run(days: int, user_id: int | None, fix: bool) -> int:
+    since = datetime.utcnow().date() - timedelta(days=days)
+    async with async_session_maker() as db:
+        drifts = await reconcile_daily_nutrition(db, since=since, user_id=user_id, fix=fix)
+    await async_engine.dispose()
+
+    for drift in drifts:
+        print(f"user={drift.user_id} day={drift.day} stored={drift.stored} expected={drift.expected}")
+    action = "corrigés" if fix else "détectés (non corrigés)"
+    print(f"{len(drifts)} écarts {action} depuis le {since}")
+    return len(drifts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réconciliation des résumés DailyNutrition")
+    parser.add_argument("--days", type=int, default=get_settings().DAILY_NUTRITION_RECONCILE_DAYS)
+    parser.add_argument("--user", type=int, default=None, help="Limiter à un utilisateur")
+    parser.add_argument("--dry-run", action="store_true", help="Signaler sans corriger")
+    args = parser.parse_args()
+
+    drifts = asyncio.run(run(args.days, args.user, fix=not args.dry_run))
+    sys.exit(1 if drifts and args.dry_run else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Tests de la maintenance incrémentale des résumés DailyNutrition."""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models.food_log import DailyNutrition, FoodItem, FoodLog
+from app.models.user import User
+from app.services.daily_nutrition import (
+    NutritionDelta,
+    apply_daily_delta,
+    apply_log_change,
+    find_daily_drifts,
+    fix_daily_drifts,
+    reconcile_daily_nutrition,
+)
+from app.services import daily_nutrition as daily_nutrition_module
+
+DAY = date(2026, 3, 2)
+
+
+async def _session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'daily.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, FoodLog.__table__, FoodItem.__table__, DailyNutrition.__table__],
+        )
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def _daily(db, day: date = DAY) -> DailyNutrition | None:
+    result = await db.execute(
+        select(DailyNutrition)
+        .where(DailyNutrition.date == datetime.combine(day, datetime.min.time()))
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+class TestNutritionDelta:
+    """Tests des opérations sur les deltas."""
+
+    def test_from_log_and_negation(self):
+        log = FoodLog(total_calories=500, total_protein=30.0, total_carbs=None, total_fat=10.0)
+        delta = NutritionDelta.from_log(log)
+
+        assert delta == NutritionDelta(calories=500, protein=30.0, fat=10.0, meals=1)
+        assert -delta == NutritionDelta(calories=-500, protein=-30.0, fat=-10.0, meals=-1)
+
+    def test_difference(self):
+        before = NutritionDelta(calories=500, protein=30.0, meals=1)
+        after = NutritionDelta(calories=650, protein=30.0, meals=1)
+
+        assert after - before == NutritionDelta(calories=150)
+        assert (before - before).is_zero
+
+
+class TestApplyDailyDelta:
+    """Tests de l'upsert atomique."""
+
+    @pytest.mark.asyncio
+    async def test_creates_then_increments(self, tmp_path):
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            await apply_daily_delta(db, 1, DAY, NutritionDelta(calories=500, protein=20.0, meals=1))
+            await apply_daily_delta(db, 1, DAY, NutritionDelta(calories=300, protein=10.0, meals=1))
+            await apply_daily_delta(db, 1, DAY, NutritionDelta(calories=-300, protein=-10.0, meals=-1))
+            await db.commit()
+
+            daily = await _daily(db)
+            assert daily.total_calories == 500
+            assert daily.total_protein == 20.0
+            assert daily.meals_count == 1
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_one_statement_per_write(self, tmp_path):
+        engine, session_maker = await _session_maker(tmp_path)
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        async with session_maker() as db:
+            await apply_daily_delta(db, 1, DAY, NutritionDelta(calories=100, meals=1))
+            await apply_daily_delta(db, 1, DAY, NutritionDelta(calories=100, meals=1))
+
+        assert len(statements) == 2
+        assert all("ON CONFLICT" in sql for sql in statements)
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_zero_delta_is_skipped(self, tmp_path):
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            await apply_daily_delta(db, 1, DAY, NutritionDelta())
+            assert await _daily(db) is None
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_rolled_back_with_the_transaction(self, tmp_path):
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            await apply_daily_delta(db, 1, DAY, NutritionDelta(calories=100, meals=1))
+            await db.rollback()
+            assert await _daily(db) is None
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_log_moved_to_another_day(self, tmp_path):
+        engine, session_maker = await _session_maker(tmp_path)
+        other_day = date(2026, 3, 3)
+        meal = NutritionDelta(calories=400, meals=1)
+        async with session_maker() as db:
+            await apply_log_change(db, 1, None, (DAY, meal))
+            await apply_log_change(db, 1, (DAY, meal), (other_day, meal))
+            await db.commit()
+
+            assert (await _daily(db)).total_calories == 0
+            assert (await _daily(db)).meals_count == 0
+            assert (await _daily(db, other_day)).total_calories == 400
+        await engine.dispose()
+
+
+class TestReconciliation:
+    """Tests de la réconciliation avec food_logs."""
+
+    @pytest.mark.asyncio
+    async def test_detects_and_fixes_drift(self, tmp_path):
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            for calories in (500, 250):
+                db.add(FoodLog(
+                    user_id=1, meal_type="lunch", meal_date=datetime(2026, 3, 2, 12, 0),
+                    total_calories=calories, total_protein=10.0,
+                ))
+            # Résumé faux (dérive) et résumé orphelin sans repas
+            db.add(DailyNutrition(user_id=1, date=datetime(2026, 3, 2), total_calories=900, meals_count=3))
+            db.add(DailyNutrition(user_id=1, date=datetime(2026, 3, 4), total_calories=120, meals_count=1))
+            await db.commit()
+
+            drifts = await reconcile_daily_nutrition(db, since=date(2026, 3, 1), fix=False)
+            assert {d.day for d in drifts} == {date(2026, 3, 2), date(2026, 3, 4)}
+
+            await reconcile_daily_nutrition(db, since=date(2026, 3, 1))
+            daily = await _daily(db)
+            assert daily.total_calories == 750
+            assert daily.total_protein == 20.0
+            assert daily.meals_count == 2
+            assert (await _daily(db, date(2026, 3, 4))).total_calories == 0
+
+            assert await reconcile_daily_nutrition(db, since=date(2026, 3, 1)) == []
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_missing_summary_is_created(self, tmp_path):
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            db.add(FoodLog(user_id=2, meal_type="dinner", meal_date=datetime(2026, 3, 2, 20, 0), total_calories=600))
+            await db.commit()
+
+            drifts = await reconcile_daily_nutrition(db, since=date(2026, 3, 1), user_id=2)
+
+            assert len(drifts) == 1
+            assert (await _daily(db)).meals_count == 1
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_fix_keeps_meal_committed_after_detection(self, tmp_path):
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            db.add(FoodLog(user_id=1, meal_type="lunch", meal_date=datetime(2026, 3, 2, 12, 0), total_calories=500))
+            db.add(DailyNutrition(user_id=1, date=datetime(2026, 3, 2), total_calories=900, meals_count=3))
+            await db.commit()
+
+        async with session_maker() as db:
+            drifts = await find_daily_drifts(db, since=date(2026, 3, 1))
+            await db.rollback()
+
+            # Un repas est ajouté (avec son delta) pendant la réconciliation
+            async with session_maker() as other:
+                log = FoodLog(user_id=1, meal_type="dinner", meal_date=datetime(2026, 3, 2, 20, 0), total_calories=300)
+                other.add(log)
+                await apply_daily_delta(other, 1, DAY, NutritionDelta.from_log(log))
+                await other.commit()
+
+            await fix_daily_drifts(db, drifts)
+            await db.commit()
+
+            daily = await _daily(db)
+            assert daily.total_calories == 800
+            assert daily.meals_count == 2
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_skipped_while_another_worker_holds_the_lock(self, tmp_path, monkeypatch):
+        engine, session_maker = await _session_maker(tmp_path)
+
+        async def locked(db):
+            return False
+
+        monkeypatch.setattr(daily_nutrition_module, "_acquire_reconcile_lock", locked)
+        async with session_maker() as db:
+            db.add(DailyNutrition(user_id=1, date=datetime(2026, 3, 2), total_calories=900, meals_count=3))
+            await db.commit()
+
+            assert await reconcile_daily_nutrition(db, since=date(2026, 3, 1)) == []
+            # La détection seule (dry-run) ne prend pas le verrou
+            assert len(await reconcile_daily_nutrition(db, since=date(2026, 3, 1), fix=False)) == 1
+            assert (await _daily(db)).total_calories == 900
+        await engine.dispose()
@@ -0,0 +1,170 @@
+"""Tests du cache stale-while-revalidate du coach et de la personnalisation."""
+import asyncio
+import time
+
+import pytest
+
+from app.api.v1 import dashboard
+from app.core.cache import Cache
+from app.models.profile import Profile
+from app.models.user import User
+from app.schemas.dashboard import QuickStats
+from app.services.dashboard_insights import DashboardInsightsCache, insights_digest
+
+
+def _quick_stats(**overrides) -> QuickStats:
+    values = dict(
+        calories_today=1200, calories_target=2000, calories_percent=60.0,
+        protein_today=50.0, protein_target=100, protein_percent=50.0,
+        water_today=1000, water_percent=50.0,
+        activity_today=10, activity_percent=33.3,
+        meals_today=2, streak_days=3,
+    )
+    values.update(overrides)
+    return QuickStats(**values)
+
+
+def _profile(**overrides) -> Profile:
+    values = dict(user_id=1, age=30, gender="female", goal="maintain", daily_calories=2000)
+    values.update(overrides)
+    return Profile(**values)
+
+
+def _coach(summary: str) -> dict:
+    return {
+        "greeting": "Bonjour", "summary": summary, "advices": [],
+        "motivation_quote": None, "confidence": 0.9,
+    }
+
+
+def _computer(summary: str, calls: list, delay: float = 0.0, degraded: bool = False):
+    async def compute():
+        calls.append(summary)
+        await asyncio.sleep(delay)
+        return _coach(summary), None, degraded
+    return compute
+
+
+class TestDigest:
+    """Tests de l'empreinte des entrées."""
+
+    def test_changes_with_stats_profile_and_time_of_day(self):
+        base = insights_digest(_quick_stats(), _profile(), "fr", "morning")
+
+        assert base == insights_digest(_quick_stats(), _profile(), "fr", "morning")
+        assert base != insights_digest(_quick_stats(meals_today=3), _profile(), "fr", "morning")
+        assert base != insights_digest(_quick_stats(), _profile(goal="lose_weight"), "fr", "morning")
+        assert base != insights_digest(_quick_stats(), _profile(), "fr", "evening")
+        assert base != insights_digest(_quick_stats(), _profile(), "en", "morning")
+
+
+class TestDashboardInsightsCache:
+    """Tests du cycle absent -> frais -> périmé."""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_refresh_then_fresh(self):
+        cache = DashboardInsightsCache(ttl=60, shared=Cache())
+        calls = []
+
+        assert await cache.get(1, "d1") is None
+        await cache.schedule_refresh(1, "d1", _computer("v1", calls))
+
+        cached = await cache.get(1, "d1")
+        assert cached.fresh
+        assert cached.coach["summary"] == "v1"
+        assert cache.get_stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_new_digest_serves_stale_value(self):
+        cache = DashboardInsightsCache(ttl=60, shared=Cache())
+        await cache.set(1, "d1", _coach("v1"), None)
+
+        cached = await cache.get(1, "d2")
+
+        assert not cached.fresh
+        assert cached.coach["summary"] == "v1"
+
+    @pytest.mark.asyncio
+    async def test_invalidate_keeps_value_but_marks_stale(self):
+        cache = DashboardInsightsCache(ttl=60, shared=Cache())
+        await cache.set(1, "d1", _coach("v1"), None)
+
+        await cache.invalidate(1)
+        cached = await cache.get(1, "d1")
+
+        assert not cached.fresh
+        assert cached.coach["summary"] == "v1"
+
+    @pytest.mark.asyncio
+    async def test_degraded_result_expires_sooner(self):
+        cache = DashboardInsightsCache(ttl=60, degraded_ttl=1, shared=Cache())
+        await cache.set(1, "d1", _coach("fallback"), None, degraded=True)
+
+        entry = await cache.shared.get("dashboard_insights:1")
+        assert entry["fresh_until"] - time.time() <= 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_are_deduplicated(self):
+        cache = DashboardInsightsCache(ttl=60, shared=Cache())
+        calls = []
+
+        first = cache.schedule_refresh(1, "d1", _computer("v1", calls, delay=0.05))
+        second = cache.schedule_refresh(1, "d1", _computer("v2", calls, delay=0.05))
+        other_user = cache.schedule_refresh(2, "d1", _computer("u2", calls, delay=0.05))
+        await cache.wait_idle()
+
+        assert first is not None and other_user is not None
+        assert second is None
+        assert calls == ["v1", "u2"]
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_previous_value(self):
+        cache = DashboardInsightsCache(ttl=60, shared=Cache())
+        await cache.set(1, "d1", _coach("v1"), None)
+
+        async def failing():
+            raise RuntimeError("HF down")
+
+        await cache.schedule_refresh(1, "d2", failing)
+
+        assert (await cache.get(1, "d2")).coach["summary"] == "v1"
+
+
+class TestGetDashboardInsights:
+    """Le dashboard ne doit jamais attendre le LLM."""
+
+    @pytest.mark.asyncio
+    async def test_served_without_waiting_for_agents(self, monkeypatch):
+        cache = DashboardInsightsCache(ttl=60, shared=Cache())
+        monkeypatch.setattr(dashboard, "get_dashboard_insights_cache", lambda: cache)
+        calls = []
+
+        async def slow_compute(user, quick_stats):
+            return await _computer(f"meals={quick_stats.meals_today}", calls, delay=0.5)()
+
+        monkeypatch.setattr(dashboard, "compute_dashboard_insights", slow_compute)
+        user = User(id=1, email="ana@example.com", name="Ana", preferred_language="fr")
+        profile = _profile()
+
+        # Premier chargement: fallback immédiat, recalcul en fond
+        start = time.perf_counter()
+        coach, personalization = await dashboard.get_dashboard_insights(user, profile, _quick_stats())
+        assert time.perf_counter() - start < 0.2
+        assert coach.confidence == 0.5
+        assert personalization is None
+        await cache.wait_idle()
+
+        # Chargement suivant: résultat de l'agent
+        coach, _ = await dashboard.get_dashboard_insights(user, profile, _quick_stats())
+        assert coach.summary == "meals=2"
+
+        # Nouveau repas: ancienne valeur servie immédiatement, recalcul en fond
+        start = time.perf_counter()
+        coach, _ = await dashboard.get_dashboard_insights(user, profile, _quick_stats(meals_today=3))
+        assert time.perf_counter() - start < 0.2
+        assert coach.summary == "meals=2"
+        await cache.wait_idle()
+
+        coach, _ = await dashboard.get_dashboard_insights(user, profile, _quick_stats(meals_today=3))
+        assert coach.summary == "meals=3"
+        assert calls == ["meals=2", "meals=3"]
@@ -0,0 +1,113 @@
+"""Tests du modèle de lecture du dashboard."""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models.activity import ActivityLog
+from app.models.food_log import DailyNutrition
+from app.models.gamification import Achievement, Notification, Streak, UserStats
+from app.models.profile import Profile
+from app.models.user import User
+from app.services.dashboard_read_model import load_dashboard_snapshot
+
+DAY = date(2026, 3, 2)
+TABLES = [
+    User.__table__, Profile.__table__, UserStats.__table__, DailyNutrition.__table__,
+    ActivityLog.__table__, Achievement.__table__, Streak.__table__, Notification.__table__,
+]
+
+
+async def _engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dashboard.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def _seed(session_maker):
+    async with session_maker() as db:
+        db.add(User(id=1, email="ana@example.com", hashed_password="x", name="Ana"))
+        db.add(User(id=2, email="bob@example.com", hashed_password="x", name="Bob"))
+        db.add(Profile(
+            user_id=1, age=30, gender="female", height_cm=165, weight_kg=60,
+            activity_level="moderate", goal="maintain", daily_calories=1900,
+        ))
+        db.add(UserStats(user_id=1, total_points=120, level=2))
+        db.add(DailyNutrition(
+            user_id=1, date=datetime(2026, 3, 2), total_calories=1450, total_protein=80.0,
+            total_carbs=150.0, total_fat=50.0, meals_count=3, water_ml=1250,
+        ))
+        # Autre jour: ignoré
+        db.add(DailyNutrition(user_id=1, date=datetime(2026, 3, 1), total_calories=999, meals_count=9))
+        db.add(ActivityLog(user_id=1, activity_type="running", duration_minutes=30, calories_burned=300,
+                           activity_date=datetime(2026, 3, 2, 7, 0)))
+        db.add(ActivityLog(user_id=1, activity_type="walking", duration_minutes=20, calories_burned=80,
+                           activity_date=datetime(2026, 3, 2, 18, 0)))
+        db.add(ActivityLog(user_id=1, activity_type="walking", duration_minutes=99, calories_burned=99,
+                           activity_date=datetime(2026, 3, 1, 18, 0)))
+        db.add(Streak(user_id=1, streak_type="logging", current_count=4))
+        db.add(Streak(user_id=1, streak_type="activity", current_count=0))
+        for i in range(7):
+            db.add(Achievement(user_id=1, achievement_type=f"a{i}", name=f"A{i}", icon="*",
+                               unlocked_at=datetime(2026, 2, 1 + i)))
+        for i in range(12):
+            db.add(Notification(user_id=1, notification_type="tip", title=f"N{i}", read=i % 2 == 0,
+                                created_at=datetime(2026, 2, 1 + i)))
+        await db.commit()
+
+
+class TestLoadDashboardSnapshot:
+    """Tests du chargement groupé."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_values(self, tmp_path):
+        engine, session_maker = await _engine(tmp_path)
+        await _seed(session_maker)
+
+        async with session_maker() as db:
+            snapshot = await load_dashboard_snapshot(db, session_maker, 1, DAY)
+
+        assert snapshot.stats.total_points == 120
+        assert snapshot.profile.daily_calories == 1900
+        assert (snapshot.calories, snapshot.protein, snapshot.meals_count) == (1450, 80.0, 3)
+        assert snapshot.water_ml == 1250
+        assert (snapshot.activity_minutes, snapshot.calories_burned) == (50, 380)
+        assert snapshot.logging_streak_days == 4
+        assert [s.streak_type for s in snapshot.active_streaks] == ["logging"]
+        assert [a.name for a in snapshot.recent_achievements] == ["A6", "A5", "A4", "A3", "A2"]
+        assert len(snapshot.notifications) == 10
+        assert snapshot.notifications[0].title == "N11"
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_new_user_defaults(self, tmp_path):
+        engine, session_maker = await _engine(tmp_path)
+        await _seed(session_maker)
+
+        async with session_maker() as db:
+            snapshot = await load_dashboard_snapshot(db, session_maker, 2, DAY)
+
+        assert snapshot.stats is None
+        assert snapshot.profile is None
+        assert (snapshot.calories, snapshot.water_ml, snapshot.activity_minutes) == (0, 0, 0)
+        assert snapshot.logging_streak_days == 0
+        assert snapshot.notifications == []
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_single_query_on_request_session(self, tmp_path):
+        engine, session_maker = await _engine(tmp_path)
+        await _seed(session_maker)
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        async with session_maker() as db:
+            await load_dashboard_snapshot(db, session_maker, 1, DAY)
+
+        # 1 requête principale + 3 listes en parallèle (au lieu de 9 séquentielles)
+        assert len(statements) == 4
+        assert sum("daily_nutrition" in sql and "activity_logs" in sql for sql in statements) == 1
+        await engine.dispose()
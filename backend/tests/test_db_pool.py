@@ -0,0 +1,115 @@
+"""Tests for the database connection pool configuration."""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core import db_pool
+from app.core.db_pool import (
+    MeteredAsyncQueuePool,
+    build_engine_kwargs,
+    get_db_pool_metrics,
+    install_pool_events,
+)
+
+PG_URL = "postgresql+asyncpg://user:pass@db:5432/app"
+
+
+def _settings(**overrides):
+    values = dict(
+        DEBUG=False,
+        DB_POOL_MODE="queue",
+        DB_POOL_SIZE=5,
+        DB_POOL_MAX_OVERFLOW=10,
+        DB_POOL_TIMEOUT=10.0,
+        DB_POOL_RECYCLE=1800,
+        DB_POOL_PRE_PING=True,
+        DB_POOL_IDLE_TIMEOUT=240.0,
+        DB_PGBOUNCER=False,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class TestBuildEngineKwargs:
+    """Test engine options per database and mode."""
+
+    def test_postgres_queue_pool(self):
+        kwargs = build_engine_kwargs(PG_URL, _settings())
+
+        assert kwargs["poolclass"] is MeteredAsyncQueuePool
+        assert kwargs["pool_size"] == 5
+        assert kwargs["max_overflow"] == 10
+        assert kwargs["pool_pre_ping"] is True
+        assert kwargs["pool_recycle"] == 1800
+        assert kwargs["connect_args"] == {"ssl": False}
+
+    def test_null_pool_mode(self):
+        kwargs = build_engine_kwargs(PG_URL, _settings(DB_POOL_MODE="null"))
+
+        assert kwargs["poolclass"] is NullPool
+        assert "pool_size" not in kwargs
+
+    def test_pgbouncer_disables_statement_cache(self):
+        connect_args = build_engine_kwargs(PG_URL, _settings(DB_PGBOUNCER=True))["connect_args"]
+
+        assert connect_args["statement_cache_size"] == 0
+        assert connect_args["prepared_statement_cache_size"] == 0
+        name_func = connect_args["prepared_statement_name_func"]
+        assert name_func() != name_func()
+
+    def test_sqlite_has_no_pool_options(self):
+        kwargs = build_engine_kwargs("sqlite+aiosqlite:///./test.db", _settings())
+
+        assert kwargs["connect_args"] == {"check_same_thread": False}
+        assert "poolclass" not in kwargs
+
+
+class TestMeteredPool:
+    """Test acquire metrics and idle discards (on aiosqlite)."""
+
+    @staticmethod
+    def _engine(tmp_path):
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=MeteredAsyncQueuePool,
+            pool_size=2,
+            max_overflow=0,
+        )
+        install_pool_events(engine, idle_timeout=60)
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_acquire_latency_recorded(self, tmp_path):
+        engine = self._engine(tmp_path)
+        for _ in range(3):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        metrics = get_db_pool_metrics(engine)
+
+        assert metrics["pool"] == "MeteredAsyncQueuePool"
+        assert metrics["acquires"] == 3
+        assert metrics["connects"] == 1  # connection reused
+        assert metrics["max_acquire_ms"] >= metrics["p50_acquire_ms"] >= 0
+        assert metrics["checked_out"] == 0
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_idle_connection_is_replaced(self, tmp_path, monkeypatch):
+        engine = self._engine(tmp_path)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+        now = db_pool.time.monotonic()
+        monkeypatch.setattr(db_pool.time, "monotonic", lambda: now + 120)
+
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+
+        metrics = get_db_pool_metrics(engine)
+        assert metrics["idle_discards"] == 1
+        assert metrics["connects"] == 2
+        await engine.dispose()
@@ -0,0 +1,125 @@
+"""Tests pour le format de stockage memory-mappé des embeddings USDA."""
+import numpy as np
+import pytest
+
+from app.services.embeddings_store import (
+    FoodMetadataTable,
+    convert_pickle_cache,
+    extract_nutrients,
+    load_embeddings_store,
+    save_embeddings_store,
+)
+from app.services.food_index import FoodEmbeddingIndex
+
+
+def _usda_foods(n: int = 200, dim: int = 16, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "fdcId": 1000 + i,
+            "description": f"Aliment {i} é",
+            "foodNutrients": [
+                {"nutrientName": "Energy", "value": 100 + i, "unitName": "KCAL"},
+                {"nutrientName": "Protein", "value": 10.5},
+                {"nutrientName": "Total lipid (fat)", "value": 3.0},
+            ],
+            "embedding": rng.standard_normal(dim).tolist(),
+        }
+        for i in range(n)
+    ]
+
+
+class TestExtractNutrients:
+    """Tests pour l'extraction des nutriments."""
+
+    def test_extracts_known_nutrients(self):
+        food = _usda_foods(1)[0]
+        assert extract_nutrients(food) == [100.0, 10.5, 0.0, 3.0, 0.0]
+
+    def test_missing_nutrients(self):
+        assert extract_nutrients({}) == [0.0] * 5
+
+
+class TestFoodMetadataTable:
+    """Tests pour la table de métadonnées."""
+
+    def test_item_has_usda_format(self):
+        table = FoodMetadataTable.from_foods(_usda_foods(3))
+        food = table[2]
+        assert food["fdcId"] == 1002
+        assert food["description"] == "Aliment 2 é"
+        energy = next(n for n in food["foodNutrients"] if n["nutrientName"] == "Energy")
+        assert energy["value"] == 102.0
+
+    def test_negative_index_and_bounds(self):
+        table = FoodMetadataTable.from_foods(_usda_foods(3))
+        assert table[-1]["fdcId"] == 1002
+        with pytest.raises(IndexError):
+            table[3]
+
+    def test_take_reorders(self):
+        table = FoodMetadataTable.from_foods(_usda_foods(5))
+        reordered = table.take(np.array([4, 0, 2]))
+        assert [food["fdcId"] for food in reordered] == [1004, 1000, 1002]
+        assert reordered.name(0) == "Aliment 4 é"
+
+
+class TestEmbeddingsStore:
+    """Tests pour la sauvegarde et le chargement memory-mappé."""
+
+    def test_round_trip_is_memory_mapped(self, tmp_path):
+        foods = _usda_foods()
+        directory = convert_pickle_cache(foods, tmp_path / "index")
+
+        index = load_embeddings_store(directory)
+
+        assert index is not None
+        assert len(index) == len(foods)
+        assert isinstance(index.embeddings, np.memmap)
+        assert index.mode == "exact"
+
+    def test_search_matches_in_memory_index(self, tmp_path):
+        foods = _usda_foods()
+        reference = FoodEmbeddingIndex.from_foods(foods)
+        index = load_embeddings_store(convert_pickle_cache(foods, tmp_path / "index"))
+        query = np.random.default_rng(3).standard_normal(16)
+
+        expected = [food["fdcId"] for food, _ in reference.search(query, top_k=5)]
+        actual = [food["fdcId"] for food, _ in index.search(query, top_k=5)]
+
+        assert actual == expected
+
+    def test_float16_store(self, tmp_path):
+        foods = _usda_foods()
+        index = load_embeddings_store(convert_pickle_cache(foods, tmp_path / "index", dtype="float16"))
+
+        assert index.embeddings.dtype == np.float16
+        results = index.search(np.array(foods[7]["embedding"]), top_k=1)
+        assert results[0][0]["fdcId"] == 1007
+        assert results[0][1] == pytest.approx(1.0, abs=1e-2)
+
+    def test_ivf_is_persisted(self, tmp_path):
+        foods = _usda_foods()
+        index = load_embeddings_store(convert_pickle_cache(foods, tmp_path / "index", n_lists=8))
+
+        assert index.mode == "ivf"
+        assert index.n_lists == 8
+        for i in (0, 50, 199):
+            results = index.search(np.array(foods[i]["embedding"]), top_k=1, n_probe=2)
+            assert results[0][0]["fdcId"] == 1000 + i
+
+    def test_overwrite_existing_store(self, tmp_path):
+        directory = tmp_path / "index"
+        convert_pickle_cache(_usda_foods(10), directory)
+        convert_pickle_cache(_usda_foods(20), directory)
+
+        assert len(load_embeddings_store(directory)) == 20
+        assert not (tmp_path / "index.tmp").exists()
+
+    def test_missing_store_returns_none(self, tmp_path):
+        assert load_embeddings_store(tmp_path / "absent") is None
+
+    def test_invalid_dtype(self, tmp_path):
+        index = FoodEmbeddingIndex.from_foods(_usda_foods(2))
+        with pytest.raises(ValueError):
+            save_embeddings_store(index, tmp_path / "index", dtype="int8")
@@ -0,0 +1,165 @@
+"""Tests pour l'index vectoriel des aliments USDA."""
+import numpy as np
+import pytest
+
+from app.services import food_embeddings
+from app.services.food_index import FoodEmbeddingIndex, normalize_rows, INDEX_MODE_EXACT, INDEX_MODE_IVF
+
+
+def _random_foods(n: int = 500, dim: int = 32, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        {"fdcId": i, "description": f"food {i}", "embedding": rng.standard_normal(dim).tolist()}
+        for i in range(n)
+    ]
+
+
+def _brute_force(foods: list[dict], query: np.ndarray, k: int) -> list[int]:
+    """Référence: cosinus calculé aliment par aliment (ancienne implémentation)."""
+    scores = []
+    for food in foods:
+        emb = np.array(food["embedding"])
+        scores.append(float(emb @ query / (np.linalg.norm(emb) * np.linalg.norm(query))))
+    order = np.argsort(scores)[::-1][:k]
+    return [foods[i]["fdcId"] for i in order]
+
+
+class TestNormalizeRows:
+    """Tests pour la normalisation."""
+
+    def test_rows_have_unit_norm(self):
+        matrix = np.array([[3.0, 4.0], [1.0, 0.0]])
+        normalized = normalize_rows(matrix)
+        assert normalized.dtype == np.float32
+        assert np.allclose(np.linalg.norm(normalized, axis=1), 1.0)
+
+    def test_zero_row_stays_zero(self):
+        normalized = normalize_rows(np.array([[0.0, 0.0], [0.0, 2.0]]))
+        assert np.all(normalized[0] == 0)
+
+
+class TestExactSearch:
+    """Tests pour la recherche exacte."""
+
+    def test_matches_brute_force(self):
+        """Les résultats sont identiques à l'ancienne boucle cosinus."""
+        foods = _random_foods()
+        index = FoodEmbeddingIndex.from_foods(foods)
+        query = np.random.default_rng(1).standard_normal(32)
+
+        results = index.search(query, top_k=5)
+
+        assert [food["fdcId"] for food, _ in results] == _brute_force(foods, query, 5)
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_threshold_filters_results(self):
+        foods = _random_foods()
+        index = FoodEmbeddingIndex.from_foods(foods)
+        query = np.array(foods[10]["embedding"])
+
+        results = index.search(query, top_k=5, threshold=0.99)
+
+        assert len(results) == 1
+        assert results[0][0]["fdcId"] == 10
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    def test_skips_foods_without_embedding(self):
+        foods = _random_foods(10) + [{"fdcId": 999, "description": "no embedding"}]
+        index = FoodEmbeddingIndex.from_foods(foods)
+        assert len(index) == 10
+
+    def test_empty_index(self):
+        index = FoodEmbeddingIndex.from_foods([])
+        assert len(index) == 0
+        assert index.search(np.ones(8), top_k=3) == []
+
+    def test_top_k_larger_than_index(self):
+        index = FoodEmbeddingIndex.from_foods(_random_foods(3))
+        assert len(index.search(np.ones(32), top_k=10)) == 3
+
+    def test_misaligned_metadata_raises(self):
+        with pytest.raises(ValueError):
+            FoodEmbeddingIndex(np.ones((3, 4)), [{}])
+
+
+class TestIVFSearch:
+    """Tests pour l'index approximatif IVF."""
+
+    def test_build_switches_mode(self):
+        index = FoodEmbeddingIndex.from_foods(_random_foods())
+        assert index.mode == INDEX_MODE_EXACT
+
+        index.build_ivf(n_lists=10, n_probe=3)
+
+        assert index.mode == INDEX_MODE_IVF
+        assert index.n_lists == 10
+        assert index.n_probe == 3
+        assert index.list_offsets[-1] == len(index)
+
+    def test_probing_all_lists_is_exact(self):
+        """Avec n_probe = n_lists, l'IVF retourne les résultats exacts."""
+        foods = _random_foods()
+        index = FoodEmbeddingIndex.from_foods(foods).build_ivf(n_lists=10)
+        query = np.random.default_rng(2).standard_normal(32)
+
+        results = index.search(query, top_k=5, n_probe=10)
+
+        assert [food["fdcId"] for food, _ in results] == _brute_force(foods, query, 5)
+
+    def test_metadata_follows_reordering(self):
+        """Après réordonnancement, chaque vecteur reste associé à son aliment."""
+        foods = _random_foods()
+        index = FoodEmbeddingIndex.from_foods(foods).build_ivf(n_lists=8, n_probe=2)
+
+        for food_id in (0, 123, 499):
+            results = index.search(np.array(foods[food_id]["embedding"]), top_k=1)
+            assert results[0][0]["fdcId"] == food_id
+
+    def test_drop_ivf(self):
+        index = FoodEmbeddingIndex.from_foods(_random_foods()).build_ivf(n_lists=4)
+        index.drop_ivf()
+        assert index.mode == INDEX_MODE_EXACT
+
+
+class TestBackgroundIVF:
+    """Tests de la construction IVF hors event loop (index sans IVF pré-calculé)."""
+
+    @pytest.mark.asyncio
+    async def test_exact_search_served_until_ivf_is_ready(self, monkeypatch):
+        monkeypatch.setattr(food_embeddings.settings, "FOOD_INDEX_MODE", INDEX_MODE_IVF)
+        monkeypatch.setattr(food_embeddings, "_usda_embeddings_cache", None)
+        monkeypatch.setattr(food_embeddings, "_usda_embeddings_source_id", None)
+        monkeypatch.setattr(food_embeddings, "_ivf_build_task", None)
+        foods = _random_foods(n=300)
+
+        index = food_embeddings.get_food_index(foods)
+        assert index.mode == INDEX_MODE_EXACT
+        assert [food["fdcId"] for food, _ in index.search(np.array(foods[7]["embedding"]), top_k=1)] == [7]
+
+        await food_embeddings._ivf_build_task
+        ivf_index = food_embeddings.get_food_index(foods)
+
+        assert ivf_index is not index
+        assert ivf_index.mode == INDEX_MODE_IVF
+        # L'index exact encore utilisé par des requêtes en cours n'est pas réordonné
+        assert index.mode == INDEX_MODE_EXACT
+        assert index.foods[7]["fdcId"] == 7
+
+    @pytest.mark.asyncio
+    async def test_memmapped_store_without_ivf_stays_exact(self, tmp_path, monkeypatch):
+        from app.services.embeddings_store import save_embeddings_store
+
+        save_embeddings_store(FoodEmbeddingIndex.from_foods(_random_foods(n=300)), tmp_path / "index")
+        monkeypatch.setattr(food_embeddings.settings, "FOOD_INDEX_MODE", INDEX_MODE_IVF)
+        monkeypatch.setattr(food_embeddings.settings, "FOOD_INDEX_PATH", str(tmp_path / "index"))
+        monkeypatch.setattr(food_embeddings, "_usda_embeddings_cache", None)
+        monkeypatch.setattr(food_embeddings, "_usda_embeddings_source_id", None)
+        monkeypatch.setattr(food_embeddings, "_ivf_build_task", None)
+
+        index = food_embeddings.get_food_index()
+
+        # Pas de copie IVF en RAM privée: la matrice reste memory-mappée
+        assert index.mode == INDEX_MODE_EXACT
+        assert isinstance(index.embeddings, np.memmap)
+        assert food_embeddings._ivf_build_task is None
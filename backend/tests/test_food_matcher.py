@@ -0,0 +1,57 @@
+"""Tests pour la traduction des noms d'aliments (automate Aho-Corasick)."""
+import pytest
+
+from app.services.food_matcher import FoodMatcher
+from app.services.nutrition_database import FOOD_TRANSLATIONS, translate_food_to_english
+
+
+class TestFoodMatcher:
+    """Tests pour FoodMatcher."""
+
+    def test_longest_match_wins(self):
+        matcher = FoodMatcher({"poulet": "chicken", "poulet grillé": "grilled chicken"})
+        assert matcher.translate("poulet grillé au citron") == "grilled chicken"
+
+    def test_leftmost_on_equal_length(self):
+        matcher = FoodMatcher({"riz": "rice", "thé": "tea"})
+        assert matcher.longest_match("thé et riz") == "thé"
+
+    def test_overlapping_patterns(self):
+        matcher = FoodMatcher({"he": "a", "she": "b", "hers": "c", "his": "d"})
+        assert matcher.longest_match("ushers") == "hers"
+        assert matcher.longest_match("ahishe") == "his"
+
+    def test_suffix_pattern_found_through_failure_links(self):
+        matcher = FoodMatcher({"abcd": "x", "bc": "y"})
+        assert matcher.longest_match("abce") == "bc"
+
+    def test_no_match(self):
+        matcher = FoodMatcher({"pomme": "apple"})
+        assert matcher.translate("banane") is None
+        assert matcher.translate("") is None
+
+    def test_cjk_without_spaces(self):
+        matcher = FoodMatcher(FOOD_TRANSLATIONS["zh"])
+        assert matcher.translate("红烧鸡胸肉") == "chicken breast"
+
+
+class TestTranslateFoodToEnglish:
+    """Tests pour translate_food_to_english."""
+
+    @pytest.mark.parametrize("language", sorted(FOOD_TRANSLATIONS))
+    def test_exact_matches_unchanged(self, language):
+        for source, english in FOOD_TRANSLATIONS[language].items():
+            assert translate_food_to_english(source, language) == (english, True)
+
+    def test_case_and_whitespace(self):
+        assert translate_food_to_english("  Poulet  ", "fr") == ("chicken", True)
+
+    def test_compound_uses_longest_entry(self):
+        assert translate_food_to_english("blanc de poulet rôti", "fr") == ("chicken breast", True)
+
+    def test_english_and_unknown_language(self):
+        assert translate_food_to_english("Chicken", "en") == ("Chicken", False)
+        assert translate_food_to_english("pollo", "it") == ("pollo", False)
+
+    def test_not_found_returns_original(self):
+        assert translate_food_to_english("Zzz", "fr") == ("Zzz", False)
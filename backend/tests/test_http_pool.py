@@ -0,0 +1,81 @@
+"""Tests for the shared outbound HTTP pool."""
+import httpx
+import pytest
+
+from app.core.http_pool import (
+    MeteredTransport,
+    PoolStats,
+    USDA,
+    HUGGINGFACE,
+    close_http_clients,
+    get_http_client,
+    get_http_pool_metrics,
+)
+
+
+class TestHttpPool:
+    """Test pooled client lifecycle."""
+
+    @pytest.mark.asyncio
+    async def test_client_is_shared_per_service(self):
+        """Same service returns the same long-lived client."""
+        client1 = get_http_client(USDA)
+        client2 = get_http_client(USDA)
+        other = get_http_client(HUGGINGFACE)
+
+        assert client1 is client2
+        assert client1 is not other
+
+        await close_http_clients()
+
+    @pytest.mark.asyncio
+    async def test_close_recreates_client(self):
+        """After shutdown a new client is created on demand."""
+        client = get_http_client(USDA)
+        await close_http_clients()
+
+        assert client.is_closed
+        new_client = get_http_client(USDA)
+        assert new_client is not client
+        assert not new_client.is_closed
+
+        await close_http_clients()
+
+    @pytest.mark.asyncio
+    async def test_metrics_list_used_services(self):
+        """Metrics expose one entry per created pool."""
+        get_http_client(USDA)
+        metrics = get_http_pool_metrics()
+
+        assert USDA in metrics["services"]
+        assert metrics["services"][USDA]["requests"] == 0
+        assert "open_connections" in metrics["services"][USDA]
+
+        await close_http_clients()
+        assert get_http_pool_metrics()["services"] == {}
+
+
+class TestMeteredTransport:
+    """Test request counters."""
+
+    @pytest.mark.asyncio
+    async def test_counts_requests_and_errors(self):
+        """Successful and failing requests are counted."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/fail":
+                raise httpx.ConnectError("boom", request=request)
+            return httpx.Response(200, json={"ok": True})
+
+        stats = PoolStats()
+        transport = MeteredTransport(httpx.MockTransport(handler), stats)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/ok")
+            assert response.json() == {"ok": True}
+            with pytest.raises(httpx.ConnectError):
+                await client.get("/fail")
+
+        assert stats.requests == 2
+        assert stats.errors == 1
+        assert stats.in_flight == 0
+        assert stats.max_in_flight == 1
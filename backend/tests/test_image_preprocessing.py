@@ -0,0 +1,98 @@
+"""Tests du prétraitement des photos avant le VLM."""
+import base64
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from app.services import image_preprocessing
+from app.services.image_preprocessing import (
+    ImagePreprocessingError,
+    preprocess_image,
+    preprocess_image_async,
+)
+
+
+def _encode(image: Image.Image, format: str = "JPEG", **params) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **params)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def _decode(image_base64: str) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(image_base64)))
+
+
+class TestPreprocessImage:
+    """Tests du pipeline synchrone."""
+
+    def test_large_photo_is_downscaled(self):
+        photo = _encode(Image.new("RGB", (4000, 3000), (200, 120, 40)), quality=95)
+
+        result = preprocess_image(photo, max_side=1024, image_format="jpeg", quality=85)
+
+        assert (result.width, result.height) == (1024, 768)
+        assert _decode(result.image_base64).size == (1024, 768)
+        assert result.media_type == "image/jpeg"
+        assert result.processed_bytes < result.original_bytes
+
+    def test_small_photo_is_not_upscaled(self):
+        result = preprocess_image(_encode(Image.new("RGB", (320, 240))), max_side=1024)
+
+        assert (result.width, result.height) == (320, 240)
+
+    def test_exif_orientation_applied_and_metadata_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotation 90°
+        exif[0x010F] = "PhoneMaker"
+        photo = _encode(Image.new("RGB", (400, 200)), exif=exif.tobytes())
+
+        result = preprocess_image(photo, max_side=1024, image_format="jpeg")
+
+        assert (result.width, result.height) == (200, 400)
+        assert not _decode(result.image_base64).getexif()
+
+    def test_transparent_png_is_flattened_to_jpeg(self):
+        photo = _encode(Image.new("RGBA", (100, 100), (0, 0, 0, 0)), format="PNG")
+
+        result = preprocess_image(f"data:image/png;base64,{photo}", max_side=1024, image_format="jpeg")
+        decoded = _decode(result.image_base64)
+
+        assert decoded.format == "JPEG"
+        assert decoded.getpixel((50, 50)) == (255, 255, 255)
+
+    def test_webp_output(self):
+        result = preprocess_image(_encode(Image.new("RGB", (2048, 2048))), max_side=512, image_format="webp")
+
+        assert result.media_type == "image/webp"
+        assert _decode(result.image_base64).format == "WEBP"
+
+    def test_invalid_or_oversized_images_are_rejected(self):
+        with pytest.raises(ImagePreprocessingError):
+            preprocess_image(base64.b64encode(b"pas une image" * 20).decode(), max_side=1024)
+        with pytest.raises(ImagePreprocessingError):
+            preprocess_image("@@@ pas du base64 @@@", max_side=1024)
+        with pytest.raises(ImagePreprocessingError):
+            preprocess_image(_encode(Image.new("RGB", (500, 500))), max_side=1024, max_bytes=100)
+
+
+class TestPreprocessImageAsync:
+    """Tests de l'exécution hors event loop."""
+
+    @pytest.mark.asyncio
+    async def test_runs_in_dedicated_pool(self, monkeypatch):
+        threads = []
+        original = image_preprocessing.preprocess_image
+
+        def tracking(image_base64):
+            threads.append(threading.current_thread().name)
+            return original(image_base64)
+
+        monkeypatch.setattr(image_preprocessing, "preprocess_image", tracking)
+
+        result = await preprocess_image_async(_encode(Image.new("RGB", (3000, 1500))))
+
+        assert max(result.width, result.height) == image_preprocessing.settings.VISION_IMAGE_MAX_SIDE
+        assert threads[0].startswith("image-preprocess")
+        image_preprocessing.shutdown_image_preprocessing()
@@ -0,0 +1,137 @@
+"""Tests du gouverneur de concurrence LLM."""
+import asyncio
+
+import pytest
+
+from app.agents.coach import COACH_MODELS, CoachAgent, CoachInput
+from app.llm import governor as governor_module
+from app.llm.client import HuggingFaceClient
+from app.llm.governor import LLMGovernor, LLMOverloadedError, LLMPriority
+
+
+def _governor(limit: int = 1, **budgets: float) -> LLMGovernor:
+    return LLMGovernor(
+        default_limit=limit,
+        model_limits={},
+        queue_budgets={"vision": 1.0, "coach": 1.0, "batch": 1.0, **budgets},
+    )
+
+
+class TestLLMGovernor:
+    """Tests des créneaux, de la file à priorité et du délestage."""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrency_per_model(self):
+        governor = _governor(limit=2)
+        running = peak = 0
+
+        async def call():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "ok"
+
+        results = await asyncio.gather(*(governor.run("m1", LLMPriority.COACH, call) for _ in range(6)))
+        await governor.run("m2", LLMPriority.COACH, call)
+
+        assert results == ["ok"] * 6
+        assert peak == 2
+        assert governor.get_stats()["models"]["m1"] == {"limit": 2, "in_flight": 0, "queued": 0}
+
+    @pytest.mark.asyncio
+    async def test_queue_served_by_priority(self):
+        governor = _governor(limit=1)
+        order = []
+        await governor.acquire("m", LLMPriority.COACH)
+
+        async def call(name, priority):
+            await governor.run("m", priority, lambda: asyncio.sleep(0, result=order.append(name)))
+
+        tasks = [
+            asyncio.create_task(call("batch", LLMPriority.BATCH)),
+            asyncio.create_task(call("coach", LLMPriority.COACH)),
+            asyncio.create_task(call("vision", LLMPriority.VISION)),
+        ]
+        await asyncio.sleep(0)
+        governor.release("m")
+        await asyncio.gather(*tasks)
+
+        assert order == ["vision", "coach", "batch"]
+        assert governor.get_stats()["priorities"]["batch"]["queued"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sheds_when_wait_exceeds_budget(self):
+        governor = _governor(limit=1, batch=0.01)
+        await governor.acquire("m", LLMPriority.VISION)
+
+        with pytest.raises(LLMOverloadedError):
+            await governor.run("m", LLMPriority.BATCH, lambda: asyncio.sleep(0))
+
+        assert governor.is_shedding(LLMPriority.BATCH)
+        assert not governor.is_shedding(LLMPriority.VISION)
+        governor.release("m")
+        # Entrée délestée ignorée: le créneau est libéré
+        assert governor.get_stats()["models"]["m"] == {"limit": 1, "in_flight": 0, "queued": 0}
+        assert governor.get_stats()["priorities"]["batch"]["shed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        governor = _governor(limit=1)
+        await governor.acquire("m", LLMPriority.COACH)
+        waiter = asyncio.create_task(governor.acquire("m", LLMPriority.COACH))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        governor.release("m")
+
+        assert governor.get_stats()["models"]["m"]["in_flight"] == 0
+
+
+class TestClientAndAgents:
+    """Tests de l'intégration client HuggingFace / agents."""
+
+    @pytest.mark.asyncio
+    async def test_text_chat_goes_through_governor(self, monkeypatch):
+        governor = _governor(limit=1, coach=0.01)
+        monkeypatch.setattr(governor_module, "_governor", governor)
+
+        async def fake_text_chat(self, prompt, model_id, max_tokens, temperature):
+            return "réponse"
+
+        monkeypatch.setattr(HuggingFaceClient, "_text_chat", fake_text_chat)
+        client = HuggingFaceClient(token="test")
+
+        assert await client.text_chat("bonjour", model_id="m") == "réponse"
+        await governor.acquire("m", LLMPriority.VISION)
+        with pytest.raises(LLMOverloadedError):
+            await client.text_chat("bonjour", model_id="m")
+
+    @pytest.mark.asyncio
+    async def test_shed_agent_uses_deterministic_fallback(self, monkeypatch):
+        governor = _governor(limit=1, coach=0.01)
+        monkeypatch.setattr(governor_module, "_governor", governor)
+
+        class BusyClient:
+            calls = 0
+
+            async def text_chat(self, prompt, model_id, **kwargs):
+                BusyClient.calls += 1
+                return await governor.run(model_id, kwargs.get("priority", LLMPriority.COACH),
+                                          lambda: asyncio.sleep(0, result=""))
+
+        # Tous les modèles du coach saturés
+        for model_id in COACH_MODELS[:3]:
+            await governor.acquire(model_id, LLMPriority.VISION)
+
+        agent = CoachAgent(client=BusyClient(), language="fr")
+        response = await agent.process(CoachInput(
+            name="Test", age=30, goal="maintain", diet_type="omnivore", target_calories=2000,
+            target_protein=100.0, target_carbs=250.0, target_fat=70.0,
+        ))
+
+        assert response.model_used == "deterministic"
+        assert response.used_fallback is True
+        assert BusyClient.calls == 3
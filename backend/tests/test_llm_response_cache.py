@@ -0,0 +1,179 @@
+"""Tests du cache de réponses LLM adressé par contenu."""
+import asyncio
+import time
+
+import pytest
+
+from app.agents.coach import CoachAgent
+from app.agents.recipe import RecipeAgent
+from app.core.cache import MemoryCache
+from app.llm import client as client_module
+from app.llm.client import HuggingFaceClient
+from app.llm.response_cache import DiskCache, LLMResponseCache, response_cache_key
+
+
+def _counting_call(calls: list, response: str = "réponse", delay: float = 0.0):
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return response
+    return call
+
+
+class TestResponseCacheKey:
+    """Tests de la clé adressée par contenu."""
+
+    def test_depends_on_every_parameter(self):
+        base = response_cache_key("coaching", "model-a", "prompt", 500, 0.7)
+
+        assert base == response_cache_key("coaching", "model-a", "prompt", 500, 0.7)
+        assert base != response_cache_key("coaching", "model-b", "prompt", 500, 0.7)
+        assert base != response_cache_key("coaching", "model-a", "prompt!", 500, 0.7)
+        assert base != response_cache_key("coaching", "model-a", "prompt", 600, 0.7)
+        assert base != response_cache_key("coaching", "model-a", "prompt", 500, 0.3)
+        assert base.startswith("llm_response:coaching:")
+
+    def test_image_is_part_of_the_key(self):
+        photo = response_cache_key("food_detection", "vlm", "analyse", 800, image_base64="aGVsbG8=")
+
+        assert photo == response_cache_key("food_detection", "vlm", "analyse", 800, image_base64="aGVsbG8=")
+        assert photo != response_cache_key("food_detection", "vlm", "analyse", 800, image_base64="d29ybGQ=")
+        assert "aGVsbG8" not in photo
+
+
+class TestLLMResponseCache:
+    """Tests de get_or_call."""
+
+    @pytest.mark.asyncio
+    async def test_second_identical_call_is_served_from_cache(self):
+        cache = LLMResponseCache(backend=MemoryCache(), ttls={}, default_ttl=60, enabled=True)
+        calls = []
+
+        assert await cache.get_or_call("coaching", "k", _counting_call(calls)) == "réponse"
+        assert await cache.get_or_call("coaching", "k", _counting_call(calls)) == "réponse"
+
+        assert len(calls) == 1
+        assert cache.stats.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_are_deduplicated(self):
+        cache = LLMResponseCache(backend=MemoryCache(), ttls={}, default_ttl=60, enabled=True)
+        calls = []
+
+        results = await asyncio.gather(*(
+            cache.get_or_call("coaching", "k", _counting_call(calls, delay=0.05)) for _ in range(5)
+        ))
+
+        assert results == ["réponse"] * 5
+        assert len(calls) == 1
+        assert cache.stats.deduplicated == 4
+
+    @pytest.mark.asyncio
+    async def test_empty_responses_and_errors_are_not_cached(self):
+        cache = LLMResponseCache(backend=MemoryCache(), ttls={}, default_ttl=60, enabled=True)
+        calls = []
+
+        assert await cache.get_or_call("coaching", "k", _counting_call(calls, response="")) == ""
+
+        async def failing():
+            raise RuntimeError("503")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_call("coaching", "k", failing)
+
+        assert await cache.get_or_call("coaching", "k", _counting_call(calls)) == "réponse"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_ttl_per_namespace(self):
+        cache = LLMResponseCache(
+            backend=MemoryCache(), ttls={"food_detection": 3600}, default_ttl=60, enabled=True,
+        )
+
+        assert cache.ttl_for("food_detection") == 3600
+        assert cache.ttl_for("profiling") == 60
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_always_calls(self):
+        cache = LLMResponseCache(backend=MemoryCache(), ttls={}, default_ttl=60, enabled=False)
+        calls = []
+
+        await cache.get_or_call("coaching", "k", _counting_call(calls))
+        await cache.get_or_call("coaching", "k", _counting_call(calls))
+
+        assert len(calls) == 2
+
+
+class TestDiskCache:
+    """Tests du backend fichier."""
+
+    @pytest.mark.asyncio
+    async def test_persists_across_instances(self, tmp_path):
+        await DiskCache(tmp_path).set("llm_response:coaching:abc", "réponse", ttl=60)
+
+        assert await DiskCache(tmp_path).get("llm_response:coaching:abc") == "réponse"
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_removed(self, tmp_path, monkeypatch):
+        disk = DiskCache(tmp_path)
+        await disk.set("k", "v", ttl=60)
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+
+        assert await disk.get("k") is None
+        assert list(tmp_path.glob("*/*.json")) == []
+
+    @pytest.mark.asyncio
+    async def test_clear_pattern_by_namespace(self, tmp_path):
+        disk = DiskCache(tmp_path)
+        await disk.set("llm_response:coaching:a", "1", ttl=60)
+        await disk.set("llm_response:food_detection:b", "2", ttl=60)
+
+        assert await disk.clear_pattern("llm_response:coaching:*") == 1
+        assert await disk.get("llm_response:food_detection:b") == "2"
+
+
+class TestClientIntegration:
+    """Le cache est opt-in côté appelant."""
+
+    @pytest.mark.asyncio
+    async def test_text_chat_caches_only_with_namespace(self, monkeypatch):
+        cache = LLMResponseCache(backend=MemoryCache(), ttls={}, default_ttl=60, enabled=True)
+        monkeypatch.setattr(client_module, "get_response_cache", lambda: cache)
+        calls = []
+
+        async def fake_text_chat(self, prompt, model_id, max_tokens, temperature):
+            calls.append(prompt)
+            return f"réponse à {prompt}"
+
+        monkeypatch.setattr(HuggingFaceClient, "_text_chat", fake_text_chat)
+        client = HuggingFaceClient(token="test")
+
+        for _ in range(2):
+            await client.text_chat("traduire: pomme", model_id="m", temperature=0.3, cache_namespace="translation")
+        for _ in range(2):
+            await client.text_chat("recette", model_id="m")
+
+        assert calls == ["traduire: pomme", "recette", "recette"]
+
+    @pytest.mark.asyncio
+    async def test_vision_chat_reuses_result_for_identical_photo(self, monkeypatch):
+        cache = LLMResponseCache(backend=MemoryCache(), ttls={}, default_ttl=60, enabled=True)
+        monkeypatch.setattr(client_module, "get_response_cache", lambda: cache)
+        calls = []
+
+        async def fake_vision_chat(self, image_base64, prompt, model_id, max_tokens, image_type):
+            calls.append(image_base64)
+            return '{"items": []}'
+
+        monkeypatch.setattr(HuggingFaceClient, "_vision_chat", fake_vision_chat)
+        client = HuggingFaceClient(token="test")
+
+        for photo in ("cGhvdG8x", "cGhvdG8x", "cGhvdG8y"):
+            await client.vision_chat(photo, "analyse", cache_namespace="food_detection")
+
+        assert calls == ["cGhvdG8x", "cGhvdG8y"]
+
+    def test_agents_declare_cacheability(self):
+        assert CoachAgent(client=HuggingFaceClient(token="test")).cache_namespace == "coaching"
+        assert RecipeAgent(client=HuggingFaceClient(token="test")).cache_namespace is None
@@ -0,0 +1,197 @@
+"""Tests de la santé des modèles LLM (disjoncteur, routage)."""
+import pytest
+
+from app.agents.coach import CoachAgent
+from app.agents.profiling import ProfileInput, ProfilingAgent
+from app.llm import model_health as model_health_module
+from app.llm.client import HuggingFaceClient
+from app.llm.model_health import (
+    MemoryHealthStore,
+    ModelHealthTracker,
+    ModelUnavailableError,
+    RedisHealthStore,
+)
+from app.llm.models import ModelInfo, ModelType
+
+
+def _tracker(**kwargs) -> ModelHealthTracker:
+    tracker = ModelHealthTracker(store=kwargs.pop("store", MemoryHealthStore()), sync_interval=0)
+    # alpha, échecs consécutifs, taux d'erreur, appels min, ouverture (s)
+    tracker.config = (0.5, 3, 0.5, 10, 30.0)
+    return tracker
+
+
+def _model(model_id: str, **kwargs) -> ModelInfo:
+    return ModelInfo(id=model_id, name=model_id, type=ModelType.TEXT, **kwargs)
+
+
+class TestModelHealthTracker:
+    """Tests des statistiques et du disjoncteur."""
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_after_failure_burst(self):
+        tracker = _tracker()
+        await tracker.record("m", True, 100.0)
+        await tracker.record("m", False, 0.0)
+        await tracker.record("m", False, 0.0)
+        await tracker.check("m")
+
+        await tracker.record("m", False, 0.0)
+
+        with pytest.raises(ModelUnavailableError):
+            await tracker.check("m")
+        stats = tracker.get_stats()
+        assert stats["rejected_calls"] == 1
+        assert stats["models"]["m"]["circuit"] == "open"
+        assert stats["models"]["m"]["latency_ms"] == 100.0
+
+    @pytest.mark.asyncio
+    async def test_half_open_after_cooldown(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(model_health_module.time, "time", lambda: now)
+        tracker = _tracker()
+        for _ in range(3):
+            await tracker.record("m", False, 0.0)
+        assert await tracker.is_open("m")
+
+        now += 31.0
+        await tracker.check("m")
+        assert tracker.get_stats()["models"]["m"]["circuit"] == "half_open"
+        # Nouvel échec en semi-ouvert: le circuit se rouvre aussitôt
+        await tracker.record("m", False, 0.0)
+        assert await tracker.is_open("m")
+
+        now += 31.0
+        await tracker.record("m", True, 50.0)
+        assert tracker.get_stats()["models"]["m"]["circuit"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_half_open_admits_a_single_probe(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(model_health_module.time, "time", lambda: now)
+        tracker = _tracker()
+        tracker.probe_ttl = 10.0
+        for _ in range(3):
+            await tracker.record("m", False, 0.0)
+
+        now += 31.0
+        await tracker.check("m")
+        # Sonde en cours: les autres appelants sont rejetés
+        with pytest.raises(ModelUnavailableError):
+            await tracker.check("m")
+        assert await tracker.is_open("m")
+
+        # Sonde perdue (sans issue): une autre est admise après son TTL
+        now += 11.0
+        await tracker.check("m")
+        with pytest.raises(ModelUnavailableError):
+            await tracker.check("m")
+
+        await tracker.record("m", True, 50.0)
+        assert not await tracker.is_open("m")
+        await tracker.check("m")
+        await tracker.check("m")
+        assert tracker.get_stats()["rejected_calls"] == 2
+
+    @pytest.mark.asyncio
+    async def test_route_prefers_fastest_closed_primary(self):
+        tracker = _tracker()
+        primary, secondary, fallback = (
+            _model("a", priority=1), _model("b", priority=2), _model("c", is_fallback=True),
+        )
+        await tracker.record(primary.id, True, 900.0)
+        await tracker.record(secondary.id, True, 200.0)
+        await tracker.record(fallback.id, True, 50.0)
+
+        routed = await tracker.route([primary, secondary, fallback])
+        assert [m.id for m in routed] == [secondary.id, primary.id, fallback.id]
+
+        for _ in range(3):
+            await tracker.record(secondary.id, False, 0.0)
+        routed = await tracker.route([primary, secondary, fallback])
+        assert [m.id for m in routed] == [primary.id, fallback.id, secondary.id]
+
+    @pytest.mark.asyncio
+    async def test_store_error_falls_back_to_local_state(self):
+        tracker = _tracker(store=RedisHealthStore("redis://localhost:1/0"))
+
+        for _ in range(3):
+            await tracker.record("m", False, 0.0)
+
+        assert await tracker.is_open("m")
+        assert tracker.get_stats()["store_errors"] >= 3
+
+    @pytest.mark.asyncio
+    async def test_probe_falls_back_to_local_token(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(model_health_module.time, "time", lambda: now)
+        tracker = _tracker(store=RedisHealthStore("redis://localhost:1/0"))
+        for _ in range(3):
+            await tracker.record("m", False, 0.0)
+
+        now += 31.0
+        await tracker.check("m")
+        with pytest.raises(ModelUnavailableError):
+            await tracker.check("m")
+
+
+class TestClientAndAgents:
+    """Tests de l'intégration client HuggingFace / agents."""
+
+    @pytest.mark.asyncio
+    async def test_client_records_outcomes_and_fails_fast(self, monkeypatch):
+        tracker = _tracker()
+        monkeypatch.setattr(model_health_module, "_tracker", tracker)
+        calls = 0
+
+        async def fake_text_chat(self, prompt, model_id, max_tokens, temperature):
+            nonlocal calls
+            calls += 1
+            return ""  # Retries épuisés
+
+        monkeypatch.setattr(HuggingFaceClient, "_text_chat", fake_text_chat)
+        client = HuggingFaceClient(token="test")
+
+        for _ in range(3):
+            assert await client.text_chat("bonjour", model_id="m") == ""
+        with pytest.raises(ModelUnavailableError):
+            await client.text_chat("bonjour", model_id="m")
+        assert calls == 3
+
+    @pytest.mark.asyncio
+    async def test_agent_routes_around_open_circuit(self, monkeypatch):
+        tracker = _tracker()
+        monkeypatch.setattr(model_health_module, "_tracker", tracker)
+        agent = CoachAgent(client=HuggingFaceClient(token="test"), language="fr")
+        models = await agent.route_models()
+        for _ in range(3):
+            await tracker.record(models[0].id, False, 0.0)
+
+        assert (await agent.route_models())[0].id == models[1].id
+        assert await agent.pick_model_id(models[0].id) == models[1].id
+        assert await agent.pick_model_id(models[1].id) == models[1].id
+
+    @pytest.mark.asyncio
+    async def test_open_fallback_circuit_uses_deterministic_fallback(self, monkeypatch):
+        tracker = _tracker()
+        monkeypatch.setattr(model_health_module, "_tracker", tracker)
+
+        class FailingClient:
+            calls = 0
+
+            async def text_chat(self, prompt, model_id, **kwargs):
+                FailingClient.calls += 1
+                await tracker.check(model_id)
+                await tracker.record(model_id, False, 0.0)
+                raise RuntimeError("timeout")
+
+        agent = ProfilingAgent(client=FailingClient(), language="fr")
+        response = await agent.process(ProfileInput(
+            age=30, gender="male", height_cm=180, weight_kg=75, activity_level="moderate", goal="maintain",
+            diet_type="omnivore", allergies=[], medical_conditions=[],
+        ))
+
+        assert response.model_used == "deterministic"
+        assert response.used_fallback is True
+        # Chaque circuit s'ouvre après 3 échecs, puis plus aucun appel
+        assert FailingClient.calls == 6
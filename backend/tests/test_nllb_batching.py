@@ -0,0 +1,142 @@
+"""Tests pour la traduction batch et le regroupement des requêtes NLLB."""
+import asyncio
+
+import pytest
+
+from app.core.cache import Cache
+from app.services import nllb_translator
+from app.services.nllb_translator import _parse_batch_response, translate_many, translate_with_nllb
+from app.services.translation_cache import TranslationCache
+
+
+class FakeBatchModel:
+    """Faux appel d'inférence batch, enregistre chaque lot."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls: list[list[str]] = []
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self, texts, src_code, tgt_code):
+        self.calls.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("HF indisponible")
+        return [f"en:{text}" for text in texts]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TranslationCache("test", shared=Cache())
+    cache.warm({"zh": {"鸡肉": "chicken"}})
+    monkeypatch.setattr(nllb_translator, "get_translation_cache", lambda namespace: cache)
+    return cache
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeBatchModel()
+    monkeypatch.setattr(nllb_translator, "_translate_batch_with_llm", model)
+    return model
+
+
+class TestTranslateMany:
+    """Tests pour translate_many."""
+
+    @pytest.mark.asyncio
+    async def test_one_call_for_all_misses(self, cache, model):
+        results = await translate_many(["米饭", "鸡肉", "面条", "米饭 "], "zh")
+
+        assert results == ["en:米饭", "chicken", "en:面条", "en:米饭"]
+        assert model.calls == [["米饭", "面条"]]
+
+    @pytest.mark.asyncio
+    async def test_results_are_cached(self, cache, model):
+        await translate_many(["豆腐"], "zh")
+        await translate_many(["豆腐"], "zh")
+
+        assert len(model.calls) == 1
+        assert cache.stats.memory_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_coalesced(self, cache, model):
+        model.delay = 0.01
+
+        user_a, user_b, single = await asyncio.gather(
+            translate_many(["羊肉", "鸭肉"], "zh"),
+            translate_many(["鸭肉", "排骨"], "zh"),
+            translate_with_nllb("羊肉", "zh"),
+        )
+
+        assert user_a == ["en:羊肉", "en:鸭肉"]
+        assert user_b == ["en:鸭肉", "en:排骨"]
+        assert single == "en:羊肉"
+        assert model.calls == [["羊肉", "鸭肉", "排骨"]]
+        assert nllb_translator._batcher.stats.coalesced >= 2
+
+    @pytest.mark.asyncio
+    async def test_batch_size_cap(self, cache, model, monkeypatch):
+        monkeypatch.setattr(nllb_translator.settings, "NLLB_BATCH_MAX_SIZE", 2)
+
+        results = await translate_many(["a1", "a2", "a3"], "ar")
+
+        assert results == ["en:a1", "en:a2", "en:a3"]
+        assert sorted(len(call) for call in model.calls) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_failure_returns_originals_and_is_not_cached(self, cache, model):
+        model.fail = True
+        assert await translate_many(["خبز", "أرز"], "ar") == ["خبز", "أرز"]
+
+        model.fail = False
+        assert await translate_many(["خبز"], "ar") == ["en:خبز"]
+
+    @pytest.mark.asyncio
+    async def test_same_language_and_unsupported(self, cache, model):
+        assert await translate_many(["rice"], "en", "en") == ["rice"]
+        assert await translate_many(["riso"], "it") == ["riso"]
+        assert model.calls == []
+
+
+class TestBatchInference:
+    """Tests pour l'appel d'inférence batch."""
+
+    def test_parse_batch_response(self):
+        assert _parse_batch_response('Sure: ["rice", "beef"]', 2) == ["rice", "beef"]
+        assert _parse_batch_response('["rice"]', 2) is None
+        assert _parse_batch_response("rice, beef", 2) is None
+        assert _parse_batch_response(None, 1) is None
+
+    @pytest.mark.asyncio
+    async def test_single_prompt_for_many_texts(self, monkeypatch):
+        prompts = []
+
+        async def fake_chat(prompt, max_tokens):
+            prompts.append(prompt)
+            return '["Rice.", "米饭2", "\\"beef\\""]'
+
+        monkeypatch.setattr(nllb_translator.settings, "HUGGINGFACE_TOKEN", "test")
+        monkeypatch.setattr(nllb_translator, "_chat_completion", fake_chat)
+
+        results = await nllb_translator._translate_batch_with_llm(
+            ["米饭", "米饭2", "牛肉"], "zho_Hans", "eng_Latn"
+        )
+
+        assert len(prompts) == 1
+        assert results == ["Rice", None, "beef"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_response_falls_back_to_single_calls(self, monkeypatch):
+        async def fake_chat(prompt, max_tokens):
+            return "rice and beef"
+
+        async def fake_single(text, src, tgt):
+            return f"single:{text}"
+
+        monkeypatch.setattr(nllb_translator.settings, "HUGGINGFACE_TOKEN", "test")
+        monkeypatch.setattr(nllb_translator, "_chat_completion", fake_chat)
+        monkeypatch.setattr(nllb_translator, "_call_nllb_api", fake_single)
+
+        results = await nllb_translator._translate_batch_with_llm(["米饭", "牛肉"], "zho_Hans", "eng_Latn")
+
+        assert results == ["single:米饭", "single:牛肉"]
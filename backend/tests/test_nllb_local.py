@@ -0,0 +1,130 @@
+"""Tests pour le backend local de traduction NLLB."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import nllb_local, nllb_translator
+
+
+class FakeLocalTranslator:
+    """Traducteur bloquant (simule la génération CPU)."""
+
+    def __init__(self, fail: bool = False, loaded: bool = True, fail_load: bool = False):
+        self.fail = fail
+        self.is_loaded = loaded
+        self.fail_load = fail_load
+        self.loads = 0
+        self.threads: list[str] = []
+
+    def load(self):
+        self.loads += 1
+        time.sleep(0.02)
+        if self.fail_load:
+            raise RuntimeError("download failed")
+        self.is_loaded = True
+
+    def translate_batch(self, texts, src_code, tgt_code):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("out of memory")
+        return [f"local:{text}" if text != "same" else text for text in texts]
+
+
+@pytest.fixture
+def local(monkeypatch):
+    translator = FakeLocalTranslator()
+    monkeypatch.setattr(nllb_local, "get_local_translator", lambda: translator)
+    monkeypatch.setattr(nllb_local, "is_local_backend_available", lambda: True)
+    monkeypatch.setattr(nllb_translator.settings, "NLLB_BACKEND", "local")
+    monkeypatch.setattr(nllb_local, "_load_task", None)
+    monkeypatch.setattr(nllb_local, "_load_failed_at", None)
+    return translator
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    calls = []
+
+    async def fake_remote(texts, src, tgt):
+        calls.append(list(texts))
+        return [f"remote:{text}" for text in texts]
+
+    monkeypatch.setattr(nllb_translator, "_translate_batch_with_llm", fake_remote)
+    return calls
+
+
+class TestLocalBackend:
+    """Tests pour translate_local et la sélection du backend."""
+
+    @pytest.mark.asyncio
+    async def test_runs_in_thread_pool_without_blocking_loop(self, local):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            for _ in range(5):
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        results, _ = await asyncio.gather(
+            nllb_local.translate_local(["米饭"], "zho_Hans", "eng_Latn"),
+            ticker(),
+        )
+
+        assert results == ["local:米饭"]
+        assert local.threads[0].startswith("nllb-local")
+        assert ticks == 5
+
+    @pytest.mark.asyncio
+    async def test_local_backend_is_used(self, local, remote):
+        results = await nllb_translator._translate_batch(["米饭", "same"], "zho_Hans", "eng_Latn")
+
+        assert results == ["local:米饭", None]
+        assert remote == []
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_remote_on_failure(self, local, remote):
+        local.fail = True
+
+        results = await nllb_translator._translate_batch(["米饭"], "zho_Hans", "eng_Latn")
+
+        assert results == ["remote:米饭"]
+        assert remote == [["米饭"]]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_transformers_missing(self, local, remote, monkeypatch):
+        monkeypatch.setattr(nllb_local, "is_local_backend_available", lambda: False)
+
+        assert await nllb_translator._translate_batch(["خبز"], "arb_Arab", "eng_Latn") == ["remote:خبز"]
+
+    @pytest.mark.asyncio
+    async def test_remote_backend_skips_local(self, local, remote, monkeypatch):
+        monkeypatch.setattr(nllb_translator.settings, "NLLB_BACKEND", "remote")
+
+        assert await nllb_translator._translate_batch(["米饭"], "zho_Hans", "eng_Latn") == ["remote:米饭"]
+        assert local.threads == []
+
+    @pytest.mark.asyncio
+    async def test_unloaded_model_falls_back_while_loading(self, local, remote):
+        local.is_loaded = False
+
+        assert await nllb_translator._translate_batch(["米饭"], "zho_Hans", "eng_Latn") == ["remote:米饭"]
+        assert await nllb_local._load_task is True
+
+        assert await nllb_translator._translate_batch(["米饭"], "zho_Hans", "eng_Latn") == ["local:米饭"]
+        assert local.loads == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_load_is_not_retried_on_every_call(self, local, remote):
+        local.is_loaded = False
+        local.fail_load = True
+
+        assert await nllb_local.preload_local_model() is False
+        for _ in range(3):
+            assert await nllb_local.translate_local(["米饭"], "zho_Hans", "eng_Latn") is None
+
+        assert local.loads == 1
+        assert local.threads == []
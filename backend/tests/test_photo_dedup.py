@@ -0,0 +1,105 @@
+"""Tests de la déduplication perceptuelle des photos."""
+import base64
+import io
+import random
+import time
+
+import pytest
+from PIL import Image
+
+from app.agents.vision import FoodAnalysis, FoodItem
+from app.core.cache import Cache
+from app.services.photo_dedup import PhotoDedupIndex, compute_photo_hash, hamming_distance
+
+
+def _meal_photo(seed: int, size: int = 640) -> Image.Image:
+    """Image de test: blocs de couleurs aléatoires (structure stable au redimensionnement)."""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (size, size))
+    block = size // 8
+    for x in range(8):
+        for y in range(8):
+            color = tuple(rng.randint(0, 255) for _ in range(3))
+            image.paste(color, (x * block, y * block, (x + 1) * block, (y + 1) * block))
+    return image
+
+
+def _to_base64(image: Image.Image, quality: int = 90, data_url: bool = False) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/jpeg;base64,{encoded}" if data_url else encoded
+
+
+def _analysis() -> dict:
+    item = FoodItem(name="Salade niçoise", quantity="1", unit="assiette", calories=420,
+                    protein=25.0, carbs=18.0, fat=26.0, source="usda_verified")
+    return FoodAnalysis(items=[item], meal_type="lunch", description="Salade").to_dict()
+
+
+class TestPhotoHash:
+    """Tests du dHash."""
+
+    def test_recompressed_and_resized_photo_is_near_duplicate(self):
+        photo = _meal_photo(1)
+        original = compute_photo_hash(_to_base64(photo))
+        reupload = compute_photo_hash(_to_base64(photo.resize((480, 480)), quality=60, data_url=True))
+
+        assert hamming_distance(original, reupload) <= 6
+
+    def test_different_photos_are_far_apart(self):
+        first = compute_photo_hash(_to_base64(_meal_photo(1)))
+        second = compute_photo_hash(_to_base64(_meal_photo(2)))
+
+        assert hamming_distance(first, second) > 6
+
+    def test_invalid_image_has_no_hash(self):
+        assert compute_photo_hash(base64.b64encode(b"pas une image" * 20).decode()) is None
+
+
+class TestPhotoDedupIndex:
+    """Tests de l'index par utilisateur et global."""
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_reuses_analysis(self):
+        index = PhotoDedupIndex(max_distance=6, ttl=3600, max_per_user=5, use_global=False, shared=Cache())
+        photo_hash = compute_photo_hash(_to_base64(_meal_photo(1)))
+        await index.add(1, photo_hash, "fr", _analysis(), 0.85, "qwen-vl")
+
+        match = await index.find(1, photo_hash ^ 0b101, "fr")
+
+        assert match.distance == 2
+        assert match.model_used == "qwen-vl"
+        assert FoodAnalysis.from_dict(match.analysis).items[0].name == "Salade niçoise"
+        assert await index.find(1, photo_hash ^ 0xFF, "fr") is None
+
+    @pytest.mark.asyncio
+    async def test_other_users_only_with_global_index(self):
+        shared = Cache()
+        per_user = PhotoDedupIndex(max_distance=6, ttl=3600, max_per_user=5, use_global=False, shared=shared)
+        with_global = PhotoDedupIndex(max_distance=6, ttl=3600, max_per_user=5, use_global=True, shared=shared)
+        await with_global.add(1, 0xABCDEF, "fr", _analysis(), 0.85, "qwen-vl")
+
+        assert await per_user.find(2, 0xABCDEF, "fr") is None
+        assert (await with_global.find(2, 0xABCDEF, "fr")).scope == "global"
+        assert await with_global.find(2, 0xABCDEF, "en") is None
+
+    @pytest.mark.asyncio
+    async def test_user_index_is_bounded_and_expires(self, monkeypatch):
+        index = PhotoDedupIndex(max_distance=0, ttl=60, max_per_user=2, use_global=False, shared=Cache())
+        for photo_hash in (1, 2, 3):
+            await index.add(1, photo_hash << 20, "fr", _analysis(), 0.8, "qwen-vl")
+
+        assert await index.find(1, 1 << 20, "fr") is None
+        assert await index.find(1, 3 << 20, "fr") is not None
+
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        assert await index.find(1, 3 << 20, "fr") is None
+
+    def test_analysis_round_trip(self):
+        analysis = FoodAnalysis.from_dict(_analysis())
+
+        assert analysis.total_calories == 420
+        assert analysis.items[0].source == "usda_verified"
+        assert analysis.to_dict() == _analysis()
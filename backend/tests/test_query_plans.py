@@ -0,0 +1,126 @@
+"""Query-plan regression tests for the per-user time-range queries."""
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+
+from app.database import Base
+from app.models.activity import ActivityLog, WeightLog
+from app.models.food_log import DailyNutrition, FoodItem, FoodLog
+from app.models.subscription import UsageTracking
+from app.models.user import User
+
+# Rows seeded in food_logs (the largest table); other tables get a tenth
+ROWS = int(os.environ.get("QUERY_PLAN_ROWS", 1_000_000))
+USERS = 10_000
+
+SEED = """
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows)
+INSERT INTO {table} ({columns}) SELECT {values} FROM seq
+"""
+
+
+@pytest.fixture(scope="module")
+def plan_engine(tmp_path_factory):
+    """SQLite database created from the models and seeded with ROWS food logs."""
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    engine = create_engine(f"sqlite:///{path}")
+    tables = [
+        User.__table__, FoodLog.__table__, FoodItem.__table__, DailyNutrition.__table__,
+        ActivityLog.__table__, WeightLog.__table__, UsageTracking.__table__,
+    ]
+    Base.metadata.create_all(engine, tables=tables)
+
+    day = f"datetime('2025-01-01', '+' || (n % 365) || ' days')"
+    seeds = [
+        ("food_logs", "user_id, meal_type, meal_date, total_calories", f"n % {USERS}, 'lunch', {day}, 500", ROWS),
+        ("food_items", "food_log_id, name, quantity, unit", "n, 'rice', '100', 'g'", ROWS // 10),
+        ("activity_logs", "user_id, activity_type, duration_minutes, activity_date", f"n % {USERS}, 'walking', 30, {day}", ROWS // 10),
+        ("weight_logs", "user_id, weight_kg, log_date", f"n % {USERS}, 70.0, {day}", ROWS // 10),
+        # One row per (user, day): n -> user n % USERS, day n / USERS
+        ("daily_nutrition", "user_id, date", f"n % {USERS}, datetime('2025-01-01', '+' || (n / {USERS}) || ' days')", ROWS // 10),
+        (
+            "usage_tracking", "user_id, date, vision_analyses, recipe_generations, coach_messages",
+            f"n % {USERS}, date('2025-01-01', '+' || (n / {USERS}) || ' days'), 1, 0, 0", ROWS // 10,
+        ),
+    ]
+    with engine.begin() as conn:
+        for table, columns, values, rows in seeds:
+            conn.execute(text(SEED.format(table=table, columns=columns, values=values)), {"rows": rows})
+        conn.execute(text("ANALYZE"))
+
+    yield engine
+    engine.dispose()
+
+
+def _plan(engine, sql: str, **params) -> str:
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+class TestTimeRangeIndexes:
+    """Test that the hot per-user range queries use the composite indexes."""
+
+    def test_food_logs_by_user_and_day(self, plan_engine):
+        plan = _plan(
+            plan_engine,
+            "SELECT * FROM food_logs WHERE user_id = :user_id "
+            "AND meal_date >= :start AND meal_date <= :end ORDER BY meal_date DESC",
+            user_id=42, start="2025-03-01 00:00:00", end="2025-03-01 23:59:59",
+        )
+        assert "USING INDEX ix_food_logs_user_meal_date (user_id=? AND meal_date>? AND meal_date<?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_food_items_by_log(self, plan_engine):
+        plan = _plan(plan_engine, "SELECT * FROM food_items WHERE food_log_id IN (1, 2, 3)")
+        assert "USING INDEX idx_food_items_log_id" in plan
+
+    def test_daily_nutrition_by_user_and_day(self, plan_engine):
+        plan = _plan(
+            plan_engine,
+            "SELECT * FROM daily_nutrition WHERE user_id = :user_id AND date >= :start AND date <= :end",
+            user_id=42, start="2025-01-05 00:00:00", end="2025-01-05 23:59:59",
+        )
+        # The unique constraint's index serves the lookup
+        assert "USING INDEX sqlite_autoindex_daily_nutrition_1 (user_id=? AND date>? AND date<?)" in plan
+
+    def test_activity_sums_by_user_and_range(self, plan_engine):
+        plan = _plan(
+            plan_engine,
+            "SELECT SUM(duration_minutes), SUM(calories_burned) FROM activity_logs "
+            "WHERE user_id = :user_id AND activity_date >= :start AND activity_date <= :end",
+            user_id=42, start="2025-03-01 00:00:00", end="2025-03-07 23:59:59",
+        )
+        assert "USING INDEX ix_activity_logs_user_activity_date (user_id=? AND activity_date>? AND activity_date<?)" in plan
+
+    def test_weight_chart(self, plan_engine):
+        plan = _plan(
+            plan_engine,
+            "SELECT log_date, weight_kg FROM weight_logs WHERE user_id = :user_id "
+            "AND log_date >= :start ORDER BY log_date",
+            user_id=42, start="2025-01-01 00:00:00",
+        )
+        assert "USING INDEX ix_weight_logs_user_log_date (user_id=? AND log_date>?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_usage_tracking_by_user_and_date(self, plan_engine):
+        plan = _plan(
+            plan_engine,
+            "SELECT * FROM usage_tracking WHERE user_id = :user_id AND date = :day",
+            user_id=42, day="2025-01-05",
+        )
+        assert "USING INDEX sqlite_autoindex_usage_tracking_1 (user_id=? AND date=?)" in plan
+
+
+class TestDailyNutritionUniqueness:
+    """Test the one-row-per-user-and-day constraint."""
+
+    def test_duplicate_day_rejected(self, plan_engine):
+        with plan_engine.connect() as conn:
+            with pytest.raises(IntegrityError):
+                conn.execute(text(
+                    "INSERT INTO daily_nutrition (user_id, date) "
+                    "VALUES (1, datetime('2025-01-01', '+0 days'))"
+                ))
@@ -0,0 +1,146 @@
+"""Tests du rate limiting (token bucket pondéré, identifiant utilisateur)."""
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from jose import jwt
+from starlette.requests import Request
+
+from app.api import deps
+from app.api.deps import get_current_user, rate_limited
+from app.config import get_settings
+from app.core import rate_limiter
+from app.core.rate_limiter import (
+    COACH_LIMIT,
+    RECIPE_LIMIT,
+    VISION_LIMIT,
+    CostClass,
+    TokenBucketLimiter,
+    get_user_identifier,
+)
+from app.models.user import User
+
+settings = get_settings()
+
+
+def _request(headers: dict | None = None) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("10.0.0.7", 1234),
+    })
+
+
+class TestTokenBucket:
+    """Tests du bucket mémoire (fallback sans Redis)."""
+
+    @pytest.mark.asyncio
+    async def test_costs_share_one_budget(self):
+        limiter = TokenBucketLimiter(tokens_per_minute=60, burst=60)
+
+        results = [(await limiter.acquire("user:1", VISION_LIMIT))[0] for _ in range(11)]
+        assert results == [True] * 10 + [False]
+        # Le budget IA est commun: plus de place pour une recette
+        assert (await limiter.acquire("user:1", RECIPE_LIMIT))[0] is False
+        # Autre utilisateur, autre bucket
+        assert (await limiter.acquire("user:2", RECIPE_LIMIT))[0] is True
+
+    @pytest.mark.asyncio
+    async def test_tokens_refill_continuously(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now)
+        limiter = TokenBucketLimiter(tokens_per_minute=60, burst=6)
+
+        assert (await limiter.acquire("user:1", VISION_LIMIT))[0] is True
+        allowed, retry_after = await limiter.acquire("user:1", COACH_LIMIT)
+        assert allowed is False
+        assert retry_after == pytest.approx(3.0)
+
+        now += 3.0
+        assert (await limiter.acquire("user:1", COACH_LIMIT))[0] is True
+
+    @pytest.mark.asyncio
+    async def test_cost_above_capacity_is_capped(self):
+        limiter = TokenBucketLimiter(tokens_per_minute=60, burst=5)
+
+        assert (await limiter.acquire("user:1", CostClass("huge", 100)))[0] is True
+
+    @pytest.mark.asyncio
+    async def test_redis_error_falls_back_to_local_bucket(self):
+        limiter = TokenBucketLimiter(tokens_per_minute=60, burst=60, redis_url="redis://localhost:1/0")
+
+        assert (await limiter.acquire("user:1", VISION_LIMIT))[0] is True
+        assert limiter.get_stats()["redis_errors"] == 1
+        assert limiter.get_stats()["allowed"] == 1
+
+
+class TestUserIdentifier:
+    """Tests de la clé du rate limiting."""
+
+    def test_prefers_request_state(self):
+        request = _request()
+        request.state.user_id = 42
+
+        assert get_user_identifier(request) == "user:42"
+
+    def test_uses_valid_bearer_token_subject(self):
+        token = jwt.encode({"sub": "a@example.com", "type": "access"}, settings.SECRET_KEY,
+                           algorithm=settings.ALGORITHM)
+
+        assert get_user_identifier(_request({"Authorization": f"Bearer {token}"})).startswith("user:")
+
+    def test_falls_back_to_ip(self):
+        forged = jwt.encode({"sub": "a@example.com"}, "wrong-secret", algorithm=settings.ALGORITHM)
+
+        assert get_user_identifier(_request({"Authorization": f"Bearer {forged}"})) == "10.0.0.7"
+        assert get_user_identifier(_request()) == "10.0.0.7"
+
+
+class TestRateLimitedDependency:
+    """Tests de la dépendance FastAPI."""
+
+    @pytest.mark.asyncio
+    async def test_returns_429_with_retry_after(self, monkeypatch):
+        limiter = TokenBucketLimiter(tokens_per_minute=60, burst=12)
+        monkeypatch.setattr(deps, "get_ai_limiter", lambda: limiter)
+
+        app = FastAPI()
+        app.dependency_overrides[get_current_user] = lambda: User(id=7, email="u@example.com")
+
+        @app.post("/recipe", dependencies=[Depends(rate_limited(RECIPE_LIMIT))])
+        async def recipe():
+            return {"ok": True}
+
+        @app.get("/read")
+        async def read(user: User = Depends(get_current_user)):
+            return {"ok": True}
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.post("/recipe")).status_code == 200
+            denied = await client.post("/recipe")
+            # Les lectures ne consomment pas le budget IA
+            assert (await client.get("/read")).status_code == 200
+
+        assert denied.status_code == 429
+        assert denied.json()["detail"]["error"] == "rate_limit_exceeded"
+        assert denied.headers["Retry-After"] == "12"
+
+    def test_only_llm_routes_draw_from_ai_budget(self):
+        from app.api.v1 import api_router
+        from app.core.rate_limiter import MEAL_PLAN_LIMIT
+
+        def cost_classes(path: str, method: str) -> list[CostClass]:
+            route = next(r for r in api_router.routes if r.path == f"/api/v1{path}" and method in r.methods)
+            return [
+                cell.cell_contents
+                for dep in route.dependencies
+                for cell in (dep.dependency.__closure__ or ())
+                if isinstance(cell.cell_contents, CostClass)
+            ]
+
+        assert cost_classes("/meal-plans/generate", "POST") == [MEAL_PLAN_LIMIT]
+        assert cost_classes("/meal-plans/preview", "POST") == [MEAL_PLAN_LIMIT]
+        assert cost_classes("/dashboard/coach", "GET") == [COACH_LIMIT]
+        # Conseils déterministes: pas d'appel LLM, pas de coût IA
+        assert cost_classes("/coaching/tips", "GET") == []
@@ -0,0 +1,191 @@
+"""Tests du tier effectif (requête jointe, mémorisation, cache versionné)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core import cache as cache_module
+from app.core.cache import (
+    Cache,
+    MemoryCache,
+    RedisCache,
+    bump_user_tier_epoch,
+    get_user_tier_epoch,
+    tier_cache_key,
+)
+from app.api.v1.webhooks import refresh_user_tier
+from app.core import user_cache as user_cache_module
+from app.core.user_cache import UserPrincipalCache
+from app.database import Base
+from app.models.subscription import Subscription, SubscriptionStatus, SubscriptionTier
+from app.models.user import User
+from app.services.subscription import SubscriptionService, compute_tier_state, tier_cache_ttl
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    cache = Cache.__new__(Cache)
+    cache.backend = MemoryCache()
+    monkeypatch.setattr(cache_module, "_cache_instance", cache)
+    return cache
+
+
+async def _session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tier.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[User.__table__, Subscription.__table__])
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+def _count_selects(engine) -> list:
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    return statements
+
+
+def _user(**kwargs) -> User:
+    return User(email="tier@example.com", hashed_password="x", name="Tier", **kwargs)
+
+
+class TestComputeTierState:
+    """Tests des règles subscription payée > trial > free."""
+
+    def test_active_trial_is_premium(self):
+        now = datetime(2026, 10, 17, tzinfo=timezone.utc)
+        user = _user(subscription_tier="free", trial_ends_at=datetime(2026, 10, 20, 12))
+
+        state = compute_tier_state(user, None, now=now)
+
+        assert (state.tier, state.is_trial, state.days_remaining) == ("premium", True, 3)
+
+    def test_expired_trial_falls_back_to_user_tier(self):
+        now = datetime(2026, 10, 17, tzinfo=timezone.utc)
+        user = _user(subscription_tier="free", trial_ends_at=datetime(2026, 10, 1))
+
+        state = compute_tier_state(user, None, now=now)
+
+        assert (state.tier, state.is_trial, state.days_remaining) == ("free", False, 0)
+
+    def test_paid_subscription_overrides_trial(self):
+        user = _user(subscription_tier="pro", trial_ends_at=datetime.now(timezone.utc) + timedelta(days=5))
+        subscription = Subscription(tier=SubscriptionTier.PRO, status=SubscriptionStatus.ACTIVE)
+
+        state = compute_tier_state(user, subscription)
+
+        assert (state.tier, state.is_trial, state.days_remaining) == ("pro", False, None)
+
+    def test_unknown_user_is_free(self):
+        assert compute_tier_state(None, None).tier == "free"
+
+
+class TestTierCacheTTL:
+    """Tests du TTL du tier en cache."""
+
+    def test_trial_ttl_capped_at_trial_end(self):
+        now = datetime(2026, 10, 17, tzinfo=timezone.utc)
+        user = _user(subscription_tier="free", trial_ends_at=datetime(2026, 10, 17, 0, 10))
+        cache = Cache.__new__(Cache)
+        cache.backend = RedisCache.__new__(RedisCache)
+
+        state = compute_tier_state(user, None, now=now)
+
+        assert tier_cache_ttl(state, cache, now=now) == 600
+        assert tier_cache_ttl(compute_tier_state(_user(subscription_tier="pro"), None), cache) == 6 * 3600
+
+    def test_memory_backend_keeps_short_ttl(self, memory_cache):
+        assert tier_cache_ttl(compute_tier_state(_user(subscription_tier="pro"), None), memory_cache) == 300
+
+
+class TestSubscriptionService:
+    """Tests de get_tier_state / get_effective_tier."""
+
+    @pytest.mark.asyncio
+    async def test_tier_and_trial_info_use_one_query(self, tmp_path, memory_cache):
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            user = _user(subscription_tier="free", trial_ends_at=datetime.now(timezone.utc) + timedelta(days=3))
+            db.add(user)
+            await db.flush()
+            db.add(Subscription(user_id=user.id, tier=SubscriptionTier.FREE, status=SubscriptionStatus.ACTIVE))
+            await db.commit()
+
+        selects = _count_selects(engine)
+        async with session_maker() as db:
+            assert await SubscriptionService(db).get_effective_tier(user.id) == "premium"
+            # Autre instance, même requête HTTP (même session)
+            service = SubscriptionService(db)
+            info = await service.get_trial_info(user.id)
+            assert await service.is_trial_active(user.id) is True
+            assert await service.get_trial_days_remaining(user.id) == 2
+
+        assert info["is_trial"] is True
+        assert info["days_remaining"] == 2
+        assert len(selects) == 1
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_epoch_bump_invalidates_cached_tier(self, tmp_path, memory_cache):
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            user = _user(subscription_tier="free")
+            db.add(user)
+            await db.commit()
+            assert await SubscriptionService(db).get_effective_tier(user.id) == "free"
+
+            user.subscription_tier = "pro"
+            await db.commit()
+
+        async with session_maker() as db:
+            # Sans changement d'époque, le tier en cache est servi
+            assert await SubscriptionService(db).get_effective_tier(user.id) == "free"
+
+        await bump_user_tier_epoch(user.id)
+
+        async with session_maker() as db:
+            assert await SubscriptionService(db).get_effective_tier(user.id) == "pro"
+        epoch = await get_user_tier_epoch(user.id)
+        assert await memory_cache.get(tier_cache_key(user.id, epoch)) == "pro"
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_subscription_update_invalidates_tier(self, tmp_path, memory_cache):
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            user = _user(subscription_tier="free")
+            db.add(user)
+            await db.commit()
+
+            service = SubscriptionService(db)
+            assert await service.get_effective_tier(user.id) == "free"
+            await service.create_or_update_subscription(user.id, tier="premium")
+            assert await service.get_effective_tier(user.id) == "premium"
+            await db.commit()
+
+        async with session_maker() as db:
+            assert await SubscriptionService(db).get_effective_tier(user.id) == "premium"
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_principal_invalidated_again_after_commit(self, tmp_path, memory_cache, monkeypatch):
+        principals = UserPrincipalCache(max_entries=10, shared=memory_cache)
+        monkeypatch.setattr(user_cache_module, "_user_cache", principals)
+        engine, session_maker = await _session_maker(tmp_path)
+        async with session_maker() as db:
+            user = _user(subscription_tier="free")
+            db.add(user)
+            await db.commit()
+
+            await SubscriptionService(db).create_or_update_subscription(user.id, tier="pro")
+            # Requête concurrente avant le commit: remet en cache l'ancien tier
+            await principals.set(_user(id=user.id, subscription_tier="free"))
+            await refresh_user_tier(user.id, db)
+
+        assert await principals.get(user.email) is None
+        assert "principal_invalidations" not in db.info
+        await engine.dispose()
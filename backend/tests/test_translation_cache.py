@@ -0,0 +1,109 @@
+"""Tests pour le cache des traductions d'aliments."""
+import time
+
+import pytest
+
+from app.core.cache import Cache, LRUCache
+from app.services.translation_cache import TranslationCache
+
+
+@pytest.fixture
+def shared():
+    return Cache()
+
+
+class TestLRUCache:
+    """Tests pour le LRU borné avec TTL."""
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(max_entries=2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        assert lru.get("a") == 1
+        assert lru.get("b") is None
+        assert len(lru) == 2
+
+    def test_ttl_expiration(self, monkeypatch):
+        lru = LRUCache(max_entries=10, ttl=60)
+        lru.set("a", 1)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+
+        assert lru.get("a") is None
+        assert len(lru) == 0
+
+
+class TestTranslationCache:
+    """Tests pour TranslationCache."""
+
+    @pytest.mark.asyncio
+    async def test_static_pairs_are_warm(self, shared):
+        cache = TranslationCache("test", shared=shared)
+        cache.warm({"fr": {"poulet": "chicken"}})
+
+        assert await cache.get("  Poulet ", "fr") == "chicken"
+        assert await cache.get("poulet", "de") is None
+        assert cache.stats.static_hits == 1
+        assert cache.stats.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_set_then_memory_hit(self, shared):
+        cache = TranslationCache("test", shared=shared)
+        await cache.set("鸡蛋面", "zh", "en", "egg noodles")
+
+        assert await cache.get("鸡蛋面", "zh") == "egg noodles"
+        assert cache.stats.memory_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_between_workers(self, shared):
+        await TranslationCache("test", shared=shared).set("tajine", "ar", "en", "tagine")
+        other_worker = TranslationCache("test", shared=shared)
+
+        assert await other_worker.get("Tajine", "ar") == "tagine"
+        assert await other_worker.get("tajine", "ar") == "tagine"
+        assert other_worker.stats.shared_hits == 1
+        assert other_worker.stats.memory_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_namespaces_are_isolated(self, shared):
+        await TranslationCache("nllb", shared=shared).set("riz", "fr", "en", "rice")
+        assert await TranslationCache("llm", shared=shared).get("riz", "fr") is None
+
+    @pytest.mark.asyncio
+    async def test_size_cap(self, shared):
+        cache = TranslationCache("test", max_entries=3, shared=shared, use_shared=False)
+        for i in range(10):
+            await cache.set(f"aliment {i}", "fr", "en", f"food {i}")
+
+        assert cache.get_stats()["size"] == 3
+        assert await cache.get("aliment 0", "fr") is None
+
+    @pytest.mark.asyncio
+    async def test_clear_keeps_static_pairs(self, shared):
+        cache = TranslationCache("test", shared=shared)
+        cache.warm({"fr": {"pomme": "apple"}})
+        await cache.set("poire", "fr", "en", "pear")
+
+        await cache.clear()
+
+        assert await cache.get("poire", "fr") is None
+        assert await cache.get("pomme", "fr") == "apple"
+
+    @pytest.mark.asyncio
+    async def test_stats_hit_rate(self, shared):
+        cache = TranslationCache("test", shared=shared)
+        cache.warm({"fr": {"pomme": "apple"}})
+        await cache.set("poire", "fr", "en", "pear")
+
+        await cache.get("pomme", "fr")
+        await cache.get("poire", "fr")
+        await cache.get("kiwi", "fr")
+        await cache.get("mangue", "fr")
+
+        stats = cache.get_stats()
+        assert stats["hit_rate"] == 0.5
+        assert stats["static_entries"] == 1
+        assert stats["languages_cached"] == ["fr"]
@@ -0,0 +1,188 @@
+"""Tests du moteur de quotas d'usage (check-and-increment atomique)."""
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models.subscription import UsageTracking
+from app.models.user import User
+from app.services import subscription as subscription_module
+from app.services.subscription import SubscriptionService
+from app.services.usage_quota import MemoryQuotaStore, UsageQuotaEngine, bucket_start, bucket_ttl, quota_key
+
+
+async def _session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'usage.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[User.__table__, UsageTracking.__table__])
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+def _db_count(value: int, delay: float = 0.0):
+    async def load():
+        await asyncio.sleep(delay)
+        return value
+    return load
+
+
+class TestBuckets:
+    """Tests des buckets jour / semaine."""
+
+    def test_week_bucket_starts_on_monday(self):
+        assert bucket_start("week", date(2026, 10, 17)) == date(2026, 10, 12)
+        assert bucket_start("day", date(2026, 10, 17)) == date(2026, 10, 17)
+        assert quota_key(1, "recipe_generations", "week", date(2026, 10, 14)) == \
+            quota_key(1, "recipe_generations", "week", date(2026, 10, 18))
+        assert quota_key(1, "vision_analyses", "day", date(2026, 10, 14)) != \
+            quota_key(1, "vision_analyses", "day", date(2026, 10, 15))
+
+    def test_ttl_covers_remaining_period(self):
+        assert 3600 < bucket_ttl("day") <= 24 * 3600 + 3600
+        assert bucket_ttl("week") >= bucket_ttl("day")
+
+
+class TestUsageQuotaEngine:
+    """Tests de consume / refund sur le stockage mémoire."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_cannot_exceed_limit(self):
+        engine = UsageQuotaEngine(store=MemoryQuotaStore())
+
+        results = await asyncio.gather(*(
+            engine.consume(1, "vision_analyses", 3, "day", _db_count(0, delay=0.01)) for _ in range(10)
+        ))
+
+        assert sum(allowed for allowed, _ in results) == 3
+        assert engine.pending_usage(1, "vision_analyses", date.today()) == 3
+
+    @pytest.mark.asyncio
+    async def test_bucket_seeded_from_database_count(self):
+        engine = UsageQuotaEngine(store=MemoryQuotaStore())
+
+        assert await engine.consume(1, "vision_analyses", 3, "day", _db_count(2)) == (True, 2)
+        assert await engine.consume(1, "vision_analyses", 3, "day", _db_count(2)) == (False, 3)
+
+    @pytest.mark.asyncio
+    async def test_refund_frees_the_slot(self):
+        engine = UsageQuotaEngine(store=MemoryQuotaStore())
+        await engine.consume(1, "coach_messages", 1, "day", _db_count(0))
+
+        await engine.refund(1, "coach_messages", "day")
+
+        assert await engine.consume(1, "coach_messages", 1, "day", _db_count(0)) == (True, 0)
+        assert engine.pending_usage(1, "coach_messages", date.today()) == 1
+
+    @pytest.mark.asyncio
+    async def test_unlimited_is_still_counted(self):
+        engine = UsageQuotaEngine(store=MemoryQuotaStore())
+        for _ in range(5):
+            assert (await engine.consume(1, "vision_analyses", -1, "day", _db_count(0)))[0]
+
+        assert await engine.peek(1, "vision_analyses", "day", _db_count(0)) == 5
+
+    @pytest.mark.asyncio
+    async def test_store_error_returns_none(self):
+        class BrokenStore(MemoryQuotaStore):
+            async def consume(self, key, limit, cost):
+                raise ConnectionError("redis down")
+
+        engine = UsageQuotaEngine(store=BrokenStore())
+
+        assert await engine.consume(1, "vision_analyses", 3, "day", _db_count(0)) is None
+        assert engine.get_stats()["store_errors"] == 1
+
+
+class TestFlush:
+    """Tests de l'écriture groupée dans usage_tracking."""
+
+    @pytest.mark.asyncio
+    async def test_flush_upserts_batched_counts(self, tmp_path):
+        db_engine, session_maker = await _session_maker(tmp_path)
+        engine = UsageQuotaEngine(store=MemoryQuotaStore())
+        for _ in range(2):
+            await engine.consume(1, "vision_analyses", -1, "day", _db_count(0))
+        await engine.consume(1, "recipe_generations", -1, "week", _db_count(0))
+        await engine.consume(2, "coach_messages", -1, "day", _db_count(0))
+
+        assert await engine.flush(session_maker) == 2
+        await engine.consume(1, "vision_analyses", -1, "day", _db_count(0))
+        assert await engine.flush(session_maker) == 1
+        assert await engine.flush(session_maker) == 0
+
+        async with session_maker() as db:
+            rows = {
+                row.user_id: row
+                for row in (await db.execute(select(UsageTracking))).scalars()
+            }
+        assert (rows[1].vision_analyses, rows[1].recipe_generations, rows[1].coach_messages) == (3, 1, 0)
+        assert rows[2].coach_messages == 1
+        assert engine.pending_usage(1, "vision_analyses", date.today()) == 0
+        await db_engine.dispose()
+
+
+class TestSubscriptionService:
+    """Tests de consume_usage / release_usage."""
+
+    @pytest.mark.asyncio
+    async def test_consume_release_and_status(self, tmp_path, monkeypatch):
+        db_engine, session_maker = await _session_maker(tmp_path)
+        engine = UsageQuotaEngine(store=MemoryQuotaStore())
+        monkeypatch.setattr(subscription_module, "get_usage_quota_engine", lambda: engine)
+
+        async def free_tier(self, user_id):
+            return "free"
+
+        monkeypatch.setattr(SubscriptionService, "get_user_tier", free_tier)
+
+        async with session_maker() as db:
+            db.add(UsageTracking(user_id=1, date=date.today(), vision_analyses=1,
+                                 recipe_generations=0, coach_messages=0))
+            await db.commit()
+
+            service = SubscriptionService(db)
+            assert await service.consume_usage(1, "vision_analyses") == (True, 1, 3)
+            assert await service.consume_usage(1, "vision_analyses") == (True, 2, 3)
+            assert await service.consume_usage(1, "vision_analyses") == (False, 3, 3)
+            assert await service.check_limit(1, "vision_analyses") == (False, 3, 3)
+
+            await service.release_usage(1, "vision_analyses")
+            assert await service.check_limit(1, "vision_analyses") == (True, 2, 3)
+
+            status = await service.get_usage_status(1)
+            assert status["usage"] == {"vision_analyses": 2, "recipe_generations": 0, "coach_messages": 0}
+
+        await engine.flush(session_maker)
+        async with session_maker() as db:
+            usage = (await db.execute(select(UsageTracking))).scalar_one()
+            assert usage.vision_analyses == 2
+        await db_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_without_redis_limit_is_shared_across_workers(self, tmp_path, monkeypatch):
+        db_engine, session_maker = await _session_maker(tmp_path)
+        monkeypatch.setattr(subscription_module.settings, "REDIS_URL", "")
+        workers = [UsageQuotaEngine(), UsageQuotaEngine()]
+        assert workers[0].store is None
+        calls = iter(range(100))
+        monkeypatch.setattr(subscription_module, "get_usage_quota_engine", lambda: workers[next(calls) % 2])
+
+        async def free_tier(self, user_id):
+            return "free"
+
+        monkeypatch.setattr(SubscriptionService, "get_user_tier", free_tier)
+
+        results = []
+        for _ in range(4):
+            async with session_maker() as db:
+                results.append(await SubscriptionService(db).consume_usage(1, "vision_analyses"))
+        async with session_maker() as db:
+            await SubscriptionService(db).release_usage(1, "vision_analyses")
+        async with session_maker() as db:
+            status = await SubscriptionService(db).get_usage_status(1)
+
+        assert results == [(True, 0, 3), (True, 1, 3), (True, 2, 3), (False, 3, 3)]
+        assert status["usage"]["vision_analyses"] == 2
+        await db_engine.dispose()
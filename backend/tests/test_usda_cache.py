@@ -0,0 +1,211 @@
+"""Tests pour le cache des recherches USDA."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.cache import Cache
+from app.services import nutrition_database
+from app.services.nutrition_database import USDANutritionService
+from app.services.usda_cache import USDALookupCache, normalize_query
+
+
+def _nutrition(name: str) -> dict:
+    return {
+        "food_name": name,
+        "calories": 130.0,
+        "protein": 2.7,
+        "carbs": 28.0,
+        "fat": 0.3,
+        "fiber": 0.4,
+        "source": "usda",
+        "confidence": 0.95,
+        "portion_size_g": 100.0,
+    }
+
+
+class CountingFetch:
+    """Faux appel USDA comptant les requêtes."""
+
+    def __init__(self, results=None, delay: float = 0.0, error: Exception | None = None):
+        self.calls: list[tuple[str, int]] = []
+        self.results = results
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self, query: str, max_results: int) -> list[dict]:
+        self.calls.append((query, max_results))
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [_nutrition(query)] if self.results is None else self.results
+
+
+@pytest.fixture
+def shared():
+    return Cache()
+
+
+class TestNormalizeQuery:
+    """Tests pour la normalisation des requêtes."""
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("White Rice", "white rice"),
+            ("  white   rice ", "white rice"),
+            ("Chicken Breasts!", "chicken breast"),
+            ("tomatoes", "tomato"),
+            ("berries", "berry"),
+            ("cookies", "cookie"),
+            ("peaches", "peach"),
+            ("hummus", "hummus"),
+            ("swiss cheese", "swiss cheese"),
+            ("eggs", "egg"),
+        ],
+    )
+    def test_normalize(self, query, expected):
+        assert normalize_query(query) == expected
+
+
+class TestUSDALookupCache:
+    """Tests pour le cache à deux niveaux."""
+
+    @pytest.mark.asyncio
+    async def test_variants_share_one_upstream_call(self, shared):
+        cache = USDALookupCache(shared=shared)
+        fetch = CountingFetch()
+
+        first = await cache.get_or_fetch("White Rice", 1, fetch)
+        second = await cache.get_or_fetch("white  rices", 1, fetch)
+
+        assert fetch.calls == [("White Rice", 1)]
+        assert first == second
+        assert cache.stats.memory_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_original_query_is_sent_upstream(self, shared):
+        cache = USDALookupCache(shared=shared)
+        fetch = CountingFetch()
+
+        await cache.get_or_fetch(" 2% milk ", 1, fetch)
+
+        assert fetch.calls == [("2% milk", 1)]
+
+    @pytest.mark.asyncio
+    async def test_shared_tier_fills_memory(self, shared):
+        fetch = CountingFetch()
+        await USDALookupCache(shared=shared).get_or_fetch("apple", 1, fetch)
+
+        # Nouveau worker: LRU vide, cache partagé rempli
+        other = USDALookupCache(shared=shared)
+        await other.get_or_fetch("apple", 1, fetch)
+        await other.get_or_fetch("apple", 1, fetch)
+
+        assert len(fetch.calls) == 1
+        assert other.stats.shared_hits == 1
+        assert other.stats.memory_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_negative_results_use_short_ttl(self, shared, monkeypatch):
+        cache = USDALookupCache(ttl=1000, negative_ttl=5, shared=shared)
+        ttls = []
+        original_set = shared.set
+
+        async def spy_set(key, value, ttl=300):
+            ttls.append(ttl)
+            return await original_set(key, value, ttl)
+
+        monkeypatch.setattr(shared, "set", spy_set)
+        fetch = CountingFetch(results=[])
+
+        assert await cache.get_or_fetch("unknown dish", 1, fetch) == []
+        assert await cache.get_or_fetch("unknown dish", 1, fetch) == []
+
+        assert len(fetch.calls) == 1
+        assert ttls == [5]
+        assert cache.stats.negative_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_are_coalesced(self, shared):
+        cache = USDALookupCache(shared=shared)
+        fetch = CountingFetch(delay=0.05)
+
+        results = await asyncio.gather(*(cache.get_or_fetch("banana", 1, fetch) for _ in range(10)))
+
+        assert len(fetch.calls) == 1
+        assert all(r == results[0] for r in results)
+        assert cache.stats.coalesced == 9
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self, shared):
+        cache = USDALookupCache(shared=shared)
+        fetch = CountingFetch(delay=0.05)
+
+        leader = asyncio.create_task(asyncio.wait_for(cache.get_or_fetch("kiwi", 1, fetch), timeout=0.01))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_fetch("kiwi", 1, fetch))
+
+        with pytest.raises(asyncio.TimeoutError):
+            await leader
+        assert await follower == [_nutrition("kiwi")]
+        assert len(fetch.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self, shared):
+        cache = USDALookupCache(shared=shared)
+        failing = CountingFetch(delay=0.01, error=httpx.ConnectError("down"))
+
+        results = await asyncio.gather(
+            *(cache.get_or_fetch("pear", 1, failing) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, httpx.ConnectError) for r in results)
+        assert len(failing.calls) == 1
+
+        fetch = CountingFetch()
+        assert await cache.get_or_fetch("pear", 1, fetch) == [_nutrition("pear")]
+        assert len(fetch.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, shared):
+        cache = USDALookupCache(max_entries=2, shared=shared)
+        fetch = CountingFetch()
+
+        for query in ("apple", "pear", "plum"):
+            await cache.get_or_fetch(query, 1, fetch)
+
+        assert len(cache) == 2
+        assert cache._memory.get(cache.make_key("apple", 1)) is None
+
+
+class TestSearchFoodCaching:
+    """Tests pour USDANutritionService.search_food avec cache."""
+
+    @pytest.mark.asyncio
+    async def test_search_food_returns_fresh_objects(self, shared, monkeypatch):
+        cache = USDALookupCache(shared=shared)
+        monkeypatch.setattr(nutrition_database, "get_usda_cache", lambda: cache)
+        fetch = CountingFetch()
+        service = USDANutritionService()
+        service.api_key = "test"
+        monkeypatch.setattr(service, "_fetch_foods", fetch)
+
+        first = await service.search_food("Rice", max_results=1)
+        first[0].calories *= 2  # search_nutrition ajuste les objets en place
+        second = await service.search_food("rice", max_results=1)
+
+        assert len(fetch.calls) == 1
+        assert second[0].calories == 130.0
+        assert second[0].food_name == "Rice"
+
+    @pytest.mark.asyncio
+    async def test_search_food_upstream_error_returns_empty(self, shared, monkeypatch):
+        cache = USDALookupCache(shared=shared)
+        monkeypatch.setattr(nutrition_database, "get_usda_cache", lambda: cache)
+        service = USDANutritionService()
+        service.api_key = "test"
+        monkeypatch.setattr(service, "_fetch_foods", CountingFetch(error=httpx.ConnectError("down")))
+
+        assert await service.search_food("rice") == []
+        assert len(cache) == 0
@@ -0,0 +1,181 @@
+"""Tests pour le miroir local USDA (SQLite + FTS5)."""
+import json
+
+import pytest
+
+from app.services import nutrition_database
+from app.services.nutrition_database import USDANutritionService
+from app.services.usda_local import (
+    LocalFood,
+    USDALocalStore,
+    build_match_query,
+    iter_csv_foods,
+    iter_json_foods,
+    parse_json_food,
+)
+
+
+def _bulk_food(fdc_id: int, description: str, kcal: float = 100.0, protein: float = 5.0) -> dict:
+    """Aliment au format export JSON en masse USDA."""
+    return {
+        "fdcId": fdc_id,
+        "description": description,
+        "dataType": "SR Legacy",
+        "publicationDate": "4/1/2019",
+        "foodNutrients": [
+            {"nutrient": {"id": 1062, "number": "268", "unitName": "kJ"}, "amount": kcal * 4.184},
+            {"nutrient": {"id": 1008, "number": "208", "unitName": "kcal"}, "amount": kcal},
+            {"nutrient": {"id": 1003, "number": "203", "unitName": "g"}, "amount": protein},
+            {"nutrient": {"id": 1004, "number": "204", "unitName": "g"}, "amount": 1.0},
+            {"nutrient": {"id": 1005, "number": "205", "unitName": "g"}, "amount": 20.0},
+        ],
+    }
+
+
+FOODS = [
+    LocalFood(1, "Rice, white, long-grain, regular, cooked", 130, 2.7, 28.2, 0.3, 0.4),
+    LocalFood(2, "Rice, brown, long-grain, cooked", 123, 2.7, 25.6, 1.0, 1.6),
+    LocalFood(3, "Chicken, broilers or fryers, breast, meat only, cooked, roasted", 165, 31.0, 0.0, 3.6),
+    LocalFood(4, "Apples, raw, with skin", 52, 0.3, 13.8, 0.2, 2.4),
+    LocalFood(5, "Crème fraîche", 340, 2.4, 2.8, 36.0),
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "usda.db"
+    with USDALocalStore(path, read_only=False) as store:
+        store.upsert_foods(FOODS, release="test")
+    return path
+
+
+class TestParsing:
+    """Tests pour le parsing des exports USDA."""
+
+    def test_parse_bulk_json_food_ignores_kj(self):
+        food = parse_json_food(_bulk_food(10, "Banana, raw", kcal=89, protein=1.1))
+        assert food.calories == 89
+        assert food.protein == 1.1
+        assert food.carbs == 20.0
+        assert food.fiber == 0.0
+
+    def test_parse_api_format(self):
+        food = parse_json_food({
+            "fdcId": 11,
+            "description": "Egg, whole",
+            "foodNutrients": [
+                {"nutrientId": 1008, "nutrientNumber": "208", "unitName": "KCAL", "value": 143},
+                {"nutrientId": 1003, "nutrientNumber": "203", "unitName": "G", "value": 12.6},
+            ],
+        })
+        assert (food.calories, food.protein) == (143, 12.6)
+
+    def test_atwater_energy_fallback(self):
+        food = parse_json_food({
+            "fdcId": 12,
+            "description": "Hummus",
+            "foodNutrients": [{"nutrient": {"id": 2047, "number": "957"}, "amount": 229}],
+        })
+        assert food.calories == 229
+
+    def test_zero_calorie_food_is_kept(self):
+        food = parse_json_food(_bulk_food(14, "Beverages, water, tap", kcal=0, protein=0))
+        assert food is not None
+        assert (food.calories, food.protein) == (0, 0)
+
+    def test_food_without_energy_is_skipped(self):
+        assert parse_json_food({"fdcId": 13, "description": "Water", "foodNutrients": []}) is None
+
+    def test_iter_json_foods(self, tmp_path):
+        path = tmp_path / "sr_legacy.json"
+        path.write_text(json.dumps({"SRLegacyFoods": [_bulk_food(1, "A"), _bulk_food(2, "B")]}))
+        assert [food.fdc_id for food in iter_json_foods(path)] == [1, 2]
+
+    def test_iter_csv_foods(self, tmp_path):
+        (tmp_path / "food.csv").write_text(
+            '"fdc_id","data_type","description","food_category_id","publication_date"\n'
+            '"1","foundation_food","Kale, raw","11","2019-04-01"\n'
+            '"2","foundation_food","No energy","11","2019-04-01"\n'
+        )
+        (tmp_path / "food_nutrient.csv").write_text(
+            '"id","fdc_id","nutrient_id","amount"\n'
+            '"1","1","1008","35"\n'
+            '"2","1","1003","2.9"\n'
+            '"3","2","1003","1.0"\n'
+        )
+        foods = list(iter_csv_foods(tmp_path))
+        assert len(foods) == 1
+        assert (foods[0].description, foods[0].calories, foods[0].protein) == ("Kale, raw", 35.0, 2.9)
+
+
+class TestUSDALocalStore:
+    """Tests pour la recherche et le chargement incrémental."""
+
+    def test_build_match_query_escapes_tokens(self):
+        assert build_match_query('chicken "breast') == '"chicken" AND "breast"*'
+        assert build_match_query("!!") is None
+
+    def test_search_ranks_relevant_food(self, db_path):
+        with USDALocalStore(db_path) as store:
+            results = store.search("white rice", max_results=1)
+            assert results[0]["food_name"].startswith("Rice, white")
+            assert results[0]["calories"] == 130
+            assert results[0]["source"] == "usda"
+
+    def test_search_stemming_and_diacritics(self, db_path):
+        with USDALocalStore(db_path) as store:
+            assert store.search("apple")[0]["food_name"].startswith("Apples")
+            assert store.search("creme fraiche")[0]["food_name"] == "Crème fraîche"
+
+    def test_search_falls_back_to_any_word(self, db_path):
+        with USDALocalStore(db_path) as store:
+            results = store.search("roasted chicken sandwich")
+            assert results[0]["food_name"].startswith("Chicken")
+            assert store.search("zzzz") == []
+
+    def test_search_is_deterministic(self, db_path):
+        with USDALocalStore(db_path) as store:
+            assert store.search("rice", 5) == store.search("rice", 5)
+
+    def test_incremental_upsert(self, db_path):
+        changed = LocalFood(4, "Apples, raw, with skin", 55, 0.3, 13.8, 0.2, 2.4)
+        new = LocalFood(6, "Banana, raw", 89, 1.1, 22.8, 0.3, 2.6)
+        with USDALocalStore(db_path, read_only=False) as store:
+            stats = store.upsert_foods([*FOODS[:3], changed, new, new], release="next")
+
+            assert stats.as_dict() == {"inserted": 1, "updated": 1, "unchanged": 3, "skipped": 1}
+            assert store.count() == 6
+            assert store.get(4).calories == 55
+            assert store.get_meta("release") == "next"
+            assert store.search("banana")[0]["food_name"] == "Banana, raw"
+
+    def test_renamed_food_is_reindexed(self, db_path):
+        with USDALocalStore(db_path, read_only=False) as store:
+            store.upsert_foods([LocalFood(2, "Quinoa, cooked", 120, 4.4, 21.3, 1.9, 2.8)])
+            assert [r["food_name"] for r in store.search("brown")] == []
+            assert store.search("quinoa")[0]["calories"] == 120
+
+    def test_read_only_store_rejects_writes(self, db_path):
+        import sqlite3
+
+        with USDALocalStore(db_path) as store:
+            with pytest.raises(sqlite3.OperationalError):
+                store.upsert_foods([LocalFood(99, "X", 1)])
+
+
+class TestLocalBackend:
+    """Tests pour USDANutritionService avec USDA_BACKEND=local."""
+
+    @pytest.mark.asyncio
+    async def test_search_food_uses_local_store(self, db_path, monkeypatch):
+        store = USDALocalStore(db_path)
+        monkeypatch.setattr(nutrition_database.settings, "USDA_BACKEND", "local")
+        monkeypatch.setattr(nutrition_database, "get_local_store", lambda: store)
+        service = USDANutritionService()
+        service.api_key = ""  # aucun accès réseau possible
+
+        results = await service.search_food("chicken breast", max_results=1)
+
+        assert results[0].food_name.startswith("Chicken")
+        assert results[0].protein == 31.0
+        store.close()
@@ -0,0 +1,115 @@
+"""Tests pour la validation USDA concurrente des aliments détectés."""
+import asyncio
+import time
+
+import pytest
+
+from app.services import nutrition_database
+from app.services.nutrition_database import (
+    USDAValidationResult,
+    validate_detected_items_batch,
+)
+
+
+def _fake_validator(delays: dict[str, float], state: dict):
+    """Remplace validate_against_usda par une version à latence simulée."""
+
+    async def fake(food_name: str, quantity_g: float, language: str = "en"):
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(delays.get(food_name, 0.05))
+            if food_name == "inconnu":
+                return USDAValidationResult(found=False, original_name=food_name)
+            if food_name == "erreur":
+                raise RuntimeError("boom")
+            return USDAValidationResult(
+                found=True,
+                original_name=food_name,
+                usda_food_name=f"USDA {food_name}",
+                calories=quantity_g,
+                protein=1.0,
+                carbs=2.0,
+                fat=3.0,
+            )
+        finally:
+            state["in_flight"] -= 1
+
+    return fake
+
+
+@pytest.fixture
+def state():
+    return {"in_flight": 0, "max_in_flight": 0}
+
+
+class TestValidateDetectedItemsBatch:
+    """Tests pour la validation par lot."""
+
+    @pytest.mark.asyncio
+    async def test_empty_batch(self):
+        assert await validate_detected_items_batch([]) == []
+
+    @pytest.mark.asyncio
+    async def test_runs_concurrently_and_keeps_order(self, monkeypatch, state):
+        monkeypatch.setattr(nutrition_database, "validate_against_usda", _fake_validator({}, state))
+        items = [{"name": f"aliment{i}", "quantity": "100", "unit": "g"} for i in range(6)]
+
+        start = time.perf_counter()
+        results = await validate_detected_items_batch(items, max_concurrency=6)
+        elapsed = time.perf_counter() - start
+
+        assert [r["usda_food_name"] for r in results] == [f"USDA aliment{i}" for i in range(6)]
+        assert all(r["source"] == "usda_verified" for r in results)
+        assert elapsed < 0.2  # ~1 latence, pas 6
+        assert state["max_in_flight"] == 6
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, monkeypatch, state):
+        monkeypatch.setattr(nutrition_database, "validate_against_usda", _fake_validator({}, state))
+        items = [{"name": f"aliment{i}"} for i in range(8)]
+
+        await validate_detected_items_batch(items, max_concurrency=2)
+
+        assert state["max_in_flight"] == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_returns_partial_results(self, monkeypatch, state):
+        delays = {"lent": 1.0}
+        monkeypatch.setattr(nutrition_database, "validate_against_usda", _fake_validator(delays, state))
+        items = [
+            {"name": "rapide", "quantity": "50"},
+            {"name": "lent", "quantity": "50", "confidence": 0.5},
+        ]
+
+        start = time.perf_counter()
+        results = await validate_detected_items_batch(items, item_timeout=0.1)
+
+        assert time.perf_counter() - start < 0.5
+        assert results[0]["source"] == "usda_verified"
+        assert results[0]["calories"] == 50
+        assert results[1]["source"] == "ai_estimated"
+        assert results[1]["needs_verification"] is True
+
+    @pytest.mark.asyncio
+    async def test_errors_keep_ai_estimation(self, monkeypatch, state):
+        monkeypatch.setattr(nutrition_database, "validate_against_usda", _fake_validator({}, state))
+        items = [{"name": "erreur", "calories": 120}, {"name": "inconnu"}]
+
+        results = await validate_detected_items_batch(items)
+
+        assert [r["source"] for r in results] == ["ai_estimated", "ai_estimated"]
+        assert results[0]["calories"] == 120
+
+    @pytest.mark.asyncio
+    async def test_quantity_conversion(self, monkeypatch, state):
+        monkeypatch.setattr(nutrition_database, "validate_against_usda", _fake_validator({}, state))
+        items = [
+            {"name": "pomme", "quantity": "2", "unit": "piece"},
+            {"name": "lait", "quantity": "250", "unit": "ml"},
+            {"name": "riz", "quantity": "abc"},
+        ]
+
+        results = await validate_detected_items_batch(items)
+
+        assert [r["calories"] for r in results] == [200, 250, 100]
@@ -0,0 +1,117 @@
+"""Tests for the authenticated-user principal cache."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1 import auth
+from app.core.cache import Cache
+from app.core.user_cache import UserPrincipalCache, deserialize_user, serialize_user
+from app.models.user import User
+
+
+def _user(**overrides) -> User:
+    values = dict(
+        id=7,
+        email="ana@example.com",
+        hashed_password="secret-hash",
+        name="Ana",
+        is_active=True,
+        preferred_language="fr",
+        subscription_tier="premium",
+        trial_ends_at=datetime(2026, 1, 15, tzinfo=timezone.utc),
+        created_at=datetime(2025, 12, 1, tzinfo=timezone.utc),
+        updated_at=datetime(2025, 12, 2, tzinfo=timezone.utc),
+    )
+    values.update(overrides)
+    return User(**values)
+
+
+class TestSerialization:
+    """Test principal round-trip."""
+
+    def test_round_trip_keeps_principal_fields(self):
+        user = deserialize_user(serialize_user(_user()))
+
+        assert user.id == 7
+        assert user.preferred_language == "fr"
+        assert user.subscription_tier == "premium"
+        assert user.trial_ends_at == datetime(2026, 1, 15, tzinfo=timezone.utc)
+
+    def test_password_hash_not_cached(self):
+        data = serialize_user(_user())
+
+        assert "hashed_password" not in data
+        assert "hashed_password" not in inspect(deserialize_user(data)).dict
+
+    def test_rebuilt_user_is_detached(self):
+        user = deserialize_user(serialize_user(_user()))
+
+        assert inspect(user).detached
+        assert inspect(user).identity == (7,)
+
+
+class TestUserPrincipalCache:
+    """Test lookup, sharing and invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_set_then_get(self):
+        cache = UserPrincipalCache(max_entries=10, ttl=60, local_ttl=15, shared=Cache())
+        assert await cache.get("ana@example.com") is None
+
+        await cache.set(_user())
+        user = await cache.get("ana@example.com")
+
+        assert user.id == 7
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_tier_serves_other_workers(self):
+        shared = Cache()
+        await UserPrincipalCache(max_entries=10, shared=shared).set(_user())
+
+        other_worker = UserPrincipalCache(max_entries=10, shared=shared)
+
+        assert (await other_worker.get("ana@example.com")).id == 7
+
+    @pytest.mark.asyncio
+    async def test_invalidate_clears_both_tiers(self):
+        shared = Cache()
+        cache = UserPrincipalCache(max_entries=10, shared=shared)
+        await cache.set(_user())
+
+        await cache.invalidate("ana@example.com")
+
+        assert await cache.get("ana@example.com") is None
+        assert await UserPrincipalCache(max_entries=10, shared=shared).get("ana@example.com") is None
+
+
+class TestGetCurrentUser:
+    """Test that get_current_user skips the database on a cache hit."""
+
+    @pytest.mark.asyncio
+    async def test_second_call_uses_cache(self, tmp_path, monkeypatch):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'users.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(User.__table__.create)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_maker() as db:
+            db.add(_user())
+            await db.commit()
+
+        queries = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+        monkeypatch.setattr(auth, "async_session_maker", session_maker)
+        cache = UserPrincipalCache(max_entries=10, shared=Cache())
+        monkeypatch.setattr(auth, "get_user_cache", lambda: cache)
+        token = auth.create_access_token({"sub": "ana@example.com"}, timedelta(minutes=5))
+
+        first = await auth.get_current_user(token)
+        second = await auth.get_current_user(token)
+
+        assert first.id == second.id == 7
+        assert second.subscription_tier == "premium"
+        assert len(queries) == 1
+        await engine.dispose()
@@ -0,0 +1,135 @@
+"""Tests de l'analyse vision par étapes (flux SSE)."""
+import json
+import structlog
+
+import pytest
+
+from app.agents.vision import VisionAgent, VisionInput
+from app.api.v1 import vision as vision_api
+from app.api.v1.vision import _detect_stages, _sse_event
+from app.models.user import User
+from app.schemas.food_log import DailyNutritionResponse, ImageAnalyzeRequest
+from app.services.image_preprocessing import PreprocessedImage
+
+
+class FakeVisionClient:
+    """Client VLM renvoyant des réponses prédéfinies, dans l'ordre."""
+
+    def __init__(self, *responses: str):
+        self.responses = list(responses)
+        self.prompts = []
+
+    async def vision_chat(self, image_base64, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+
+def _vlm_json(description: str, *items: tuple[str, float, float, float]) -> str:
+    return json.dumps({
+        "description": description,
+        "meal_type": "lunch",
+        "items": [
+            {"name": name, "quantity": "100", "unit": "g", "protein": p, "carbs": c, "fat": f, "confidence": 0.8}
+            for name, p, c, f in items
+        ],
+    })
+
+
+async def _collect(agent: VisionAgent) -> list:
+    return [stage async for stage in agent.process_stages(VisionInput(image_base64="aGVsbG8="))]
+
+
+class TestVisionStages:
+    """Tests de VisionAgent.process_stages."""
+
+    @pytest.mark.asyncio
+    async def test_simple_dish_yields_single_detected_stage(self):
+        client = FakeVisionClient(_vlm_json("Pomme", ("Pomme", 0.3, 14.0, 0.2)))
+        agent = VisionAgent(client=client, language="fr")
+
+        stages = await _collect(agent)
+
+        assert [name for name, _ in stages] == ["detected"]
+        assert stages[0][1].result.items[0].name == "Pomme"
+        assert len(client.prompts) == 1
+
+    @pytest.mark.asyncio
+    async def test_complex_dish_yields_decomposition_after_first_pass(self):
+        client = FakeVisionClient(
+            _vlm_json("Chicken curry", ("Chicken curry", 30.0, 40.0, 20.0)),
+            _vlm_json(
+                "Chicken curry, decomposed",
+                ("Chicken thigh", 24.0, 0.0, 8.0),
+                ("White rice, cooked", 2.7, 28.0, 0.3),
+                ("Curry sauce", 2.0, 6.0, 10.0),
+            ),
+        )
+        agent = VisionAgent(client=client, language="en")
+
+        stages = await _collect(agent)
+
+        assert [name for name, _ in stages] == ["detected", "decomposed"]
+        assert len(stages[0][1].result.items) == 1
+        assert [item.source for item in stages[1][1].result.items] == ["ai_dual_pass"] * 3
+
+    @pytest.mark.asyncio
+    async def test_process_returns_last_stage(self):
+        client = FakeVisionClient(
+            _vlm_json("Chicken curry", ("Chicken curry", 30.0, 40.0, 20.0)),
+            _vlm_json("Chicken curry", ("Chicken curry", 30.0, 40.0, 20.0)),
+        )
+        agent = VisionAgent(client=client, language="en")
+
+        response = await agent.process(VisionInput(image_base64="aGVsbG8="))
+
+        # Décomposition sans item supplémentaire: le résultat de la première passe est conservé
+        assert len(response.result.items) == 1
+        assert response.used_fallback is False
+        assert len(client.prompts) == 2
+
+
+class TestDetectStages:
+    """Tests de l'étape de détection de l'endpoint (/analyze et /analyze/stream)."""
+
+    @pytest.mark.asyncio
+    async def test_complex_dish_calls_vlm_twice_and_streams_first_pass(self, monkeypatch):
+        client = FakeVisionClient(
+            _vlm_json("Chicken curry", ("Chicken curry", 30.0, 40.0, 20.0)),
+            _vlm_json(
+                "Chicken curry, decomposed",
+                ("Chicken thigh", 24.0, 0.0, 8.0),
+                ("White rice, cooked", 2.7, 28.0, 0.3),
+                ("Curry sauce", 2.0, 6.0, 10.0),
+            ),
+        )
+        monkeypatch.setattr(vision_api, "get_vision_agent", lambda language: VisionAgent(client=client, language="en"))
+        image = PreprocessedImage("aGVsbG8=", "image/jpeg", 10, 10, 6, 6)
+        body = ImageAnalyzeRequest(image_base64="aGVsbG8=" * 20)
+        user = User(id=1, email="v@example.com", preferred_language="en")
+
+        stages = [stage async for stage in _detect_stages(image, body, user, structlog.get_logger())]
+
+        assert [name for name, _ in stages] == ["detected", "decomposed"]
+        assert [item.name for item in stages[0][1].result.items] == ["Chicken curry"]
+        assert len(stages[1][1].result.items) == 3
+        assert len(client.prompts) == 2
+
+
+class TestSseEvent:
+    """Tests du format Server-Sent Events."""
+
+    def test_dict_payload(self):
+        event = _sse_event("saved", {"food_log_id": 42, "note": "déjà vu"})
+
+        assert event == 'event: saved\ndata: {"food_log_id": 42, "note": "déjà vu"}\n\n'
+
+    def test_pydantic_payload_is_serialized_on_one_line(self):
+        event = _sse_event("complete", DailyNutritionResponse(
+            id=1, date="2026-10-17T12:00:00", total_calories=1800, total_protein=90.0, total_carbs=200.0,
+            total_fat=60.0, water_ml=1500, meals_count=3,
+        ))
+
+        name, data, end, _ = event.split("\n")
+        assert name == "event: complete"
+        assert json.loads(data.removeprefix("data: "))["total_calories"] == 1800
+        assert end == ""